@@ -5,10 +5,21 @@ from pathlib import Path
 # Base paths
 ROOT_DIR = Path(__file__).resolve().parent
 DATA_DIR = ROOT_DIR / "data"
+BENCHMARK_DIR = DATA_DIR / "benchmarks"  # JSON benchmark reports
+PROFILE_DIR = DATA_DIR / "profiles"  # --profile output
+CACHE_DIR = DATA_DIR / "cache"  # Local caches of YouTube API / yt-dlp responses
 
 # YouTube API Configuration
 YOUTUBE_API_KEY = os.getenv('YOUTUBE_API_KEY', 'your_key_here')
 CHANNEL_ID = 'UCX6b17PVsYBQ0ip5gyeme-Q'  # CrashCourse channel
+YOUTUBE_API_BASE_URL = os.getenv('YOUTUBE_API_BASE_URL', 'https://www.googleapis.com/youtube/v3')
+YOUTUBE_QUOTA_UNITS = 10000  # Daily quota budget (list calls cost 1 unit each)
+YOUTUBE_MAX_CONCURRENCY = 8  # Concurrent Data API requests in the async fetcher
+YOUTUBE_REQUESTS_PER_SECOND = 10.0  # Sustained Data API request rate
+TRANSCRIPT_CONCURRENCY = 4  # Concurrent yt-dlp transcript downloads
+CHANNEL_CACHE_TTL = 7 * 24 * 3600  # Seconds cached channel metadata stays fresh
+TRANSCRIPT_CACHE_DIR = CACHE_DIR / "transcripts"  # Compressed yt-dlp subtitle downloads
+TRANSCRIPT_CACHE_MAX_MB = 2048  # Least recently used transcripts are evicted above this size
 
 # Vector Database Configuration
 VECTOR_DB_PATH = str(DATA_DIR / "vectordb")
@@ -17,5 +28,80 @@ EMBEDDING_MODEL = "all-MiniLM-L6-v2"
 EMBEDDING_DIMENSION = 384  # Dimension for all-MiniLM-L6-v2
 DISTANCE_METRIC = "cosine"  # Options: cosine, l2, ip
 
+# Search runtime
+QUERY_CACHE_SIZE = 1024  # Cached query embeddings (0 disables the cache)
+QUIET = os.getenv('YTSS_QUIET', '').lower() in ('1', 'true', 'yes')  # Silence status prints
+
+# Pipelined query executor (scripts/query_pipeline.py)
+PIPELINE_ENCODE_WORKERS = 1  # Encoder threads; each encodes a micro-batch of queued queries per call
+PIPELINE_SEARCH_WORKERS = 4  # Threads running the index search, formatting and passages
+PIPELINE_ENCODE_BATCH = 16  # Most queries encoded together in one model call
+PIPELINE_QUEUE_SIZE = 64  # Capacity of each stage queue; submitters block (backpressure) when full
+
+# Query normalisation and spelling correction (scripts/query_normalizer.py)
+VOCABULARY_PATH = str(DATA_DIR / "vocabulary")
+QUERY_NORMALISE_CACHE_SIZE = 4096  # Memoised query -> normalised query pairs (0 disables the memo)
+SPELL_MAX_DISTANCE = 2  # Largest edit distance corrected (1 for words of up to SPELL_SHORT_WORD letters)
+SPELL_SHORT_WORD = 6  # Words this short get at most one edit
+SPELL_MIN_WORD_LENGTH = 4  # Shorter query words are never corrected
+SPELL_COUNT_RATIO = 10  # A correction must be this many times as frequent as the rarest vocabulary word
+VOCABULARY_MIN_COUNT = 3  # Words seen fewer times are left out (typos, caption noise)
+VOCABULARY_MAX_WORDS = 100000  # Most frequent words kept in the vocabulary
+
+# Read-only search snapshot (memory-mapped, shared between workers)
+SNAPSHOT_PATH = str(DATA_DIR / "snapshot")
+SNAPSHOT_GRAPH_DEGREE = 16  # Neighbours per node in the prebuilt k-NN graph
+SNAPSHOT_SEARCH_EF = 64  # Beam width for graph search
+SNAPSHOT_EXACT_SEARCH_MAX = 50000  # Below this size an exact scan is faster than the graph
+
+# Inverted-file (IVF) index for large archives (scripts/ivf_index.py)
+IVF_PATH = str(DATA_DIR / "ivf")
+IVF_LISTS = 0  # Coarse k-means centroids (posting lists); 0 = about 4 * sqrt(number of vectors)
+IVF_NPROBE = 16  # Posting lists scanned per query; more = better recall, slower
+IVF_TRAIN_SAMPLE = 100000  # Vectors sampled to train the centroids and PQ codebooks
+IVF_PQ_SUBVECTORS = 0  # Product-quantisation sub-vectors (1 byte each); 0 = store full vectors only
+IVF_PQ_RERANK = 256  # PQ candidates re-scored with the full vectors
+
+# Reduced-dimension search: PCA / Matryoshka first pass + full-vector rescoring (scripts/reduced_index.py)
+REDUCED_PATH = str(DATA_DIR / "reduced")
+REDUCED_MAX_DIMS = 128  # Reduced dimensions stored; a search can use any prefix of them
+REDUCED_DIMS = 64  # Dimensions scored in the first pass
+REDUCED_RESCORE_DEPTH = 200  # First-pass shortlist re-scored with the full vectors
+REDUCED_TRAIN_SAMPLE = 50000  # Vectors sampled to fit the PCA projection
+
+# Time-aligned passages (deep links into videos)
+PASSAGES_PATH = str(DATA_DIR / "passages")
+PASSAGE_CHARS = 1000  # Target passage length; passages are cut at caption cue boundaries
+SNIPPET_CHARS = 240  # Transcript preview length in search results
+
+# Multi-field embeddings and weighted late fusion (scripts/field_embeddings.py)
+FIELDS_PATH = str(DATA_DIR / "fields")
+FIELD_WEIGHTS = {  # Per-field weight of the fused score; "combined" = the primary title | transcript embedding
+    "title": 0.3,
+    "description": 0.15,
+    "transcript": 0.3,
+    "combined": 0.25,
+}
+FIELD_CANDIDATES = 50  # Candidates re-scored by field fusion
+
+# "More like this" neighbour table (scripts/neighbours.py)
+NEIGHBOURS_PATH = str(DATA_DIR / "neighbours")
+NEIGHBOURS_K = 20  # Neighbours stored per video
+NEIGHBOURS_FLUSH_SECONDS = 30  # Writers apply their queued table changes at most this often (and on exit)
+
+# Topic clusters and series labels (scripts/cluster_topics.py)
+CLUSTERS_PATH = str(DATA_DIR / "clusters")
+TOPIC_CLUSTERS = 0  # k-means clusters; 0 = about sqrt(number of videos)
+CLUSTER_PROBES = 8  # Clusters searched by a routed (coarse-to-fine) search
+
+# Diversity reranking (maximal marginal relevance)
+MMR_LAMBDA = 0.7  # 1.0 = relevance only, 0.0 = diversity only
+MMR_CANDIDATES = 100  # Candidates fetched (with embeddings) before reranking
+
+# Near-duplicate detection (scripts/dedup.py)
+DEDUP_THRESHOLD = 0.95  # Cosine similarity above which two videos are duplicates
+DEDUP_LSH_BANDS = 16  # SimHash bands; more bands find more pairs but cost more checks
+DEDUP_LSH_BITS = 16  # Hyperplane bits per band; more bits make buckets smaller and stricter
+
 if not YOUTUBE_API_KEY or YOUTUBE_API_KEY == 'your_key_here':
     print("⚠️  Warning: YOUTUBE_API_KEY not set. Set it in .env or environment.")
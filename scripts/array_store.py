@@ -0,0 +1,186 @@
+"""
+Array Store Helpers for YouTube Semantic Search
+
+Small helpers for the read-only sidecar files written next to the vector
+database (search snapshots, precomputed tables, ...).
+
+A store is a directory holding versions of its contents, each in a
+v<timestamp>-<pid>/ subdirectory with:
+- one .npy file per array (memory-mappable, shared through the page cache)
+- optional offset-indexed blobs (<name>.bin + <name>.offsets.npy)
+- a manifest.json describing the contents
+
+A CURRENT file names the live version. Writers fill a new version and then
+replace CURRENT atomically, so the store never disappears and readers never
+see a half-written one. The version before it is kept for readers that are
+still opening it; older ones are removed. Stores written before versioning
+(files directly in the directory) are still read.
+"""
+
+import json
+import mmap
+import os
+import shutil
+import time
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+MANIFEST_NAME = "manifest.json"
+CURRENT_NAME = "CURRENT"
+
+
+def _current_version(directory: Path) -> Optional[str]:
+    """Name of the live version subdirectory, or None for an unversioned store."""
+    try:
+        return (directory / CURRENT_NAME).read_text(encoding="utf-8").strip() or None
+    except FileNotFoundError:
+        return None
+
+
+def store_path(directory) -> Path:
+    """Directory holding the live files of a store."""
+    directory = Path(directory)
+    version = _current_version(directory)
+    return directory / version if version else directory
+
+
+def store_exists(directory) -> bool:
+    """Whether a store has been written at directory."""
+    directory = Path(directory)
+    return (directory / CURRENT_NAME).exists() or (directory / MANIFEST_NAME).exists()
+
+
+def write_store(directory, arrays: Dict[str, np.ndarray],
+                blobs: Optional[Dict[str, List[bytes]]] = None,
+                manifest: Optional[Dict] = None) -> Path:
+    """
+    Write arrays and blobs to a store directory.
+
+    The arrays are written to a new version subdirectory, which then
+    replaces the live one by an atomic rename of the CURRENT pointer, so
+    readers never see a missing or half-written store. Writers of one store
+    must not overlap.
+
+    Args:
+        directory: Target store directory
+        arrays: Mapping of array name -> numpy array
+        blobs: Mapping of blob name -> list of byte records
+        manifest: Extra manifest fields (JSON serialisable)
+
+    Returns:
+        Path to the written store
+    """
+    directory = Path(directory)
+    directory.mkdir(parents=True, exist_ok=True)
+    previous = _current_version(directory)
+    version = f"v{time.time_ns()}-{os.getpid()}"
+    version_dir = directory / version
+    version_dir.mkdir()
+
+    for name, array in arrays.items():
+        np.save(version_dir / f"{name}.npy", np.ascontiguousarray(array))
+
+    for name, records in (blobs or {}).items():
+        offsets = np.zeros(len(records) + 1, dtype=np.int64)
+        with open(version_dir / f"{name}.bin", "wb") as f:
+            for i, record in enumerate(records):
+                f.write(record)
+                offsets[i + 1] = offsets[i] + len(record)
+        np.save(version_dir / f"{name}.offsets.npy", offsets)
+
+    full_manifest = dict(manifest or {})
+    full_manifest["arrays"] = sorted(arrays)
+    full_manifest["blobs"] = sorted(blobs or {})
+    with open(version_dir / MANIFEST_NAME, "w", encoding="utf-8") as f:
+        json.dump(full_manifest, f, indent=2)
+
+    # Point CURRENT at the new version
+    pointer = directory / f"{CURRENT_NAME}.tmp-{os.getpid()}"
+    pointer.write_text(version, encoding="utf-8")
+    os.replace(pointer, directory / CURRENT_NAME)
+
+    # Keep the previous version for readers still opening it; drop the rest
+    # (the files of an unversioned store count as a version too)
+    for entry in directory.iterdir():
+        if entry.name in (CURRENT_NAME, version, previous) or entry.name.startswith(f"{CURRENT_NAME}.tmp-"):
+            continue
+        if entry.is_dir():
+            shutil.rmtree(entry, ignore_errors=True)
+        elif previous is not None:
+            entry.unlink()
+
+    return directory
+
+
+class BlobReader:
+    """
+    Random access to an offset-indexed blob through mmap.
+
+    Records are returned as bytes; nothing is read until a record is accessed.
+    """
+
+    def __init__(self, bin_path: Path, offsets_path: Path):
+        self.offsets = np.load(offsets_path, mmap_mode="r")
+        self._file = open(bin_path, "rb")
+        size = os.path.getsize(bin_path)
+        # mmap cannot map empty files
+        self._mmap = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ) if size else b""
+
+    def __len__(self) -> int:
+        return len(self.offsets) - 1
+
+    def __getitem__(self, index: int) -> bytes:
+        start = int(self.offsets[index])
+        end = int(self.offsets[index + 1])
+        return self._mmap[start:end]
+
+    def close(self) -> None:
+        if isinstance(self._mmap, mmap.mmap):
+            self._mmap.close()
+        self._file.close()
+
+
+def _open_version(directory: Path, mmap_arrays: bool) -> Tuple[Dict[str, np.ndarray], Dict[str, BlobReader], Dict]:
+    manifest_path = directory / MANIFEST_NAME
+    if not manifest_path.exists():
+        raise FileNotFoundError(f"No store manifest found at {manifest_path}")
+
+    with open(manifest_path, "r", encoding="utf-8") as f:
+        manifest = json.load(f)
+
+    mmap_mode = "r" if mmap_arrays else None
+    arrays = {
+        name: np.load(directory / f"{name}.npy", mmap_mode=mmap_mode)
+        for name in manifest.get("arrays", [])
+    }
+    blobs = {
+        name: BlobReader(directory / f"{name}.bin", directory / f"{name}.offsets.npy")
+        for name in manifest.get("blobs", [])
+    }
+    return arrays, blobs, manifest
+
+
+def read_store(directory, mmap_arrays: bool = True) -> Tuple[Dict[str, np.ndarray], Dict[str, BlobReader], Dict]:
+    """
+    Open a store written by write_store().
+
+    If the version being opened is removed by newer writes first, the
+    current version is opened instead.
+
+    Args:
+        directory: Store directory
+        mmap_arrays: Memory-map arrays instead of loading them into RAM
+
+    Returns:
+        Tuple of (arrays, blob_readers, manifest)
+    """
+    directory = Path(directory)
+    while True:
+        version = _current_version(directory)
+        try:
+            return _open_version(directory / version if version else directory, mmap_arrays)
+        except FileNotFoundError:
+            if _current_version(directory) == version:
+                raise
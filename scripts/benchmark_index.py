@@ -0,0 +1,316 @@
+"""
+Index Benchmark for YouTube Semantic Search
+
+Compares the vector index backends on the same vectors and queries:
+- exact     brute-force scan of the in-memory matrix (the recall baseline)
+- chroma    ChromaDB's HNSW index (what VideoVectorDB uses)
+- ivf       IVF index with full vectors (scripts/ivf_index.py)
+- ivf-pq    IVF index with product-quantised codes and exact re-scoring
+- reduced   PCA first pass on 64-128 dims, full-vector re-scoring (scripts/reduced_index.py)
+
+For each it records build time, size on disk and, per nprobe setting,
+query latency (p50/p95/p99) and recall@k against the exact baseline
+(reduced: per dims / rescore-depth setting).
+
+By default the vectors are passage-sized synthetic texts embedded with the
+stub encoder, so the benchmark runs offline at archive scale. Point it at
+a real collection with --db-path.
+
+Usage:
+    python scripts/benchmark_index.py
+    python scripts/benchmark_index.py --vectors 500000 --nprobe 8 32 128 --pq 48
+    python scripts/benchmark_index.py --db-path data/vectordb --skip-chroma
+    python scripts/benchmark_index.py --dims 32 64 128 --rescore-depth 50 200 1000
+
+Output:
+    data/benchmarks/index-<timestamp>.json
+"""
+
+import argparse
+import contextlib
+import io
+import json
+import os
+import platform
+import tempfile
+import time
+from pathlib import Path
+import sys
+from typing import Dict, List
+
+import numpy as np
+
+# Add project root to path
+ROOT_DIR = Path(__file__).resolve().parents[1]
+sys.path.append(str(ROOT_DIR))
+
+from config import (BENCHMARK_DIR, COLLECTION_NAME, EMBEDDING_DIMENSION, IVF_LISTS, IVF_NPROBE,
+                    DISTANCE_METRIC, REDUCED_DIMS, REDUCED_RESCORE_DEPTH)
+from scripts.benchmark_search import latency_summary, exact_top_k, fetch_all_embeddings
+from scripts.embedding_utils import STUB_MODEL, load_model, normalise_rows
+from scripts.ivf_index import IVFIndex, build_ivf, auto_list_count
+from scripts.metrics import set_quiet
+from scripts.reduced_index import ReducedIndex
+
+
+# --------------------------------------------------------------------
+# Data
+# --------------------------------------------------------------------
+def synthetic_vectors(n_vectors: int, n_queries: int, seed: int = 0):
+    """
+    Embed distinct ~1 KB synthetic passages and queries with the stub encoder.
+
+    Returns:
+        Tuple of (ids, vectors, query vectors)
+    """
+    from scripts.synthetic_data import SyntheticCorpus, make_queries
+
+    corpus = SyntheticCorpus(seed=seed)
+    encoder = load_model(STUB_MODEL, seed)
+    per_topic = -(-n_vectors // corpus.n_topics)
+    passages = [p for pool in corpus.paragraphs(per_topic=per_topic) for p in pool][:n_vectors]
+    vectors = np.vstack([
+        encoder.encode(passages[start:start + 10000]) for start in range(0, n_vectors, 10000)
+    ]).astype(np.float32)
+    queries = encoder.encode(make_queries(n_queries, seed=seed, corpus=corpus)).astype(np.float32)
+    ids = [f"p{i:09d}" for i in range(n_vectors)]
+    return ids, vectors, queries
+
+
+def _metric_space(matrix: np.ndarray) -> np.ndarray:
+    """Vectors as the collection compares them (unit length under cosine)."""
+    return normalise_rows(matrix) if DISTANCE_METRIC == "cosine" else matrix
+
+
+def directory_size_mb(path) -> float:
+    return round(sum(f.stat().st_size for f in Path(path).rglob("*") if f.is_file()) / (1024 * 1024), 2)
+
+
+# --------------------------------------------------------------------
+# Measurements
+# --------------------------------------------------------------------
+def measure(search, queries: np.ndarray, truth: List[set], top_k: int) -> Dict:
+    """
+    Run every query through search(query) -> ids and score it against truth.
+
+    Returns:
+        Latency summary plus recall@k
+    """
+    search(queries[0])  # warm-up (page cache, lazy loads)
+    latencies, overlaps = [], []
+    for query, expected in zip(queries, truth):
+        start = time.perf_counter()
+        found = search(query)
+        latencies.append((time.perf_counter() - start) * 1000)
+        overlaps.append(len(expected & set(found[:top_k])) / max(len(expected), 1))
+    summary = latency_summary(latencies)
+    summary["recall_at_k"] = round(float(np.mean(overlaps)), 4)
+    return summary
+
+
+def bench_exact(ids, vectors, queries, truth, top_k) -> Dict:
+    start = time.perf_counter()
+    matrix = _metric_space(vectors)
+    build = time.perf_counter() - start
+
+    def search(query):
+        scores = matrix @ _metric_space(query[None, :])[0]
+        top = np.argpartition(-scores, top_k - 1)[:top_k]
+        return [ids[i] for i in top[np.argsort(-scores[top])]]
+
+    return {"build_seconds": round(build, 3), "size_mb": round(matrix.nbytes / (1024 * 1024), 2),
+            "search": measure(search, queries, truth, top_k)}
+
+
+def bench_chroma(ids, vectors, queries, truth, top_k, workdir) -> Dict:
+    from scripts.db_handler import VideoVectorDB
+
+    path = os.path.join(workdir, "chroma")
+    db = VideoVectorDB(path, "benchmark_index")
+    start = time.perf_counter()
+    db.insert_videos(ids, [""] * len(ids), vectors, [{"row": i} for i in range(len(ids))])
+    build = time.perf_counter() - start
+
+    def search(query):
+        return db.collection.query(query_embeddings=[query.tolist()], n_results=top_k, include=[])["ids"][0]
+
+    return {"build_seconds": round(build, 3), "size_mb": directory_size_mb(path),
+            "search": measure(search, queries, truth, top_k)}
+
+
+def bench_ivf(ids, vectors, queries, truth, top_k, workdir, n_lists, nprobes, pq_subvectors) -> Dict:
+    path = os.path.join(workdir, f"ivf-pq{pq_subvectors}")
+    start = time.perf_counter()
+    build_ivf(ids, _metric_space(vectors), path, n_lists=n_lists, pq_subvectors=pq_subvectors)
+    build = time.perf_counter() - start
+
+    index = IVFIndex(path)
+    runs = []
+    for nprobe in nprobes:
+        index.nprobe = nprobe
+
+        def search(query):
+            indices, _ = index._search_indices(query, top_k, None)
+            return [index._video_id(i) for i in indices]
+
+        runs.append({"nprobe": nprobe, **measure(search, queries, truth, top_k)})
+    return {"build_seconds": round(build, 3), "size_mb": directory_size_mb(path),
+            "lists": int(index.manifest["lists"]), "search": runs}
+
+
+def bench_reduced(ids, vectors, queries, truth, top_k, workdir, dims_list, depths, method="pca") -> Dict:
+    path = os.path.join(workdir, f"reduced-{method}")
+    start = time.perf_counter()
+    ReducedIndex.build(ids, vectors, max(dims_list), method).save(path)
+    build = time.perf_counter() - start
+
+    index = ReducedIndex.load(path)
+    runs = []
+    for dims in dims_list:
+        for depth in depths:
+            def search(query):
+                return index.search_ids(query, top_k, dims, depth)[0]
+
+            runs.append({"dims": dims, "rescore_depth": depth, **measure(search, queries, truth, top_k)})
+    return {"build_seconds": round(build, 3), "size_mb": directory_size_mb(path),
+            "method": method, "search": runs}
+
+
+def print_row(name: str, summary: Dict) -> None:
+    print(f"   • {name:<22} p50 {summary['p50_ms']:>7.3f} ms | p95 {summary['p95_ms']:>7.3f} ms | "
+          f"recall@k {summary['recall_at_k']:.4f}")
+
+
+# --------------------------------------------------------------------
+# MAIN
+# --------------------------------------------------------------------
+def main():
+    parser = argparse.ArgumentParser(
+        description="Benchmark index build and search: exact scan vs ChromaDB HNSW vs IVF / IVF-PQ"
+    )
+    parser.add_argument('--vectors', type=int, default=100000,
+                        help='Synthetic passage vectors (default: 100000)')
+    parser.add_argument('--queries', type=int, default=200,
+                        help='Synthetic queries (default: 200)')
+    parser.add_argument('--top-k', '-k', type=int, default=10,
+                        help='Results per query (default: 10)')
+    parser.add_argument('--lists', type=int, default=IVF_LISTS,
+                        help='IVF posting lists, 0 = about 4*sqrt(vectors) (default: %(default)s)')
+    parser.add_argument('--nprobe', type=int, nargs='+', default=[IVF_NPROBE // 4, IVF_NPROBE, IVF_NPROBE * 4],
+                        help='nprobe settings to measure (default: %(default)s)')
+    parser.add_argument('--pq', type=int, default=EMBEDDING_DIMENSION // 8,
+                        help='PQ sub-vectors for the ivf-pq run, 0 to skip it (default: %(default)s)')
+    parser.add_argument('--dims', type=int, nargs='+', default=[REDUCED_DIMS // 2, REDUCED_DIMS, REDUCED_DIMS * 2],
+                        help='Reduced first-pass dimensions to measure, empty to skip (default: %(default)s)')
+    parser.add_argument('--rescore-depth', type=int, nargs='+', default=[REDUCED_RESCORE_DEPTH // 4, REDUCED_RESCORE_DEPTH],
+                        help='Shortlist sizes re-scored with full vectors (default: %(default)s)')
+    parser.add_argument('--skip-chroma', action='store_true',
+                        help='Skip the ChromaDB run (slow to build at large sizes)')
+    parser.add_argument('--db-path', type=str, default=None,
+                        help='Benchmark the embeddings of an existing ChromaDB directory')
+    parser.add_argument('--collection', type=str, default=COLLECTION_NAME,
+                        help=f'Collection name for --db-path (default: {COLLECTION_NAME})')
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--output', type=str, default=None,
+                        help='JSON report path (default: data/benchmarks/index-<timestamp>.json)')
+    args = parser.parse_args()
+
+    print("=" * 70)
+    print("INDEX BENCHMARK")
+    print("=" * 70)
+
+    set_quiet(True)
+    workdir = tempfile.TemporaryDirectory(prefix="ytss-index-bench-")
+
+    # Vectors and queries
+    if args.db_path:
+        from scripts.db_handler import VideoVectorDB
+        print(f"\n📂 Reading embeddings from: {args.collection} ({args.db_path})")
+        ids, vectors = fetch_all_embeddings(VideoVectorDB(args.db_path, args.collection))
+        rng = np.random.default_rng(args.seed)
+        picks = rng.choice(len(ids), size=min(args.queries, len(ids)), replace=False)
+        queries = vectors[picks] + 0.05 * rng.standard_normal((len(picks), vectors.shape[1])).astype(np.float32)
+    else:
+        print(f"\n🧪 Embedding {args.vectors:,} synthetic passages...")
+        start = time.perf_counter()
+        ids, vectors, queries = synthetic_vectors(args.vectors, args.queries, seed=args.seed)
+        print(f"   ✓ Done in {time.perf_counter() - start:.1f}s")
+    queries = queries.astype(np.float32)
+
+    k = min(args.top_k, len(ids))
+    truth = [{ids[i] for i in row} for row in exact_top_k(vectors, queries, k)]
+    n_lists = args.lists or auto_list_count(len(ids))
+    print(f"   • Vectors: {len(ids):,} × {vectors.shape[1]} | queries: {len(queries)} | top_k: {k} | "
+          f"lists: {n_lists}")
+
+    report = {
+        "benchmark": "index",
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "config": {
+            "vectors": len(ids),
+            "dimension": int(vectors.shape[1]),
+            "db_path": args.db_path,
+            "queries": len(queries),
+            "top_k": k,
+            "lists": n_lists,
+            "nprobe": args.nprobe,
+            "pq_subvectors": args.pq,
+            "dims": args.dims,
+            "rescore_depth": args.rescore_depth,
+            "distance_metric": DISTANCE_METRIC,
+            "seed": args.seed,
+        },
+        "environment": {
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "cpu_count": os.cpu_count(),
+        },
+        "backends": {},
+    }
+    backends = report["backends"]
+
+    print("\n🎯 Exact scan (baseline)...")
+    backends["exact"] = bench_exact(ids, vectors, queries, truth, k)
+    print_row("exact", backends["exact"]["search"])
+
+    if not args.skip_chroma:
+        print("\n🗄️  ChromaDB HNSW...")
+        with contextlib.redirect_stdout(io.StringIO()):
+            backends["chroma"] = bench_chroma(ids, vectors, queries, truth, k, workdir.name)
+        print(f"   ✓ Built in {backends['chroma']['build_seconds']:.1f}s ({backends['chroma']['size_mb']:.1f} MB)")
+        print_row("chroma", backends["chroma"]["search"])
+
+    for name, pq in [("ivf", 0), ("ivf-pq", args.pq)]:
+        if name == "ivf-pq" and not pq:
+            continue
+        print(f"\n📇 {name.upper()}" + (f" ({pq} bytes/vector)" if pq else "") + "...")
+        backends[name] = bench_ivf(ids, vectors, queries, truth, k, workdir.name, n_lists, args.nprobe, pq)
+        print(f"   ✓ Built in {backends[name]['build_seconds']:.1f}s ({backends[name]['size_mb']:.1f} MB)")
+        for run in backends[name]["search"]:
+            print_row(f"{name} nprobe={run['nprobe']}", run)
+
+    if args.dims:
+        print(f"\n📉 Reduced dimensions (PCA, up to {max(args.dims)} dims)...")
+        backends["reduced"] = bench_reduced(ids, vectors, queries, truth, k, workdir.name,
+                                            args.dims, args.rescore_depth)
+        print(f"   ✓ Built in {backends['reduced']['build_seconds']:.1f}s ({backends['reduced']['size_mb']:.1f} MB)")
+        for run in backends["reduced"]["search"]:
+            print_row(f"dims={run['dims']} depth={run['rescore_depth']}", run)
+
+    # Save report
+    output_path = Path(args.output) if args.output else \
+        BENCHMARK_DIR / f"index-{time.strftime('%Y%m%d-%H%M%S')}.json"
+    output_path.parent.mkdir(parents=True, exist_ok=True)
+    with open(output_path, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2)
+
+    print("\n" + "=" * 70)
+    print("✅ BENCHMARK COMPLETE!")
+    print(f"   Report saved to: {output_path}")
+    print("=" * 70 + "\n")
+
+    workdir.cleanup()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,348 @@
+"""
+Ingestion Pipeline Benchmark for YouTube Semantic Search
+
+Times the stages we re-run on every refresh on synthetic corpora:
+1. clean   - clean_and_merge_dataset.merge_and_clean_datasets
+2. embed   - generate_embeddings (combine text, encode, serialise, save)
+3. migrate - migrate_to_vectordb (load, prepare, insert into ChromaDB)
+
+Each stage runs in its own process so peak RSS is measured per stage.
+The row-wise and columnar row preparation paths are also timed against
+each other (and checked to produce identical output).
+The report records rows/sec, seconds, peak RSS and on-disk size of every
+intermediate file (per file format with --formats), as JSON that can be
+compared between runs.
+
+Usage:
+    python scripts/benchmark_ingestion.py
+    python scripts/benchmark_ingestion.py --sizes 1000 10000 --transcript-chars 30000
+    python scripts/benchmark_ingestion.py --sizes 10000 --formats csv parquet arrow
+
+Output:
+    data/benchmarks/ingestion-<timestamp>.json
+
+Note: at realistic transcript lengths (~30k characters) the 100k corpus
+needs several GB of free disk in the work directory.
+"""
+
+# Suppress warnings before imports
+import os
+import warnings
+os.environ['TF_CPP_MIN_LOG_LEVEL'] = '3'
+os.environ['TF_ENABLE_ONEDNN_OPTS'] = '0'
+warnings.filterwarnings('ignore')
+
+import argparse
+import contextlib
+import io
+import json
+import multiprocessing
+import platform
+import resource
+import shutil
+import tempfile
+import time
+from pathlib import Path
+import sys
+from typing import Dict
+
+# Add project root to path
+ROOT_DIR = Path(__file__).resolve().parents[1]
+sys.path.append(str(ROOT_DIR))
+
+from config import BENCHMARK_DIR
+from scripts.embedding_utils import STUB_MODEL, load_model
+
+STAGES = ["clean", "embed", "migrate"]
+
+
+# --------------------------------------------------------------------
+# Helpers
+# --------------------------------------------------------------------
+def peak_rss_mb() -> float:
+    """Peak resident set size of the current process in MB."""
+    # ru_maxrss survives exec on Linux, so a spawned child would report the
+    # parent's peak if it was higher; VmHWM is reset for the new process
+    try:
+        with open("/proc/self/status", encoding="ascii") as f:
+            for line in f:
+                if line.startswith("VmHWM:"):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        pass
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux reports KB, macOS reports bytes
+    return peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024
+
+
+def path_size_mb(path: Path) -> float:
+    """Size of a file or directory tree in MB."""
+    path = Path(path)
+    if not path.exists():
+        return 0.0
+    if path.is_file():
+        return path.stat().st_size / (1024 * 1024)
+    return sum(f.stat().st_size for f in path.rglob("*") if f.is_file()) / (1024 * 1024)
+
+
+# --------------------------------------------------------------------
+# Stage bodies (run in child processes)
+# --------------------------------------------------------------------
+def run_clean(paths: Dict, model_name: str) -> int:
+    from scripts.clean_and_merge_dataset import merge_and_clean_datasets
+
+    df = merge_and_clean_datasets(paths["raw"], paths["metadata"], paths["clean"])
+    return len(df)
+
+
+def run_embed(paths: Dict, model_name: str) -> int:
+    from scripts.dataset_io import read_dataset
+    from scripts.generate_embeddings import combine_text_columns, generate_embeddings, save_embeddings
+
+    model = load_model(model_name)
+
+    df = read_dataset(paths["clean"])
+    combined_texts = combine_text_columns(df['title'], df['transcript'])
+    embeddings = generate_embeddings(combined_texts, batch_size=32, show_progress=False, model=model)
+    save_embeddings(df, embeddings, paths["embedded"])
+    return len(df)
+
+
+def run_migrate(paths: Dict, model_name: str) -> int:
+    from scripts.migrate_to_vectordb import load_dataset, prepare_data_for_db
+    from scripts.db_handler import VideoVectorDB
+
+    df = load_dataset(paths["embedded"])
+    video_ids, transcripts, embeddings, metadata_list = prepare_data_for_db(df)
+    db = VideoVectorDB(str(paths["vectordb"]), "benchmark_videos")
+    db.insert_videos(video_ids, transcripts, embeddings, metadata_list)
+    return len(video_ids)
+
+
+def rowwise_prepare_data_for_db(df):
+    """
+    Reference row-by-row preparation (the iterrows loop that
+    prepare_data_for_db replaced), kept to measure and verify the speedup.
+    """
+    import pandas as pd
+    import numpy as np
+    from scripts.migrate_to_vectordb import parse_embedding_string
+
+    video_ids, transcripts, embeddings_list, metadata_list = [], [], [], []
+    for _, row in df.iterrows():
+        embedding = parse_embedding_string(row['embeddings'])
+        if embedding is None:
+            continue
+        video_ids.append(str(row['id']))
+        transcripts.append(str(row['transcript']) if pd.notna(row['transcript']) else "")
+        embeddings_list.append(embedding)
+        metadata_list.append({
+            'title': str(row['title']) if pd.notna(row['title']) else "",
+            'channel_title': str(row['channel_title']) if pd.notna(row['channel_title']) else "",
+            'view_count': int(row['viewCount']) if pd.notna(row['viewCount']) else 0,
+            'duration_seconds': int(row['duration_seconds']) if pd.notna(row['duration_seconds']) else 0,
+            'published_at': str(row['publishedAt']) if pd.notna(row['publishedAt']) else "",
+            'like_count': int(row['likeCount']) if pd.notna(row['likeCount']) else 0,
+            'comment_count': int(row['commentCount']) if pd.notna(row['commentCount']) else 0,
+        })
+    return video_ids, transcripts, np.array(embeddings_list, dtype=np.float32), metadata_list
+
+
+def compare_row_preparation(paths: Dict) -> Dict:
+    """Time row-wise vs columnar preparation on the embedded dataset and check they match."""
+    import numpy as np
+    from scripts.dataset_io import read_dataset
+    from scripts.generate_embeddings import combine_text, combine_text_columns
+    from scripts.migrate_to_vectordb import prepare_data_for_db
+
+    df = read_dataset(paths["embedded"])
+    report = {}
+
+    start = time.perf_counter()
+    rowwise_texts = [combine_text(row['title'], row['transcript']) for _, row in df.iterrows()]
+    rowwise_s = time.perf_counter() - start
+    start = time.perf_counter()
+    columnar_texts = combine_text_columns(df['title'], df['transcript'])
+    columnar_s = time.perf_counter() - start
+    report["combine_text"] = {
+        "rowwise_seconds": round(rowwise_s, 4),
+        "columnar_seconds": round(columnar_s, 4),
+        "speedup": round(rowwise_s / columnar_s, 1) if columnar_s else None,
+        "identical": rowwise_texts == columnar_texts,
+    }
+
+    with contextlib.redirect_stdout(io.StringIO()):
+        start = time.perf_counter()
+        rowwise = rowwise_prepare_data_for_db(df)
+        rowwise_s = time.perf_counter() - start
+        start = time.perf_counter()
+        columnar = prepare_data_for_db(df)
+        columnar_s = time.perf_counter() - start
+    report["prepare_data_for_db"] = {
+        "rowwise_seconds": round(rowwise_s, 4),
+        "columnar_seconds": round(columnar_s, 4),
+        "speedup": round(rowwise_s / columnar_s, 1) if columnar_s else None,
+        "identical": (rowwise[0] == columnar[0] and rowwise[1] == columnar[1]
+                      and np.array_equal(rowwise[2], columnar[2]) and rowwise[3] == columnar[3]),
+    }
+    return report
+
+
+STAGE_FUNCTIONS = {"clean": run_clean, "embed": run_embed, "migrate": run_migrate}
+
+
+def _stage_worker(stage: str, paths: Dict, model_name: str, out) -> None:
+    """Child-process body: run one stage silently and report timings."""
+    with contextlib.redirect_stdout(io.StringIO()), contextlib.redirect_stderr(io.StringIO()):
+        start = time.perf_counter()
+        rows = STAGE_FUNCTIONS[stage](paths, model_name)
+        seconds = time.perf_counter() - start
+    out.put({"rows": rows, "seconds": seconds, "peak_rss_mb": peak_rss_mb()})
+
+
+def run_stage(stage: str, paths: Dict, model_name: str) -> Dict:
+    """Run a stage in a fresh process and collect its measurements."""
+    ctx = multiprocessing.get_context("spawn")
+    out = ctx.Queue()
+    proc = ctx.Process(target=_stage_worker, args=(stage, paths, model_name, out))
+    proc.start()
+    proc.join()
+    if proc.exitcode != 0:
+        raise RuntimeError(f"Stage '{stage}' failed with exit code {proc.exitcode}")
+    result = out.get()
+    result["rows_per_sec"] = round(result["rows"] / result["seconds"], 2) if result["seconds"] else None
+    result["seconds"] = round(result["seconds"], 3)
+    result["peak_rss_mb"] = round(result["peak_rss_mb"], 1)
+    return result
+
+
+# --------------------------------------------------------------------
+# Benchmark one corpus size
+# --------------------------------------------------------------------
+def benchmark_size(n_videos: int, workdir: Path, transcript_chars: int,
+                   model_name: str, seed: int, formats=("csv",)) -> Dict:
+    """Generate a corpus of n_videos and time every ingestion stage on it, once per file format."""
+    from scripts.dataset_io import write_dataset, with_format
+    from scripts.synthetic_data import make_videos_frame
+
+    size_dir = workdir / f"n{n_videos}"
+    size_dir.mkdir(parents=True, exist_ok=True)
+
+    print(f"\n🧪 Generating {n_videos:,} synthetic videos...")
+    start = time.perf_counter()
+    df = make_videos_frame(n_videos, seed=seed, median_transcript_chars=transcript_chars)
+    for fmt in formats:
+        write_dataset(df, with_format(size_dir / "videos", fmt))
+    del df
+    print(f"   ✓ Generated in {time.perf_counter() - start:.1f}s")
+
+    stages, disk = {}, {}
+    row_preparation = None
+    for fmt in formats:
+        paths = {
+            "raw": with_format(size_dir / "videos", fmt),
+            "metadata": size_dir / "metadata.csv",  # intentionally absent
+            "clean": with_format(size_dir / "final", fmt),
+            "embedded": with_format(size_dir / "final_embedded", fmt),
+            "vectordb": size_dir / f"vectordb_{fmt}",
+        }
+
+        print(f"\n   [{fmt}]")
+        stages[fmt] = {}
+        for stage in STAGES:
+            result = stages[fmt][stage] = run_stage(stage, paths, model_name)
+            print(f"   • {stage:<8} {result['seconds']:>8.2f}s | {result['rows_per_sec']:>10,.1f} rows/s | "
+                  f"peak RSS {result['peak_rss_mb']:,.0f} MB")
+
+        disk[fmt] = {
+            "raw_mb": round(path_size_mb(paths["raw"]), 2),
+            "clean_mb": round(path_size_mb(paths["clean"]), 2),
+            "embedded_mb": round(path_size_mb(paths["embedded"]), 2),
+        }
+        print(f"   • disk     raw {disk[fmt]['raw_mb']:.1f} MB | clean {disk[fmt]['clean_mb']:.1f} MB | "
+              f"embedded {disk[fmt]['embedded_mb']:.1f} MB")
+
+        # The row-wise reference path only understands CSV (JSON string embeddings)
+        if fmt == "csv":
+            row_preparation = compare_row_preparation(paths)
+            for name, result in row_preparation.items():
+                print(f"   • {name:<20} row-wise {result['rowwise_seconds']:.3f}s -> columnar "
+                      f"{result['columnar_seconds']:.3f}s ({result['speedup']}x, identical={result['identical']})")
+
+    disk["vectordb_mb"] = round(path_size_mb(size_dir / f"vectordb_{formats[0]}"), 2)
+
+    shutil.rmtree(size_dir, ignore_errors=True)
+    return {"videos": n_videos, "stages": stages, "row_preparation": row_preparation, "disk": disk}
+
+
+# --------------------------------------------------------------------
+# MAIN
+# --------------------------------------------------------------------
+def main():
+    parser = argparse.ArgumentParser(
+        description="Benchmark the clean / embed / migrate ingestion stages"
+    )
+    parser.add_argument('--sizes', type=int, nargs='+', default=[1000, 10000, 100000],
+                        help='Corpus sizes in videos (default: 1000 10000 100000)')
+    parser.add_argument('--transcript-chars', type=int, default=30000,
+                        help='Median synthetic transcript length (default: 30000)')
+    parser.add_argument('--model', type=str, default=STUB_MODEL,
+                        help='Encoder: "stub" or a sentence-transformer model name (default: stub)')
+    parser.add_argument('--formats', nargs='+', choices=['csv', 'parquet', 'arrow'], default=['csv'],
+                        help='Intermediate file formats to compare (default: csv)')
+    parser.add_argument('--workdir', type=str, default=None,
+                        help='Directory for intermediate files (default: system temp dir)')
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--output', type=str, default=None,
+                        help='JSON report path (default: data/benchmarks/ingestion-<timestamp>.json)')
+    args = parser.parse_args()
+
+    print("=" * 70)
+    print("INGESTION PIPELINE BENCHMARK")
+    print("=" * 70)
+    print(f"\nSizes: {', '.join(f'{n:,}' for n in args.sizes)} | model: {args.model} | "
+          f"median transcript: {args.transcript_chars:,} chars | formats: {', '.join(args.formats)}")
+
+    tmp = tempfile.TemporaryDirectory(prefix="ytss-ingest-", dir=args.workdir)
+    workdir = Path(tmp.name)
+
+    report = {
+        "benchmark": "ingestion",
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "config": {
+            "sizes": args.sizes,
+            "transcript_chars": args.transcript_chars,
+            "model": args.model,
+            "formats": args.formats,
+            "seed": args.seed,
+        },
+        "environment": {
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "cpu_count": os.cpu_count(),
+        },
+        "runs": [],
+    }
+
+    for n_videos in args.sizes:
+        report["runs"].append(
+            benchmark_size(n_videos, workdir, args.transcript_chars, args.model, args.seed,
+                           args.formats)
+        )
+
+    tmp.cleanup()
+
+    output_path = Path(args.output) if args.output else \
+        BENCHMARK_DIR / f"ingestion-{time.strftime('%Y%m%d-%H%M%S')}.json"
+    output_path.parent.mkdir(parents=True, exist_ok=True)
+    with open(output_path, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2)
+
+    print("\n" + "=" * 70)
+    print("✅ BENCHMARK COMPLETE!")
+    print(f"   Report saved to: {output_path}")
+    print("=" * 70 + "\n")
+
+
+if __name__ == "__main__":
+    main()
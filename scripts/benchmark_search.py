@@ -0,0 +1,528 @@
+"""
+Search Benchmark for YouTube Semantic Search
+
+Measures VideoSemanticSearch.search latency and quality so changes to the
+search path can be compared run against run:
+- cold start (fresh process) and warm latency at several concurrency levels
+- throughput of the pipelined executor (scripts/query_pipeline.py)
+- p50/p95/p99 latency and queries per second
+- per-stage breakdown (query normalisation, encode, ANN query, metadata
+  fetch, formatting)
+- recall@k against exact brute-force search
+
+By default everything runs offline on a synthetic corpus with a stub
+encoder. Point it at a real collection with --db-path and --model.
+Queries go through the same normalisation and spelling correction as
+search(): the synthetic run builds a vocabulary from its own corpus and
+--typo-rate misspells some query words so corrections are exercised.
+
+Usage:
+    python scripts/benchmark_search.py
+    python scripts/benchmark_search.py --videos 20000 --concurrency 1 4 8
+    python scripts/benchmark_search.py --pipeline 1 4
+    python scripts/benchmark_search.py --typo-rate 0.3 --query-cache 1000
+    python scripts/benchmark_search.py --db-path data/vectordb --model all-MiniLM-L6-v2 --queries-file queries.txt
+
+Output:
+    data/benchmarks/search-<timestamp>.json
+"""
+
+# Suppress warnings before imports
+import os
+import warnings
+os.environ['TF_CPP_MIN_LOG_LEVEL'] = '3'
+os.environ['TF_ENABLE_ONEDNN_OPTS'] = '0'
+warnings.filterwarnings('ignore')
+
+import argparse
+import contextlib
+import io
+import json
+import multiprocessing
+import platform
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+import sys
+from typing import Dict, List
+
+import numpy as np
+
+# Add project root to path
+ROOT_DIR = Path(__file__).resolve().parents[1]
+sys.path.append(str(ROOT_DIR))
+
+from config import BENCHMARK_DIR, COLLECTION_NAME, DISTANCE_METRIC, VOCABULARY_PATH
+from scripts.metrics import metrics, set_quiet
+from scripts.query_pipeline import QueryPipeline
+from scripts.embedding_utils import STUB_MODEL, load_model, normalise_rows
+
+
+
+# --------------------------------------------------------------------
+# Helpers
+# --------------------------------------------------------------------
+def latency_summary(samples_ms: List[float]) -> Dict:
+    """Summarise latency samples (milliseconds)."""
+    if not samples_ms:
+        return {"count": 0}
+    arr = np.asarray(samples_ms, dtype=np.float64)
+    return {
+        "count": int(len(arr)),
+        "mean_ms": round(float(arr.mean()), 3),
+        "p50_ms": round(float(np.percentile(arr, 50)), 3),
+        "p95_ms": round(float(np.percentile(arr, 95)), 3),
+        "p99_ms": round(float(np.percentile(arr, 99)), 3),
+        "max_ms": round(float(arr.max()), 3),
+    }
+
+
+def open_engine(db_path: str, collection_name: str, model_name: str,
+                snapshot_path: str = None, seed: int = 0, query_cache_size: int = 0,
+                ivf_path: str = None, vocabulary_path: str = None):
+    """
+    Build a VideoSemanticSearch on the given backend with its chatter silenced.
+
+    query_cache_size sizes both the query embedding cache and the
+    normalisation memo, so 0 measures every spelling correction and encode.
+    """
+    from scripts.semantic_search import VideoSemanticSearch
+    from scripts.db_handler import VideoVectorDB
+
+    set_quiet(True)
+    model = load_model(model_name, seed)
+    sidecars = dict(query_cache_size=query_cache_size, passages_path=None, neighbours_path=None,
+                    clusters_path=None, fields_path=None, vocabulary_path=vocabulary_path)
+    if ivf_path:
+        engine = VideoSemanticSearch(model=model, ivf_path=ivf_path, **sidecars)
+    elif snapshot_path:
+        engine = VideoSemanticSearch(model=model, snapshot_path=snapshot_path, **sidecars)
+    else:
+        engine = VideoSemanticSearch(model=model, db=VideoVectorDB(db_path, collection_name), **sidecars)
+    engine.normalizer.cache_size = query_cache_size
+    return engine
+
+
+def build_synthetic_collection(db_path: str, collection_name: str, n_videos: int,
+                               transcript_chars: int, seed: int = 0,
+                               vocabulary_path: str = None) -> None:
+    """
+    Generate a synthetic corpus, embed it with the stub encoder and load it
+    into ChromaDB. With vocabulary_path, also write the corpus vocabulary
+    the query normaliser corrects spellings against.
+    """
+    from scripts.synthetic_data import SyntheticCorpus, make_videos_frame
+    from scripts.generate_embeddings import combine_text_columns, embeddings_to_string
+    from scripts.clean_and_merge_dataset import parse_duration_to_seconds
+    from scripts.migrate_to_vectordb import prepare_data_for_db
+    from scripts.db_handler import VideoVectorDB
+    from scripts.query_normalizer import build_vocabulary
+
+    corpus = SyntheticCorpus(seed=seed)
+    df = make_videos_frame(n_videos, seed=seed, median_transcript_chars=transcript_chars, corpus=corpus)
+    df['duration_seconds'] = df['duration'].apply(parse_duration_to_seconds)
+
+    encoder = load_model(STUB_MODEL, seed)
+    texts = combine_text_columns(df['title'], df['transcript'])
+    df['embeddings'] = embeddings_to_string(encoder.encode(texts))
+    if vocabulary_path:
+        build_vocabulary(texts, vocabulary_path)
+
+    with contextlib.redirect_stdout(io.StringIO()), contextlib.redirect_stderr(io.StringIO()):
+        video_ids, transcripts, embeddings, metadata = prepare_data_for_db(df)
+        db = VideoVectorDB(db_path, collection_name)
+        db.insert_videos(video_ids, transcripts, embeddings, metadata)
+
+
+def add_typos(queries: List[str], rate: float, seed: int = 0) -> List[str]:
+    """Swap two adjacent letters in roughly `rate` of the query words (4+ letters)."""
+    rng = np.random.default_rng(seed)
+    noisy = []
+    for query in queries:
+        words = query.split()
+        for i, word in enumerate(words):
+            if len(word) >= 4 and rng.random() < rate:
+                j = int(rng.integers(1, len(word) - 2))
+                words[i] = word[:j] + word[j + 1] + word[j] + word[j + 2:]
+        noisy.append(" ".join(words))
+    return noisy
+
+
+def fetch_all_embeddings(db, batch_size: int = 1000):
+    """Read every (id, embedding) pair from a VideoVectorDB collection."""
+    ids, vectors = [], []
+    total = db.collection.count()
+    for offset in range(0, total, batch_size):
+        page = db.collection.get(limit=batch_size, offset=offset, include=["embeddings"])
+        ids.extend(page["ids"])
+        vectors.append(np.asarray(page["embeddings"], dtype=np.float32))
+    return ids, np.vstack(vectors)
+
+
+def exact_top_k(corpus: np.ndarray, queries: np.ndarray, k: int) -> np.ndarray:
+    """Brute-force top-k row indices for each query under the configured metric."""
+    if DISTANCE_METRIC == "cosine":
+        corpus = normalise_rows(corpus)
+        queries = normalise_rows(queries)
+    if DISTANCE_METRIC == "l2":
+        scores = -(np.sum(corpus ** 2, axis=1)[None, :] - 2 * queries @ corpus.T)
+    else:
+        scores = queries @ corpus.T
+    top = np.argpartition(-scores, k - 1, axis=1)[:, :k]
+    order = np.argsort(-np.take_along_axis(scores, top, axis=1), axis=1)
+    return np.take_along_axis(top, order, axis=1)
+
+
+# --------------------------------------------------------------------
+# Measurements
+# --------------------------------------------------------------------
+def run_queries(engine, queries: List[str], top_k: int, concurrency: int):
+    """
+    Run every query through engine.search.
+
+    Returns:
+        Tuple of (latencies_ms, wall_seconds, results_per_query)
+    """
+    def timed(query):
+        start = time.perf_counter()
+        results = engine.search(query, top_k=top_k)
+        return (time.perf_counter() - start) * 1000, results
+
+    start = time.perf_counter()
+    if concurrency <= 1:
+        outcomes = [timed(q) for q in queries]
+    else:
+        with ThreadPoolExecutor(max_workers=concurrency) as pool:
+            outcomes = list(pool.map(timed, queries))
+    wall = time.perf_counter() - start
+
+    return [o[0] for o in outcomes], wall, [o[1] for o in outcomes]
+
+
+def run_pipeline(engine, queries: List[str], top_k: int, search_workers: int):
+    """
+    Submit every query to a QueryPipeline at once and wait for all of them.
+
+    Returns:
+        Tuple of (latencies_ms, wall_seconds, results_per_query)
+    """
+    latencies = [0.0] * len(queries)
+
+    def done(i, submitted):
+        def callback(_):
+            latencies[i] = (time.perf_counter() - submitted) * 1000
+        return callback
+
+    start = time.perf_counter()
+    with QueryPipeline(engine, search_workers=search_workers) as pipeline:
+        futures = []
+        for i, query in enumerate(queries):
+            future = pipeline.submit(query, top_k=top_k)
+            future.add_done_callback(done(i, time.perf_counter()))
+            futures.append(future)
+        results = [future.result() for future in futures]
+    wall = time.perf_counter() - start
+    return latencies, wall, results
+
+
+def _cold_worker(db_path, collection_name, model_name, snapshot_path, seed, queries, top_k, out,
+                 ivf_path=None, vocabulary_path=None):
+    """Child-process body for the cold run: startup plus one sequential pass."""
+    start = time.perf_counter()
+    engine = open_engine(db_path, collection_name, model_name, snapshot_path, seed,
+                         ivf_path=ivf_path, vocabulary_path=vocabulary_path)
+    startup = time.perf_counter() - start
+    latencies, _, _ = run_queries(engine, queries, top_k, concurrency=1)
+    out.put({"startup_seconds": startup, "latencies_ms": latencies})
+
+
+def run_cold(db_path, collection_name, model_name, snapshot_path, seed, queries, top_k,
+             ivf_path=None, vocabulary_path=None) -> Dict:
+    """Measure startup and first-pass latency in a fresh process."""
+    ctx = multiprocessing.get_context("spawn")
+    out = ctx.Queue()
+    proc = ctx.Process(
+        target=_cold_worker,
+        args=(db_path, collection_name, model_name, snapshot_path, seed, queries, top_k, out,
+              ivf_path, vocabulary_path)
+    )
+    proc.start()
+    result = out.get()
+    proc.join()
+    return {
+        "startup_seconds": round(result["startup_seconds"], 4),
+        "first_query_ms": round(result["latencies_ms"][0], 3),
+        "latency": latency_summary(result["latencies_ms"]),
+    }
+
+
+def stage_breakdown(engine, queries: List[str], top_k: int) -> Dict:
+    """
+    Replay the stages of VideoSemanticSearch.search one by one and time each.
+
+    For ChromaDB the ANN query and the metadata fetch are separate round
+    trips here (query for ids/distances, then get for metadata), which is
+    what lets them be timed independently. Normalisation (cleaning and
+    spelling correction) is timed apart from the encode it feeds.
+    """
+    stages = {"normalise": [], "encode": [], "ann_query": [], "metadata_fetch": [], "formatting": []}
+    db = engine.db
+
+    for query in queries:
+        tn = time.perf_counter()
+        text = engine.normalise_query(query)
+        t0 = time.perf_counter()
+        embedding = engine._encode_normalised(text)
+        t1 = time.perf_counter()
+
+        if hasattr(db, "collection"):
+            hits = db.collection.query(
+                query_embeddings=embedding.reshape(1, -1).tolist(),
+                n_results=top_k,
+                include=["distances"]
+            )
+            ids, distances = hits["ids"][0], hits["distances"][0]
+            t2 = time.perf_counter()
+            fetched = db.collection.get(ids=ids, include=["metadatas"])
+            by_id = dict(zip(fetched["ids"], fetched["metadatas"]))
+            metadatas = [by_id[i] for i in ids]
+        else:
+            ids, distances, metadatas = db.search_videos(embedding, top_k=top_k)
+            t2 = time.perf_counter()
+        t3 = time.perf_counter()
+
+        engine.format_results(ids, distances, metadatas)
+        t4 = time.perf_counter()
+
+        stages["normalise"].append((t0 - tn) * 1000)
+        stages["encode"].append((t1 - t0) * 1000)
+        stages["ann_query"].append((t2 - t1) * 1000)
+        stages["metadata_fetch"].append((t3 - t2) * 1000)
+        stages["formatting"].append((t4 - t3) * 1000)
+
+    return {name: latency_summary(samples) for name, samples in stages.items()}
+
+
+def recall_at_k(engine, queries: List[str], results: List[List[Dict]], top_k: int) -> float:
+    """Average overlap between search results and exact brute-force top-k."""
+    db = engine.db
+    if hasattr(db, "collection"):
+        ids, corpus = fetch_all_embeddings(db)
+    else:
+        ids = [db._video_id(i) for i in range(db.count())]
+        corpus = np.asarray(db.vectors)
+
+    query_vectors = np.vstack(engine.encode_queries(queries))
+    k = min(top_k, len(ids))
+    exact = exact_top_k(corpus, query_vectors.astype(np.float32), k)
+
+    overlaps = []
+    for row, found in zip(exact, results):
+        truth = {ids[i] for i in row}
+        overlaps.append(len(truth & {r['video_id'] for r in found[:k]}) / k)
+    return float(np.mean(overlaps))
+
+
+# --------------------------------------------------------------------
+# MAIN
+# --------------------------------------------------------------------
+def main():
+    parser = argparse.ArgumentParser(
+        description="Benchmark semantic search latency, throughput and recall"
+    )
+    parser.add_argument('--videos', type=int, default=2000,
+                        help='Synthetic corpus size (default: 2000)')
+    parser.add_argument('--transcript-chars', type=int, default=30000,
+                        help='Median synthetic transcript length (default: 30000)')
+    parser.add_argument('--queries', type=int, default=200,
+                        help='Number of synthetic queries (default: 200)')
+    parser.add_argument('--queries-file', type=str, default=None,
+                        help='Text file with one query per line (overrides --queries)')
+    parser.add_argument('--top-k', '-k', type=int, default=10,
+                        help='Results per query (default: 10)')
+    parser.add_argument('--concurrency', type=int, nargs='+', default=[1, 4],
+                        help='Concurrency levels for the warm runs (default: 1 4)')
+    parser.add_argument('--warm-passes', type=int, default=2,
+                        help='Passes over the query set per concurrency level (default: 2)')
+    parser.add_argument('--pipeline', type=int, nargs='*', default=[],
+                        help='Search-stage thread counts to measure through QueryPipeline (default: none)')
+    parser.add_argument('--backend', choices=['chroma', 'snapshot', 'ivf'], default='chroma',
+                        help='Search backend to benchmark (default: chroma)')
+    parser.add_argument('--db-path', type=str, default=None,
+                        help='Benchmark an existing ChromaDB directory instead of a synthetic one')
+    parser.add_argument('--collection', type=str, default=COLLECTION_NAME,
+                        help=f'Collection name for --db-path (default: {COLLECTION_NAME})')
+    parser.add_argument('--model', type=str, default=STUB_MODEL,
+                        help='Encoder: "stub" or a sentence-transformer model name (default: stub)')
+    parser.add_argument('--query-cache', type=int, default=0,
+                        help='Query embedding cache and normalisation memo size; '
+                             '0 measures uncached normalisation and encodes (default: 0)')
+    parser.add_argument('--vocabulary', type=str, default=None,
+                        help='Spelling vocabulary for query normalisation; "" cleans only '
+                             f'(default: built from the synthetic corpus, or {VOCABULARY_PATH} with --db-path)')
+    parser.add_argument('--typo-rate', type=float, default=0.1,
+                        help='Fraction of query words misspelt to exercise spelling correction (default: 0.1)')
+    parser.add_argument('--skip-cold', action='store_true',
+                        help='Skip the fresh-process cold run')
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--output', type=str, default=None,
+                        help='JSON report path (default: data/benchmarks/search-<timestamp>.json)')
+    args = parser.parse_args()
+
+    print("=" * 70)
+    print("SEMANTIC SEARCH BENCHMARK")
+    print("=" * 70)
+
+    workdir = tempfile.TemporaryDirectory(prefix="ytss-bench-")
+
+    # Corpus
+    if args.db_path:
+        db_path, collection_name = args.db_path, args.collection
+        vocabulary_path = VOCABULARY_PATH if args.vocabulary is None else args.vocabulary
+        print(f"\n📂 Using existing collection: {collection_name} ({db_path})")
+    else:
+        db_path, collection_name = os.path.join(workdir.name, "vectordb"), "benchmark_videos"
+        vocabulary_path = args.vocabulary
+        if vocabulary_path is None:
+            vocabulary_path = os.path.join(workdir.name, "vocabulary")
+        print(f"\n🧪 Building synthetic collection: {args.videos} videos...")
+        start = time.perf_counter()
+        build_synthetic_collection(db_path, collection_name, args.videos, args.transcript_chars, args.seed,
+                                   vocabulary_path=None if args.vocabulary is not None else vocabulary_path)
+        print(f"   ✓ Built in {time.perf_counter() - start:.1f}s")
+
+    snapshot_path = None
+    if args.backend == 'snapshot':
+        from scripts.snapshot import export_snapshot
+        from scripts.db_handler import VideoVectorDB
+        snapshot_path = os.path.join(workdir.name, "snapshot")
+        with contextlib.redirect_stdout(io.StringIO()):
+            export_snapshot(VideoVectorDB(db_path, collection_name), snapshot_path)
+        print(f"   ✓ Exported snapshot for benchmarking")
+
+    ivf_path = None
+    if args.backend == 'ivf':
+        from scripts.ivf_index import export_ivf_index
+        from scripts.db_handler import VideoVectorDB
+        ivf_path = os.path.join(workdir.name, "ivf")
+        with contextlib.redirect_stdout(io.StringIO()):
+            export_ivf_index(VideoVectorDB(db_path, collection_name), ivf_path)
+        print(f"   ✓ Built IVF index for benchmarking")
+
+    # Queries
+    if args.queries_file:
+        with open(args.queries_file, "r", encoding="utf-8") as f:
+            queries = [line.strip() for line in f if line.strip()]
+    else:
+        from scripts.synthetic_data import make_queries
+        queries = make_queries(args.queries, seed=args.seed)
+    if args.typo_rate > 0:
+        queries = add_typos(queries, args.typo_rate, seed=args.seed)
+    print(f"   • Queries: {len(queries)} | top_k: {args.top_k} | backend: {args.backend}")
+
+    report = {
+        "benchmark": "search",
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "config": {
+            "videos": None if args.db_path else args.videos,
+            "db_path": args.db_path,
+            "backend": args.backend,
+            "model": args.model,
+            "queries": len(queries),
+            "top_k": args.top_k,
+            "concurrency": args.concurrency,
+            "warm_passes": args.warm_passes,
+            "pipeline": args.pipeline,
+            "query_cache": args.query_cache,
+            "vocabulary": bool(vocabulary_path),
+            "typo_rate": args.typo_rate,
+            "distance_metric": DISTANCE_METRIC,
+            "seed": args.seed,
+        },
+        "environment": {
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "cpu_count": os.cpu_count(),
+        },
+    }
+
+    # Cold run
+    if not args.skip_cold:
+        print("\n❄️  Cold run (fresh process)...")
+        report["cold"] = run_cold(db_path, collection_name, args.model, snapshot_path,
+                                  args.seed, queries, args.top_k, ivf_path, vocabulary_path)
+        print(f"   ✓ Startup {report['cold']['startup_seconds']:.2f}s | "
+              f"first query {report['cold']['first_query_ms']:.1f} ms")
+
+    # Warm runs
+    engine = open_engine(db_path, collection_name, args.model, snapshot_path, args.seed,
+                         query_cache_size=args.query_cache, ivf_path=ivf_path,
+                         vocabulary_path=vocabulary_path)
+    run_queries(engine, queries, args.top_k, concurrency=1)  # warm-up pass
+    metrics.reset()
+
+    print("\n🔥 Warm runs...")
+    report["warm"] = []
+    first_results = None
+    for concurrency in args.concurrency:
+        latencies, wall = [], 0.0
+        for _ in range(args.warm_passes):
+            pass_latencies, pass_wall, results = run_queries(engine, queries, args.top_k, concurrency)
+            latencies.extend(pass_latencies)
+            wall += pass_wall
+            if first_results is None:
+                first_results = results
+        entry = {"concurrency": concurrency, "qps": round(len(latencies) / wall, 2),
+                 "latency": latency_summary(latencies)}
+        report["warm"].append(entry)
+        print(f"   • c={concurrency:<3} p50 {entry['latency']['p50_ms']:.2f} ms | "
+              f"p95 {entry['latency']['p95_ms']:.2f} ms | p99 {entry['latency']['p99_ms']:.2f} ms | "
+              f"{entry['qps']:.1f} QPS")
+
+    if args.pipeline:
+        print("\n🚰 Pipelined runs (encode || search)...")
+        report["pipeline"] = []
+        for search_workers in args.pipeline:
+            latencies, wall = [], 0.0
+            for _ in range(args.warm_passes):
+                pass_latencies, pass_wall, _ = run_pipeline(engine, queries, args.top_k, search_workers)
+                latencies.extend(pass_latencies)
+                wall += pass_wall
+            entry = {"search_workers": search_workers, "qps": round(len(latencies) / wall, 2),
+                     "latency": latency_summary(latencies)}
+            report["pipeline"].append(entry)
+            print(f"   • w={search_workers:<3} p50 {entry['latency']['p50_ms']:.2f} ms | "
+                  f"p95 {entry['latency']['p95_ms']:.2f} ms | {entry['qps']:.1f} QPS")
+
+    # Instrumentation recorded during the warm runs
+    report["metrics"] = metrics.to_dict()
+
+    # Stage breakdown
+    print("\n⏱️  Per-stage breakdown...")
+    report["stages"] = stage_breakdown(engine, queries, args.top_k)
+    for name, summary in report["stages"].items():
+        print(f"   • {name:<15} p50 {summary['p50_ms']:.3f} ms | p95 {summary['p95_ms']:.3f} ms")
+
+    # Recall
+    print("\n🎯 Measuring recall against exact search...")
+    report["recall_at_k"] = round(recall_at_k(engine, queries, first_results, args.top_k), 4)
+    print(f"   ✓ recall@{args.top_k}: {report['recall_at_k']:.4f}")
+
+    # Save report
+    output_path = Path(args.output) if args.output else \
+        BENCHMARK_DIR / f"search-{time.strftime('%Y%m%d-%H%M%S')}.json"
+    output_path.parent.mkdir(parents=True, exist_ok=True)
+    with open(output_path, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2)
+
+    print("\n" + "=" * 70)
+    print("✅ BENCHMARK COMPLETE!")
+    print(f"   Report saved to: {output_path}")
+    print("=" * 70 + "\n")
+
+    workdir.cleanup()
+
+
+if __name__ == "__main__":
+    main()
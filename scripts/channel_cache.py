@@ -0,0 +1,88 @@
+"""
+On-disk Channel Metadata Cache
+
+Keeps the channel_* columns returned by channels.list in a small JSON
+file, so repeat harvests of the same channels skip those API calls until
+the entries expire.
+
+Usage:
+    from scripts.channel_cache import ChannelCache
+
+    cache = ChannelCache()
+    cached, missing = cache.get_many(channel_ids)
+    cache.put_many(fetch(missing))
+    cache.save()
+"""
+
+import json
+import os
+import sys
+import time
+from pathlib import Path
+from typing import Dict, Iterable, List, Tuple
+
+# Add project root to path
+ROOT_DIR = Path(__file__).resolve().parents[1]
+sys.path.append(str(ROOT_DIR))
+
+from config import CACHE_DIR, CHANNEL_CACHE_TTL
+
+
+class ChannelCache:
+    """
+    Channel info keyed by channel ID, with a time-to-live per entry.
+
+    Args:
+        path: JSON file backing the cache
+        ttl: Seconds an entry stays fresh (0 disables expiry)
+    """
+
+    def __init__(self, path=CACHE_DIR / "channels.json", ttl: float = CHANNEL_CACHE_TTL):
+        self.path = Path(path)
+        self.ttl = ttl
+        self._entries: Dict[str, Dict] = {}
+        self._dirty = False
+        if self.path.exists():
+            try:
+                self._entries = json.loads(self.path.read_text(encoding="utf-8"))
+            except (json.JSONDecodeError, OSError) as e:
+                print(f"⚠️  Ignoring unreadable channel cache {self.path}: {e}")
+
+    def _fresh(self, entry: Dict, now: float) -> bool:
+        return not self.ttl or now - entry["fetched_at"] < self.ttl
+
+    def get_many(self, channel_ids: Iterable[str]) -> Tuple[Dict[str, Dict], List[str]]:
+        """
+        Look up channels.
+
+        Returns:
+            Tuple of (fresh info keyed by channel ID, IDs that must be fetched)
+        """
+        now = time.time()
+        cached, missing = {}, []
+        for channel_id in channel_ids:
+            entry = self._entries.get(channel_id)
+            if entry is not None and self._fresh(entry, now):
+                cached[channel_id] = entry["info"]
+            else:
+                missing.append(channel_id)
+        return cached, missing
+
+    def put_many(self, channel_info: Dict[str, Dict]) -> None:
+        """Store freshly fetched channel info."""
+        now = time.time()
+        for channel_id, info in channel_info.items():
+            self._entries[channel_id] = {"fetched_at": now, "info": info}
+        self._dirty = self._dirty or bool(channel_info)
+
+    def save(self) -> None:
+        """Write the cache to disk (atomically), dropping expired entries."""
+        if not self._dirty:
+            return
+        now = time.time()
+        self._entries = {k: v for k, v in self._entries.items() if self._fresh(v, now)}
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = self.path.with_suffix(".tmp")
+        tmp_path.write_text(json.dumps(self._entries), encoding="utf-8")
+        os.replace(tmp_path, self.path)
+        self._dirty = False
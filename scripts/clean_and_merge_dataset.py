@@ -9,6 +9,7 @@ This script:
 5. Converts all text to lowercase
 """
 
+import argparse
 import pandas as pd
 import re
 from pathlib import Path
@@ -18,6 +19,9 @@ import sys
 ROOT_DIR = Path(__file__).resolve().parents[1]
 sys.path.append(str(ROOT_DIR))
 
+from scripts.dataset_io import read_dataset, write_dataset
+from scripts.passages import CUES_COLUMN, remap_cues
+
 
 def parse_duration_to_seconds(duration_str):
     """
@@ -95,6 +99,60 @@ def clean_text(text):
     return text
 
 
+# Free-text columns that are cleaned (lowercase, special characters removed)
+TEXT_COLUMNS = ['title', 'description', 'transcript']
+
+# Other text columns that are only lowercased
+LOWERCASE_COLUMNS = ['tags', 'defaultLanguage', 'defaultAudioLanguage',
+                     'channel_title', 'channel_description']
+
+# Columns kept in the cleaned dataset
+REQUIRED_COLUMNS = [
+    'id', 'title', 'description', 'publishedAt', 'tags', 'categoryId',
+    'defaultLanguage', 'defaultAudioLanguage', 'thumbnail_default', 'thumbnail_high',
+    'duration_seconds', 'viewCount', 'likeCount', 'commentCount', 'privacyStatus',
+    'channel_id', 'channel_title', 'channel_description', 'channel_country',
+    'channel_thumbnail', 'channel_subscriberCount', 'channel_videoCount',
+    'transcript',  # Keep cleaned transcript
+    'transcript_cues'  # Caption timings, remapped onto the cleaned transcript
+]
+
+
+def clean_video_frame(df):
+    """
+    Clean a frame of raw video rows (the crashcourse_videos.csv columns).
+    
+    Converts duration to seconds, cleans the free-text columns, lowercases
+    the other text columns and keeps only REQUIRED_COLUMNS. Works on any
+    number of rows, so it is used both for the full dataset and for the
+    micro-batches of the streaming pipeline.
+    
+    Args:
+        df: pandas DataFrame of raw video rows
+        
+    Returns:
+        pandas DataFrame: Cleaned copy
+    """
+    df = df.copy()
+    
+    df['duration_seconds'] = df['duration'].apply(parse_duration_to_seconds)
+    
+    # Cue offsets point into the raw transcript, so remap them before cleaning it
+    if CUES_COLUMN in df.columns and 'transcript' in df.columns:
+        df[CUES_COLUMN] = [remap_cues(transcript, cues, clean_text)
+                           for transcript, cues in zip(df['transcript'], df[CUES_COLUMN])]
+    
+    for col in TEXT_COLUMNS:
+        if col in df.columns:
+            df[col] = df[col].apply(clean_text)
+    
+    for col in LOWERCASE_COLUMNS:
+        if col in df.columns:
+            df[col] = df[col].apply(lambda x: x.lower() if isinstance(x, str) else x)
+    
+    return df[[col for col in REQUIRED_COLUMNS if col in df.columns]]
+
+
 def merge_and_clean_datasets(videos_path, metadata_path, output_path):
     """
     Merge and clean the YouTube datasets.
@@ -118,72 +176,44 @@ def merge_and_clean_datasets(videos_path, metadata_path, output_path):
     
     # Load datasets
     print("\n[1/6] Loading datasets...")
-    df_videos = pd.read_csv(videos_path)
+    df_videos = read_dataset(videos_path)
     print(f"   ✓ Loaded {len(df_videos)} videos with {len(df_videos.columns)} columns")
     
     # Check if metadata file exists (optional)
     if metadata_path.exists():
-        df_metadata = pd.read_csv(metadata_path)
+        df_metadata = read_dataset(metadata_path)
         print(f"   ✓ Loaded metadata: {len(df_metadata)} rows")
     else:
         print(f"   ℹ Metadata file not found (using videos dataset only)")
     
     # Use videos dataset as base
     print("\n[2/6] Preparing dataset...")
-    df_merged = df_videos.copy()
-    print(f"   ✓ Working with {len(df_merged)} rows")
+    print(f"   ✓ Working with {len(df_videos)} rows")
+    
+    df_merged = clean_video_frame(df_videos)
     
     # Convert duration to seconds
     print("\n[3/6] Converting duration to seconds...")
-    df_merged['duration_seconds'] = df_merged['duration'].apply(parse_duration_to_seconds)
     print(f"   ✓ Converted {len(df_merged)} duration values")
     
     # Clean text fields and replace originals
     print("\n[4/6] Cleaning text fields...")
-    text_columns = ['title', 'description', 'transcript']
-    
-    for col in text_columns:
+    for col in TEXT_COLUMNS:
         if col in df_merged.columns:
-            # Clean the text and replace the original column
-            df_merged[col] = df_merged[col].apply(clean_text)
             print(f"   ✓ Cleaned '{col}' column")
     
     # Convert other text fields to lowercase
     print("\n[5/6] Converting text to lowercase...")
-    other_text_cols = ['tags', 'defaultLanguage', 'defaultAudioLanguage', 
-                       'channel_title', 'channel_description']
-    
-    converted_count = 0
-    for col in other_text_cols:
-        if col in df_merged.columns:
-            df_merged[col] = df_merged[col].apply(
-                lambda x: x.lower() if isinstance(x, str) else x
-            )
-            converted_count += 1
+    converted_count = sum(col in df_videos.columns for col in LOWERCASE_COLUMNS)
     print(f"   ✓ Converted {converted_count} additional text columns")
     
     # Select only required columns
     print(f"\n[6/6] Selecting required columns and saving...")
-    
-    # Columns to keep (as specified by user)
-    required_cols = [
-        'id', 'title', 'description', 'publishedAt', 'tags', 'categoryId',
-        'defaultLanguage', 'defaultAudioLanguage', 'thumbnail_default', 'thumbnail_high',
-        'duration_seconds', 'viewCount', 'likeCount', 'commentCount', 'privacyStatus',
-        'channel_id', 'channel_title', 'channel_description', 'channel_country',
-        'channel_thumbnail', 'channel_subscriberCount', 'channel_videoCount',
-        'transcript'  # Keep cleaned transcript
-    ]
-    
-    # Filter to only columns that exist in the dataframe
-    final_cols = [col for col in required_cols if col in df_merged.columns]
-    df_merged = df_merged[final_cols]
-    
+    final_cols = list(df_merged.columns)
     print(f"   ✓ Kept {len(final_cols)} columns")
     
     # Save cleaned dataset
-    output_path.parent.mkdir(parents=True, exist_ok=True)
-    df_merged.to_csv(output_path, index=False)
+    write_dataset(df_merged, output_path)
     print(f"   ✓ Saved to: {output_rel}")
     
     # Display summary
@@ -222,12 +252,20 @@ def main():
     """Main execution function."""
     # Define paths
     data_dir = ROOT_DIR / "data"
-    videos_path = data_dir / "crashcourse_videos.csv"
-    metadata_path = data_dir / "crashcourse_metadata.csv"
-    output_path = data_dir / "crashcourse_final.csv"  # Changed to avoid file lock
+    
+    parser = argparse.ArgumentParser(
+        description="Clean the harvested video dataset (CSV, Parquet or Arrow by extension)"
+    )
+    parser.add_argument('--input', default=str(data_dir / "crashcourse_videos.csv"),
+                        help='Raw videos dataset (default: data/crashcourse_videos.csv)')
+    parser.add_argument('--metadata', default=str(data_dir / "crashcourse_metadata.csv"),
+                        help='Optional metadata dataset (default: data/crashcourse_metadata.csv)')
+    parser.add_argument('--output', default=str(data_dir / "crashcourse_final.csv"),
+                        help='Cleaned dataset (default: data/crashcourse_final.csv)')
+    args = parser.parse_args()
     
     # Run cleaning and merging
-    df_cleaned = merge_and_clean_datasets(videos_path, metadata_path, output_path)
+    df_cleaned = merge_and_clean_datasets(Path(args.input), Path(args.metadata), Path(args.output))
     
     return df_cleaned
 
@@ -0,0 +1,326 @@
+"""
+Topic Clusters and Series Labels for YouTube Semantic Search
+
+CrashCourse is organised into series (World History, Biology, Futures of
+AI...), and videos of one series sit close together in embedding space.
+This module clusters the embeddings with mini-batch k-means and stores two
+labels in each video's metadata:
+- cluster_id   the nearest k-means centroid
+- series       the series named in the title ("...: Crash Course Biology #3"),
+               or else the series most videos of the cluster belong to
+
+The centroids are saved to a small sidecar (data/clusters/):
+- centroids.npy   float32 (n_clusters, dim) unit-normalised centroids
+- manifest.json   cluster names and sizes, the video count per series, and
+                  the embedding model and collection the centroids came from
+
+Search uses them as a coarse-to-fine index: the query is routed to its
+nearest CLUSTER_PROBES centroids and only videos of those clusters are
+ranked (a cluster_id filter). The series label gives faceted filtering
+(`--series Biology`).
+
+Labels are assigned by migrate_to_vectordb.py and, for new videos, by the
+streaming pipeline (nearest centroid). Run this script to re-cluster the
+whole collection, e.g. after many videos have been added.
+
+Usage:
+    python scripts/cluster_topics.py
+    python scripts/cluster_topics.py --clusters 64 --dry-run
+    python scripts/cluster_topics.py --list
+"""
+
+import argparse
+from collections import Counter
+from pathlib import Path
+import re
+import sys
+import time
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+# Add project root to path
+ROOT_DIR = Path(__file__).resolve().parents[1]
+sys.path.append(str(ROOT_DIR))
+
+from config import CLUSTERS_PATH, TOPIC_CLUSTERS, CLUSTER_PROBES, VECTOR_DB_PATH, COLLECTION_NAME
+from scripts.array_store import write_store, read_store, store_exists
+from scripts.embedding_utils import normalise_rows
+from scripts.metrics import status
+
+CLUSTER_KEY = "cluster_id"
+SERIES_KEY = "series"
+
+# "The Agricultural Revolution: Crash Course World History #1" -> "World History"
+# (also matches cleaned titles: "the agricultural revolution crash course world history 1")
+SERIES_PATTERN = re.compile(r"crash\s*course\s+(?P<series>[^#:|()\d]+?)\s*#?\s*\d+", re.IGNORECASE)
+
+# Share of a cluster's titled videos that must agree before the cluster is named after their series
+SERIES_MAJORITY = 0.5
+
+
+def normalise_series(name: str) -> str:
+    """Canonical form of a series name ("world  history" -> "World History")."""
+    return " ".join(str(name).split()).title()
+
+
+def detect_series(title) -> Optional[str]:
+    """Series named in a video title, or None."""
+    match = SERIES_PATTERN.search(str(title or ""))
+    return normalise_series(match.group("series")) if match else None
+
+
+def auto_cluster_count(n_videos: int) -> int:
+    """Default number of clusters: about sqrt(n_videos), at least 2."""
+    return max(2, min(n_videos, int(round(np.sqrt(n_videos)))))
+
+
+def fit_clusters(embeddings: np.ndarray, n_clusters: int = TOPIC_CLUSTERS,
+                 seed: int = 0) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Cluster embeddings with mini-batch k-means.
+
+    Vectors are unit-normalised first, so clusters follow cosine similarity.
+
+    Args:
+        embeddings: (n_videos, dim) embeddings
+        n_clusters: Number of clusters (0 = auto_cluster_count)
+        seed: Random seed
+
+    Returns:
+        Tuple of (unit-normalised centroids, cluster index per video)
+    """
+    from sklearn.cluster import MiniBatchKMeans
+
+    vectors = normalise_rows(embeddings)
+    n_clusters = min(n_clusters or auto_cluster_count(len(vectors)), len(vectors))
+    kmeans = MiniBatchKMeans(n_clusters=n_clusters, batch_size=4096, n_init=3, random_state=seed)
+    labels = kmeans.fit_predict(vectors)
+    return normalise_rows(kmeans.cluster_centers_), labels.astype(np.int32)
+
+
+def name_clusters(labels: np.ndarray, titles: List[str], n_clusters: int) -> List[str]:
+    """
+    Name each cluster after the series most of its titled videos belong to.
+
+    Clusters without a clear majority are named "Topic <cluster_id>".
+    """
+    counts = [Counter() for _ in range(n_clusters)]
+    for label, title in zip(labels, titles):
+        series = detect_series(title)
+        if series:
+            counts[label][series] += 1
+
+    names = []
+    for cluster, counter in enumerate(counts):
+        if counter:
+            series, votes = counter.most_common(1)[0]
+            if votes >= SERIES_MAJORITY * sum(counter.values()):
+                names.append(series)
+                continue
+        names.append(f"Topic {cluster}")
+    return names
+
+
+class TopicIndex:
+    """
+    Cluster centroids and names, used to label videos and route queries.
+
+    Args:
+        centroids: (n_clusters, dim) unit-normalised centroids
+        names: Cluster names (series or "Topic <n>")
+        sizes: Videos per cluster
+        series_counts: Videos per series label
+        manifest: Extra manifest fields ("model", "collection_name")
+    """
+
+    def __init__(self, centroids: np.ndarray, names: List[str], sizes: List[int],
+                 series_counts: Dict[str, int], manifest: Optional[Dict] = None):
+        self.manifest = dict(manifest or {})
+        self.centroids = centroids
+        self.names = list(names)
+        self.sizes = list(sizes)
+        self.series_counts = dict(series_counts)
+
+    def __len__(self) -> int:
+        return len(self.names)
+
+    @property
+    def dimension(self) -> int:
+        return int(self.centroids.shape[1])
+
+    @classmethod
+    def fit(cls, embeddings: np.ndarray, titles: List[str], n_clusters: int = TOPIC_CLUSTERS,
+            seed: int = 0, model: Optional[str] = None,
+            collection_name: Optional[str] = None) -> Tuple["TopicIndex", np.ndarray, List[str]]:
+        """
+        Cluster a collection and label every video; the index is tagged with
+        its model and collection.
+
+        Returns:
+            Tuple of (TopicIndex, cluster index per video, series per video)
+        """
+        centroids, labels = fit_clusters(embeddings, n_clusters, seed)
+        names = name_clusters(labels, titles, len(centroids))
+        series = [detect_series(title) or names[label] for label, title in zip(labels, titles)]
+        sizes = np.bincount(labels, minlength=len(centroids)).tolist()
+        index = cls(centroids, names, sizes, Counter(series),
+                    {"model": model, "collection_name": collection_name})
+        return index, labels, series
+
+    @classmethod
+    def load(cls, path=CLUSTERS_PATH) -> "TopicIndex":
+        """Open a saved index."""
+        arrays, _, manifest = read_store(path, mmap_arrays=False)
+        return cls(arrays["centroids"], manifest["names"], manifest["sizes"], manifest["series"], manifest)
+
+    def save(self, path=CLUSTERS_PATH) -> Path:
+        """Write the index (atomically replacing any previous one)."""
+        return write_store(
+            path,
+            arrays={"centroids": np.asarray(self.centroids, dtype=np.float32)},
+            manifest={"clusters": len(self), "dimension": self.dimension, "names": self.names,
+                      "sizes": [int(size) for size in self.sizes],
+                      "series": {name: int(count) for name, count in sorted(self.series_counts.items())},
+                      "model": self.manifest.get("model"),
+                      "collection_name": self.manifest.get("collection_name")},
+        )
+
+    def assign(self, embeddings: np.ndarray) -> np.ndarray:
+        """Nearest cluster of each embedding."""
+        return np.argmax(normalise_rows(embeddings) @ self.centroids.T, axis=1).astype(np.int32)
+
+    def label(self, metadata_list: List[Dict], embeddings: np.ndarray) -> None:
+        """Add cluster_id and series to metadata records in place (for new videos)."""
+        if len(metadata_list) == 0:
+            return
+        for metadata, cluster in zip(metadata_list, self.assign(embeddings)):
+            metadata[CLUSTER_KEY] = int(cluster)
+            metadata[SERIES_KEY] = detect_series(metadata.get('title')) or self.names[cluster]
+
+    def route(self, query_embedding: np.ndarray, n_probe: int = CLUSTER_PROBES) -> List[int]:
+        """The n_probe clusters nearest to a query, nearest first."""
+        scores = self.centroids @ normalise_rows(np.asarray(query_embedding).reshape(-1))
+        n_probe = min(n_probe, len(scores))
+        nearest = np.argpartition(-scores, n_probe - 1)[:n_probe]
+        return [int(c) for c in nearest[np.argsort(-scores[nearest])]]
+
+    def route_filter(self, query_embedding: np.ndarray, n_probe: int = CLUSTER_PROBES) -> Dict:
+        """Metadata filter restricting a search to the query's nearest clusters."""
+        return {CLUSTER_KEY: {"$in": self.route(query_embedding, n_probe)}}
+
+
+def load_topics(path=CLUSTERS_PATH, model: Optional[str] = None,
+                collection_name: Optional[str] = None) -> Optional[TopicIndex]:
+    """
+    Open the topic index if it exists.
+
+    Args:
+        model: Expected embedding model (None skips the check)
+        collection_name: Expected source collection (None skips the check)
+
+    Returns:
+        The index, or None if there is none or it was built from another
+        model or collection (indexes saved before tagging are accepted)
+    """
+    if not store_exists(path):
+        return None
+    index = TopicIndex.load(path)
+    for key, expected in (("model", model), ("collection_name", collection_name)):
+        built_from = index.manifest.get(key)
+        if expected is not None and built_from is not None and built_from != expected:
+            status(f"⚠️  Topic index at {path} was built from {built_from}, not {expected}; ignoring it")
+            return None
+    return index
+
+
+def cluster_collection(db, n_clusters: int = TOPIC_CLUSTERS, dry_run: bool = False,
+                       page_size: int = 5000) -> Tuple[TopicIndex, int]:
+    """
+    Re-cluster every video in the database and update the changed labels.
+
+    Returns:
+        Tuple of (TopicIndex, number of videos whose labels changed)
+    """
+    ids, metadatas, blocks = [], [], []
+    for page_ids, columns in db.iter_pages(('metadata', 'embedding'), page_size):
+        ids.extend(page_ids)
+        metadatas.extend(columns['metadata'])
+        blocks.append(columns['embedding'])
+    if not ids:
+        raise ValueError("The collection is empty")
+
+    titles = [(metadata or {}).get('title') for metadata in metadatas]
+    index, labels, series = TopicIndex.fit(np.vstack(blocks), titles, n_clusters,
+                                           model=db.model_info()['model'], collection_name=db.collection_name)
+
+    changes = {
+        video_id: {CLUSTER_KEY: int(label), SERIES_KEY: name}
+        for video_id, metadata, label, name in zip(ids, metadatas, labels, series)
+        if (metadata or {}).get(CLUSTER_KEY) != label or (metadata or {}).get(SERIES_KEY) != name
+    }
+    if changes and not dry_run:
+        db.update_metadata_many(changes)
+    return index, len(changes)
+
+
+def print_series(index: TopicIndex, limit: Optional[int] = None) -> None:
+    """Print the series labels, largest first."""
+    ranked = sorted(index.series_counts.items(), key=lambda item: (-item[1], item[0]))
+    print(f"\n📚 {len(ranked)} series across {len(index)} clusters:")
+    for name, count in ranked[:limit]:
+        print(f"   • {name:<40} {count:>7,} videos")
+    if limit is not None and len(ranked) > limit:
+        print(f"   ... and {len(ranked) - limit} more")
+
+
+def main():
+    from scripts.db_handler import VideoVectorDB
+
+    parser = argparse.ArgumentParser(
+        description="Cluster the stored embeddings into topics and label each video's series"
+    )
+    parser.add_argument('--clusters', type=int, default=TOPIC_CLUSTERS,
+                        help='Number of k-means clusters, 0 = about sqrt(videos) (default: %(default)s)')
+    parser.add_argument('--dry-run', action='store_true',
+                        help='Cluster and report without writing labels or the index')
+    parser.add_argument('--list', action='store_true',
+                        help='List the series of the saved index and exit')
+    parser.add_argument('--path', default=CLUSTERS_PATH,
+                        help=f'Topic index directory (default: {CLUSTERS_PATH})')
+    parser.add_argument('--db-path', default=VECTOR_DB_PATH,
+                        help=f'ChromaDB directory (default: {VECTOR_DB_PATH})')
+    parser.add_argument('--collection', default=COLLECTION_NAME,
+                        help=f'Collection name (default: {COLLECTION_NAME})')
+    args = parser.parse_args()
+
+    if args.list:
+        index = load_topics(args.path)
+        if index is None:
+            print(f"❌ No topic index at {args.path}. Build it with: python scripts/cluster_topics.py")
+            return
+        print_series(index)
+        return
+
+    print("=" * 70)
+    print("TOPIC CLUSTERING" + (" (DRY RUN)" if args.dry_run else ""))
+    print("=" * 70)
+
+    db = VideoVectorDB(args.db_path, args.collection)
+    start = time.perf_counter()
+    index, changed = cluster_collection(db, args.clusters, args.dry_run)
+    elapsed = time.perf_counter() - start
+
+    print_series(index, limit=20)
+    print("\n📊 Summary:")
+    print(f"   • Videos: {sum(index.sizes):,} in {len(index)} clusters")
+    print(f"   • Labels changed: {changed:,}" + (" (not written)" if args.dry_run else ""))
+    print(f"   • Time: {elapsed:.1f}s")
+
+    if not args.dry_run:
+        index.save(args.path)
+        print(f"\n✅ Topic index written to {args.path}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,178 @@
+"""
+Dataset IO for the Ingestion Stages
+
+Reads and writes the intermediate video datasets in any of three formats,
+picked from the file extension:
+
+- .csv                 the original format (embeddings as JSON strings)
+- .parquet / .pq       Parquet, zstd-compressed
+- .arrow / .feather    Arrow IPC (Feather v2), zstd-compressed
+
+In the columnar formats embeddings are stored as a fixed_size_list<float32>
+column, so they load straight into a float32 matrix with no JSON parsing.
+Reads accept a column projection, so a stage only decodes the columns it
+uses (Parquet/Arrow skip the others on disk).
+
+Usage:
+    from scripts.dataset_io import read_dataset, write_dataset
+
+    write_dataset(df, "data/crashcourse_final.parquet", embeddings=embeddings)
+    df = read_dataset("data/crashcourse_final.parquet", columns=["id", "embeddings"])
+"""
+
+import json
+from pathlib import Path
+import sys
+from typing import List, Optional
+
+import numpy as np
+import pandas as pd
+
+# Add project root to path
+ROOT_DIR = Path(__file__).resolve().parents[1]
+sys.path.append(str(ROOT_DIR))
+
+EMBEDDINGS_COLUMN = "embeddings"
+
+FORMATS = {
+    ".csv": "csv",
+    ".parquet": "parquet",
+    ".pq": "parquet",
+    ".arrow": "arrow",
+    ".feather": "arrow",
+}
+
+# File extension used when switching a path to another format
+EXTENSIONS = {"csv": ".csv", "parquet": ".parquet", "arrow": ".arrow"}
+
+
+def dataset_format(path) -> str:
+    """
+    Detect the dataset format from the file extension.
+
+    Raises:
+        ValueError: For unsupported extensions
+    """
+    suffix = Path(path).suffix.lower()
+    if suffix not in FORMATS:
+        raise ValueError(f"Unsupported dataset format '{suffix}' for {path} "
+                         f"(expected one of: {', '.join(FORMATS)})")
+    return FORMATS[suffix]
+
+
+def with_format(path, fmt: str) -> Path:
+    """Return path with the extension of format fmt (csv, parquet or arrow)."""
+    return Path(path).with_suffix(EXTENSIONS[fmt])
+
+
+def _embeddings_to_arrow(embeddings: np.ndarray):
+    import pyarrow as pa
+
+    matrix = np.ascontiguousarray(embeddings, dtype=np.float32)
+    return pa.FixedSizeListArray.from_arrays(pa.array(matrix.reshape(-1)), matrix.shape[1])
+
+
+def _embeddings_from_arrow(column) -> list:
+    """fixed_size_list column -> list of float32 row vectors (None for null rows)."""
+    import pyarrow as pa
+
+    column = column.combine_chunks() if isinstance(column, pa.ChunkedArray) else column
+    if len(column) == 0:
+        return []
+    dim = column.type.list_size
+    # .values ignores the array offset, so slice the flat buffer explicitly
+    flat = column.values.slice(column.offset * dim, len(column) * dim)
+    matrix = flat.to_numpy(zero_copy_only=False).astype(np.float32, copy=False).reshape(-1, dim)
+    rows = list(matrix)
+    if column.null_count:
+        for i in np.flatnonzero(column.is_null().to_numpy(zero_copy_only=False)):
+            rows[i] = None
+    return rows
+
+
+def write_dataset(df: pd.DataFrame, path, embeddings: Optional[np.ndarray] = None,
+                  compression: str = "zstd") -> Path:
+    """
+    Write a dataset, choosing the format from the extension.
+
+    Args:
+        df: Video rows
+        path: Output path (.csv, .parquet/.pq or .arrow/.feather)
+        embeddings: Optional (n_rows, dim) array written as the embeddings column
+                    (JSON strings in CSV, fixed_size_list<float32> otherwise)
+        compression: Codec for Parquet/Arrow
+
+    Returns:
+        The output path
+    """
+    path = Path(path)
+    fmt = dataset_format(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+
+    if fmt == "csv":
+        if embeddings is not None:
+            df = df.assign(**{EMBEDDINGS_COLUMN: [json.dumps(row.tolist()) for row in embeddings]})
+        df.to_csv(path, index=False)
+        return path
+
+    import pyarrow as pa
+
+    if embeddings is not None:
+        df = df.drop(columns=[EMBEDDINGS_COLUMN], errors="ignore")
+    table = pa.Table.from_pandas(df, preserve_index=False)
+    if embeddings is not None:
+        table = table.append_column(EMBEDDINGS_COLUMN, _embeddings_to_arrow(embeddings))
+
+    if fmt == "parquet":
+        import pyarrow.parquet as pq
+        pq.write_table(table, path, compression=compression)
+    else:
+        import pyarrow.feather as feather
+        feather.write_feather(table, path, compression=compression)
+    return path
+
+
+def read_dataset(path, columns: Optional[List[str]] = None) -> pd.DataFrame:
+    """
+    Read a dataset, choosing the format from the extension.
+
+    Args:
+        path: Input path (.csv, .parquet/.pq or .arrow/.feather)
+        columns: Optional projection; names missing from the file are ignored
+
+    Returns:
+        DataFrame. From Parquet/Arrow the embeddings column holds float32
+        row vectors; from CSV it holds the JSON strings.
+    """
+    path = Path(path)
+    fmt = dataset_format(path)
+
+    if fmt == "csv":
+        if columns is None:
+            return pd.read_csv(path)
+        wanted = set(columns)
+        return pd.read_csv(path, usecols=lambda name: name in wanted)
+
+    if fmt == "parquet":
+        import pyarrow.parquet as pq
+        names = pq.read_schema(path).names
+        read = lambda cols: pq.read_table(path, columns=cols)
+    else:
+        import pyarrow.feather as feather
+        import pyarrow.ipc as ipc
+        with ipc.open_file(path) as reader:
+            names = reader.schema.names
+        read = lambda cols: feather.read_table(path, columns=cols)
+
+    selected = names if columns is None else [name for name in names if name in set(columns)]
+    table = read(selected)
+
+    embeddings = None
+    if EMBEDDINGS_COLUMN in table.column_names:
+        embeddings = _embeddings_from_arrow(table.column(EMBEDDINGS_COLUMN))
+        table = table.drop_columns([EMBEDDINGS_COLUMN])
+
+    df = table.to_pandas()
+    if embeddings is not None:
+        df[EMBEDDINGS_COLUMN] = pd.Series(embeddings, index=df.index, dtype=object)
+    return df
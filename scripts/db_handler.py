@@ -3,21 +3,227 @@ Vector Database Handler for YouTube Semantic Search
 
 This module provides a clean interface for interacting with ChromaDB
 to store and retrieve video metadata, transcripts, and embeddings.
+
+Collections are tagged with the embedding model and dimension they were
+built with, and may be opened through an alias: aliases.json in the
+database directory maps a stable name (COLLECTION_NAME) to a versioned
+collection ("youtube_videos__all-MiniLM-L6-v2__384__v2"). scripts/reembed.py
+fills a new version while the old one keeps serving, then switches the
+alias atomically.
+
+Writes made through an alias hold a shared lock on the database directory
+(aliases.lock) and re-resolve the alias first, so a writer that opened the
+alias before a switch writes to the new target afterwards (or fails with
+ModelMismatchError if the new target uses another model). reembed.py holds
+the lock exclusively for its final catch-up and the switch, so no write
+lands in the old collection after it was last compared. Where fcntl is not
+available (Windows) the lock does nothing; pause writers during a switch.
+
+Every write that adds, replaces or removes vectors bumps a per-collection
+counter (<collection>.vector-writes), which tells sidecars built from the
+vectors, such as the reduced index, that they are out of date.
+
+A VideoVectorDB opened with neighbours_path keeps the related-video table
+(scripts/neighbours.py) in step with its writes: upserts and embedding
+updates add rows and deletes remove them. Changes are queued and applied
+to the saved table every NEIGHBOURS_FLUSH_SECONDS, on flush_neighbours()
+and at exit, under the table's lock.
 """
 
 import chromadb
 from chromadb.config import Settings
 import numpy as np
-from typing import List, Dict, Optional, Tuple
+from typing import Dict, Iterator, List, Optional, Sequence, Tuple
+from contextlib import contextmanager
+import atexit
+import functools
 import json
+import os
 from pathlib import Path
+import re
 import sys
+import threading
+import time
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
 
 # Add project root to path
 ROOT_DIR = Path(__file__).resolve().parents[1]
 sys.path.append(str(ROOT_DIR))
 
-from config import VECTOR_DB_PATH, COLLECTION_NAME, DISTANCE_METRIC
+from config import (VECTOR_DB_PATH, COLLECTION_NAME, DISTANCE_METRIC, EMBEDDING_MODEL, EMBEDDING_DIMENSION,
+                    REDUCED_PATH, REDUCED_RESCORE_DEPTH, NEIGHBOURS_FLUSH_SECONDS)
+from scripts.metrics import metrics, status
+
+# Fields a video lookup can return, and the ChromaDB include name of each
+VIDEO_FIELDS = ('metadata', 'transcript', 'embedding')
+_CHROMA_INCLUDE = {'metadata': 'metadatas', 'transcript': 'documents', 'embedding': 'embeddings'}
+
+# Per-ID outcomes of the bulk operations
+STATUS_OK = "ok"
+STATUS_MISSING = "missing"
+STATUS_ERROR = "error"
+
+# Collection metadata keys recording the embedding model
+MODEL_KEY = "embedding_model"
+DIMENSION_KEY = "embedding_dimension"
+
+# Alias table in the database directory: {"alias": "collection name"}
+ALIASES_FILE = "aliases.json"
+ALIAS_LOCK_FILE = "aliases.lock"
+# One byte is appended per write that adds, replaces or removes vectors, so
+# the file size counts them (sidecars record the count they were built at)
+VECTOR_WRITES_SUFFIX = ".vector-writes"
+VERSION_SEPARATOR = "__"
+
+# Database directories this process holds the exclusive alias lock on
+_exclusive_locks = set()
+_exclusive_guard = threading.Lock()
+
+
+class ModelMismatchError(ValueError):
+    """The query model does not match the model a collection was embedded with."""
+
+
+def _count_status(statuses: Dict[str, str], outcome: str) -> int:
+    return sum(1 for value in statuses.values() if value == outcome)
+
+
+def check_fields(fields: Sequence[str]) -> Sequence[str]:
+    """
+    Validate the field names passed to get_video_by_id / get_videos.
+    
+    Raises:
+        ValueError: For unknown field names
+    """
+    unknown = set(fields) - set(VIDEO_FIELDS)
+    if unknown:
+        raise ValueError(f"Unknown video field(s): {', '.join(sorted(unknown))} "
+                         f"(expected any of: {', '.join(VIDEO_FIELDS)})")
+    return fields
+
+
+def read_aliases(persist_directory: str = VECTOR_DB_PATH) -> Dict[str, str]:
+    """Alias -> collection name table of a database directory (empty if none)."""
+    path = Path(persist_directory) / ALIASES_FILE
+    if not path.exists():
+        return {}
+    with open(path, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def vector_write_count(persist_directory: str, collection_name: str) -> int:
+    """Writes that changed the vectors of a collection so far (a stat, no database round trip)."""
+    try:
+        return os.stat(Path(persist_directory) / f"{collection_name}{VECTOR_WRITES_SUFFIX}").st_size
+    except FileNotFoundError:
+        return 0
+
+
+def resolve_collection(persist_directory: str, name: str) -> str:
+    """Collection an alias points to (names that are not aliases resolve to themselves)."""
+    return read_aliases(persist_directory).get(name, name)
+
+
+def set_alias(persist_directory: str, alias: str, collection_name: str) -> Optional[str]:
+    """
+    Point an alias at a collection.
+    
+    The table is rewritten to a temporary file and renamed over the old one,
+    so processes opening the alias see either the old or the new target.
+    Pointing an alias at its own name removes it.
+    
+    Returns:
+        The collection the alias pointed to before
+    """
+    aliases = read_aliases(persist_directory)
+    previous = aliases.get(alias, alias)
+    if collection_name == alias:
+        aliases.pop(alias, None)
+    else:
+        aliases[alias] = collection_name
+    
+    path = Path(persist_directory) / ALIASES_FILE
+    tmp_path = path.with_name(f"{ALIASES_FILE}.tmp-{os.getpid()}")
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(aliases, f, indent=2, sort_keys=True)
+    os.replace(tmp_path, path)
+    return previous
+
+
+@contextmanager
+def alias_lock(persist_directory: str, exclusive: bool = False):
+    """
+    Hold the alias lock of a database directory.
+    
+    Writers take it shared for each write; reembed.py takes it exclusive to
+    catch up and switch an alias with no writes in between. A process that
+    holds it exclusively does not wait for its own shared requests.
+    """
+    key = str(Path(persist_directory).resolve())
+    with _exclusive_guard:
+        held = key in _exclusive_locks
+    if fcntl is None or (held and not exclusive):
+        yield
+        return
+    
+    Path(persist_directory).mkdir(parents=True, exist_ok=True)
+    with open(Path(persist_directory) / ALIAS_LOCK_FILE, "a") as f:
+        fcntl.flock(f, fcntl.LOCK_EX if exclusive else fcntl.LOCK_SH)
+        if exclusive:
+            with _exclusive_guard:
+                _exclusive_locks.add(key)
+        try:
+            yield
+        finally:
+            if exclusive:
+                with _exclusive_guard:
+                    _exclusive_locks.discard(key)
+            fcntl.flock(f, fcntl.LOCK_UN)
+
+
+def _writes(method):
+    """Run a VideoVectorDB write under the shared alias lock, on the collection the alias points to now."""
+    @functools.wraps(method)
+    def wrapper(self, *args, **kwargs):
+        with alias_lock(self.persist_directory):
+            self._follow_alias()
+            return method(self, *args, **kwargs)
+    return wrapper
+
+
+def versioned_name(alias: str, model_name: str, dimension: int, version: int) -> str:
+    """Collection name of one version of an alias, e.g. youtube_videos__all-MiniLM-L6-v2__384__v2."""
+    model_slug = re.sub(r"[^a-zA-Z0-9._-]+", "-", model_name).strip("-._")
+    return VERSION_SEPARATOR.join([alias, model_slug, str(dimension), f"v{version}"])
+
+
+def check_model(info: Dict, model_name: Optional[str], dimension: Optional[int], source: str) -> None:
+    """
+    Refuse a query model that does not match a collection's model tags.
+    
+    Args:
+        info: {'model': ..., 'dimension': ...} of the collection (None = untagged)
+        model_name: Query model name (None skips the name check)
+        dimension: Query embedding dimension (None skips the dimension check)
+        source: Collection / index name used in the error message
+    
+    Raises:
+        ModelMismatchError: If a tagged value differs
+    """
+    if dimension is not None and info.get('dimension') is not None and int(info['dimension']) != int(dimension):
+        raise ModelMismatchError(
+            f"{source} holds {info['dimension']}-dim embeddings ({info.get('model')}), "
+            f"but the query model produces {dimension} dims"
+        )
+    if model_name is not None and info.get('model') is not None and info['model'] != model_name:
+        raise ModelMismatchError(
+            f"{source} was embedded with {info['model']}, not {model_name}. "
+            f"Search with --model {info['model']}, or re-embed with scripts/reembed.py"
+        )
 
 
 class VideoVectorDB:
@@ -31,16 +237,39 @@ class VideoVectorDB:
     """
     
     def __init__(self, persist_directory: str = VECTOR_DB_PATH, 
-                 collection_name: str = COLLECTION_NAME):
+                 collection_name: str = COLLECTION_NAME,
+                 embedding_model: str = EMBEDDING_MODEL,
+                 embedding_dimension: int = EMBEDDING_DIMENSION,
+                 reduced_path: str = REDUCED_PATH,
+                 neighbours_path: Optional[str] = None):
         """
         Initialize ChromaDB client and collection.
         
         Args:
             persist_directory: Path to store ChromaDB data
-            collection_name: Name of the collection
+            collection_name: Name of the collection, or an alias of one
+            embedding_model: Model tag of the collection if it is created
+            embedding_dimension: Dimension tag of the collection if it is created
+            reduced_path: Reduced-dimension sidecar (see scripts/reduced_index.py)
+                          used by search_videos(dims=...); opened on first use
+            neighbours_path: Related-video table kept in step with writes (None
+                             leaves it alone; `neighbours.py --sync` catches up)
         """
         self.persist_directory = persist_directory
-        self.collection_name = collection_name
+        self.alias = collection_name
+        self.collection_name = resolve_collection(persist_directory, collection_name)
+        self.embedding_model = embedding_model
+        self.embedding_dimension = embedding_dimension
+        self.reduced_path = reduced_path
+        self._reduced = None  # Not loaded yet (False = no usable sidecar)
+        self._reduced_verdict = (None, False)  # (vector write count, sidecar current) last checked
+        self.neighbours_path = neighbours_path
+        self._neighbour_changes = {}  # Video ID -> new embedding (None = deleted) since the last flush
+        self._neighbours_usable = True  # False once the table turned out missing or of another model
+        self._neighbours_flushed = time.monotonic()
+        self._neighbours_lock = threading.Lock()
+        if neighbours_path:
+            atexit.register(self.flush_neighbours)
         
         # Create directory if it doesn't exist
         Path(persist_directory).mkdir(parents=True, exist_ok=True)
@@ -57,20 +286,71 @@ class VideoVectorDB:
     def _get_or_create_collection(self):
         """Get existing collection or create a new one."""
         # Use ChromaDB's built-in get_or_create_collection method
+        metadata = {"hnsw:space": DISTANCE_METRIC}
+        if self.embedding_model is not None:
+            metadata.update({MODEL_KEY: self.embedding_model, DIMENSION_KEY: int(self.embedding_dimension)})
         collection = self.client.get_or_create_collection(
             name=self.collection_name,
-            metadata={"hnsw:space": DISTANCE_METRIC}
+            metadata=metadata
         )
         
+        # An existing collection keeps its own tags (collections created before
+        # tagging have none)
+        tags = collection.metadata or {}
+        self.embedding_model = tags.get(MODEL_KEY)
+        self.embedding_dimension = tags.get(DIMENSION_KEY)
+        
         # Check if collection already had data
         count = collection.count()
         if count > 0:
-            print(f"✓ Loaded existing collection: {self.collection_name} ({count} videos)")
+            status(f"✓ Loaded existing collection: {self.collection_name} ({count} videos)")
         else:
-            print(f"✓ Created new collection: {self.collection_name}")
+            status(f"✓ Created new collection: {self.collection_name}")
         
         return collection
     
+    def _follow_alias(self) -> None:
+        """
+        Switch to the collection the alias points to now, if it moved since
+        this handle was opened (e.g. reembed.py switched it).
+        
+        Raises:
+            ModelMismatchError: The new target is embedded with another model
+        """
+        current = resolve_collection(self.persist_directory, self.alias)
+        if current == self.collection_name:
+            return
+        # Queued changes belong to the old collection's table
+        self.flush_neighbours()
+        collection = self.client.get_collection(name=current)
+        tags = collection.metadata or {}
+        if (tags.get(MODEL_KEY), tags.get(DIMENSION_KEY)) != (self.embedding_model, self.embedding_dimension):
+            raise ModelMismatchError(
+                f"{self.alias} now points to {current} ({tags.get(MODEL_KEY) or 'untagged'}), but this "
+                f"writer embeds for {self.collection_name} ({self.embedding_model or 'untagged'}). "
+                f"Restart it with the new model"
+            )
+        status(f"↪️  {self.alias} now points to {current} (was {self.collection_name}); writing there")
+        self.collection_name, self.collection = current, collection
+        self._reduced = None
+        self._reduced_verdict = (None, False)
+        self._neighbours_usable = True
+    
+    def model_info(self) -> Dict:
+        """Embedding model and dimension the collection was built with (None if untagged)."""
+        return {'model': self.embedding_model, 'dimension': self.embedding_dimension}
+    
+    def check_model(self, model_name: Optional[str] = None, dimension: Optional[int] = None) -> None:
+        """
+        Raise ModelMismatchError if the collection was embedded with another model.
+        
+        Args:
+            model_name: Query model name (None skips the name check)
+            dimension: Query embedding dimension (None skips the dimension check)
+        """
+        check_model(self.model_info(), model_name, dimension, f"Collection {self.collection_name}")
+    
+    @_writes
     def insert_videos(self, 
                      video_ids: List[str],
                      transcripts: List[str],
@@ -86,23 +366,151 @@ class VideoVectorDB:
             metadata: List of dicts containing video metadata
                      (title, channel_title, view_count, duration_seconds, etc.)
         """
-        # Convert numpy array to list for ChromaDB
-        embeddings_list = embeddings.tolist()
+        # ChromaDB rejects oversized requests, so add in chunks
+        batch_size = self.client.get_max_batch_size()
         
-        # Add videos to collection
-        self.collection.add(
-            ids=video_ids,
-            documents=transcripts,
-            embeddings=embeddings_list,
-            metadatas=metadata
-        )
+        for start in range(0, len(video_ids), batch_size):
+            end = start + batch_size
+            self.collection.add(
+                ids=video_ids[start:end],
+                documents=transcripts[start:end],
+                embeddings=embeddings[start:end].tolist(),
+                metadatas=metadata[start:end]
+            )
+        
+        status(f"✓ Inserted {len(video_ids)} videos into {self.collection_name}")
+        self._vectors_changed(added=video_ids, embeddings=embeddings)
+    
+    @_writes
+    def upsert_videos(self,
+                      video_ids: List[str],
+                      transcripts: List[str],
+                      embeddings: np.ndarray,
+                      metadata: List[Dict]) -> None:
+        """
+        Insert videos, replacing any that are already stored under the same ID.
+        
+        Same arguments as insert_videos. Used by the streaming pipeline, where
+        a re-harvested video must overwrite its previous version.
+        """
+        batch_size = self.client.get_max_batch_size()
+        
+        for start in range(0, len(video_ids), batch_size):
+            end = start + batch_size
+            self.collection.upsert(
+                ids=video_ids[start:end],
+                documents=transcripts[start:end],
+                embeddings=embeddings[start:end].tolist(),
+                metadatas=metadata[start:end]
+            )
+        
+        status(f"✓ Upserted {len(video_ids)} videos into {self.collection_name}")
+        self._vectors_changed(added=video_ids, embeddings=embeddings)
+    
+    def vector_write_count(self) -> int:
+        """Writes that changed this collection's vectors so far."""
+        return vector_write_count(self.persist_directory, self.collection_name)
+    
+    def _count_vector_write(self) -> None:
+        with open(Path(self.persist_directory) / f"{self.collection_name}{VECTOR_WRITES_SUFFIX}", "ab") as f:
+            f.write(b".")
+    
+    def _vectors_changed(self, added: Sequence[str] = (), embeddings: Optional[np.ndarray] = None,
+                         removed: Sequence[str] = ()) -> None:
+        """
+        Count a write that added/replaced or removed vectors, and queue its
+        rows for the neighbour table (flushing the queue if a flush is due).
+        """
+        if not (len(added) or len(removed)):
+            return
+        self._count_vector_write()
+        if not self.neighbours_path or not self._neighbours_usable:
+            return
+        with self._neighbours_lock:
+            for video_id in removed:
+                self._neighbour_changes[video_id] = None
+            if len(added):
+                vectors = np.array(embeddings, dtype=np.float32).reshape(len(added), -1)
+                self._neighbour_changes.update(zip(added, vectors))
+        if time.monotonic() - self._neighbours_flushed >= NEIGHBOURS_FLUSH_SECONDS:
+            self.flush_neighbours()
+    
+    def flush_neighbours(self, clear: bool = False) -> None:
+        """
+        Apply the queued changes to the saved neighbour table.
+        
+        Args:
+            clear: Remove every video from the table first
+        """
+        from scripts.neighbours import apply_changes
+        
+        with self._neighbours_lock:
+            changes, self._neighbour_changes = self._neighbour_changes, {}
+            self._neighbours_flushed = time.monotonic()
+            if not self.neighbours_path or not self._neighbours_usable or not (changes or clear):
+                return
+            with metrics.timer("ytss_db_seconds", operation="neighbours"):
+                self._neighbours_usable = apply_changes(self.neighbours_path, changes, self.embedding_model,
+                                                        self.collection_name, clear)
+    
+    def _query(self, query_embedding: np.ndarray, top_k: int,
+               metadata_filter: Optional[Dict], include: List[str]) -> Dict:
+        """Run a nearest-neighbour query and return the first (only) query's results."""
+        # Convert to list and ensure 2D shape for ChromaDB
+        if query_embedding.ndim == 1:
+            query_embedding = query_embedding.reshape(1, -1)
+        
+        with metrics.timer("ytss_db_seconds", operation="query"):
+            results = self.collection.query(
+                query_embeddings=query_embedding.tolist(),
+                n_results=top_k,
+                where=metadata_filter,
+                include=include
+            )
+        return {key: results[key][0] for key in ['ids'] + include}
+    
+    def reduced_index(self):
+        """The reduced-dimension sidecar, loaded on first use (None if it was not built)."""
+        if self._reduced is None and self.reduced_path:
+            from scripts.reduced_index import load_reduced
+            reduced = load_reduced(self.reduced_path)
+            built_from = reduced.manifest.get('collection_name') if reduced is not None else None
+            if built_from and built_from != self.collection_name:
+                status(f"⚠️  Reduced index at {self.reduced_path} was built from {built_from}; ignoring it")
+                reduced = None
+            self._reduced = reduced if reduced is not None else False
+            if reduced is not None and not self._reduced_current(reduced):
+                status(f"⚠️  Reduced index at {self.reduced_path} predates writes to {self.collection_name}; "
+                       f"searching full vectors until it is rebuilt")
+        return self._reduced or None
+    
+    def _reduced_current(self, reduced) -> bool:
+        """
+        Whether the reduced sidecar still matches the collection's vectors.
         
-        print(f"✓ Inserted {len(video_ids)} videos into {self.collection_name}")
+        A sidecar records the vector write count it was built at; any write
+        since (adds, upserts, embedding updates, deletes) makes reduced
+        searches fall back to the full index until it is rebuilt. The
+        verdict is cached until the count moves, so a search costs a stat
+        rather than a database round trip. Sidecars built before the count
+        was recorded are compared by collection size.
+        """
+        writes = self.vector_write_count()
+        checked_at, current = self._reduced_verdict
+        if writes != checked_at:
+            if reduced.manifest.get('vector_writes') is not None:
+                current = reduced.manifest['vector_writes'] == writes
+            else:
+                current = self.collection.count() == reduced.manifest.get('videos', len(reduced))
+            self._reduced_verdict = (writes, current)
+        return current
     
     def search_videos(self, 
                      query_embedding: np.ndarray,
                      top_k: int = 5,
-                     metadata_filter: Optional[Dict] = None) -> Tuple[List[str], List[float], List[Dict]]:
+                     metadata_filter: Optional[Dict] = None,
+                     dims: Optional[int] = None,
+                     rescore_depth: int = REDUCED_RESCORE_DEPTH) -> Tuple[List[str], List[float], List[Dict]]:
         """
         Search for similar videos using query embedding.
         
@@ -110,59 +518,120 @@ class VideoVectorDB:
             query_embedding: Query embedding vector (1D numpy array)
             top_k: Number of results to return
             metadata_filter: Optional filter dict (e.g., {"view_count": {"$gte": 10000}})
+            dims: Score a first pass on this many reduced dimensions and re-score
+                  the shortlist with full vectors (needs the reduced sidecar;
+                  filtered searches always use the full index)
+            rescore_depth: Shortlist size re-scored with full vectors when dims is set
         
         Returns:
             Tuple of (video_ids, distances, metadata)
         """
-        # Convert to list and ensure 2D shape for ChromaDB
-        if query_embedding.ndim == 1:
-            query_embedding = query_embedding.reshape(1, -1)
-        
-        query_list = query_embedding.tolist()
-        
-        # Perform search
-        results = self.collection.query(
-            query_embeddings=query_list,
-            n_results=top_k,
-            where=metadata_filter,
-            include=["metadatas", "distances"]
-        )
+        reduced = self.reduced_index() if dims and not metadata_filter else None
+        if reduced is not None and reduced.dimension == query_embedding.shape[-1]:
+            if self._reduced_current(reduced):
+                return self._search_reduced(reduced, query_embedding, top_k, dims, rescore_depth)
+            metrics.counter("ytss_reduced_fallbacks_total",
+                            "Reduced-dimension searches run on the full index (stale sidecar)").inc()
+        results = self._query(query_embedding, top_k, metadata_filter, ["metadatas", "distances"])
+        return results['ids'], results['distances'], results['metadatas']
+    
+    def _search_reduced(self, reduced, query_embedding: np.ndarray, top_k: int, dims: int,
+                        rescore_depth: int) -> Tuple[List[str], List[float], List[Dict]]:
+        """
+        Reduced first pass + full rescoring, then one metadata lookup for the hits.
         
-        # Extract results
-        video_ids = results['ids'][0]
-        distances = results['distances'][0]
-        metadatas = results['metadatas'][0]
+        Videos deleted since the sidecar was built are skipped, and as many
+        extra hits are fetched in their place until top_k are found.
+        """
+        fetch = top_k
+        while True:
+            with metrics.timer("ytss_db_seconds", operation="query_reduced"):
+                video_ids, distances = reduced.search_ids(query_embedding, fetch, dims,
+                                                          max(rescore_depth, fetch))
+            records = self.get_videos(video_ids, fields=('metadata',))
+            kept = [i for i, record in enumerate(records) if record is not None]
+            if len(kept) >= top_k or len(video_ids) < fetch:
+                break
+            fetch += top_k - len(kept)
+        kept = kept[:top_k]
+        return ([video_ids[i] for i in kept], [distances[i] for i in kept],
+                [records[i]['metadata'] for i in kept])
+    
+    def search_candidates(self,
+                          query_embedding: np.ndarray,
+                          top_k: int = 100,
+                          metadata_filter: Optional[Dict] = None) -> Tuple[List[str], List[float], List[Dict], np.ndarray]:
+        """
+        Like search_videos, but also returns the candidates' embeddings
+        (for reranking).
         
-        return video_ids, distances, metadatas
+        Returns:
+            Tuple of (video_ids, distances, metadata, embeddings matrix)
+        """
+        results = self._query(query_embedding, top_k, metadata_filter,
+                              ["metadatas", "distances", "embeddings"])
+        embeddings = np.asarray(results['embeddings'], dtype=np.float32)
+        if len(results['ids']) == 0:
+            embeddings = embeddings.reshape(0, query_embedding.shape[-1])
+        return results['ids'], results['distances'], results['metadatas'], embeddings
     
-    def get_video_by_id(self, video_id: str) -> Optional[Dict]:
+    def get_video_by_id(self, video_id: str,
+                        fields: Sequence[str] = VIDEO_FIELDS) -> Optional[Dict]:
         """
         Retrieve a specific video by ID.
         
         Args:
             video_id: YouTube video ID
+            fields: Fields to load ('metadata', 'transcript', 'embedding');
+                    only these are read from the database
         
         Returns:
-            Dictionary with video data or None if not found
+            Dictionary with 'id' and the requested fields, or None if not found
         """
+        check_fields(fields)
         try:
-            result = self.collection.get(
-                ids=[video_id],
-                include=["metadatas", "documents", "embeddings"]
-            )
-            
-            if result['ids']:
-                return {
-                    'id': result['ids'][0],
-                    'transcript': result['documents'][0],
-                    'embedding': np.array(result['embeddings'][0]),
-                    'metadata': result['metadatas'][0]
-                }
-            return None
+            return self.get_videos([video_id], fields)[0]
         except Exception as e:
             print(f"Error retrieving video {video_id}: {e}")
             return None
     
+    def get_videos(self, video_ids: List[str],
+                   fields: Sequence[str] = ('metadata',)) -> List[Optional[Dict]]:
+        """
+        Retrieve several videos in as few round trips as possible.
+        
+        Args:
+            video_ids: YouTube video IDs
+            fields: Fields to load ('metadata', 'transcript', 'embedding')
+        
+        Returns:
+            List aligned with video_ids: a dict with 'id' and the requested
+            fields, or None for IDs that are not stored
+        
+        Raises:
+            ValueError: For unknown field names
+        """
+        include = [_CHROMA_INCLUDE[field] for field in check_fields(fields)]
+        batch_size = self.client.get_max_batch_size()
+        unique_ids = list(dict.fromkeys(video_ids))
+        found = {}
+        
+        for start in range(0, len(unique_ids), batch_size):
+            with metrics.timer("ytss_db_seconds", operation="get"):
+                result = self.collection.get(ids=unique_ids[start:start + batch_size], include=include)
+            for i, video_id in enumerate(result['ids']):
+                record = {'id': video_id}
+                if 'transcript' in fields:
+                    record['transcript'] = result['documents'][i]
+                if 'embedding' in fields:
+                    record['embedding'] = np.array(result['embeddings'][i])
+                if 'metadata' in fields:
+                    record['metadata'] = result['metadatas'][i]
+                found[video_id] = record
+        
+        return [found.get(video_id) for video_id in video_ids]
+    
+    @_writes
     def update_video(self, video_id: str, 
                     transcript: Optional[str] = None,
                     embedding: Optional[np.ndarray] = None,
@@ -190,12 +659,17 @@ class VideoVectorDB:
                 update_dict["metadatas"] = [metadata]
             
             self.collection.update(**update_dict)
-            print(f"✓ Updated video: {video_id}")
+            status(f"✓ Updated video: {video_id}")
+            # ChromaDB ignores updates of unknown IDs; only stored videos count
+            if embedding is not None and self._existing_ids([video_id]):
+                self._vectors_changed(added=[video_id], embeddings=np.asarray(embedding).reshape(1, -1))
             return True
         except Exception as e:
+            metrics.counter("ytss_errors_total", operation="update").inc()
             print(f"Error updating video {video_id}: {e}")
             return False
     
+    @_writes
     def delete_video(self, video_id: str) -> bool:
         """
         Delete a video from the collection.
@@ -208,12 +682,215 @@ class VideoVectorDB:
         """
         try:
             self.collection.delete(ids=[video_id])
-            print(f"✓ Deleted video: {video_id}")
+            status(f"✓ Deleted video: {video_id}")
+            self._vectors_changed(removed=[video_id])
             return True
         except Exception as e:
+            metrics.counter("ytss_errors_total", operation="delete").inc()
             print(f"Error deleting video {video_id}: {e}")
             return False
     
+    def iter_pages(self, fields: Sequence[str] = ('metadata',),
+                   page_size: int = 5000) -> Iterator[Tuple[List[str], Dict[str, list]]]:
+        """
+        Page through the whole collection, reading only the requested fields.
+        
+        Args:
+            fields: Fields to load ('metadata', 'transcript', 'embedding')
+            page_size: Videos per page
+        
+        Yields:
+            Tuples of (video_ids, {field: values aligned with video_ids});
+            embeddings come back as a float32 matrix
+        """
+        include = [_CHROMA_INCLUDE[field] for field in check_fields(fields)]
+        offset = 0
+        while True:
+            with metrics.timer("ytss_db_seconds", operation="get"):
+                page = self.collection.get(limit=page_size, offset=offset, include=include)
+            if not page['ids']:
+                return
+            columns = {field: page[_CHROMA_INCLUDE[field]] for field in fields}
+            if 'embedding' in columns:
+                columns['embedding'] = np.asarray(columns['embedding'], dtype=np.float32)
+            yield page['ids'], columns
+            offset += len(page['ids'])
+    
+    def iter_metadata(self, page_size: int = 5000) -> Iterator[Tuple[List[str], List[Dict]]]:
+        """
+        Page through the stored metadata without touching documents or embeddings.
+        
+        Args:
+            page_size: Videos per page
+        
+        Yields:
+            Tuples of (video_ids, metadatas)
+        """
+        for video_ids, columns in self.iter_pages(('metadata',), page_size):
+            yield video_ids, columns['metadata']
+    
+    # ----------------------------------------------------------------
+    # Bulk operations: batched internally, one status per ID, no per-item output
+    # ----------------------------------------------------------------
+    def get_many(self, video_ids: List[str],
+                 fields: Sequence[str] = ('metadata',)) -> Dict[str, Optional[Dict]]:
+        """
+        Retrieve several videos, keyed by ID.
+        
+        Args:
+            video_ids: YouTube video IDs
+            fields: Fields to load ('metadata', 'transcript', 'embedding')
+        
+        Returns:
+            Dict of video ID -> record (None for IDs that are not stored)
+        """
+        return dict(zip(video_ids, self.get_videos(video_ids, fields)))
+    
+    def _existing_ids(self, video_ids: List[str]) -> set:
+        """IDs from video_ids that are stored (ChromaDB silently skips unknown IDs on update)."""
+        batch_size = self.client.get_max_batch_size()
+        existing = set()
+        for start in range(0, len(video_ids), batch_size):
+            with metrics.timer("ytss_db_seconds", operation="get"):
+                result = self.collection.get(ids=video_ids[start:start + batch_size], include=[])
+            existing.update(result['ids'])
+        return existing
+    
+    def _run_batched(self, operation: str, video_ids: List[str], call) -> Dict[str, str]:
+        """
+        Apply call(start, end) to video_ids in ChromaDB-sized batches.
+        
+        Returns:
+            Dict of video ID -> STATUS_OK or STATUS_ERROR (a failed batch marks
+            all of its IDs and the remaining batches still run)
+        """
+        batch_size = self.client.get_max_batch_size()
+        statuses = {}
+        for start in range(0, len(video_ids), batch_size):
+            end = start + batch_size
+            try:
+                with metrics.timer("ytss_db_seconds", operation=operation):
+                    call(start, end)
+                outcome = STATUS_OK
+            except Exception as e:
+                metrics.counter("ytss_errors_total", operation=operation).inc()
+                print(f"Error in {operation} batch of {len(video_ids[start:end])} videos: {e}")
+                outcome = STATUS_ERROR
+            statuses.update(dict.fromkeys(video_ids[start:end], outcome))
+        return statuses
+    
+    @_writes
+    def update_many(self, video_ids: List[str],
+                    transcripts: Optional[List[str]] = None,
+                    embeddings: Optional[np.ndarray] = None,
+                    metadata: Optional[List[Dict]] = None) -> Dict[str, str]:
+        """
+        Update several videos.
+        
+        Args:
+            video_ids: YouTube video IDs (no duplicates)
+            transcripts: New transcripts, aligned with video_ids (optional)
+            embeddings: New embeddings (n_videos, embedding_dim) (optional)
+            metadata: Metadata dicts aligned with video_ids (optional). Keys are
+                      merged into the stored metadata; a None value removes a key.
+        
+        Returns:
+            Dict of video ID -> STATUS_OK, STATUS_MISSING or STATUS_ERROR
+        """
+        if len(set(video_ids)) != len(video_ids):
+            raise ValueError("update_many got duplicate video IDs")
+        columns = {'documents': transcripts, 'embeddings': embeddings, 'metadatas': metadata}
+        columns = {name: values for name, values in columns.items() if values is not None}
+        for name, values in columns.items():
+            if len(values) != len(video_ids):
+                raise ValueError(f"{name} has {len(values)} entries for {len(video_ids)} video IDs")
+        
+        existing = self._existing_ids(video_ids)
+        positions = [i for i, video_id in enumerate(video_ids) if video_id in existing]
+        ids = [video_ids[i] for i in positions]
+        columns = {name: [values[i] for i in positions] for name, values in columns.items()}
+        if 'embeddings' in columns:
+            columns['embeddings'] = np.asarray(columns['embeddings'], dtype=np.float32).reshape(len(ids), -1)
+        
+        def update(start, end):
+            batch = {name: values[start:end] for name, values in columns.items()}
+            if 'embeddings' in batch:
+                batch['embeddings'] = batch['embeddings'].tolist()
+            self.collection.update(ids=ids[start:end], **batch)
+        
+        statuses = dict.fromkeys(video_ids, STATUS_MISSING)
+        statuses.update(self._run_batched("update", ids, update))
+        if 'embeddings' in columns:
+            updated = [i for i, video_id in enumerate(ids) if statuses[video_id] == STATUS_OK]
+            self._vectors_changed(added=[ids[i] for i in updated], embeddings=columns['embeddings'][updated])
+        status(f"✓ Updated {_count_status(statuses, STATUS_OK)} of {len(statuses)} videos "
+               f"in {self.collection_name}")
+        return statuses
+    
+    def update_metadata_many(self, metadata_by_id: Dict[str, Dict]) -> Dict[str, str]:
+        """
+        Update metadata only (e.g. refreshed view counts), merging keys.
+        
+        Args:
+            metadata_by_id: Dict of video ID -> metadata fields to set
+        
+        Returns:
+            Dict of video ID -> STATUS_OK, STATUS_MISSING or STATUS_ERROR
+        """
+        return self.update_many(list(metadata_by_id), metadata=list(metadata_by_id.values()))
+    
+    def update_embeddings_many(self, video_ids: List[str], embeddings: np.ndarray) -> Dict[str, str]:
+        """
+        Update embeddings only (e.g. after re-embedding with a new model).
+        
+        Args:
+            video_ids: YouTube video IDs
+            embeddings: Numpy array of embeddings (n_videos, embedding_dim)
+        
+        Returns:
+            Dict of video ID -> STATUS_OK, STATUS_MISSING or STATUS_ERROR
+        """
+        return self.update_many(video_ids, embeddings=embeddings)
+    
+    @_writes
+    def delete_many(self, video_ids: List[str]) -> Dict[str, str]:
+        """
+        Delete several videos.
+        
+        Args:
+            video_ids: YouTube video IDs
+        
+        Returns:
+            Dict of video ID -> STATUS_OK, STATUS_MISSING or STATUS_ERROR
+        """
+        unique_ids = list(dict.fromkeys(video_ids))
+        stored = self._existing_ids(unique_ids)
+        existing = [video_id for video_id in unique_ids if video_id in stored]
+        statuses = dict.fromkeys(video_ids, STATUS_MISSING)
+        statuses.update(self._run_batched(
+            "delete", existing, lambda start, end: self.collection.delete(ids=existing[start:end])
+        ))
+        status(f"✓ Deleted {_count_status(statuses, STATUS_OK)} of {len(statuses)} videos "
+               f"from {self.collection_name}")
+        self._vectors_changed(removed=[video_id for video_id in existing if statuses[video_id] == STATUS_OK])
+        return statuses
+    
+    def delete_where(self, metadata_filter: Dict) -> Dict[str, str]:
+        """
+        Delete every video matching a metadata filter.
+        
+        Args:
+            metadata_filter: ChromaDB where filter (e.g. {"privacyStatus": "private"})
+        
+        Returns:
+            Dict of deleted video ID -> STATUS_OK or STATUS_ERROR
+        """
+        if not metadata_filter:
+            raise ValueError("delete_where needs a non-empty filter (use clear_collection to delete everything)")
+        with metrics.timer("ytss_db_seconds", operation="get"):
+            matches = self.collection.get(where=metadata_filter, include=[])['ids']
+        return self.delete_many(matches)
+    
     def get_collection_stats(self) -> Dict:
         """
         Get statistics about the collection.
@@ -226,10 +903,14 @@ class VideoVectorDB:
         return {
             'total_videos': count,
             'collection_name': self.collection_name,
+            'alias': self.alias if self.alias != self.collection_name else None,
             'persist_directory': self.persist_directory,
-            'distance_metric': DISTANCE_METRIC
+            'distance_metric': DISTANCE_METRIC,
+            'embedding_model': self.embedding_model,
+            'embedding_dimension': self.embedding_dimension
         }
     
+    @_writes
     def clear_collection(self) -> bool:
         """
         Delete all videos from collection (use with caution!).
@@ -240,9 +921,14 @@ class VideoVectorDB:
         try:
             self.client.delete_collection(name=self.collection_name)
             self.collection = self._get_or_create_collection()
-            print(f"✓ Cleared collection: {self.collection_name}")
+            self._count_vector_write()
+            with self._neighbours_lock:
+                self._neighbour_changes.clear()
+            self.flush_neighbours(clear=True)
+            status(f"✓ Cleared collection: {self.collection_name}")
             return True
         except Exception as e:
+            metrics.counter("ytss_errors_total", operation="clear").inc()
             print(f"Error clearing collection: {e}")
             return False
 
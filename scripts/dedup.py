@@ -0,0 +1,323 @@
+"""
+Near-duplicate Detection for YouTube Semantic Search
+
+Re-uploads, compilations and re-edits have near-identical transcripts and
+therefore near-identical embeddings. They crowd the top-k results and
+waste index space. This script groups them without comparing all pairs:
+
+1. SimHash (random-hyperplane LSH) over the stored embeddings: each band
+   of sign bits is a bucket key, and only videos sharing a bucket in some
+   band become candidate pairs
+2. Candidates are verified with exact cosine similarity: small buckets
+   all at once, large ones in blocks (no full similarity matrix is built)
+3. Verified pairs are merged into groups with union-find
+
+Each group keeps one canonical video (most views, then earliest upload).
+Every member gets `dup_group` (the canonical ID) and `is_duplicate`
+metadata. Search can then collapse duplicates with a metadata filter, and
+--compact deletes the non-canonical entries.
+
+Usage:
+    python scripts/dedup.py --dry-run
+    python scripts/dedup.py --threshold 0.95
+    python scripts/dedup.py --compact
+"""
+
+import argparse
+from pathlib import Path
+import sys
+import time
+from typing import Dict, List, Optional
+
+import numpy as np
+
+# Add project root to path
+ROOT_DIR = Path(__file__).resolve().parents[1]
+sys.path.append(str(ROOT_DIR))
+
+from config import (VECTOR_DB_PATH, COLLECTION_NAME, DEDUP_THRESHOLD, DEDUP_LSH_BANDS,
+                    DEDUP_LSH_BITS, NEIGHBOURS_PATH)
+from scripts.embedding_utils import normalise_rows
+
+DUP_GROUP_KEY = "dup_group"
+IS_DUPLICATE_KEY = "is_duplicate"
+
+# Matches canonical videos and videos that are in no group
+NOT_DUPLICATE_FILTER = {IS_DUPLICATE_KEY: {"$ne": True}}
+
+
+def collapse_filter(metadata_filter: Optional[Dict]) -> Dict:
+    """Combine a search filter with NOT_DUPLICATE_FILTER."""
+    if not metadata_filter:
+        return NOT_DUPLICATE_FILTER
+    return {"$and": [metadata_filter, NOT_DUPLICATE_FILTER]}
+
+
+# --------------------------------------------------------------------
+# Candidate generation (SimHash LSH)
+# --------------------------------------------------------------------
+def simhash_bands(vectors: np.ndarray, n_bands: int = DEDUP_LSH_BANDS,
+                  bits_per_band: int = DEDUP_LSH_BITS, seed: int = 0) -> np.ndarray:
+    """
+    Hash vectors into LSH band keys.
+
+    Two vectors at angle θ agree on each sign bit with probability 1 - θ/π,
+    so near-duplicates share at least one band key with high probability
+    while unrelated vectors rarely do.
+
+    Returns:
+        (n_vectors, n_bands) int64 bucket keys
+    """
+    if bits_per_band > 62:
+        raise ValueError("bits_per_band must be at most 62")
+    rng = np.random.default_rng(seed)
+    planes = rng.standard_normal((vectors.shape[1], n_bands * bits_per_band)).astype(np.float32)
+    bits = (vectors @ planes > 0).reshape(len(vectors), n_bands, bits_per_band)
+    weights = np.left_shift(np.int64(1), np.arange(bits_per_band, dtype=np.int64))
+    return bits.astype(np.int64) @ weights
+
+
+def _verify_pairs(vectors: np.ndarray, i: np.ndarray, j: np.ndarray, threshold: float) -> np.ndarray:
+    """Keep the candidate pairs (i, j) whose cosine similarity reaches the threshold."""
+    sims = np.einsum("ij,ij->i", vectors[i], vectors[j])
+    keep = sims >= threshold
+    return np.stack([np.minimum(i, j)[keep], np.maximum(i, j)[keep]], axis=1)
+
+
+def _verify_bucket(vectors: np.ndarray, members: np.ndarray, threshold: float,
+                   block_size: int) -> np.ndarray:
+    """Exact cosine check of all pairs in one large bucket, block_size rows at a time."""
+    bucket = vectors[members]
+    pairs = []
+    for start in range(0, len(members), block_size):
+        sims = bucket[start:start + block_size] @ bucket.T
+        rows, cols = np.nonzero(sims >= threshold)
+        rows += start
+        keep = rows < cols
+        pairs.append(np.stack([members[rows[keep]], members[cols[keep]]], axis=1))
+    return np.concatenate(pairs)
+
+
+def _band_pairs(vectors: np.ndarray, keys: np.ndarray, threshold: float,
+                block_size: int, small_bucket: int = 32) -> List[np.ndarray]:
+    """
+    Verified pairs among the videos sharing a bucket in one band.
+
+    Most buckets hold a handful of videos. Their pairs are generated and
+    checked for all buckets at once: pairing each sorted position with the
+    one k places later, for k = 1 .. small_bucket - 1. Larger buckets go
+    through _verify_bucket one by one.
+    """
+    order = np.argsort(keys, kind="stable")
+    sorted_keys = keys[order]
+    starts = np.concatenate([[0], np.flatnonzero(np.diff(sorted_keys)) + 1])
+    sizes = np.diff(np.append(starts, len(keys)))
+    bucket_end = np.repeat(starts + sizes, sizes)
+    small = np.repeat(sizes <= small_bucket, sizes)
+
+    found = []
+    positions = np.flatnonzero(small & (np.arange(len(keys)) + 1 < bucket_end))
+    for k in range(1, min(small_bucket, int(sizes.max()))):
+        positions = positions[positions + k < bucket_end[positions]]
+        if len(positions) == 0:
+            break
+        found.append(_verify_pairs(vectors, order[positions], order[positions + k], threshold))
+
+    for start, size in zip(starts[sizes > small_bucket], sizes[sizes > small_bucket]):
+        found.append(_verify_bucket(vectors, order[start:start + size], threshold, block_size))
+    return found
+
+
+def find_duplicate_pairs(vectors: np.ndarray, threshold: float = DEDUP_THRESHOLD,
+                         n_bands: int = DEDUP_LSH_BANDS, bits_per_band: int = DEDUP_LSH_BITS,
+                         block_size: int = 1024, seed: int = 0) -> np.ndarray:
+    """
+    Find pairs of vectors with cosine similarity >= threshold.
+
+    Args:
+        vectors: (n, dim) embeddings (normalised here)
+        threshold: Cosine similarity threshold
+        n_bands: LSH bands
+        bits_per_band: Sign bits per band
+        block_size: Rows compared at once inside a bucket
+        seed: Hyperplane seed
+
+    Returns:
+        (n_pairs, 2) array of row indices with i < j
+    """
+    vectors = normalise_rows(vectors)
+
+    keys = simhash_bands(vectors, n_bands, bits_per_band, seed)
+    found = [np.zeros((0, 2), dtype=np.int64)]
+    for band in range(n_bands):
+        found.extend(_band_pairs(vectors, keys[:, band], threshold, block_size))
+    return np.unique(np.concatenate(found).astype(np.int64), axis=0)
+
+
+# --------------------------------------------------------------------
+# Grouping
+# --------------------------------------------------------------------
+def union_find_groups(n: int, pairs: np.ndarray) -> np.ndarray:
+    """
+    Connected components of the duplicate graph.
+
+    Returns:
+        Array of length n with the root index of each row's group
+    """
+    parent = np.arange(n)
+
+    def find(i):
+        root = i
+        while parent[root] != root:
+            root = parent[root]
+        while parent[i] != root:
+            parent[i], i = root, parent[i]
+        return root
+
+    for i, j in pairs:
+        root_i, root_j = find(i), find(j)
+        if root_i != root_j:
+            parent[max(root_i, root_j)] = min(root_i, root_j)
+    return np.array([find(i) for i in range(n)])
+
+
+def build_groups(video_ids: List[str], metadatas: List[Dict], pairs: np.ndarray) -> Dict[str, List[str]]:
+    """
+    Turn duplicate pairs into groups with a canonical video.
+
+    The canonical video is the one with the most views (ties: earliest
+    published_at, then ID).
+
+    Returns:
+        Dict of canonical video ID -> other member IDs (groups of 2+ only)
+    """
+    if len(pairs) == 0:
+        return {}
+    roots = union_find_groups(len(video_ids), pairs)
+    members_by_root = {}
+    for index in np.unique(pairs):
+        members_by_root.setdefault(roots[index], []).append(index)
+
+    groups = {}
+    for members in members_by_root.values():
+        members.sort(key=lambda i: (-int(metadatas[i].get('view_count') or 0),
+                                    str(metadatas[i].get('published_at') or ''),
+                                    video_ids[i]))
+        groups[video_ids[members[0]]] = [video_ids[i] for i in members[1:]]
+    return groups
+
+
+def group_metadata(groups: Dict[str, List[str]], metadatas_by_id: Dict[str, Dict]) -> Dict[str, Dict]:
+    """
+    Metadata updates for a dedup run.
+
+    Sets dup_group / is_duplicate on group members and clears them (None
+    removes the key) from videos that were grouped by an earlier run but
+    no longer are.
+    """
+    updates = {}
+    for canonical, duplicates in groups.items():
+        updates[canonical] = {DUP_GROUP_KEY: canonical, IS_DUPLICATE_KEY: False}
+        for video_id in duplicates:
+            updates[video_id] = {DUP_GROUP_KEY: canonical, IS_DUPLICATE_KEY: True}
+
+    for video_id, metadata in metadatas_by_id.items():
+        if DUP_GROUP_KEY in (metadata or {}) and video_id not in updates:
+            updates[video_id] = {DUP_GROUP_KEY: None, IS_DUPLICATE_KEY: None}
+
+    # Skip videos whose labels are already correct
+    return {
+        video_id: fields for video_id, fields in updates.items()
+        if any((metadatas_by_id.get(video_id) or {}).get(key) != value for key, value in fields.items())
+    }
+
+
+def find_duplicates(db, threshold: float = DEDUP_THRESHOLD, n_bands: int = DEDUP_LSH_BANDS,
+                    bits_per_band: int = DEDUP_LSH_BITS, page_size: int = 5000):
+    """
+    Load embeddings + metadata from the database and group near-duplicates.
+
+    Returns:
+        Tuple of (groups, metadatas_by_id, n_pairs)
+    """
+    video_ids, metadatas, blocks = [], [], []
+    for ids, columns in db.iter_pages(('metadata', 'embedding'), page_size):
+        video_ids.extend(ids)
+        metadatas.extend(columns['metadata'])
+        blocks.append(columns['embedding'])
+    if not video_ids:
+        return {}, {}, 0
+
+    vectors = np.concatenate(blocks)
+    pairs = find_duplicate_pairs(vectors, threshold, n_bands, bits_per_band)
+    groups = build_groups(video_ids, metadatas, pairs)
+    return groups, dict(zip(video_ids, metadatas)), len(pairs)
+
+
+def main():
+    from scripts.db_handler import VideoVectorDB, STATUS_OK
+
+    parser = argparse.ArgumentParser(
+        description="Group near-duplicate videos and optionally remove the duplicates"
+    )
+    parser.add_argument('--threshold', type=float, default=DEDUP_THRESHOLD,
+                        help=f'Cosine similarity threshold (default: {DEDUP_THRESHOLD})')
+    parser.add_argument('--bands', type=int, default=DEDUP_LSH_BANDS,
+                        help=f'LSH bands (default: {DEDUP_LSH_BANDS})')
+    parser.add_argument('--bits', type=int, default=DEDUP_LSH_BITS,
+                        help=f'Sign bits per band (default: {DEDUP_LSH_BITS})')
+    parser.add_argument('--dry-run', action='store_true',
+                        help='Report groups without writing metadata')
+    parser.add_argument('--compact', action='store_true',
+                        help='Delete non-canonical duplicates from the collection')
+    parser.add_argument('--db-path', default=VECTOR_DB_PATH,
+                        help=f'ChromaDB directory (default: {VECTOR_DB_PATH})')
+    parser.add_argument('--collection', default=COLLECTION_NAME,
+                        help=f'Collection name (default: {COLLECTION_NAME})')
+    parser.add_argument('--neighbours-path', default=NEIGHBOURS_PATH,
+                        help='Related-video table kept in step with the writes, "" to skip (default: %(default)s)')
+    args = parser.parse_args()
+
+    print("=" * 70)
+    print("NEAR-DUPLICATE DETECTION" + (" (DRY RUN)" if args.dry_run else ""))
+    print("=" * 70 + "\n")
+
+    db = VideoVectorDB(args.db_path, args.collection, neighbours_path=args.neighbours_path or None)
+
+    start = time.perf_counter()
+    groups, metadatas_by_id, n_pairs = find_duplicates(db, args.threshold, args.bands, args.bits)
+    elapsed = time.perf_counter() - start
+    n_duplicates = sum(len(members) for members in groups.values())
+
+    print(f"\n📊 Results:")
+    print(f"   • Videos scanned: {len(metadatas_by_id):,}")
+    print(f"   • Duplicate pairs (cosine ≥ {args.threshold}): {n_pairs:,}")
+    print(f"   • Groups: {len(groups):,} ({n_duplicates:,} duplicates of a canonical video)")
+    print(f"   • Time: {elapsed:.1f}s")
+
+    largest = sorted(groups.items(), key=lambda item: -len(item[1]))[:5]
+    for canonical, members in largest:
+        title = (metadatas_by_id[canonical] or {}).get('title', '')[:50]
+        print(f"     - {canonical} ({title}) + {len(members)}: {', '.join(members[:5])}"
+              + (" ..." if len(members) > 5 else ""))
+
+    if args.dry_run:
+        return
+
+    updates = group_metadata(groups, metadatas_by_id)
+    if updates:
+        print(f"\n🏷️  Labelling {len(updates):,} videos...")
+        db.update_metadata_many(updates)
+
+    if args.compact and n_duplicates:
+        print(f"\n🗜️  Compacting: deleting {n_duplicates:,} duplicates...")
+        statuses = db.delete_where({IS_DUPLICATE_KEY: True})
+        deleted = sum(1 for value in statuses.values() if value == STATUS_OK)
+        print(f"   ✓ {deleted:,} deleted, {db.get_collection_stats()['total_videos']:,} videos remain")
+        db.flush_neighbours()
+
+    print("\n✅ Dedup complete! Search with --collapse-duplicates to hide duplicates.")
+
+
+if __name__ == "__main__":
+    main()
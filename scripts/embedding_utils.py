@@ -0,0 +1,38 @@
+"""
+Embedding Helpers for YouTube Semantic Search
+
+Shared by the scripts that embed text or compare stored vectors:
+- load_model(): the sentence-transformer named on the command line, or the
+  deterministic stub encoder (scripts/synthetic_data.py) for "stub"
+- normalise_rows(): unit-normalise embeddings for cosine similarity
+"""
+
+from pathlib import Path
+import sys
+
+import numpy as np
+
+# Add project root to path
+ROOT_DIR = Path(__file__).resolve().parents[1]
+sys.path.append(str(ROOT_DIR))
+
+from config import EMBEDDING_DIMENSION
+
+# --model value that selects the offline stub encoder
+STUB_MODEL = "stub"
+
+
+def load_model(model_name: str, seed: int = 0):
+    """Load the stub encoder or a sentence-transformer model."""
+    if model_name == STUB_MODEL:
+        from scripts.synthetic_data import StubEncoder
+        return StubEncoder(dimension=EMBEDDING_DIMENSION, seed=seed)
+    from sentence_transformers import SentenceTransformer
+    return SentenceTransformer(model_name)
+
+
+def normalise_rows(matrix: np.ndarray) -> np.ndarray:
+    """Scale each vector (last axis) to unit length as float32; all-zero vectors stay zero."""
+    matrix = np.asarray(matrix, dtype=np.float32)
+    norms = np.linalg.norm(matrix, axis=-1, keepdims=True)
+    return matrix / np.where(norms == 0, 1, norms)
@@ -19,6 +19,7 @@ import time
 import argparse
 import glob
 import shutil
+import tempfile
 from pathlib import Path
 
 import pandas as pd
@@ -29,7 +30,11 @@ from yt_dlp import YoutubeDL
 # Allow import of config from project root
 ROOT_DIR = Path(__file__).resolve().parents[1]
 sys.path.append(str(ROOT_DIR))
-from config import YOUTUBE_API_KEY, CHANNEL_ID  # type: ignore
+from config import YOUTUBE_API_KEY, CHANNEL_ID, CHANNEL_CACHE_TTL  # type: ignore
+from scripts.channel_cache import ChannelCache
+from scripts.dataset_io import write_dataset
+from scripts.passages import CUES_COLUMN, join_cues
+from scripts.transcript_cache import TranscriptCache, add_cache_arguments, cache_from_args
 
 
 # --------------------------------------------------------------------
@@ -64,66 +69,164 @@ def get_uploads_playlist_id(youtube, channel_id: str) -> str:
 # --------------------------------------------------------------------
 # Fetch transcript for a single video
 # --------------------------------------------------------------------
-def fetch_transcript(video_id: str, languages=None) -> str | None:
+def download_vtt(video_id: str, languages: list) -> str | None:
     """
-    Fetch transcript for a video using yt-dlp.
-    Returns transcript text or None if unavailable.
-    """
-    if languages is None:
-        languages = ["en"]
+    Download a video's subtitles with yt-dlp.
+    Returns the raw VTT content, or None if the video has no subtitles.
 
+    Subtitles are downloaded into a private temp directory per call, so
+    several transcripts can be fetched concurrently.
+    """
+    temp_dir = tempfile.mkdtemp(prefix=f"subs_{video_id}_")
     ydl_opts = {
         'skip_download': True,
         'writesubtitles': True,
         'writeautomaticsub': True,
         'subtitleslangs': languages,
-        'outtmpl': f'temp_subs/{video_id}',
+        'outtmpl': os.path.join(temp_dir, video_id),
         'quiet': True,
         'no_warnings': True,
     }
 
     try:
-        # Clean up temp dir if exists
-        if os.path.exists('temp_subs'):
-            shutil.rmtree('temp_subs')
-        os.makedirs('temp_subs', exist_ok=True)
-
         with YoutubeDL(ydl_opts) as ydl:
             ydl.extract_info(f"https://www.youtube.com/watch?v={video_id}", download=True)
 
         # Find the downloaded vtt file
-        vtt_files = glob.glob(f'temp_subs/{video_id}*.vtt')
+        vtt_files = glob.glob(os.path.join(temp_dir, f"{glob.escape(video_id)}*.vtt"))
         if not vtt_files:
             return None
 
-        # Parse the VTT file
-        vtt_file = vtt_files[0]
-        text_parts = []
-        seen_lines = set()
+        with open(vtt_files[0], encoding="utf-8") as f:
+            return f.read()
+
+    finally:
+        shutil.rmtree(temp_dir, ignore_errors=True)
+
 
-        for caption in webvtt.read(vtt_file):
-            line = caption.text.strip().replace('\n', ' ')
-            if line and line not in seen_lines:
-                text_parts.append(line)
-                seen_lines.add(line)
+def _timestamp_seconds(timestamp: str) -> float:
+    """Seconds of a VTT timestamp ("HH:MM:SS.mmm" or "MM:SS.mmm")."""
+    seconds = 0.0
+    for part in timestamp.split(':'):
+        seconds = seconds * 60 + float(part)
+    return seconds
 
-        full_text = " ".join(text_parts)
 
-        # Cleanup
-        shutil.rmtree('temp_subs')
+def parse_vtt_cues(vtt: str) -> list[tuple[float, str]]:
+    """Caption cues of a VTT file as (start seconds, text), skipping repeated lines."""
+    cues = []
+    seen_lines = set()
 
-        return full_text.strip() if full_text.strip() else None
+    for caption in webvtt.from_string(vtt):
+        line = caption.text.strip().replace('\n', ' ')
+        if line and line not in seen_lines:
+            # caption.start is the raw timestamp text on every webvtt-py version
+            start = _timestamp_seconds(caption.start)
+            cues.append((start, line))
+            seen_lines.add(line)
 
+    return cues
+
+
+def parse_vtt(vtt: str) -> str | None:
+    """Join the caption text of a VTT file, skipping repeated lines."""
+    return join_cues(parse_vtt_cues(vtt))[0]
+
+
+def fetch_timed_transcript(video_id: str, languages=None, cache: TranscriptCache | None = None,
+                           max_age: float | None = None) -> tuple[str | None, str | None]:
+    """
+    Fetch transcript for a video using yt-dlp, keeping the caption timings.
+    Returns (transcript text, encoded cue offsets), both None if unavailable.
+
+    With a cache, fresh entries (fetched less than max_age seconds ago, or
+    any age if max_age is None) are served without touching YouTube, and
+    new downloads are stored in it. The cache keeps the raw VTT, so cue
+    timings are recovered from cached entries too.
+    """
+    if languages is None:
+        languages = ["en"]
+
+    if cache is not None:
+        entry = cache.get(video_id, languages, max_age)
+        if entry is not None:
+            return join_cues(parse_vtt_cues(entry.vtt)) if entry.vtt else (None, None)
+
+    try:
+        vtt = download_vtt(video_id, languages)
+        text, cues = join_cues(parse_vtt_cues(vtt)) if vtt else (None, None)
     except Exception as e:
         print(f"  Warning: error fetching transcript for {video_id}: {e}")
-        if os.path.exists('temp_subs'):
-            shutil.rmtree('temp_subs')
-        return None
+        return None, None
+
+    if cache is not None:
+        cache.put(video_id, languages, vtt, text)
+    return text, cues
+
+
+def fetch_transcript(video_id: str, languages=None, cache: TranscriptCache | None = None,
+                     max_age: float | None = None) -> str | None:
+    """
+    Fetch transcript for a video using yt-dlp.
+    Returns transcript text or None if unavailable.
+    """
+    return fetch_timed_transcript(video_id, languages, cache, max_age)[0]
 
 
 # --------------------------------------------------------------------
 # Get video metadata for a batch of IDs
 # --------------------------------------------------------------------
+def _count(stats: dict, key: str) -> int:
+    """Parse a statistics counter (returned as a string, or missing)."""
+    return int(stats.get(key, 0)) if stats.get(key) else 0
+
+
+def _video_item_to_row(item: dict) -> dict:
+    """Convert a videos.list item into a dataset row."""
+    snip = item.get("snippet", {})
+    stats = item.get("statistics", {})
+    content = item.get("contentDetails", {})
+    status = item.get("status", {})
+
+    return {
+        "id": item.get("id"),
+        "title": snip.get("title"),
+        "description": snip.get("description"),
+        "publishedAt": snip.get("publishedAt"),
+        "tags": ", ".join(snip.get("tags", [])),
+        "categoryId": snip.get("categoryId"),
+        "defaultLanguage": snip.get("defaultLanguage", ""),
+        "defaultAudioLanguage": snip.get("defaultAudioLanguage", ""),
+        "thumbnail_default": snip.get("thumbnails", {}).get("default", {}).get("url"),
+        "thumbnail_high": snip.get("thumbnails", {}).get("high", {}).get("url"),
+        "duration": content.get("duration"),
+        "viewCount": _count(stats, "viewCount"),
+        "likeCount": _count(stats, "likeCount"),
+        "commentCount": _count(stats, "commentCount"),
+        "privacyStatus": status.get("privacyStatus", ""),
+        "channel_id": snip.get("channelId"),
+        "channel_title": snip.get("channelTitle"),
+        "channel_description": None,
+        "channel_country": None,
+        "channel_thumbnail": None,
+        "channel_subscriberCount": None,
+        "channel_videoCount": None,
+    }
+
+
+def _channel_item_to_info(channel: dict) -> dict:
+    """Convert a channels.list item into the channel_* columns."""
+    snip = channel.get("snippet", {})
+    stats = channel.get("statistics", {})
+    return {
+        "channel_description": snip.get("description"),
+        "channel_country": snip.get("country"),
+        "channel_thumbnail": snip.get("thumbnails", {}).get("high", {}).get("url"),
+        "channel_subscriberCount": _count(stats, "subscriberCount"),
+        "channel_videoCount": _count(stats, "videoCount"),
+    }
+
+
 def get_video_metadata(youtube, video_ids: list) -> list[dict]:
     """Fetch metadata for a batch of video IDs."""
     all_rows = []
@@ -138,36 +241,7 @@ def get_video_metadata(youtube, video_ids: list) -> list[dict]:
         res = req.execute()
 
         for item in res.get("items", []):
-            snip = item.get("snippet", {})
-            stats = item.get("statistics", {})
-            content = item.get("contentDetails", {})
-            status = item.get("status", {})
-
-            row = {
-                "id": item.get("id"),
-                "title": snip.get("title"),
-                "description": snip.get("description"),
-                "publishedAt": snip.get("publishedAt"),
-                "tags": ", ".join(snip.get("tags", [])),
-                "categoryId": snip.get("categoryId"),
-                "defaultLanguage": snip.get("defaultLanguage", ""),
-                "defaultAudioLanguage": snip.get("defaultAudioLanguage", ""),
-                "thumbnail_default": snip.get("thumbnails", {}).get("default", {}).get("url"),
-                "thumbnail_high": snip.get("thumbnails", {}).get("high", {}).get("url"),
-                "duration": content.get("duration"),
-                "viewCount": int(stats.get("viewCount", 0)) if stats.get("viewCount") else 0,
-                "likeCount": int(stats.get("likeCount", 0)) if stats.get("likeCount") else 0,
-                "commentCount": int(stats.get("commentCount", 0)) if stats.get("commentCount") else 0,
-                "privacyStatus": status.get("privacyStatus", ""),
-                "channel_id": snip.get("channelId"),
-                "channel_title": snip.get("channelTitle"),
-                "channel_description": None,
-                "channel_country": None,
-                "channel_thumbnail": None,
-                "channel_subscriberCount": None,
-                "channel_videoCount": None,
-            }
-            all_rows.append(row)
+            all_rows.append(_video_item_to_row(item))
 
     return all_rows
 
@@ -175,18 +249,12 @@ def get_video_metadata(youtube, video_ids: list) -> list[dict]:
 # --------------------------------------------------------------------
 # Enrich channel metadata
 # --------------------------------------------------------------------
-def enrich_channel_details(youtube, df: pd.DataFrame) -> pd.DataFrame:
-    """Add channel metadata to the dataframe."""
-    print("\nEnriching channel metadata...")
-
-    unique_channels = df["channel_id"].dropna().unique()
-    if len(unique_channels) == 0:
-        return df
-
+def fetch_channel_info(youtube, channel_ids: list) -> dict:
+    """Fetch the channel_* columns for channel IDs, keyed by channel ID."""
     channel_info = {}
 
-    for i in range(0, len(unique_channels), 50):
-        chunk = unique_channels[i:i + 50]
+    for i in range(0, len(channel_ids), 50):
+        chunk = channel_ids[i:i + 50]
         req = youtube.channels().list(
             part="snippet,statistics",
             id=",".join(chunk)
@@ -194,28 +262,65 @@ def enrich_channel_details(youtube, df: pd.DataFrame) -> pd.DataFrame:
         res = req.execute()
 
         for ch in res.get("items", []):
-            snip = ch.get("snippet", {})
-            stats = ch.get("statistics", {})
-            channel_info[ch["id"]] = {
-                "channel_description": snip.get("description"),
-                "channel_country": snip.get("country"),
-                "channel_thumbnail": snip.get("thumbnails", {}).get("high", {}).get("url"),
-                "channel_subscriberCount": int(stats.get("subscriberCount", 0)) if stats.get("subscriberCount") else 0,
-                "channel_videoCount": int(stats.get("videoCount", 0)) if stats.get("videoCount") else 0,
-            }
-
-    for ch_id, info in channel_info.items():
-        for col, val in info.items():
-            df.loc[df["channel_id"] == ch_id, col] = val
-
-    print("Channel metadata enriched")
+            channel_info[ch["id"]] = _channel_item_to_info(ch)
+
+    return channel_info
+
+
+def apply_channel_info(df: pd.DataFrame, channel_info: dict) -> pd.DataFrame:
+    """
+    Write channel info into the channel_* columns with one join per column.
+
+    Rows whose channel is not in channel_info keep their current values.
+    """
+    if not channel_info:
+        return df
+
+    info = pd.DataFrame.from_dict(channel_info, orient="index")
+    known = df["channel_id"].isin(info.index)
+    for col in info.columns:
+        values = df["channel_id"].map(info[col])
+        if col in df.columns:
+            df[col] = df[col].astype(object).where(~known, values)
+        else:
+            df[col] = values
+    return df
+
+
+def enrich_channel_details(youtube, df: pd.DataFrame, cache: ChannelCache | None = None) -> pd.DataFrame:
+    """
+    Add channel metadata to the dataframe.
+
+    Args:
+        youtube: YouTube API client
+        df: Videos with a channel_id column
+        cache: Optional ChannelCache; fresh entries skip the channels.list call
+    """
+    print("\nEnriching channel metadata...")
+
+    unique_channels = df["channel_id"].dropna().unique().tolist()
+    if len(unique_channels) == 0:
+        return df
+
+    channel_info, missing = cache.get_many(unique_channels) if cache else ({}, unique_channels)
+    if missing:
+        fetched = fetch_channel_info(youtube, missing)
+        channel_info.update(fetched)
+        if cache:
+            cache.put_many(fetched)
+            cache.save()
+
+    df = apply_channel_info(df, channel_info)
+
+    print(f"Channel metadata enriched ({len(unique_channels) - len(missing)} cached, {len(missing)} fetched)")
     return df
 
 
 # --------------------------------------------------------------------
 # Main extraction function
 # --------------------------------------------------------------------
-def fetch_videos_with_transcripts(youtube, channel_id: str, target_count: int, delay: float = 0.5):
+def fetch_videos_with_transcripts(youtube, channel_id: str, target_count: int, delay: float = 0.5,
+                                  cache: TranscriptCache | None = None, max_age: float | None = None):
     """
     Fetch videos until we have target_count with successful transcripts.
     
@@ -223,7 +328,9 @@ def fetch_videos_with_transcripts(youtube, channel_id: str, target_count: int, d
         youtube: YouTube API client
         channel_id: YouTube channel ID
         target_count: Number of videos with transcripts to collect
-        delay: Delay between transcript fetches (seconds)
+        delay: Delay between transcript fetches (seconds, skipped for cache hits)
+        cache: Optional TranscriptCache
+        max_age: Re-download cached transcripts older than this (seconds)
     
     Returns:
         tuple: (DataFrame of successful videos, list of failed videos)
@@ -270,10 +377,12 @@ def fetch_videos_with_transcripts(youtube, channel_id: str, target_count: int, d
             print(f"[{len(successful_videos)}/{target_count}] Processing {vid} - {title}...", end=" ")
 
             # Try to fetch transcript
-            transcript = fetch_transcript(vid)
+            cached = cache is not None and cache.contains(vid, ["en"], max_age)
+            transcript, cues = fetch_timed_transcript(vid, cache=cache, max_age=max_age)
 
             if transcript:
                 video["transcript"] = transcript
+                video[CUES_COLUMN] = cues
                 successful_videos.append(video)
                 print("✓ OK")
 
@@ -284,7 +393,8 @@ def fetch_videos_with_transcripts(youtube, channel_id: str, target_count: int, d
                 failed_videos.append({"video_id": vid, "title": video.get("title", "")})
                 print("✗ FAILED")
 
-            time.sleep(delay)
+            if not cached:
+                time.sleep(delay)
 
         # Get next page token for more videos
         next_page_token = res.get("nextPageToken")
@@ -381,7 +491,7 @@ def main():
     parser.add_argument(
         "--output",
         default=str(ROOT_DIR / "data/crashcourse_videos.csv"),
-        help="Output CSV path"
+        help="Output path (.csv, .parquet or .arrow)"
     )
     parser.add_argument(
         "--failed-log",
@@ -394,6 +504,13 @@ def main():
         default=0.5,
         help="Delay between transcript fetches in seconds (default: 0.5)"
     )
+    parser.add_argument(
+        "--channel-cache-ttl",
+        type=float,
+        default=CHANNEL_CACHE_TTL,
+        help=f"Seconds cached channel metadata stays fresh, 0 disables the cache (default: {CHANNEL_CACHE_TTL})"
+    )
+    add_cache_arguments(parser)
     args = parser.parse_args()
 
     # Initialize YouTube client
@@ -404,7 +521,9 @@ def main():
         youtube,
         args.channel_id,
         args.target_transcripts,
-        args.delay
+        args.delay,
+        cache=cache_from_args(args),
+        max_age=args.refresh_older_than,
     )
 
     if df.empty:
@@ -412,12 +531,11 @@ def main():
         return
 
     # Enrich with channel details
-    df = enrich_channel_details(youtube, df)
+    cache = ChannelCache(ttl=args.channel_cache_ttl) if args.channel_cache_ttl > 0 else None
+    df = enrich_channel_details(youtube, df, cache)
 
     # Save dataset
-    output_path = Path(args.output)
-    output_path.parent.mkdir(parents=True, exist_ok=True)
-    df.to_csv(output_path, index=False)
+    output_path = write_dataset(df, args.output)
     print(f"\n✓ Dataset saved to: {output_path}")
 
     # Log failures
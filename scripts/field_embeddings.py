@@ -0,0 +1,279 @@
+"""
+Multi-field Embeddings for YouTube Semantic Search
+
+The primary embedding encodes "title | transcript" as one text, so the
+short, very informative title is diluted by the transcript (and cut off
+together with it at the model's token limit), and the description and
+tags are never embedded. This module embeds each field on its own:
+- title         the video title
+- description   description and tags
+- transcript    the transcript (as far as the model reads it)
+
+All fields of all videos are encoded in one batched pass and stored in a
+memory-mapped sidecar (data/fields/):
+- embeddings    float16 (n_videos, n_fields, dim) unit-normalised vectors
+- present       bool (n_videos, n_fields), False where a field was empty
+- ids           video IDs (blob)
+
+At query time FieldIndex.fuse() scores the candidates of a search on every
+field with one matrix product and combines the scores with FIELD_WEIGHTS
+(late fusion). The query embedding is reused, so fusion adds no model
+cost per query. Empty fields are left out and the remaining weights
+rescaled; the "combined" weight applies to the primary embedding's
+similarity.
+
+Usage:
+    python scripts/field_embeddings.py --input data/crashcourse_final.csv --output data/fields
+"""
+
+# Suppress warnings before imports
+import os
+import warnings
+os.environ['TF_CPP_MIN_LOG_LEVEL'] = '3'
+os.environ['TF_ENABLE_ONEDNN_OPTS'] = '0'
+warnings.filterwarnings('ignore')
+
+import argparse
+from pathlib import Path
+import sys
+from typing import Dict, List, Optional, Sequence
+
+import numpy as np
+
+# Add project root to path
+ROOT_DIR = Path(__file__).resolve().parents[1]
+sys.path.append(str(ROOT_DIR))
+
+from config import FIELDS_PATH, FIELD_WEIGHTS, EMBEDDING_MODEL
+from scripts.array_store import write_store, read_store, store_exists
+from scripts.embedding_utils import load_model, normalise_rows
+
+FIELDS = ("title", "description", "transcript")
+
+# Weight key for the primary (title | transcript) embedding's similarity
+COMBINED_KEY = "combined"
+
+
+def _text(values) -> List[str]:
+    return ["" if not isinstance(value, str) else value.strip() for value in values]
+
+
+def field_texts(df) -> Dict[str, List[str]]:
+    """
+    Text of every field for every video.
+
+    Args:
+        df: DataFrame with title and transcript (and optionally description, tags)
+
+    Returns:
+        Mapping of field -> list of texts ("" where missing)
+    """
+    n = len(df)
+    descriptions = _text(df['description']) if 'description' in df.columns else [""] * n
+    tags = _text(df['tags']) if 'tags' in df.columns else [""] * n
+    return {
+        "title": _text(df['title']),
+        "description": [" | ".join(part for part in pair if part) for pair in zip(descriptions, tags)],
+        "transcript": _text(df['transcript']),
+    }
+
+
+def encode_fields(texts: Dict[str, List[str]], model, batch_size: int = 64):
+    """
+    Embed all fields in one batched encode pass.
+
+    Empty texts are skipped and get a zero vector.
+
+    Returns:
+        Tuple of (float32 (n_videos, n_fields, dim) unit vectors, bool present mask)
+    """
+    n_videos = len(texts[FIELDS[0]])
+    present = np.array([[bool(texts[field][i]) for field in FIELDS] for i in range(n_videos)],
+                       dtype=bool).reshape(n_videos, len(FIELDS))
+    # Video-major order: row r of the flat batch is (video r // n_fields, field r % n_fields)
+    flat = [texts[field][i] for i in range(n_videos) for field in FIELDS]
+    rows = np.flatnonzero(present.reshape(-1))
+    encoded = normalise_rows(
+        model.encode([flat[r] for r in rows], batch_size=batch_size,
+                     show_progress_bar=len(rows) > batch_size, convert_to_numpy=True)
+    ).reshape(len(rows), -1)
+
+    dimension = encoded.shape[1] if len(rows) else model.get_sentence_embedding_dimension()
+    embeddings = np.zeros((n_videos * len(FIELDS), dimension), dtype=np.float32)
+    embeddings[rows] = encoded
+    return embeddings.reshape(n_videos, len(FIELDS), dimension), present
+
+
+def build_field_index(df, model, output_dir=FIELDS_PATH, batch_size: int = 64,
+                      model_name: str = EMBEDDING_MODEL) -> Dict:
+    """
+    Build the field sidecar from a cleaned dataset.
+
+    Args:
+        df: DataFrame with id, title, transcript, description and tags columns
+        model: Encoder with encode()
+        output_dir: Sidecar directory
+        batch_size: Encoder batch size
+        model_name: Recorded in the manifest
+
+    Returns:
+        Summary dict
+    """
+    ids = df['id'].astype(str).tolist()
+    texts = field_texts(df)
+    embeddings, present = encode_fields(texts, model, batch_size)
+
+    write_store(
+        output_dir,
+        arrays={"embeddings": embeddings.astype(np.float16), "present": present},
+        blobs={"ids": [video_id.encode("utf-8") for video_id in ids]},
+        manifest={
+            "videos": len(ids),
+            "fields": list(FIELDS),
+            "model": model_name,
+            "dimension": int(embeddings.shape[2]),
+        },
+    )
+    return {"videos": len(ids), "texts": int(present.sum()),
+            "fields": {field: int(present[:, j].sum()) for j, field in enumerate(FIELDS)}}
+
+
+def weight_vector(weights: Dict[str, float], fields: Sequence[str] = FIELDS) -> np.ndarray:
+    """Weights of the stored fields followed by the combined weight, as an array."""
+    unknown = set(weights) - set(fields) - {COMBINED_KEY}
+    if unknown:
+        raise ValueError(f"Unknown field weights: {sorted(unknown)} (fields: {list(fields)}, {COMBINED_KEY})")
+    vector = np.array([float(weights.get(key, 0.0)) for key in (*fields, COMBINED_KEY)], dtype=np.float32)
+    if (vector < 0).any() or vector.sum() <= 0:
+        raise ValueError("Field weights must be non-negative and not all zero")
+    return vector
+
+
+class FieldIndex:
+    """
+    Read-only, memory-mapped view of the field sidecar.
+
+    Args:
+        path: Sidecar directory written by build_field_index()
+    """
+
+    def __init__(self, path=FIELDS_PATH):
+        arrays, blobs, self.manifest = read_store(path)
+        self.fields = tuple(self.manifest["fields"])
+        self.embeddings = arrays["embeddings"]
+        self.present = arrays["present"]
+        ids = blobs["ids"]
+        self._index = {ids[i].decode("utf-8"): i for i in range(len(ids))}
+        ids.close()
+
+    def __len__(self) -> int:
+        return len(self._index)
+
+    def __contains__(self, video_id: str) -> bool:
+        return video_id in self._index
+
+    @property
+    def dimension(self) -> int:
+        return int(self.manifest["dimension"])
+
+    def field_scores(self, video_ids: List[str], query_embedding: np.ndarray):
+        """
+        Cosine similarity of the query to every field of the given videos.
+
+        Returns:
+            Tuple of ((m, n_fields) scores, (m, n_fields) present mask); videos
+            not in the index have no fields present
+        """
+        rows = np.array([self._index.get(video_id, -1) for video_id in video_ids], dtype=np.int64)
+        known = rows >= 0
+        scores = np.zeros((len(rows), len(self.fields)), dtype=np.float32)
+        present = np.zeros((len(rows), len(self.fields)), dtype=bool)
+        if known.any():
+            query = np.asarray(query_embedding, dtype=np.float32).reshape(-1)
+            norm = np.linalg.norm(query)
+            vectors = self.embeddings[rows[known]].astype(np.float32)
+            scores[known] = vectors @ (query / norm if norm else query)
+            present[known] = self.present[rows[known]]
+        return scores, present
+
+    def fuse(self, video_ids: List[str], query_embedding: np.ndarray, combined: np.ndarray,
+             weights: Dict[str, float] = FIELD_WEIGHTS) -> np.ndarray:
+        """
+        Weighted late fusion of the field scores of a result list.
+
+        Args:
+            video_ids: Candidate video IDs
+            query_embedding: Query embedding (same model as the sidecar)
+            combined: Similarity of each candidate's primary embedding
+            weights: Weight per field name and for "combined"
+
+        Returns:
+            Fused similarity per candidate (the combined similarity alone for
+            videos that are not in the index)
+        """
+        scores, present = self.field_scores(video_ids, query_embedding)
+        combined = np.asarray(combined, dtype=np.float32).reshape(-1, 1)
+        scores = np.hstack([scores, combined])
+        present = np.hstack([present, np.ones_like(combined, dtype=bool)])
+
+        w = weight_vector(weights, self.fields) * present
+        total = w.sum(axis=1)
+        fused = (scores * w).sum(axis=1) / np.where(total == 0, 1, total)
+        return np.where(total == 0, combined[:, 0], fused)
+
+
+def load_field_index(path=FIELDS_PATH) -> Optional[FieldIndex]:
+    """Open the field sidecar if it exists."""
+    if not store_exists(path):
+        return None
+    return FieldIndex(path)
+
+
+def parse_weights(pairs: List[str]) -> Dict[str, float]:
+    """Parse ["title=0.4", "transcript=0.6"] into a weight dict."""
+    weights = {}
+    for pair in pairs:
+        key, sep, value = pair.partition("=")
+        if not sep:
+            raise ValueError(f"Expected FIELD=WEIGHT, got {pair!r}")
+        weights[key.strip()] = float(value)
+    weight_vector(weights)
+    return weights
+
+
+def main():
+    from scripts.dataset_io import read_dataset
+
+    parser = argparse.ArgumentParser(
+        description="Embed title, description/tags and transcript separately for weighted fusion in search"
+    )
+    parser.add_argument('--input', default=str(ROOT_DIR / "data/crashcourse_final.csv"),
+                        help='Cleaned dataset, .csv/.parquet/.arrow (default: data/crashcourse_final.csv)')
+    parser.add_argument('--output', default=str(FIELDS_PATH),
+                        help=f'Sidecar directory (default: {FIELDS_PATH})')
+    parser.add_argument('--model', default=EMBEDDING_MODEL,
+                        help=f'Encoder; must match the search model (default: {EMBEDDING_MODEL})')
+    parser.add_argument('--batch-size', type=int, default=64,
+                        help='Encoder batch size (default: 64)')
+    args = parser.parse_args()
+
+    print("=" * 70)
+    print("FIELD EMBEDDINGS BUILD")
+    print("=" * 70)
+
+    df = read_dataset(args.input, columns=['id', 'title', 'description', 'tags', 'transcript'])
+    print(f"\n📂 Loaded {len(df):,} videos from {Path(args.input).name}")
+
+    print(f"\n🤖 Loading model: {args.model}")
+    model = load_model(args.model)
+
+    print(f"\n🧩 Embedding {', '.join(FIELDS)}...")
+    summary = build_field_index(df, model, args.output, args.batch_size, args.model)
+
+    for field, count in summary["fields"].items():
+        print(f"   • {field:<12} {count:>7,} videos")
+    print(f"\n✅ Wrote {summary['texts']:,} field embeddings for {summary['videos']:,} videos to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
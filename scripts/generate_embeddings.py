@@ -2,10 +2,10 @@
 Embedding Generation Script for YouTube Semantic Search
 
 This script:
-1. Loads the cleaned dataset (crashcourse_final.csv)
+1. Loads the cleaned dataset (crashcourse_final.csv, or .parquet/.arrow)
 2. Combines title and transcript columns
 3. Generates embeddings using sentence-transformers
-4. Saves embeddings back to the CSV file
+4. Saves embeddings back to the dataset file
 """
 
 import os
@@ -18,16 +18,19 @@ warnings.filterwarnings('ignore')
 
 import pandas as pd
 import numpy as np
-from sentence_transformers import SentenceTransformer
 from pathlib import Path
 import sys
 from tqdm import tqdm
 import json
+import argparse
 
 # Add project root to path
 ROOT_DIR = Path(__file__).resolve().parents[1]
 sys.path.append(str(ROOT_DIR))
 
+from scripts.profiling import add_profile_arguments, profile_session
+from scripts.dataset_io import dataset_format, read_dataset, write_dataset
+
 
 def combine_text(title, transcript, separator=" | "):
     """
@@ -51,7 +54,26 @@ def combine_text(title, transcript, separator=" | "):
     return combined.strip()
 
 
-def generate_embeddings(texts, model_name='all-MiniLM-L6-v2', batch_size=32, show_progress=True):
+def combine_text_columns(titles, transcripts, separator=" | "):
+    """
+    Vectorised combine_text over whole columns.
+    
+    Args:
+        titles: pandas Series of titles (cleaned)
+        transcripts: pandas Series of transcripts (cleaned)
+        separator: String to separate title and transcript
+        
+    Returns:
+        list: Combined texts, identical to combine_text applied row by row
+    """
+    titles = titles.astype(str).where(titles.notna(), "")
+    transcripts = transcripts.astype(str).where(transcripts.notna(), "")
+    
+    return (titles + separator + transcripts).str.strip().tolist()
+
+
+def generate_embeddings(texts, model_name='all-MiniLM-L6-v2', batch_size=32, show_progress=True,
+                        model=None):
     """
     Generate embeddings for a list of texts using sentence-transformers.
     
@@ -60,12 +82,18 @@ def generate_embeddings(texts, model_name='all-MiniLM-L6-v2', batch_size=32, sho
         model_name: Name of the sentence-transformer model
         batch_size: Batch size for encoding
         show_progress: Whether to show progress bar
+        model: Optional preloaded encoder (skips loading model_name)
         
     Returns:
         np.ndarray: Array of embeddings (shape: [n_texts, embedding_dim])
     """
-    print(f"\n[1/3] Loading model: {model_name}")
-    model = SentenceTransformer(model_name)
+    if model is None:
+        from sentence_transformers import SentenceTransformer
+        
+        print(f"\n[1/3] Loading model: {model_name}")
+        model = SentenceTransformer(model_name)
+    else:
+        print(f"\n[1/3] Using preloaded model: {type(model).__name__}")
     
     print(f"[2/3] Generating embeddings for {len(texts)} texts...")
     print(f"   • Batch size: {batch_size}")
@@ -111,16 +139,19 @@ def string_to_embeddings(embedding_strings):
     return np.array([json.loads(s) for s in embedding_strings])
 
 
-def save_embeddings_to_csv(df, output_path):
+def save_embeddings(df, embeddings, output_path):
     """
-    Save dataframe with embeddings to CSV.
+    Save dataframe with embeddings (format chosen from the file extension).
+    
+    CSV stores embeddings as JSON strings; Parquet/Arrow store them as a
+    fixed-size float32 list column.
     
     Args:
-        df: DataFrame with embeddings column
-        output_path: Path to save the CSV
+        df: DataFrame of videos
+        embeddings: numpy array of embeddings, one row per video
+        output_path: Path to save the dataset
     """
-    output_path.parent.mkdir(parents=True, exist_ok=True)
-    df.to_csv(output_path, index=False)
+    write_dataset(df, output_path, embeddings=embeddings)
     
     # Get file size
     file_size_mb = output_path.stat().st_size / (1024 * 1024)
@@ -129,20 +160,26 @@ def save_embeddings_to_csv(df, output_path):
     print(f"   • File size: {file_size_mb:.2f} MB")
 
 
-def main():
-    """Main execution function."""
+def run_embedding_generation(input_path=None, output_path=None):
+    """
+    Generate embeddings for the cleaned dataset and save them.
+    
+    Args:
+        input_path: Cleaned dataset (default: data/crashcourse_final.csv)
+        output_path: Output dataset (default: overwrite input_path)
+    """
     print("=" * 70)
     print("YOUTUBE VIDEO EMBEDDING GENERATION")
     print("=" * 70)
     
     # Define paths
     data_dir = ROOT_DIR / "data"
-    input_path = data_dir / "crashcourse_final.csv"
-    output_path = data_dir / "crashcourse_final.csv"  # Overwrite the same file
+    input_path = Path(input_path) if input_path else data_dir / "crashcourse_final.csv"
+    output_path = Path(output_path) if output_path else input_path  # Overwrite the same file
     
-    # Load dataset
+    # Load dataset (any previous embeddings are regenerated)
     print(f"\n📂 Loading dataset from: {input_path.name}")
-    df = pd.read_csv(input_path)
+    df = read_dataset(input_path).drop(columns=['embeddings'], errors='ignore')
     print(f"   ✓ Loaded {len(df)} videos with {len(df.columns)} columns")
     
     # Verify required columns exist
@@ -153,10 +190,7 @@ def main():
     
     print(f"\n🔗 Combining title and transcript columns...")
     # Combine text
-    combined_texts = [
-        combine_text(row['title'], row['transcript']) 
-        for _, row in df.iterrows()
-    ]
+    combined_texts = combine_text_columns(df['title'], df['transcript'])
     
     # Show sample
     print(f"   ✓ Combined {len(combined_texts)} texts")
@@ -172,18 +206,9 @@ def main():
         show_progress=True
     )
     
-    # Convert embeddings to string format for CSV
-    print(f"\n💾 Preparing embeddings for CSV storage...")
-    embedding_strings = embeddings_to_string(embeddings)
-    
-    # Add embeddings column to dataframe
-    df['embeddings'] = embedding_strings
-    
-    print(f"   ✓ Added 'embeddings' column to dataframe")
-    
-    # Save to CSV
+    # Save with the embeddings column
     print(f"\n📝 Saving updated dataset...")
-    save_embeddings_to_csv(df, output_path)
+    save_embeddings(df, embeddings, output_path)
     
     # Display summary
     print("\n" + "=" * 70)
@@ -193,12 +218,16 @@ def main():
     print(f"   • Total videos: {len(df)}")
     print(f"   • Embedding dimension: {embeddings.shape[1]}")
     print(f"   • Model used: all-MiniLM-L6-v2")
-    print(f"   • Storage format: JSON strings in CSV")
+    if dataset_format(output_path) == "csv":
+        print(f"   • Storage format: JSON strings in CSV")
+    else:
+        print(f"   • Storage format: float32 fixed-size list ({dataset_format(output_path)}, zstd)")
     
-    print(f"\n✅ Dataset columns ({len(df.columns)} total):")
+    columns = list(df.columns) + ['embeddings']
+    print(f"\n✅ Dataset columns ({len(columns)} total):")
     cols_per_line = 3
-    for i in range(0, len(df.columns), cols_per_line):
-        cols_batch = df.columns[i:i+cols_per_line]
+    for i in range(0, len(columns), cols_per_line):
+        cols_batch = columns[i:i+cols_per_line]
         print(f"   • {', '.join(cols_batch)}")
     
     print("\n" + "=" * 70)
@@ -207,17 +236,33 @@ def main():
     
     # Verification example
     print(f"\n💡 To load and use embeddings in Python:")
-    print(f"   import pandas as pd")
     print(f"   import numpy as np")
-    print(f"   import json")
+    print(f"   from scripts.dataset_io import read_dataset")
+    print(f"   from scripts.migrate_to_vectordb import parse_embedding_column")
     print(f"   ")
-    print(f"   df = pd.read_csv('data/crashcourse_final.csv')")
-    print(f"   embeddings = np.array([json.loads(e) for e in df['embeddings']])")
+    print(f"   df = read_dataset('{output_path}')")
+    print(f"   embeddings, valid = parse_embedding_column(df['embeddings'])")
     print(f"   print(embeddings.shape)  # Should be ({len(df)}, {embeddings.shape[1]})")
     print()
     
     return df
 
 
+def main():
+    """Main execution function."""
+    parser = argparse.ArgumentParser(
+        description="Generate sentence embeddings for the cleaned video dataset"
+    )
+    parser.add_argument('--input', default=None,
+                        help='Cleaned dataset, .csv/.parquet/.arrow (default: data/crashcourse_final.csv)')
+    parser.add_argument('--output', default=None,
+                        help='Output dataset with embeddings (default: overwrite --input)')
+    add_profile_arguments(parser)
+    args = parser.parse_args()
+    
+    with profile_session(args, "generate_embeddings"):
+        return run_embedding_generation(args.input, args.output)
+
+
 if __name__ == "__main__":
     main()
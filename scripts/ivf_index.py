@@ -0,0 +1,426 @@
+"""
+Inverted-file (IVF) Index for YouTube Semantic Search
+
+ChromaDB's HNSW graph has to sit fully in memory and is slow to rebuild
+after large inserts. For archives of millions of vectors this module
+builds a disk-friendly alternative from the collection:
+
+1. k-means (trained on a sample) splits the vectors into posting lists,
+   one per centroid
+2. The vectors are reordered so each posting list is one contiguous range
+   of the memory-mapped matrix; a query only touches the pages of the
+   `nprobe` lists whose centroids are nearest to it
+3. Optionally, product quantisation (PQ) compresses the residual of each
+   vector (vector - its centroid) to one byte per sub-vector. Queries then
+   scan the small PQ codes with per-list lookup tables, and only the best
+   IVF_PQ_RERANK candidates are re-scored with the full vectors
+
+An index directory contains:
+- centroids.npy        float32 (n_lists, dim) coarse centroids
+- list_offsets.npy     int64 (n_lists + 1) start of each posting list
+- vectors.npy          float32 vectors in posting-list order (normalised for cosine)
+- codes.npy            uint8 (n, n_subvectors) PQ codes (PQ only)
+- codebooks.npy        float32 (n_subvectors, 256, dim / n_subvectors) (PQ only)
+- meta__<key>.npy      metadata columns, ids / metadata / transcripts blobs,
+                       as in a search snapshot
+
+IVFIndex exposes the read side of VideoVectorDB, like VideoSnapshot, so it
+is a drop-in backend for VideoSemanticSearch.
+
+Usage:
+    python scripts/ivf_index.py --output data/ivf
+    python scripts/ivf_index.py --lists 4096 --pq 48
+    python scripts/semantic_search.py -q "photosynthesis" --ivf data/ivf --nprobe 32
+"""
+
+import argparse
+from pathlib import Path
+import sys
+import time
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+# Add project root to path
+ROOT_DIR = Path(__file__).resolve().parents[1]
+sys.path.append(str(ROOT_DIR))
+
+from scripts.array_store import write_store, read_store, store_path
+from scripts.snapshot import VideoSnapshot, fetch_collection, metadata_columns, record_blobs
+from scripts.metrics import metrics
+from config import (IVF_PATH, IVF_LISTS, IVF_NPROBE, IVF_TRAIN_SAMPLE, IVF_PQ_SUBVECTORS,
+                    IVF_PQ_RERANK, DISTANCE_METRIC)
+
+IVF_FORMAT_VERSION = 1
+
+# Codewords per PQ sub-quantiser (one uint8 code per sub-vector)
+PQ_CODEWORDS = 256
+
+# Training vectors per PQ codeword; more barely changes the codebooks
+PQ_TRAIN_PER_CODEWORD = 64
+
+
+# --------------------------------------------------------------------
+# Training and encoding
+# --------------------------------------------------------------------
+def auto_list_count(n_vectors: int) -> int:
+    """Default number of posting lists: about 4 * sqrt(n_vectors)."""
+    return max(1, min(n_vectors, int(round(4 * np.sqrt(n_vectors)))))
+
+
+def _kmeans(vectors: np.ndarray, n_clusters: int, seed: int = 0) -> np.ndarray:
+    """Mini-batch k-means centroids (float32)."""
+    from sklearn.cluster import MiniBatchKMeans
+
+    # Random init: k-means++ seeding alone takes several times longer with thousands of lists
+    kmeans = MiniBatchKMeans(n_clusters=n_clusters, batch_size=4096, n_init=1, init="random",
+                             random_state=seed)
+    return kmeans.fit(vectors).cluster_centers_.astype(np.float32)
+
+
+def assign_lists(vectors: np.ndarray, centroids: np.ndarray, block_size: int = 16384) -> np.ndarray:
+    """Nearest centroid (L2) of each vector, block_size vectors at a time."""
+    half_sq_norms = 0.5 * np.einsum("ij,ij->i", centroids, centroids)
+    lists = np.empty(len(vectors), dtype=np.int32)
+    for start in range(0, len(vectors), block_size):
+        block = vectors[start:start + block_size]
+        lists[start:start + len(block)] = np.argmax(block @ centroids.T - half_sq_norms, axis=1)
+    return lists
+
+
+def train_pq(residuals: np.ndarray, n_subvectors: int, seed: int = 0) -> np.ndarray:
+    """
+    Train one 256-codeword quantiser per sub-vector.
+
+    Returns:
+        (n_subvectors, 256, dim / n_subvectors) float32 codebooks
+
+    Raises:
+        ValueError: If the dimension is not divisible by n_subvectors
+    """
+    dim = residuals.shape[1]
+    if dim % n_subvectors:
+        raise ValueError(f"Embedding dimension {dim} is not divisible by {n_subvectors} PQ sub-vectors")
+    if len(residuals) < PQ_CODEWORDS:
+        raise ValueError(f"PQ needs at least {PQ_CODEWORDS} training vectors, got {len(residuals)}")
+    dsub = dim // n_subvectors
+    return np.stack([
+        _kmeans(residuals[:, j * dsub:(j + 1) * dsub], PQ_CODEWORDS, seed + j)
+        for j in range(n_subvectors)
+    ])
+
+
+def pq_encode(residuals: np.ndarray, codebooks: np.ndarray, block_size: int = 16384) -> np.ndarray:
+    """Encode residuals to (n, n_subvectors) uint8 codes."""
+    n_subvectors, _, dsub = codebooks.shape
+    codeword_sq_norms = np.einsum("mkd,mkd->mk", codebooks, codebooks)
+    codes = np.empty((len(residuals), n_subvectors), dtype=np.uint8)
+    for start in range(0, len(residuals), block_size):
+        block = residuals[start:start + block_size]
+        for j in range(n_subvectors):
+            sub = block[:, j * dsub:(j + 1) * dsub]
+            codes[start:start + len(block), j] = np.argmin(codeword_sq_norms[j] - 2 * sub @ codebooks[j].T, axis=1)
+    return codes
+
+
+# --------------------------------------------------------------------
+# Build
+# --------------------------------------------------------------------
+def build_ivf(ids: List[str], vectors: np.ndarray, output_dir: str = IVF_PATH,
+              documents: Optional[List[str]] = None, metadatas: Optional[List[Dict]] = None,
+              n_lists: int = IVF_LISTS, pq_subvectors: int = IVF_PQ_SUBVECTORS,
+              train_sample: int = IVF_TRAIN_SAMPLE, collection_name: str = "",
+              embedding_model: Optional[str] = None, seed: int = 0) -> Path:
+    """
+    Build an IVF index from vectors (already normalised for cosine).
+
+    Args:
+        ids: Video IDs, one per vector
+        vectors: (n, dim) float32 vectors
+        output_dir: Index directory
+        documents: Optional transcripts, one per vector
+        metadatas: Optional metadata dicts, one per vector
+        n_lists: Posting lists (0 = auto_list_count)
+        pq_subvectors: PQ sub-vectors (0 = no PQ)
+        train_sample: Vectors sampled for k-means and PQ training
+        collection_name: Source collection, recorded in the manifest
+        embedding_model: Model the vectors were embedded with, recorded in the manifest
+        seed: Random seed
+
+    Returns:
+        Path to the index
+    """
+    n = len(ids)
+    if n == 0:
+        raise ValueError("Cannot build an IVF index from an empty collection")
+    vectors = np.asarray(vectors, dtype=np.float32)
+    n_lists = min(n_lists or auto_list_count(n), n)
+
+    rng = np.random.default_rng(seed)
+    sample = vectors[np.sort(rng.choice(n, size=min(train_sample, n), replace=False))]
+    centroids = _kmeans(sample, n_lists, seed)
+
+    lists = assign_lists(vectors, centroids)
+    order = np.argsort(lists, kind="stable")
+    lists = lists[order]
+    vectors = vectors[order]
+    list_offsets = np.zeros(n_lists + 1, dtype=np.int64)
+    np.cumsum(np.bincount(lists, minlength=n_lists), out=list_offsets[1:])
+
+    arrays = {
+        "centroids": centroids,
+        "list_offsets": list_offsets,
+        "vectors": vectors,
+        "sq_norms": np.einsum("ij,ij->i", vectors, vectors).astype(np.float32),
+    }
+
+    if pq_subvectors:
+        pq_sample = min(train_sample, PQ_CODEWORDS * PQ_TRAIN_PER_CODEWORD, n)
+        sample_rows = np.sort(rng.choice(n, size=pq_sample, replace=False))
+        codebooks = train_pq(vectors[sample_rows] - centroids[lists[sample_rows]], pq_subvectors, seed)
+        codes = np.empty((n, pq_subvectors), dtype=np.uint8)
+        for start in range(0, n, 65536):
+            end = min(start + 65536, n)
+            codes[start:end] = pq_encode(vectors[start:end] - centroids[lists[start:end]], codebooks)
+        arrays["codebooks"] = codebooks
+        arrays["codes"] = codes
+
+    ids = [ids[i] for i in order]
+    documents = [documents[i] for i in order] if documents is not None else [""] * n
+    metadatas = [metadatas[i] for i in order] if metadatas is not None else [{}] * n
+    columns, numeric_keys, category_keys = metadata_columns(metadatas)
+    arrays.update(columns)
+
+    manifest = {
+        "format_version": IVF_FORMAT_VERSION,
+        "collection_name": collection_name,
+        "distance_metric": DISTANCE_METRIC,
+        "count": n,
+        "dimension": int(vectors.shape[1]),
+        "embedding_model": embedding_model,
+        "lists": n_lists,
+        "pq_subvectors": int(pq_subvectors),
+        "numeric_metadata": numeric_keys,
+        "category_metadata": category_keys,
+        "created_at": time.strftime("%Y-%m-%dT%H:%M:%S"),
+    }
+    return write_store(output_dir, arrays, record_blobs(ids, documents, metadatas), manifest)
+
+
+def export_ivf_index(db, output_dir: str = IVF_PATH, n_lists: int = IVF_LISTS,
+                     pq_subvectors: int = IVF_PQ_SUBVECTORS, batch_size: int = 1000) -> Path:
+    """
+    Build an IVF index from a VideoVectorDB collection.
+
+    Args:
+        db: VideoVectorDB instance
+        output_dir: Index directory
+        n_lists: Posting lists (0 = auto_list_count)
+        pq_subvectors: PQ sub-vectors (0 = no PQ)
+        batch_size: Rows fetched from ChromaDB per round trip
+
+    Returns:
+        Path to the index
+    """
+    print(f"\n📤 Reading {db.collection.count()} videos from {db.collection_name}...")
+    ids, documents, metadatas, matrix = fetch_collection(db, batch_size)
+    print(f"   ✓ Fetched {len(ids)} vectors ({matrix.shape[1]} dims)")
+
+    n_lists = min(n_lists or auto_list_count(len(ids)), len(ids))
+    print(f"   • Training {n_lists} lists" + (f" + PQ ({pq_subvectors} bytes/vector)" if pq_subvectors else "")
+          + "...")
+    start = time.perf_counter()
+    path = build_ivf(ids, matrix, output_dir, documents, metadatas, n_lists, pq_subvectors,
+                     collection_name=db.collection_name, embedding_model=db.model_info()['model'])
+    size_mb = sum(f.stat().st_size for f in store_path(path).iterdir()) / (1024 * 1024)
+    print(f"   ✓ Index built in {time.perf_counter() - start:.1f}s: {path} ({size_mb:.2f} MB)")
+    return path
+
+
+# --------------------------------------------------------------------
+# Loader
+# --------------------------------------------------------------------
+class IVFIndex(VideoSnapshot):
+    """
+    Read-only, memory-mapped IVF index of an exported collection.
+
+    Same read API as VideoSnapshot (search_videos, search_candidates,
+    get_video_by_id, get_videos, get_collection_stats); searches scan the
+    nprobe posting lists nearest to the query instead of a graph.
+
+    Args:
+        index_path: Directory written by build_ivf() / export_ivf_index()
+        nprobe: Posting lists scanned per query
+        rerank: PQ candidates re-scored with the full vectors
+    """
+
+    def __init__(self, index_path: str = IVF_PATH, nprobe: int = IVF_NPROBE,
+                 rerank: int = IVF_PQ_RERANK):
+        self.snapshot_path = str(index_path)
+        arrays, blobs, self.manifest = read_store(index_path)
+
+        # Centroids and offsets are small and read on every query
+        self.centroids = np.array(arrays["centroids"])
+        self.list_offsets = np.array(arrays["list_offsets"])
+        self._half_sq_norms = 0.5 * np.einsum("ij,ij->i", self.centroids, self.centroids)
+        self.vectors = arrays["vectors"]
+        self.sq_norms = arrays["sq_norms"]
+        self.codes = arrays.get("codes")
+        self.codebooks = np.array(arrays["codebooks"]) if "codebooks" in arrays else None
+        if self.codebooks is not None:
+            self._codeword_sq_norms = np.einsum("mkd,mkd->mk", self.codebooks, self.codebooks)
+        self.columns = {
+            key: arrays[f"meta__{key}"]
+            for key in self.manifest.get("numeric_metadata", []) + self.manifest.get("category_metadata", [])
+        }
+
+        self._ids = blobs["ids"]
+        self._metadata = blobs["metadata"]
+        self._transcripts = blobs["transcripts"]
+
+        self.collection_name = self.manifest["collection_name"]
+        self.distance_metric = self.manifest["distance_metric"]
+        self._id_index = None
+
+        self.nprobe = nprobe
+        self.rerank = rerank
+
+    def probe(self, query: np.ndarray, nprobe: int) -> np.ndarray:
+        """The nprobe posting lists nearest to the query."""
+        scores = self.centroids @ query - self._half_sq_norms
+        nprobe = min(nprobe, len(scores))
+        return np.argpartition(-scores, nprobe - 1)[:nprobe]
+
+    def _list_rows(self, lists: np.ndarray, mask: Optional[np.ndarray]) -> List[np.ndarray]:
+        """Row indices of each probed list (restricted to mask)."""
+        rows = []
+        for c in lists:
+            start, end = int(self.list_offsets[c]), int(self.list_offsets[c + 1])
+            list_rows = np.arange(start, end)
+            rows.append(list_rows if mask is None else list_rows[mask[start:end]])
+        return rows
+
+    def _scan_flat(self, query: np.ndarray, lists: np.ndarray, top_k: int,
+                   mask: Optional[np.ndarray]) -> Tuple[np.ndarray, np.ndarray]:
+        """Exact distances over the probed lists (contiguous slices of the matrix)."""
+        rows, distances = [], []
+        for c, list_rows in zip(lists, self._list_rows(lists, mask)):
+            if len(list_rows) == 0:
+                continue
+            start, end = int(self.list_offsets[c]), int(self.list_offsets[c + 1])
+            list_distances = self._distances(query, slice(start, end))
+            rows.append(list_rows)
+            distances.append(list_distances if mask is None else list_distances[mask[start:end]])
+        return self._top(rows, distances, top_k)
+
+    def _scan_pq(self, query: np.ndarray, lists: np.ndarray, top_k: int,
+                 mask: Optional[np.ndarray]) -> Tuple[np.ndarray, np.ndarray]:
+        """Approximate distances from PQ codes, then exact re-scoring of the best candidates."""
+        n_subvectors, n_codewords, dsub = self.codebooks.shape
+        residuals = (query[None, :] - self.centroids[lists]).reshape(len(lists), n_subvectors, dsub)
+        # Lookup tables (probe, sub-vector, codeword): squared distance from each
+        # residual sub-vector to each codeword
+        cross = np.matmul(residuals.transpose(1, 0, 2), self.codebooks.transpose(0, 2, 1))
+        tables = (np.einsum("pmd,pmd->pm", residuals, residuals)[:, :, None]
+                  - 2 * cross.transpose(1, 0, 2) + self._codeword_sq_norms[None])
+
+        list_rows = self._list_rows(lists, mask)
+        sizes = np.array([len(r) for r in list_rows])
+        if sizes.sum() == 0:
+            return np.array([], dtype=np.int64), np.zeros(0, dtype=np.float32)
+        rows = np.concatenate(list_rows)
+        # One gather over the flattened tables for every code of every probed list
+        table_base = np.repeat(np.arange(len(lists)) * (n_subvectors * n_codewords), sizes)
+        flat_index = (self.codes[rows] + (np.arange(n_subvectors) * n_codewords)[None, :]
+                      + table_base[:, None])
+        approx = np.take(tables.ravel(), flat_index).sum(axis=1)
+
+        candidates, _ = self._top([rows], [approx], max(top_k, self.rerank))
+        candidates = np.sort(candidates)  # sequential reads from the vector file
+        return self._top([candidates], [self._distances(query, candidates)], top_k)
+
+    @staticmethod
+    def _top(rows: List[np.ndarray], distances: List[np.ndarray], k: int) -> Tuple[np.ndarray, np.ndarray]:
+        if not rows:
+            return np.array([], dtype=np.int64), np.array([], dtype=np.float32)
+        rows = np.concatenate(rows)
+        distances = np.concatenate(distances)
+        k = min(k, len(distances))
+        top = np.argpartition(distances, k - 1)[:k]
+        top = top[np.argsort(distances[top])]
+        return rows[top], distances[top]
+
+    def _search_indices(self, query_embedding: np.ndarray, top_k: int,
+                        metadata_filter: Optional[Dict], ef: int = None) -> Tuple[np.ndarray, np.ndarray]:
+        """Row indices and distances of the nearest videos (ef is unused; nprobe applies)."""
+        query = np.asarray(query_embedding, dtype=np.float32).reshape(-1)
+        if self.distance_metric == "cosine":
+            query = query / max(float(np.linalg.norm(query)), 1e-12)
+
+        with metrics.timer("ytss_db_seconds", operation="query"):
+            mask = filtered = None
+            if metadata_filter:
+                filtered = self._filter_rows(metadata_filter)
+                mask = np.zeros(self.count(), dtype=bool)
+                mask[filtered] = True
+
+            lists = self.probe(query, self.nprobe)
+            scan = self._scan_pq if self.codes is not None else self._scan_flat
+            indices, distances = scan(query, lists, top_k, mask)
+
+            # A selective filter can leave the probed lists short: scan its rows exactly
+            if filtered is not None and len(indices) < min(top_k, len(filtered)):
+                return self._exact_search(query, top_k, filtered)
+            return indices, distances
+
+    def get_collection_stats(self) -> Dict:
+        stats = super().get_collection_stats()
+        stats.update({'lists': int(self.manifest["lists"]), 'nprobe': self.nprobe,
+                      'pq_subvectors': int(self.manifest.get("pq_subvectors", 0))})
+        return stats
+
+
+def load_ivf_index(index_path: str = IVF_PATH, nprobe: int = IVF_NPROBE) -> IVFIndex:
+    """
+    Convenience function to open an IVF index.
+
+    Args:
+        index_path: Index directory
+        nprobe: Posting lists scanned per query
+
+    Returns:
+        IVFIndex instance
+    """
+    return IVFIndex(index_path, nprobe=nprobe)
+
+
+def main():
+    """Build an IVF index from the vector database."""
+    parser = argparse.ArgumentParser(
+        description="Build a disk-friendly IVF (optionally IVF-PQ) index from the ChromaDB collection"
+    )
+    parser.add_argument('--output', '-o', default=IVF_PATH,
+                        help=f'Index directory (default: {IVF_PATH})')
+    parser.add_argument('--lists', type=int, default=IVF_LISTS,
+                        help='Posting lists, 0 = about 4*sqrt(videos) (default: %(default)s)')
+    parser.add_argument('--pq', type=int, default=IVF_PQ_SUBVECTORS,
+                        help='PQ sub-vectors (bytes per vector), 0 = no PQ (default: %(default)s)')
+    args = parser.parse_args()
+
+    from scripts.db_handler import initialize_collection
+
+    print("=" * 70)
+    print("IVF INDEX BUILD")
+    print("=" * 70)
+
+    db = initialize_collection()
+    export_ivf_index(db, args.output, args.lists, args.pq)
+
+    print("\n" + "=" * 70)
+    print("✅ IVF INDEX BUILD COMPLETE!")
+    print("=" * 70)
+    print(f"\n💡 Search it with: python scripts/semantic_search.py -q 'your query' --ivf {args.output}")
+
+
+if __name__ == "__main__":
+    main()
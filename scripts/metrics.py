@@ -0,0 +1,267 @@
+"""
+Instrumentation for YouTube Semantic Search
+
+Lightweight, dependency-free metrics for the search hot path:
+- counters (cache hits/misses, errors)
+- latency histograms with a timer() context manager
+- export in Prometheus text format or JSON, optionally served over HTTP
+- a quiet mode that silences the print-based status lines
+
+Usage:
+    from scripts.metrics import metrics, status
+
+    with metrics.timer("ytss_search_stage_seconds", stage="encode"):
+        embedding = model.encode(query)
+
+    metrics.counter("ytss_query_cache_hits_total").inc()
+    print(metrics.to_prometheus())
+"""
+
+import json
+import threading
+import time
+from contextlib import contextmanager
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+import sys
+from typing import Dict, Optional, Tuple
+
+# Add project root to path
+ROOT_DIR = Path(__file__).resolve().parents[1]
+sys.path.append(str(ROOT_DIR))
+
+from config import QUIET
+
+# Latency buckets in seconds (0.5 ms .. 10 s)
+DEFAULT_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+# --------------------------------------------------------------------
+# Quiet mode
+# --------------------------------------------------------------------
+_quiet = QUIET
+
+
+def set_quiet(quiet: bool = True) -> None:
+    """Enable or disable the print-based status output."""
+    global _quiet
+    _quiet = quiet
+
+
+def is_quiet() -> bool:
+    return _quiet
+
+
+def status(*args, **kwargs) -> None:
+    """print() replacement for progress/status lines; silent in quiet mode."""
+    if not _quiet:
+        print(*args, **kwargs)
+
+
+# --------------------------------------------------------------------
+# Metric types
+# --------------------------------------------------------------------
+class Counter:
+    """Monotonically increasing counter."""
+
+    def __init__(self):
+        self.value = 0
+        self._lock = threading.Lock()
+
+    def inc(self, amount: float = 1) -> None:
+        with self._lock:
+            self.value += amount
+
+
+class Histogram:
+    """Cumulative-bucket histogram (Prometheus semantics)."""
+
+    def __init__(self, buckets: Tuple[float, ...] = DEFAULT_BUCKETS):
+        self.buckets = tuple(sorted(buckets))
+        self.bucket_counts = [0] * len(self.buckets)
+        self.count = 0
+        self.sum = 0.0
+        self._lock = threading.Lock()
+
+    def observe(self, value: float) -> None:
+        with self._lock:
+            self.count += 1
+            self.sum += value
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    self.bucket_counts[i] += 1
+
+    def to_dict(self) -> Dict:
+        return {
+            "count": self.count,
+            "sum": self.sum,
+            "mean": self.sum / self.count if self.count else 0.0,
+            "buckets": {str(b): c for b, c in zip(self.buckets, self.bucket_counts)},
+        }
+
+
+def _label_key(labels: Dict[str, str]) -> Tuple[Tuple[str, str], ...]:
+    return tuple(sorted((k, str(v)) for k, v in labels.items()))
+
+
+def _format_labels(labels: Tuple[Tuple[str, str], ...], extra: Optional[Tuple[str, str]] = None) -> str:
+    items = list(labels) + ([extra] if extra else [])
+    if not items:
+        return ""
+    return "{" + ",".join(f'{k}="{v}"' for k, v in items) + "}"
+
+
+# --------------------------------------------------------------------
+# Registry
+# --------------------------------------------------------------------
+class MetricsRegistry:
+    """Process-wide collection of named, labelled counters and histograms."""
+
+    def __init__(self):
+        self._counters: Dict[str, Dict[tuple, Counter]] = {}
+        self._histograms: Dict[str, Dict[tuple, Histogram]] = {}
+        self._help: Dict[str, str] = {}
+        self._lock = threading.Lock()
+
+    def counter(self, name: str, help_text: str = "", **labels) -> Counter:
+        """Get or create a counter."""
+        key = _label_key(labels)
+        with self._lock:
+            series = self._counters.setdefault(name, {})
+            if key not in series:
+                series[key] = Counter()
+                if help_text:
+                    self._help[name] = help_text
+            return series[key]
+
+    def histogram(self, name: str, help_text: str = "",
+                  buckets: Tuple[float, ...] = DEFAULT_BUCKETS, **labels) -> Histogram:
+        """Get or create a histogram."""
+        key = _label_key(labels)
+        with self._lock:
+            series = self._histograms.setdefault(name, {})
+            if key not in series:
+                series[key] = Histogram(buckets)
+                if help_text:
+                    self._help[name] = help_text
+            return series[key]
+
+    @contextmanager
+    def timer(self, name: str, **labels):
+        """
+        Time a block into a histogram (seconds).
+
+        Exceptions raised inside the block are counted in ytss_errors_total
+        with the same labels and re-raised.
+        """
+        histogram = self.histogram(name, **labels)
+        start = time.perf_counter()
+        try:
+            yield
+        except Exception:
+            self.counter("ytss_errors_total", "Errors raised in instrumented blocks", **labels).inc()
+            raise
+        finally:
+            histogram.observe(time.perf_counter() - start)
+
+    def reset(self) -> None:
+        """Drop all recorded metrics."""
+        with self._lock:
+            self._counters.clear()
+            self._histograms.clear()
+
+    def to_dict(self) -> Dict:
+        """JSON-friendly view of every metric."""
+        with self._lock:
+            counters = {
+                name: [{"labels": dict(k), "value": c.value} for k, c in series.items()]
+                for name, series in self._counters.items()
+            }
+            histograms = {
+                name: [{"labels": dict(k), **h.to_dict()} for k, h in series.items()]
+                for name, series in self._histograms.items()
+            }
+        return {"counters": counters, "histograms": histograms}
+
+    def to_json(self) -> str:
+        return json.dumps(self.to_dict(), indent=2)
+
+    def to_prometheus(self) -> str:
+        """Render every metric in the Prometheus text exposition format."""
+        lines = []
+        with self._lock:
+            for name, series in sorted(self._counters.items()):
+                if name in self._help:
+                    lines.append(f"# HELP {name} {self._help[name]}")
+                lines.append(f"# TYPE {name} counter")
+                for key, c in series.items():
+                    lines.append(f"{name}{_format_labels(key)} {c.value}")
+
+            for name, series in sorted(self._histograms.items()):
+                if name in self._help:
+                    lines.append(f"# HELP {name} {self._help[name]}")
+                lines.append(f"# TYPE {name} histogram")
+                for key, h in series.items():
+                    for bound, count in zip(h.buckets, h.bucket_counts):
+                        lines.append(f"{name}_bucket{_format_labels(key, ('le', str(bound)))} {count}")
+                    lines.append(f"{name}_bucket{_format_labels(key, ('le', '+Inf'))} {h.count}")
+                    lines.append(f"{name}_sum{_format_labels(key)} {h.sum}")
+                    lines.append(f"{name}_count{_format_labels(key)} {h.count}")
+        return "\n".join(lines) + "\n"
+
+    def write(self, path) -> Path:
+        """Write metrics to a file: JSON for *.json, Prometheus text otherwise."""
+        path = Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        content = self.to_json() if path.suffix == ".json" else self.to_prometheus()
+        path.write_text(content, encoding="utf-8")
+        return path
+
+
+# Shared registry used by the search code
+metrics = MetricsRegistry()
+
+
+# --------------------------------------------------------------------
+# HTTP endpoint
+# --------------------------------------------------------------------
+def serve_metrics(port: int, registry: MetricsRegistry = metrics,
+                  host: str = "127.0.0.1") -> ThreadingHTTPServer:
+    """
+    Serve metrics over HTTP from a background thread.
+
+    Endpoints:
+        /metrics       Prometheus text format
+        /metrics.json  JSON
+
+    Args:
+        port: Port to listen on (0 picks a free port)
+        registry: Registry to expose
+        host: Interface to bind
+
+    Returns:
+        The running server (call shutdown() to stop it)
+    """
+    class MetricsHandler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            if self.path == "/metrics":
+                body, content_type = registry.to_prometheus(), "text/plain; version=0.0.4"
+            elif self.path == "/metrics.json":
+                body, content_type = registry.to_json(), "application/json"
+            else:
+                self.send_error(404)
+                return
+            payload = body.encode("utf-8")
+            self.send_response(200)
+            self.send_header("Content-Type", content_type)
+            self.send_header("Content-Length", str(len(payload)))
+            self.end_headers()
+            self.wfile.write(payload)
+
+        def log_message(self, format, *args):
+            pass
+
+    server = ThreadingHTTPServer((host, port), MetricsHandler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    return server
@@ -1,23 +1,29 @@
 """
-Data Migration Script: CSV to ChromaDB
+Data Migration Script: Dataset to ChromaDB
 
-Migrates YouTube video data from crashcourse_final.csv to ChromaDB vector database.
+Migrates YouTube video data from crashcourse_final.csv (or .parquet/.arrow)
+to ChromaDB vector database.
 Handles: video metadata, transcripts, and embeddings.
 """
 
+import argparse
 import pandas as pd
 import numpy as np
 import json
 from pathlib import Path
 import sys
-from tqdm import tqdm
+import time
 
 # Add project root to path
 ROOT_DIR = Path(__file__).resolve().parents[1]
 sys.path.append(str(ROOT_DIR))
 
 from scripts.db_handler import initialize_collection
-from config import DATA_DIR
+from scripts.profiling import add_profile_arguments, profile_session
+from scripts.dataset_io import read_dataset
+from scripts.neighbours import NeighbourTable, neighbours_lock
+from scripts.cluster_topics import TopicIndex, CLUSTER_KEY, SERIES_KEY
+from config import DATA_DIR, NEIGHBOURS_PATH, NEIGHBOURS_K, CLUSTERS_PATH, TOPIC_CLUSTERS
 
 
 def parse_embedding_string(embedding_str):
@@ -38,26 +44,117 @@ def parse_embedding_string(embedding_str):
         return None
 
 
-def load_csv_data(csv_path):
+def load_dataset(path, columns=None):
     """
-    Load video data from CSV file.
+    Load video data (CSV, Parquet or Arrow, chosen by extension).
     
     Args:
-        csv_path: Path to crashcourse_final.csv
+        path: Path to crashcourse_final.csv / .parquet / .arrow
+        columns: Columns to load (default: MIGRATION_COLUMNS)
     
     Returns:
         pandas DataFrame
     """
-    print(f"\n📂 Loading data from: {csv_path.name}")
-    df = pd.read_csv(csv_path)
+    print(f"\n📂 Loading data from: {path.name}")
+    df = read_dataset(path, columns=columns or MIGRATION_COLUMNS)
     print(f"   ✓ Loaded {len(df)} videos")
     return df
 
 
+# Metadata stored with each video: (metadata key, source column, type)
+METADATA_FIELDS = [
+    ('title', 'title', str),
+    ('channel_title', 'channel_title', str),
+    ('view_count', 'viewCount', int),
+    ('duration_seconds', 'duration_seconds', int),
+    ('published_at', 'publishedAt', str),
+    ('like_count', 'likeCount', int),
+    ('comment_count', 'commentCount', int),
+]
+
+
+# Columns the migration reads; everything else (descriptions, thumbnails...) is skipped
+MIGRATION_COLUMNS = ['id', 'transcript', 'embeddings'] + [col for _, col, _ in METADATA_FIELDS]
+
+
+def text_column(series):
+    """Column-wise equivalent of `str(x) if pd.notna(x) else ""`."""
+    return series.astype(str).where(series.notna(), "")
+
+
+def int_column(series):
+    """Column-wise equivalent of `int(x) if pd.notna(x) else 0`."""
+    return series.fillna(0).astype('int64')
+
+
+def parse_embedding_column(embedding_strings):
+    """
+    Parse a column of embeddings in one pass.
+    
+    Rows loaded from Parquet/Arrow are already float32 vectors and are just
+    stacked. JSON strings (CSV) are joined into a single JSON array and
+    decoded with one json.loads call. If that fails (malformed or ragged
+    rows), rows are parsed one by one with parse_embedding_string.
+    
+    Args:
+        embedding_strings: pandas Series of JSON strings or float32 vectors
+    
+    Returns:
+        Tuple of (embeddings array for valid rows, boolean validity mask)
+    """
+    values = embedding_strings.tolist()
+    
+    if any(isinstance(v, np.ndarray) for v in values):
+        shape = next(v.shape for v in values if isinstance(v, np.ndarray))
+        valid = np.array([isinstance(v, np.ndarray) and v.shape == shape for v in values], dtype=bool)
+        rows = [v for v, ok in zip(values, valid) if ok]
+        return np.stack(rows).astype(np.float32, copy=False), valid
+    
+    valid = np.array([isinstance(v, str) for v in values], dtype=bool)
+    n_valid = int(valid.sum())
+    
+    try:
+        joined = "[" + ",".join(v for v, ok in zip(values, valid) if ok) + "]"
+        embeddings = np.array(json.loads(joined), dtype=np.float32)
+        if embeddings.ndim == 2 and embeddings.shape[0] == n_valid:
+            return embeddings, valid
+    except (json.JSONDecodeError, ValueError, TypeError):
+        pass
+    
+    # Slow path: isolate the rows that fail to parse
+    parsed = [parse_embedding_string(v) if ok else None for v, ok in zip(values, valid)]
+    valid = np.array([p is not None for p in parsed], dtype=bool)
+    return np.array([p for p in parsed if p is not None], dtype=np.float32), valid
+
+
+def prepare_records(df):
+    """
+    Extract IDs, transcripts and metadata records from cleaned video rows.
+    
+    Args:
+        df: pandas DataFrame with video data
+    
+    Returns:
+        Tuple of (video_ids, transcripts, metadata_list)
+    """
+    video_ids = df['id'].astype(str).tolist()
+    transcripts = text_column(df['transcript']).tolist()
+    
+    # Build metadata records column-wise
+    metadata_frame = pd.DataFrame({
+        key: text_column(df[col]) if kind is str else int_column(df[col])
+        for key, col, kind in METADATA_FIELDS
+    })
+    return video_ids, transcripts, metadata_frame.to_dict('records')
+
+
 def prepare_data_for_db(df):
     """
     Prepare data from DataFrame for ChromaDB insertion.
     
+    Works column by column (fill + cast whole columns, then emit records)
+    instead of walking rows with iterrows.
+    
     Args:
         df: pandas DataFrame with video data
     
@@ -66,45 +163,12 @@ def prepare_data_for_db(df):
     """
     print("\n🔧 Preparing data for ChromaDB...")
     
-    video_ids = []
-    transcripts = []
-    embeddings_list = []
-    metadata_list = []
-    
-    failed_count = 0
-    
-    for idx, row in tqdm(df.iterrows(), total=len(df), desc="Processing videos"):
-        # Parse embedding
-        embedding = parse_embedding_string(row['embeddings'])
-        
-        if embedding is None:
-            failed_count += 1
-            continue
-        
-        # Extract video ID (use 'id' column from CSV)
-        video_id = str(row['id'])
-        
-        # Extract transcript
-        transcript = str(row['transcript']) if pd.notna(row['transcript']) else ""
-        
-        # Build metadata dictionary
-        metadata = {
-            'title': str(row['title']) if pd.notna(row['title']) else "",
-            'channel_title': str(row['channel_title']) if pd.notna(row['channel_title']) else "",
-            'view_count': int(row['viewCount']) if pd.notna(row['viewCount']) else 0,
-            'duration_seconds': int(row['duration_seconds']) if pd.notna(row['duration_seconds']) else 0,
-            'published_at': str(row['publishedAt']) if pd.notna(row['publishedAt']) else "",
-            'like_count': int(row['likeCount']) if pd.notna(row['likeCount']) else 0,
-            'comment_count': int(row['commentCount']) if pd.notna(row['commentCount']) else 0,
-        }
-        
-        video_ids.append(video_id)
-        transcripts.append(transcript)
-        embeddings_list.append(embedding)
-        metadata_list.append(metadata)
-    
-    # Convert embeddings list to numpy array
-    embeddings_array = np.array(embeddings_list, dtype=np.float32)
+    # Parse embeddings and drop rows that failed
+    embeddings_array, valid = parse_embedding_column(df['embeddings'])
+    failed_count = int((~valid).sum())
+    df = df[valid]
+    
+    video_ids, transcripts, metadata_list = prepare_records(df)
     
     print(f"   ✓ Successfully prepared {len(video_ids)} videos")
     if failed_count > 0:
@@ -164,23 +228,72 @@ def generate_migration_report(video_ids, stats):
     print("=" * 70)
 
 
-def main():
-    """Main migration execution."""
+def build_neighbour_table(video_ids, embeddings, db, output_path=NEIGHBOURS_PATH):
+    """
+    Precompute the related-video table from the migrated embeddings.
+    
+    Args:
+        video_ids: Migrated video IDs
+        embeddings: Their embeddings (n_videos, embedding_dim)
+        db: VideoVectorDB they were inserted into (its model and collection tag the table)
+        output_path: Table directory
+    """
+    print(f"\n🔗 Building related-video table (k={NEIGHBOURS_K})...")
+    start = time.perf_counter()
+    table = NeighbourTable.build(video_ids, embeddings, model=db.model_info()['model'],
+                                 collection_name=db.collection_name)
+    with neighbours_lock(output_path):
+        table.save(output_path)
+    print(f"   ✓ {len(table)} videos in {time.perf_counter() - start:.1f}s → {output_path}")
+
+
+def assign_topics(embeddings, metadata_list, db, output_path=CLUSTERS_PATH):
+    """
+    Cluster the embeddings and add cluster_id / series to each metadata record.
+    
+    Args:
+        embeddings: Embeddings (n_videos, embedding_dim)
+        metadata_list: Metadata records, updated in place
+        db: VideoVectorDB they will be inserted into (its model and collection tag the index)
+        output_path: Topic index directory
+    """
+    print("\n📚 Clustering topics and labelling series...")
+    start = time.perf_counter()
+    titles = [metadata['title'] for metadata in metadata_list]
+    index, labels, series = TopicIndex.fit(embeddings, titles, TOPIC_CLUSTERS, model=db.model_info()['model'],
+                                           collection_name=db.collection_name)
+    for metadata, label, name in zip(metadata_list, labels, series):
+        metadata[CLUSTER_KEY] = int(label)
+        metadata[SERIES_KEY] = name
+    index.save(output_path)
+    print(f"   ✓ {len(index)} clusters, {len(index.series_counts)} series labels "
+          f"in {time.perf_counter() - start:.1f}s → {output_path}")
+
+
+def run_migration(input_path=None, neighbours=True, clusters=True):
+    """
+    Load the embedded dataset and insert it into ChromaDB.
+    
+    Args:
+        input_path: Embedded dataset (default: data/crashcourse_final.csv)
+        neighbours: Also build the related-video neighbour table
+        clusters: Label topic clusters and series in the metadata
+    """
     print("=" * 70)
-    print("CSV TO CHROMADB MIGRATION")
+    print("DATASET TO CHROMADB MIGRATION")
     print("=" * 70)
     
     # Define paths
-    csv_path = Path(DATA_DIR) / "crashcourse_final.csv"
+    dataset_path = Path(input_path) if input_path else Path(DATA_DIR) / "crashcourse_final.csv"
     
-    # Check if CSV exists
-    if not csv_path.exists():
-        print(f"❌ Error: CSV file not found at {csv_path}")
+    # Check if the dataset exists
+    if not dataset_path.exists():
+        print(f"❌ Error: Dataset not found at {dataset_path}")
         print(f"   Please ensure crashcourse_final.csv exists in the data directory.")
         return
     
-    # Step 1: Load CSV data
-    df = load_csv_data(csv_path)
+    # Step 1: Load the columns the migration needs
+    df = load_dataset(dataset_path)
     
     # Step 2: Prepare data for ChromaDB
     video_ids, transcripts, embeddings, metadata_list = prepare_data_for_db(df)
@@ -193,7 +306,11 @@ def main():
     print("\n🗄️  Initializing ChromaDB...")
     db = initialize_collection()
     
-    # Step 4: Insert data into ChromaDB
+    # Step 4: Label topic clusters and series
+    if clusters:
+        assign_topics(embeddings, metadata_list, db)
+    
+    # Step 5: Insert data into ChromaDB
     print(f"\n💾 Inserting {len(video_ids)} videos into ChromaDB...")
     db.insert_videos(
         video_ids=video_ids,
@@ -202,10 +319,14 @@ def main():
         metadata=metadata_list
     )
     
-    # Step 5: Verify migration
+    # Step 6: Verify migration
     verification_passed = verify_migration(db, len(video_ids))
     
-    # Step 6: Generate report
+    # Step 7: Precompute related videos
+    if neighbours and verification_passed:
+        build_neighbour_table(video_ids, embeddings, db)
+    
+    # Step 8: Generate report
     if verification_passed:
         stats = db.get_collection_stats()
         generate_migration_report(video_ids, stats)
@@ -217,5 +338,23 @@ def main():
     print("   • View database stats with: python scripts/db_handler.py")
 
 
+def main():
+    """Main migration execution."""
+    parser = argparse.ArgumentParser(
+        description="Migrate the embedded video dataset into ChromaDB"
+    )
+    parser.add_argument('--input', default=None,
+                        help='Embedded dataset, .csv/.parquet/.arrow (default: data/crashcourse_final.csv)')
+    parser.add_argument('--no-neighbours', action='store_true',
+                        help='Skip building the related-video table')
+    parser.add_argument('--no-clusters', action='store_true',
+                        help='Skip topic clustering and series labels')
+    add_profile_arguments(parser)
+    args = parser.parse_args()
+    
+    with profile_session(args, "migrate_to_vectordb"):
+        run_migration(args.input, neighbours=not args.no_neighbours, clusters=not args.no_clusters)
+
+
 if __name__ == "__main__":
     main()
@@ -0,0 +1,411 @@
+"""
+Related-video Neighbour Table for YouTube Semantic Search
+
+"More like this" should not cost a vector query per click. This module
+precomputes every video's nearest neighbours once, as blocked matrix
+products, and stores them in a memory-mapped sidecar (data/neighbours/):
+- neighbours.npy     int32 (n_videos, k) row indices, most similar first (-1 = none)
+- similarities.npy   float16 (n_videos, k) cosine similarities
+- vectors.npy        float16 unit-normalised embeddings (for incremental updates)
+- ids                video IDs (blob)
+
+The manifest records the embedding model and collection the table was
+built from; load_neighbours() drops a table that belongs to another one.
+
+related(video_id) is then a dict lookup plus one row read.
+
+The table is built by migrate_to_vectordb.py. add() and remove() update
+it incrementally: new videos are scored against the stored vectors, and
+only rows that lost a neighbour are recomputed. A VideoVectorDB opened
+with neighbours_path (as stream_pipeline.py, dedup.py --compact and
+refresh_stats.py --delete-missing do) queues the changes its writes make
+and applies them with apply_changes() every NEIGHBOURS_FLUSH_SECONDS and
+on exit, so the table follows upserts and deletes without paying for a
+table rewrite per write. apply_changes() and the builds below hold
+<path>.lock while they read and save, so concurrent writers add to each
+other's saves instead of overwriting them. `--sync` applies any remaining
+difference between the table and the database (e.g. after writes made
+without it, or changes lost when a writer was killed).
+
+Usage:
+    python scripts/neighbours.py --build
+    python scripts/neighbours.py --sync
+    python scripts/neighbours.py --related VIDEO_ID
+"""
+
+import argparse
+from contextlib import contextmanager
+from pathlib import Path
+import sys
+import time
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+
+# Add project root to path
+ROOT_DIR = Path(__file__).resolve().parents[1]
+sys.path.append(str(ROOT_DIR))
+
+from config import NEIGHBOURS_PATH, NEIGHBOURS_K, VECTOR_DB_PATH, COLLECTION_NAME
+from scripts.array_store import write_store, read_store, store_exists
+from scripts.embedding_utils import normalise_rows
+from scripts.metrics import status
+
+
+def top_k_neighbours(queries: np.ndarray, vectors: np.ndarray, k: int,
+                     self_rows: Optional[np.ndarray] = None,
+                     block_size: int = 1024) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Exact k nearest neighbours by cosine similarity, block_size queries at a time.
+
+    Args:
+        queries: (m, dim) unit vectors
+        vectors: (n, dim) unit vectors searched
+        k: Neighbours per query
+        self_rows: Row of each query in vectors, excluded from its own results
+        block_size: Queries per matrix product
+
+    Returns:
+        Tuple of (indices int32 (m, k), similarities float32 (m, k)),
+        padded with -1 / -inf when fewer than k neighbours exist
+    """
+    m, n = len(queries), len(vectors)
+    indices = np.full((m, k), -1, dtype=np.int32)
+    similarities = np.full((m, k), -np.inf, dtype=np.float32)
+    available = n - (1 if self_rows is not None else 0)
+    kk = min(k, available)
+    if m == 0 or kk <= 0:
+        return indices, similarities
+
+    for start in range(0, m, block_size):
+        end = min(start + block_size, m)
+        sims = np.asarray(queries[start:end], dtype=np.float32) @ np.asarray(vectors, dtype=np.float32).T
+        if self_rows is not None:
+            sims[np.arange(end - start), self_rows[start:end]] = -np.inf
+        top = np.argpartition(-sims, kk - 1, axis=1)[:, :kk]
+        top_sims = np.take_along_axis(sims, top, axis=1)
+        order = np.argsort(-top_sims, axis=1)
+        indices[start:end, :kk] = np.take_along_axis(top, order, axis=1)
+        similarities[start:end, :kk] = np.take_along_axis(top_sims, order, axis=1)
+    return indices, similarities
+
+
+class NeighbourTable:
+    """
+    k nearest neighbours of every video.
+
+    Args:
+        ids: Video IDs, one per row
+        vectors: (n, dim) unit-normalised embeddings
+        neighbours: (n, k) int32 row indices (-1 = none)
+        similarities: (n, k) cosine similarities
+        manifest: Extra manifest fields ("model", "collection_name")
+    """
+
+    def __init__(self, ids: List[str], vectors: np.ndarray, neighbours: np.ndarray,
+                 similarities: np.ndarray, manifest: Optional[Dict] = None):
+        self.manifest = dict(manifest or {})
+        self._assign(ids, vectors, neighbours, similarities)
+
+    def _assign(self, ids, vectors, neighbours, similarities) -> None:
+        self.ids = list(ids)
+        self.vectors = vectors
+        self.neighbours = neighbours
+        self.similarities = similarities
+        self.k = neighbours.shape[1]
+        self._rows = {video_id: row for row, video_id in enumerate(self.ids)}
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    def __contains__(self, video_id: str) -> bool:
+        return video_id in self._rows
+
+    @classmethod
+    def build(cls, ids: List[str], embeddings: np.ndarray, k: int = NEIGHBOURS_K,
+              block_size: int = 1024, model: Optional[str] = None,
+              collection_name: Optional[str] = None) -> "NeighbourTable":
+        """Compute the full table with blocked matrix products, tagged with its model and collection."""
+        vectors = normalise_rows(embeddings)
+        neighbours, similarities = top_k_neighbours(vectors, vectors, k, np.arange(len(ids)), block_size)
+        return cls(ids, vectors.astype(np.float16), neighbours, similarities.astype(np.float16),
+                   {"model": model, "collection_name": collection_name})
+
+    @classmethod
+    def load(cls, path=NEIGHBOURS_PATH) -> "NeighbourTable":
+        """Open a saved table (arrays are memory-mapped)."""
+        arrays, blobs, manifest = read_store(path)
+        ids = [blobs["ids"][i].decode("utf-8") for i in range(len(blobs["ids"]))]
+        blobs["ids"].close()
+        return cls(ids, arrays["vectors"], arrays["neighbours"], arrays["similarities"], manifest)
+
+    def save(self, path=NEIGHBOURS_PATH) -> Path:
+        """Write the table (atomically replacing any previous one)."""
+        return write_store(
+            path,
+            arrays={
+                "neighbours": self.neighbours,
+                "similarities": self.similarities,
+                "vectors": self.vectors,
+            },
+            blobs={"ids": [video_id.encode("utf-8") for video_id in self.ids]},
+            manifest={"count": len(self.ids), "k": self.k,
+                      "dimension": int(self.vectors.shape[1]) if len(self.ids) else None,
+                      "model": self.manifest.get("model"),
+                      "collection_name": self.manifest.get("collection_name")},
+        )
+
+    def related(self, video_id: str, k: Optional[int] = None) -> Optional[List[Tuple[str, float]]]:
+        """
+        Most similar videos to video_id.
+
+        Returns:
+            List of (video ID, cosine similarity), or None if the video is not in the table
+        """
+        row = self._rows.get(video_id)
+        if row is None:
+            return None
+        k = self.k if k is None else min(k, self.k)
+        indices = self.neighbours[row, :k]
+        sims = self.similarities[row, :k]
+        return [(self.ids[i], float(s)) for i, s in zip(indices, sims) if i >= 0]
+
+    def add(self, ids: List[str], embeddings: np.ndarray, block_size: int = 1024) -> None:
+        """
+        Add (or replace) videos.
+
+        New rows get their neighbours from a search over all vectors; existing
+        rows merge the new videos into their lists where they score higher.
+        """
+        replaced = [video_id for video_id in ids if video_id in self._rows]
+        if replaced:
+            self.remove(replaced, block_size)
+
+        new_vectors = normalise_rows(embeddings)
+        n_old, n_new = len(self.ids), len(ids)
+        vectors = np.vstack([np.asarray(self.vectors, dtype=np.float32), new_vectors]) if n_old else new_vectors
+
+        new_neighbours, new_sims = top_k_neighbours(new_vectors, vectors, self.k,
+                                                    n_old + np.arange(n_new), block_size)
+
+        neighbours = np.array(self.neighbours, dtype=np.int32)
+        similarities = np.array(self.similarities, dtype=np.float32)
+        new_columns = n_old + np.arange(n_new, dtype=np.int32)
+        for start in range(0, n_old, block_size):
+            end = min(start + block_size, n_old)
+            sims_to_new = vectors[start:end] @ new_vectors.T
+            candidate_sims = np.hstack([similarities[start:end], sims_to_new])
+            candidate_ids = np.hstack([neighbours[start:end], np.broadcast_to(new_columns, sims_to_new.shape)])
+            top = np.argsort(-candidate_sims, axis=1)[:, :self.k]
+            neighbours[start:end] = np.take_along_axis(candidate_ids, top, axis=1)
+            similarities[start:end] = np.take_along_axis(candidate_sims, top, axis=1)
+
+        self._assign(self.ids + list(ids), vectors.astype(np.float16),
+                      np.vstack([neighbours, new_neighbours]),
+                      np.vstack([similarities, new_sims]).astype(np.float16))
+
+    def remove(self, ids: List[str], block_size: int = 1024) -> int:
+        """
+        Remove videos; rows that listed one of them are recomputed.
+
+        Returns:
+            Number of videos removed
+        """
+        drop = np.array(sorted({self._rows[video_id] for video_id in ids if video_id in self._rows}),
+                        dtype=np.int64)
+        if len(drop) == 0:
+            return 0
+
+        keep = np.ones(len(self.ids), dtype=bool)
+        keep[drop] = False
+        new_row = np.full(len(self.ids) + 1, -1, dtype=np.int32)  # last slot maps -1 -> -1
+        new_row[:-1][keep] = np.arange(int(keep.sum()), dtype=np.int32)
+
+        neighbours = new_row[np.asarray(self.neighbours)[keep]]
+        similarities = np.array(self.similarities, dtype=np.float32)[keep]
+        vectors = np.asarray(self.vectors, dtype=np.float32)[keep]
+
+        # Rows that lost a neighbour (or were already short) are recomputed
+        stale = np.flatnonzero((neighbours < 0).any(axis=1))
+        if len(stale):
+            fixed, fixed_sims = top_k_neighbours(vectors[stale], vectors, self.k, stale, block_size)
+            neighbours[stale] = fixed
+            similarities[stale] = fixed_sims
+
+        self._assign([video_id for video_id, kept in zip(self.ids, keep) if kept],
+                      vectors.astype(np.float16), neighbours, similarities.astype(np.float16))
+        return len(drop)
+
+
+def load_neighbours(path=NEIGHBOURS_PATH, model: Optional[str] = None,
+                    collection_name: Optional[str] = None) -> Optional[NeighbourTable]:
+    """
+    Open the neighbour table if it exists.
+
+    Args:
+        model: Expected embedding model (None skips the check)
+        collection_name: Expected source collection (None skips the check)
+
+    Returns:
+        The table, or None if there is none or it was built from another
+        model or collection (tables saved before tagging are accepted)
+    """
+    if not store_exists(path):
+        return None
+    table = NeighbourTable.load(path)
+    for key, expected in (("model", model), ("collection_name", collection_name)):
+        built_from = table.manifest.get(key)
+        if expected is not None and built_from is not None and built_from != expected:
+            status(f"⚠️  Neighbour table at {path} was built from {built_from}, not {expected}; ignoring it")
+            return None
+    return table
+
+
+@contextmanager
+def neighbours_lock(path=NEIGHBOURS_PATH):
+    """
+    Hold the table's lock (<path>.lock) while reading, changing and saving it.
+
+    Where fcntl is not available (Windows) the lock does nothing; run one
+    table writer at a time there.
+    """
+    if fcntl is None:
+        yield
+        return
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with open(path.with_name(f"{path.name}.lock"), "a") as f:
+        fcntl.flock(f, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(f, fcntl.LOCK_UN)
+
+
+def apply_changes(path, changes: Dict[str, Optional[np.ndarray]], model: Optional[str] = None,
+                  collection_name: Optional[str] = None, clear: bool = False) -> bool:
+    """
+    Apply queued writes to the saved table: reload it under the lock, make
+    the changes and save it.
+
+    Args:
+        path: Table directory
+        changes: Video ID -> new embedding, or None if the video was deleted
+        model: Expected embedding model (None skips the check)
+        collection_name: Expected source collection (None skips the check)
+        clear: Remove every video before applying changes
+
+    Returns:
+        False if there is no table for this model and collection to update
+    """
+    with neighbours_lock(path):
+        table = load_neighbours(path, model, collection_name)
+        if table is None:
+            return False
+        removed = list(table.ids) if clear else [video_id for video_id, vector in changes.items() if vector is None]
+        added = [video_id for video_id, vector in changes.items() if vector is not None]
+        table.remove(removed)
+        if added:
+            table.add(added, np.vstack([changes[video_id] for video_id in added]))
+        table.save(path)
+    return True
+
+
+def build_from_db(db, k: int = NEIGHBOURS_K, page_size: int = 5000) -> NeighbourTable:
+    """Build a table from every embedding stored in the database."""
+    ids, blocks = [], []
+    for page_ids, columns in db.iter_pages(('embedding',), page_size):
+        ids.extend(page_ids)
+        blocks.append(columns['embedding'])
+    embeddings = np.vstack(blocks) if blocks else np.zeros((0, 0), dtype=np.float32)
+    return NeighbourTable.build(ids, embeddings, k, model=db.model_info()['model'],
+                                collection_name=db.collection_name)
+
+
+def sync_with_db(table: NeighbourTable, db, page_size: int = 5000) -> Dict[str, int]:
+    """
+    Bring the table in line with the database: add videos it lacks and
+    remove videos the database no longer has.
+
+    Returns:
+        Dict with the number of videos added and removed
+    """
+    stored = set()
+    for page_ids, _ in db.iter_pages((), page_size):
+        stored.update(page_ids)
+
+    removed = table.remove([video_id for video_id in table.ids if video_id not in stored])
+    missing = [video_id for video_id in stored if video_id not in table]
+    if missing:
+        records = db.get_videos(missing, fields=('embedding',))
+        table.add([record['id'] for record in records if record],
+                  np.vstack([record['embedding'] for record in records if record]))
+    return {"added": len(missing), "removed": removed}
+
+
+def main():
+    from scripts.db_handler import VideoVectorDB
+
+    parser = argparse.ArgumentParser(
+        description="Build, update and query the related-video neighbour table"
+    )
+    action = parser.add_mutually_exclusive_group(required=True)
+    action.add_argument('--build', action='store_true',
+                        help='Rebuild the table from every embedding in the database')
+    action.add_argument('--sync', action='store_true',
+                        help='Add new videos and drop deleted ones incrementally')
+    action.add_argument('--related', metavar='VIDEO_ID',
+                        help='Print the videos related to VIDEO_ID')
+    parser.add_argument('--k', type=int, default=NEIGHBOURS_K,
+                        help=f'Neighbours stored per video (default: {NEIGHBOURS_K})')
+    parser.add_argument('--path', default=NEIGHBOURS_PATH,
+                        help=f'Table directory (default: {NEIGHBOURS_PATH})')
+    parser.add_argument('--db-path', default=VECTOR_DB_PATH,
+                        help=f'ChromaDB directory (default: {VECTOR_DB_PATH})')
+    parser.add_argument('--collection', default=COLLECTION_NAME,
+                        help=f'Collection name (default: {COLLECTION_NAME})')
+    args = parser.parse_args()
+
+    if args.related:
+        table = load_neighbours(args.path)
+        if table is None:
+            print(f"❌ No neighbour table at {args.path}. Build it with --build.")
+            return
+        related = table.related(args.related)
+        if related is None:
+            print(f"❌ {args.related} is not in the neighbour table")
+            return
+        print(f"\n🔗 Related to {args.related}:")
+        for video_id, similarity in related:
+            print(f"   • {video_id}  ({similarity:.3f})  https://youtu.be/{video_id}")
+        return
+
+    db = VideoVectorDB(args.db_path, args.collection)
+    start = time.perf_counter()
+    model, collection_name = db.model_info()['model'], db.collection_name
+    with neighbours_lock(args.path):
+        # A table of another model or collection is rebuilt rather than synced
+        table = load_neighbours(args.path, model, collection_name) if args.sync else None
+        if table is not None:
+            print("\n🔄 Syncing neighbour table with the database...")
+            changes = sync_with_db(table, db)
+            print(f"   • {changes['added']:,} added, {changes['removed']:,} removed")
+            table.save(args.path)
+
+    if table is None:
+        # Built without the lock so writers are not held up; they only wait for the save
+        print(f"\n🧮 Building neighbour table (k={args.k})...")
+        table = build_from_db(db, args.k)
+        with neighbours_lock(args.path):
+            table.save(args.path)
+    print(f"\n✅ Neighbour table for {len(table):,} videos written to {args.path} "
+          f"in {time.perf_counter() - start:.1f}s")
+
+
+if __name__ == "__main__":
+    main()
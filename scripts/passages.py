@@ -0,0 +1,315 @@
+"""
+Time-aligned Passages for YouTube Semantic Search
+
+Keeps the VTT cue timings that used to be thrown away when captions were
+joined into a transcript, so search results can deep-link into a video
+(https://youtu.be/<id>?t=<seconds>) instead of its start.
+
+Cue timings travel with the datasets in the `transcript_cues` column: the
+character offset of every cue in the transcript and its start time in
+milliseconds, both delta-encoded ("<offset deltas>|<ms deltas>"). Cleaning
+remaps the offsets onto the cleaned transcript.
+
+build_passages() then cuts each cleaned transcript into passages of about
+PASSAGE_CHARS characters along cue boundaries, embeds them and writes a
+memory-mapped sidecar (data/passages/):
+- video_ptr       CSR row pointer: passages of video i are video_ptr[i]:video_ptr[i+1]
+- char_deltas     passage start offsets, delta-encoded per video
+- ms_deltas       passage start times (ms), delta-encoded per video
+- embeddings      unit-normalised passage embeddings (float16)
+- ids             video IDs (blob)
+
+At query time PassageIndex.best_passage() scores one video's passages
+against the query embedding it already has: a small dot product plus a
+cumsum over a few deltas, no transcript scanning.
+
+Usage:
+    python scripts/passages.py --input data/crashcourse_final.csv --output data/passages
+"""
+
+# Suppress warnings before imports
+import os
+import warnings
+os.environ['TF_CPP_MIN_LOG_LEVEL'] = '3'
+os.environ['TF_ENABLE_ONEDNN_OPTS'] = '0'
+warnings.filterwarnings('ignore')
+
+import argparse
+from pathlib import Path
+import sys
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+# Add project root to path
+ROOT_DIR = Path(__file__).resolve().parents[1]
+sys.path.append(str(ROOT_DIR))
+
+from config import PASSAGES_PATH, PASSAGE_CHARS, EMBEDDING_MODEL
+from scripts.array_store import write_store, read_store, store_exists
+from scripts.embedding_utils import load_model, normalise_rows
+
+CUES_COLUMN = "transcript_cues"
+
+
+# --------------------------------------------------------------------
+# Cue offsets (dataset column)
+# --------------------------------------------------------------------
+def encode_cues(offsets, starts_ms) -> str:
+    """Delta-encode cue character offsets and start times into a compact string."""
+    offsets = np.asarray(offsets, dtype=np.int64)
+    starts_ms = np.asarray(starts_ms, dtype=np.int64)
+    offset_deltas = np.diff(offsets, prepend=0)
+    ms_deltas = np.diff(starts_ms, prepend=0)
+    return f"{' '.join(map(str, offset_deltas))}|{' '.join(map(str, ms_deltas))}"
+
+
+def decode_cues(encoded) -> Tuple[np.ndarray, np.ndarray]:
+    """Inverse of encode_cues: returns (char offsets, start times in ms)."""
+    if not isinstance(encoded, str) or "|" not in encoded:
+        return np.zeros(0, dtype=np.int64), np.zeros(0, dtype=np.int64)
+    offset_part, ms_part = encoded.split("|", 1)
+    offsets = np.cumsum(np.array(offset_part.split(), dtype=np.int64))
+    starts_ms = np.cumsum(np.array(ms_part.split(), dtype=np.int64))
+    return offsets, starts_ms
+
+
+def join_cues(cues: List[Tuple[float, str]]) -> Tuple[Optional[str], Optional[str]]:
+    """
+    Join (start seconds, text) cues into a transcript.
+
+    Returns:
+        Tuple of (transcript, encoded cue offsets), or (None, None) if empty
+    """
+    cues = [(start, text) for start, text in cues if text]
+    if not cues:
+        return None, None
+    lengths = np.array([len(text) + 1 for _, text in cues], dtype=np.int64)
+    offsets = np.concatenate([[0], np.cumsum(lengths)[:-1]])
+    starts_ms = np.round(np.array([start for start, _ in cues]) * 1000).astype(np.int64)
+    return " ".join(text for _, text in cues), encode_cues(offsets, starts_ms)
+
+
+def remap_cues(transcript, encoded, clean) -> Optional[str]:
+    """
+    Map cue offsets from a raw transcript onto clean(transcript).
+
+    Each cue's text is cleaned on its own; because the cleaning only changes
+    characters and collapses whitespace, joining the cleaned cues with
+    spaces reproduces the cleaned transcript exactly.
+    """
+    if not isinstance(transcript, str) or not isinstance(encoded, str):
+        return None
+    offsets, starts_ms = decode_cues(encoded)
+    if len(offsets) == 0:
+        return None
+    bounds = np.append(offsets, len(transcript))
+    cues = [(ms / 1000, clean(transcript[start:end]))
+            for start, end, ms in zip(bounds[:-1], bounds[1:], starts_ms)]
+    return join_cues(cues)[1]
+
+
+# --------------------------------------------------------------------
+# Passages
+# --------------------------------------------------------------------
+def chunk_passages(transcript: str, encoded_cues: str,
+                   passage_chars: int = PASSAGE_CHARS) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Cut a transcript into passages along cue boundaries.
+
+    Returns:
+        Tuple of (passage start offsets, passage start times in ms)
+    """
+    offsets, starts_ms = decode_cues(encoded_cues)
+    if len(offsets) == 0:
+        return offsets, starts_ms
+    keep = [0]
+    for i in range(1, len(offsets)):
+        if offsets[i] - offsets[keep[-1]] >= passage_chars:
+            keep.append(i)
+    return offsets[keep], starts_ms[keep]
+
+
+def _delta_encode(values: np.ndarray, ptr: np.ndarray) -> np.ndarray:
+    """Delta-encode values, restarting at each video, in the smallest dtype that fits."""
+    deltas = np.diff(values, prepend=0)
+    starts = ptr[:-1]
+    deltas[starts] = values[starts]
+    if len(deltas) == 0:
+        return deltas.astype(np.uint8)
+    dtype = np.result_type(np.min_scalar_type(int(deltas.min())),
+                           np.min_scalar_type(int(deltas.max())))
+    return deltas.astype(dtype)
+
+
+def build_passages(df, model, output_dir=PASSAGES_PATH, passage_chars: int = PASSAGE_CHARS,
+                   batch_size: int = 64, model_name: str = EMBEDDING_MODEL) -> Dict:
+    """
+    Build the passage sidecar from a cleaned dataset.
+
+    Args:
+        df: DataFrame with id, transcript and transcript_cues columns
+        model: Encoder with encode()
+        output_dir: Sidecar directory
+        passage_chars: Target passage length in characters
+        batch_size: Encoder batch size
+        model_name: Recorded in the manifest
+
+    Returns:
+        Summary dict
+    """
+    ids, texts, char_starts, ms_starts, ptr = [], [], [], [], [0]
+    for video_id, transcript, cues in zip(df['id'], df['transcript'], df[CUES_COLUMN]):
+        if not isinstance(transcript, str) or not isinstance(cues, str):
+            continue
+        starts, times = chunk_passages(transcript, cues, passage_chars)
+        if len(starts) == 0:
+            continue
+        ends = np.append(starts[1:], len(transcript))
+        texts.extend(transcript[a:b] for a, b in zip(starts, ends))
+        char_starts.append(starts)
+        ms_starts.append(times)
+        ids.append(str(video_id))
+        ptr.append(ptr[-1] + len(starts))
+
+    ptr = np.array(ptr, dtype=np.int64)
+    char_starts = np.concatenate(char_starts) if char_starts else np.zeros(0, dtype=np.int64)
+    ms_starts = np.concatenate(ms_starts) if ms_starts else np.zeros(0, dtype=np.int64)
+
+    print(f"   • {len(texts):,} passages from {len(ids):,} videos")
+    if not texts:
+        print("   ⚠️  No transcripts with caption timings; nothing to build")
+        return {"videos": 0, "passages": 0}
+    embeddings = normalise_rows(
+        model.encode(texts, batch_size=batch_size, show_progress_bar=len(texts) > batch_size,
+                     convert_to_numpy=True)
+    ).reshape(len(texts), -1)
+
+    write_store(
+        output_dir,
+        arrays={
+            "video_ptr": ptr,
+            "char_deltas": _delta_encode(char_starts, ptr),
+            "ms_deltas": _delta_encode(ms_starts, ptr),
+            "embeddings": embeddings.astype(np.float16),
+        },
+        blobs={"ids": [video_id.encode("utf-8") for video_id in ids]},
+        manifest={
+            "videos": len(ids),
+            "passages": len(texts),
+            "passage_chars": passage_chars,
+            "model": model_name,
+            "dimension": int(embeddings.shape[1]),
+        },
+    )
+    return {"videos": len(ids), "passages": len(texts)}
+
+
+class PassageIndex:
+    """
+    Read-only, memory-mapped view of the passage sidecar.
+
+    Args:
+        path: Sidecar directory written by build_passages()
+    """
+
+    def __init__(self, path=PASSAGES_PATH):
+        arrays, blobs, self.manifest = read_store(path)
+        self.video_ptr = np.asarray(arrays["video_ptr"])
+        self.char_deltas = arrays["char_deltas"]
+        self.ms_deltas = arrays["ms_deltas"]
+        self.embeddings = arrays["embeddings"]
+        ids = blobs["ids"]
+        self._index = {ids[i].decode("utf-8"): i for i in range(len(ids))}
+        ids.close()
+
+    def __len__(self) -> int:
+        return len(self._index)
+
+    def __contains__(self, video_id: str) -> bool:
+        return video_id in self._index
+
+    def best_passage(self, video_id: str, query_embedding: np.ndarray) -> Optional[Dict]:
+        """
+        Find the passage of a video that best matches the query.
+
+        Args:
+            video_id: YouTube video ID
+            query_embedding: Query embedding (same model as the sidecar)
+
+        Returns:
+            Dict with start_seconds, char_start, char_end (None = end of
+            transcript) and score, or None if the video has no passages
+        """
+        i = self._index.get(video_id)
+        if i is None:
+            return None
+        start, end = int(self.video_ptr[i]), int(self.video_ptr[i + 1])
+
+        query = np.asarray(query_embedding, dtype=np.float32).reshape(-1)
+        norm = np.linalg.norm(query)
+        scores = self.embeddings[start:end].astype(np.float32) @ (query / norm if norm else query)
+        best = int(np.argmax(scores))
+
+        char_offsets = np.cumsum(self.char_deltas[start:min(start + best + 2, end)], dtype=np.int64)
+        ms = int(np.sum(self.ms_deltas[start:start + best + 1], dtype=np.int64))
+        return {
+            "start_seconds": ms // 1000,
+            "char_start": int(char_offsets[best]),
+            "char_end": int(char_offsets[best + 1]) if best + 1 < len(char_offsets) else None,
+            "score": round(float(scores[best]), 4),
+        }
+
+
+def load_passages(path=PASSAGES_PATH) -> Optional[PassageIndex]:
+    """Open the passage sidecar if it exists."""
+    if not store_exists(path):
+        return None
+    return PassageIndex(path)
+
+
+def timestamp_url(video_id: str, seconds: int) -> str:
+    """Deep link to a point in a video."""
+    return f"https://youtu.be/{video_id}?t={int(seconds)}"
+
+
+def main():
+    from scripts.dataset_io import read_dataset
+
+    parser = argparse.ArgumentParser(
+        description="Build the time-aligned passage sidecar used for deep links in search results"
+    )
+    parser.add_argument('--input', default=str(ROOT_DIR / "data/crashcourse_final.csv"),
+                        help='Cleaned dataset with transcript_cues, .csv/.parquet/.arrow '
+                             '(default: data/crashcourse_final.csv)')
+    parser.add_argument('--output', default=str(PASSAGES_PATH),
+                        help=f'Sidecar directory (default: {PASSAGES_PATH})')
+    parser.add_argument('--passage-chars', type=int, default=PASSAGE_CHARS,
+                        help=f'Target passage length in characters (default: {PASSAGE_CHARS})')
+    parser.add_argument('--model', default=EMBEDDING_MODEL,
+                        help=f'Encoder; must match the search model (default: {EMBEDDING_MODEL})')
+    parser.add_argument('--batch-size', type=int, default=64,
+                        help='Encoder batch size (default: 64)')
+    args = parser.parse_args()
+
+    print("=" * 70)
+    print("PASSAGE SIDECAR BUILD")
+    print("=" * 70)
+
+    df = read_dataset(args.input, columns=['id', 'transcript', CUES_COLUMN])
+    if CUES_COLUMN not in df.columns:
+        print(f"❌ {args.input} has no '{CUES_COLUMN}' column. Re-harvest (or re-clean) with the")
+        print("   current scripts to keep caption timings.")
+        return
+
+    print(f"\n🤖 Loading model: {args.model}")
+    model = load_model(args.model)
+
+    print(f"\n✂️  Cutting transcripts into ~{args.passage_chars}-character passages...")
+    summary = build_passages(df, model, args.output, args.passage_chars, args.batch_size, args.model)
+
+    print(f"\n✅ Wrote {summary['passages']:,} passages for {summary['videos']:,} videos to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,279 @@
+"""
+Profiling Support for the CLI Entry Points
+
+Adds a shared --profile option to the pipeline scripts so slow runs can be
+profiled without wrapping them in cProfile by hand.
+
+A profiled run writes to data/profiles/ (or --profile-dir):
+- <name>-<timestamp>.prof        cProfile stats (open with pstats/snakeviz)
+- <name>-<timestamp>.collapsed   collapsed stacks, ready for flamegraph.pl/speedscope
+- <name>-<timestamp>.txt         top-N summary (cumulative/own time, allocations)
+
+With --profile-sample the collapsed stacks come from a wall-clock sampler
+(captures time spent waiting on I/O too); otherwise they are reconstructed
+from the cProfile call graph. --profile-memory adds the tracemalloc peak and
+the top allocation sites to the summary. The sites come from the largest of
+the snapshots taken while the run grows its traced memory, so they show
+what was live near the peak, not what is left at exit.
+
+Usage:
+    python scripts/generate_embeddings.py --profile
+    python scripts/migrate_to_vectordb.py --profile --profile-sample --profile-memory
+"""
+
+import cProfile
+import io
+import pstats
+import sys
+import threading
+import time
+import tracemalloc
+from collections import Counter
+from contextlib import contextmanager
+from pathlib import Path
+
+# Add project root to path
+ROOT_DIR = Path(__file__).resolve().parents[1]
+sys.path.append(str(ROOT_DIR))
+
+from config import PROFILE_DIR
+
+
+def add_profile_arguments(parser) -> None:
+    """Register the shared profiling options on an argparse parser."""
+    group = parser.add_argument_group("profiling")
+    group.add_argument(
+        '--profile',
+        action='store_true',
+        help='Profile this run with cProfile and write reports to --profile-dir'
+    )
+    group.add_argument(
+        '--profile-dir',
+        default=str(PROFILE_DIR),
+        help=f'Directory for profiling output (default: {PROFILE_DIR})'
+    )
+    group.add_argument(
+        '--profile-sample',
+        nargs='?',
+        type=float,
+        const=5.0,
+        default=None,
+        metavar='MS',
+        help='Also sample wall-clock stacks every MS milliseconds (default when given: 5)'
+    )
+    group.add_argument(
+        '--profile-memory',
+        action='store_true',
+        help='Track allocations with tracemalloc and report the peak and the top sites near it'
+    )
+    group.add_argument(
+        '--profile-top',
+        type=int,
+        default=30,
+        help='Number of entries in the summary tables (default: 30)'
+    )
+
+
+# --------------------------------------------------------------------
+# Wall-clock stack sampler
+# --------------------------------------------------------------------
+def _frame_label(frame) -> str:
+    code = frame.f_code
+    return f"{Path(code.co_filename).name}:{code.co_name}:{code.co_firstlineno}"
+
+
+class StackSampler:
+    """
+    Samples the stacks of all other threads at a fixed wall-clock interval.
+
+    Args:
+        interval: Seconds between samples
+    """
+
+    def __init__(self, interval: float = 0.005):
+        self.interval = interval
+        self.samples = Counter()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="stack-sampler", daemon=True)
+
+    def _run(self) -> None:
+        own_id = threading.get_ident()
+        names = {}
+        while not self._stop.wait(self.interval):
+            for thread_id, frame in sys._current_frames().items():
+                if thread_id == own_id:
+                    continue
+                if thread_id not in names:
+                    names = {t.ident: t.name for t in threading.enumerate()}
+                stack = []
+                while frame is not None:
+                    stack.append(_frame_label(frame))
+                    frame = frame.f_back
+                stack.append(names.get(thread_id, str(thread_id)))
+                self.samples[";".join(reversed(stack))] += 1
+
+    def start(self) -> None:
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+        self._thread.join()
+
+    def collapsed(self) -> str:
+        return "".join(f"{stack} {count}\n" for stack, count in self.samples.most_common())
+
+
+# --------------------------------------------------------------------
+# Peak memory snapshots
+# --------------------------------------------------------------------
+class PeakSnapshotter:
+    """
+    Keeps the tracemalloc snapshot taken at the highest traced size.
+
+    Polls the traced size every interval and takes a new snapshot whenever
+    it exceeds the size of the kept one by more than `growth`, so a run
+    that grows steadily costs only a few snapshots.
+
+    Args:
+        interval: Seconds between polls
+        growth: Relative growth that triggers a new snapshot
+    """
+
+    def __init__(self, interval: float = 0.05, growth: float = 0.05):
+        self.interval = interval
+        self.growth = growth
+        self.snapshot = None
+        self.snapshot_size = 0
+        self.snapshot_at = 0.0
+        self._start = time.perf_counter()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="peak-snapshotter", daemon=True)
+
+    def poll(self) -> None:
+        """Take a snapshot if the traced size is a new high."""
+        current, _ = tracemalloc.get_traced_memory()
+        if self.snapshot is None or current > self.snapshot_size * (1 + self.growth):
+            self.snapshot = tracemalloc.take_snapshot()
+            self.snapshot_size = current
+            self.snapshot_at = time.perf_counter() - self._start
+
+    def _run(self) -> None:
+        while not self._stop.wait(self.interval):
+            self.poll()
+
+    def start(self) -> None:
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+        self._thread.join()
+        self.poll()
+
+
+def collapsed_from_cprofile(stats: pstats.Stats) -> str:
+    """
+    Approximate collapsed stacks from cProfile data.
+
+    cProfile only records caller -> callee edges, so each function's own
+    time is attributed to the chain of its heaviest callers.
+    """
+    raw = stats.stats  # func -> (cc, nc, tt, ct, callers)
+
+    def label(func):
+        filename, line, name = func
+        return f"{Path(filename).name}:{name}:{line}"
+
+    lines = []
+    for func, (_, _, tottime, _, callers) in raw.items():
+        weight = int(tottime * 1_000_000)  # microseconds
+        if weight <= 0:
+            continue
+        chain = [label(func)]
+        seen = {func}
+        current = callers
+        while current:
+            # Heaviest caller by cumulative time spent calling us
+            parent = max(current.items(), key=lambda item: item[1][3])[0]
+            if parent in seen:
+                break
+            seen.add(parent)
+            chain.append(label(parent))
+            current = raw.get(parent, (0, 0, 0, 0, {}))[4]
+        lines.append(f"{';'.join(reversed(chain))} {weight}\n")
+    return "".join(sorted(lines))
+
+
+# --------------------------------------------------------------------
+# Profiling session
+# --------------------------------------------------------------------
+@contextmanager
+def profile_session(args, name: str):
+    """
+    Profile the enclosed block when args.profile is set; otherwise do nothing.
+
+    Args:
+        args: Parsed arguments from a parser set up with add_profile_arguments()
+        name: Base name for the output files
+    """
+    if not getattr(args, "profile", False):
+        yield
+        return
+
+    out_dir = Path(args.profile_dir)
+    out_dir.mkdir(parents=True, exist_ok=True)
+    base = out_dir / f"{name}-{time.strftime('%Y%m%d-%H%M%S')}"
+
+    sampler = StackSampler(args.profile_sample / 1000) if args.profile_sample else None
+    snapshotter = None
+    if args.profile_memory:
+        tracemalloc.start(25)
+        snapshotter = PeakSnapshotter()
+        snapshotter.start()
+
+    profiler = cProfile.Profile()
+    if sampler:
+        sampler.start()
+    start = time.perf_counter()
+    profiler.enable()
+    try:
+        yield
+    finally:
+        profiler.disable()
+        wall = time.perf_counter() - start
+        if sampler:
+            sampler.stop()
+
+        memory_report = ""
+        if snapshotter:
+            snapshotter.stop()
+            _, peak = tracemalloc.get_traced_memory()
+            snapshot = snapshotter.snapshot.filter_traces([
+                tracemalloc.Filter(False, tracemalloc.__file__),
+                tracemalloc.Filter(False, __file__),
+            ])
+            tracemalloc.stop()
+            top = snapshot.statistics("lineno")[:args.profile_top]
+            memory_report = (
+                f"\nPEAK TRACED MEMORY: {peak / (1024 * 1024):.1f} MB\n"
+                f"\nTOP ALLOCATION SITES (largest snapshot: "
+                f"{snapshotter.snapshot_size / (1024 * 1024):.1f} MB at {snapshotter.snapshot_at:.2f}s)\n"
+                + "".join(f"  {stat}\n" for stat in top)
+            )
+
+        profiler.dump_stats(f"{base}.prof")
+
+        buffer = io.StringIO()
+        stats = pstats.Stats(profiler, stream=buffer)
+        stats.strip_dirs()
+        buffer.write(f"PROFILE: {name}\nWALL TIME: {wall:.2f}s\n\nTOP BY CUMULATIVE TIME\n")
+        stats.sort_stats("cumulative").print_stats(args.profile_top)
+        buffer.write("\nTOP BY OWN TIME\n")
+        stats.sort_stats("tottime").print_stats(args.profile_top)
+        buffer.write(memory_report)
+        Path(f"{base}.txt").write_text(buffer.getvalue(), encoding="utf-8")
+
+        collapsed = sampler.collapsed() if sampler else \
+            collapsed_from_cprofile(pstats.Stats(profiler))
+        Path(f"{base}.collapsed").write_text(collapsed, encoding="utf-8")
+
+        print(f"\n🔬 Profile written to: {base}.prof / .txt / .collapsed")
@@ -0,0 +1,351 @@
+"""
+Query Normalisation and Spelling Correction for YouTube Semantic Search
+
+Stored titles and transcripts go through clean_text (lowercase, special
+characters removed) before they are embedded, but queries used to reach
+the model raw. "Photosynthesis?" and "photosynthesis" therefore missed
+each other in the query cache and produced slightly different vectors,
+and a typo such as "photosynthsis" was embedded as written. Before
+encoding, each query now goes through:
+1. clean_text, the same rules as the stored text
+2. spelling correction of words that are not in the vocabulary of the
+   indexed titles and transcripts, with a symmetric-delete (SymSpell)
+   index: every vocabulary word is stored under each string obtained by
+   deleting up to SPELL_MAX_DISTANCE characters, so a lookup only
+   generates the deletes of the query word and checks a handful of
+   candidates instead of scanning the vocabulary. A valid word the corpus
+   happens not to contain ("cats", "whales") must not be turned into a
+   close neighbour ("cast", "while"), so a word is only corrected when the
+   typo is clear: the correction must be SPELL_COUNT_RATIO times as
+   frequent as an unknown word may be (the rarest vocabulary count),
+   words of up to SPELL_SHORT_WORD letters get one edit at most, and
+   tokens with digits, hyphens or non-ASCII letters ("COVID-19",
+   "Beyoncé") are never corrected
+3. a memo (LRU of QUERY_NORMALISE_CACHE_SIZE) of query -> normalised form,
+   so repeated queries skip both steps
+
+All spellings of a query map to one normalised form, so they share one
+entry of the query embedding cache.
+
+The vocabulary (word counts) is stored in a small sidecar (data/vocabulary/).
+Without it, queries are only cleaned.
+
+Usage:
+    python scripts/query_normalizer.py --input data/crashcourse_final.csv
+    python scripts/query_normalizer.py --check "Photosynthsis in plnts?"
+"""
+
+import argparse
+from collections import Counter, OrderedDict
+from pathlib import Path
+import re
+import sys
+import threading
+from typing import Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+
+# Add project root to path
+ROOT_DIR = Path(__file__).resolve().parents[1]
+sys.path.append(str(ROOT_DIR))
+
+from config import (VOCABULARY_PATH, QUERY_NORMALISE_CACHE_SIZE, SPELL_MAX_DISTANCE, SPELL_SHORT_WORD,
+                    SPELL_MIN_WORD_LENGTH, SPELL_COUNT_RATIO, VOCABULARY_MIN_COUNT, VOCABULARY_MAX_WORDS)
+from scripts.array_store import write_store, read_store, store_exists
+from scripts.clean_and_merge_dataset import clean_text
+from scripts.metrics import metrics
+
+# Words are runs of letters in cleaned text ("don't" -> "don", "t")
+WORD_PATTERN = re.compile(r"[a-z]+")
+
+# Query tokens (split on whitespace) whose words are never corrected: codes,
+# names and numbers such as "COVID-19", "Beyoncé" or "3D"
+PROTECTED_TOKEN = re.compile(r"[0-9\-]|[^\x00-\x7f]")
+
+# Only the first PREFIX_LENGTH letters of a word are indexed; the full
+# words of the candidates are compared afterwards (standard SymSpell trade-off)
+PREFIX_LENGTH = 7
+
+# A word that is an inflection of a vocabulary word ("cats" with "cat"
+# indexed) is left alone instead of being "corrected" to a close neighbour
+# ("cast")
+INFLECTIONS = ("s", "es", "ed", "ing", "ly", "er", "est")
+
+
+def count_words(texts: Iterable[str]) -> Counter:
+    """Count the words of texts after clean_text."""
+    counts = Counter()
+    for text in texts:
+        counts.update(WORD_PATTERN.findall(clean_text(text)))
+    return counts
+
+
+def edit_distance(a: str, b: str, limit: int) -> int:
+    """
+    Optimal string alignment distance (insert, delete, substitute, swap
+    adjacent letters), or limit + 1 once it is known to exceed limit.
+    """
+    if abs(len(a) - len(b)) > limit:
+        return limit + 1
+    previous2 = None
+    previous = list(range(len(b) + 1))
+    for i in range(1, len(a) + 1):
+        current = [i] + [0] * len(b)
+        for j in range(1, len(b) + 1):
+            cost = a[i - 1] != b[j - 1]
+            current[j] = min(previous[j] + 1, current[j - 1] + 1, previous[j - 1] + cost)
+            if (previous2 is not None and i > 1 and j > 1
+                    and a[i - 1] == b[j - 2] and a[i - 2] == b[j - 1]):
+                current[j] = min(current[j], previous2[j - 2] + 1)
+        if min(current) > limit:
+            return limit + 1
+        previous2, previous = previous, current
+    return previous[-1]
+
+
+def _deletes(word: str, max_distance: int) -> set:
+    """Every string obtained by deleting up to max_distance characters of word."""
+    found, frontier = {word}, {word}
+    for _ in range(max_distance):
+        frontier = {w[:i] + w[i + 1:] for w in frontier for i in range(len(w))} - found
+        found |= frontier
+    return found
+
+
+class SpellIndex:
+    """
+    Symmetric-delete spelling index over a word -> count vocabulary.
+
+    Args:
+        counts: Word frequencies (higher wins between equally close candidates)
+        max_distance: Largest edit distance corrected
+        min_length: Shorter words are never corrected
+        count_ratio: A correction must be seen count_ratio times as often as
+                     an out-of-vocabulary word may be (the rarest count kept)
+                     and as any other word equally close
+    """
+
+    def __init__(self, counts: Dict[str, int], max_distance: int = SPELL_MAX_DISTANCE,
+                 min_length: int = SPELL_MIN_WORD_LENGTH, count_ratio: float = SPELL_COUNT_RATIO):
+        self.counts = dict(counts)
+        self.max_distance = max_distance
+        self.min_length = min_length
+        self.count_ratio = count_ratio
+        # Words rarer than the vocabulary threshold were dropped, so an unknown
+        # word may still occur almost as often as the rarest word kept
+        self.min_correction_count = count_ratio * min(self.counts.values(), default=0)
+        self._index: Optional[Dict[str, List[str]]] = None
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self.counts)
+
+    def __contains__(self, word: str) -> bool:
+        return word in self.counts
+
+    def _deletes_index(self) -> Dict[str, List[str]]:
+        """delete -> vocabulary words, built on first use."""
+        with self._lock:
+            if self._index is None:
+                index: Dict[str, List[str]] = {}
+                for word in self.counts:
+                    for delete in _deletes(word[:PREFIX_LENGTH], self.max_distance):
+                        index.setdefault(delete, []).append(word)
+                self._index = index
+        return self._index
+
+    def _inflected(self, word: str) -> bool:
+        for suffix in INFLECTIONS:
+            stem = word[:-len(suffix)]
+            if word.endswith(suffix) and len(stem) >= 2 and (stem in self.counts or stem + "e" in self.counts):
+                return True
+        return False
+
+    def correct(self, word: str) -> str:
+        """Closest vocabulary word if it clearly dominates its rivals, else word itself."""
+        if word in self.counts or len(word) < self.min_length or not self.counts or self._inflected(word):
+            return word
+        # Short words get fewer edits, or nearly every word would be "corrected"
+        limit = 1 if len(word) <= SPELL_SHORT_WORD else self.max_distance
+        index = self._deletes_index()
+
+        closest, nearest = [], limit + 1
+        seen = set()
+        for delete in _deletes(word[:PREFIX_LENGTH], limit):
+            for candidate in index.get(delete, ()):
+                if candidate in seen:
+                    continue
+                seen.add(candidate)
+                distance = edit_distance(word, candidate, limit)
+                if distance < nearest:
+                    closest, nearest = [candidate], distance
+                elif distance == nearest:
+                    closest.append(candidate)
+        if not closest:
+            return word
+
+        # "evolutin" is as close to a rare "evolution" as to a common
+        # "revolution": only correct when one reading clearly wins
+        closest.sort(key=lambda candidate: -self.counts[candidate])
+        best = self.counts[closest[0]]
+        runner_up = self.counts[closest[1]] if len(closest) > 1 else 0
+        if best < self.min_correction_count or best < self.count_ratio * runner_up:
+            return word
+        return closest[0]
+
+
+def protected_words(query: str) -> set:
+    """Cleaned words of the query tokens that hold digits, hyphens or non-ASCII letters."""
+    protected = set()
+    for token in query.lower().split():
+        if PROTECTED_TOKEN.search(token):
+            protected.update(WORD_PATTERN.findall(clean_text(token)))
+    return protected
+
+
+class QueryNormalizer:
+    """
+    clean_text + spelling correction, memoised.
+
+    Args:
+        spell_index: Optional SpellIndex; without it queries are only cleaned
+        cache_size: Memoised queries (0 disables the memo)
+    """
+
+    def __init__(self, spell_index: Optional[SpellIndex] = None,
+                 cache_size: int = QUERY_NORMALISE_CACHE_SIZE):
+        self.spell_index = spell_index
+        self.cache_size = cache_size
+        self._cache = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _normalise(self, query: str) -> str:
+        text = clean_text(query)
+        if self.spell_index is not None:
+            protected = protected_words(query)
+            text = WORD_PATTERN.sub(
+                lambda match: match.group() if match.group() in protected else self.spell_index.correct(match.group()),
+                text
+            )
+        return text
+
+    def normalise(self, query: str) -> str:
+        """
+        Normalised form of a query.
+
+        Returns:
+            Cleaned, spelling-corrected query (the raw query stripped if
+            cleaning leaves nothing, e.g. a query of only symbols)
+        """
+        if self.cache_size > 0:
+            with self._lock:
+                cached = self._cache.get(query)
+                if cached is not None:
+                    self._cache.move_to_end(query)
+            if cached is not None:
+                metrics.counter("ytss_query_normalise_hits_total", "Memoised query normalisations").inc()
+                return cached
+            metrics.counter("ytss_query_normalise_misses_total", "Computed query normalisations").inc()
+
+        with metrics.timer("ytss_search_stage_seconds", stage="normalise"):
+            text = self._normalise(query) or query.strip()
+
+        if self.cache_size > 0:
+            with self._lock:
+                self._cache[query] = text
+                if len(self._cache) > self.cache_size:
+                    self._cache.popitem(last=False)
+        return text
+
+
+def build_vocabulary(texts: Iterable[str], output_dir=VOCABULARY_PATH,
+                     min_count: int = VOCABULARY_MIN_COUNT,
+                     max_words: int = VOCABULARY_MAX_WORDS) -> Dict:
+    """
+    Count the words of texts and write the vocabulary sidecar.
+
+    Returns:
+        Summary dict
+    """
+    counts = count_words(texts)
+    kept = [(word, count) for word, count in counts.most_common(max_words) if count >= min_count]
+    write_store(
+        output_dir,
+        arrays={"counts": np.array([count for _, count in kept], dtype=np.int64)},
+        blobs={"words": [word.encode("utf-8") for word, _ in kept]},
+        manifest={"words": len(kept), "min_count": min_count},
+    )
+    return {"distinct": len(counts), "words": len(kept), "tokens": sum(counts.values())}
+
+
+def load_vocabulary(path=VOCABULARY_PATH) -> Optional[Dict[str, int]]:
+    """Read the vocabulary sidecar if it exists."""
+    if not store_exists(path):
+        return None
+    arrays, blobs, _ = read_store(path)
+    words = blobs["words"]
+    counts = {words[i].decode("utf-8"): int(count) for i, count in enumerate(arrays["counts"])}
+    words.close()
+    return counts
+
+
+def load_normalizer(path=VOCABULARY_PATH, cache_size: int = QUERY_NORMALISE_CACHE_SIZE) -> QueryNormalizer:
+    """A QueryNormalizer with spelling correction if the vocabulary was built."""
+    counts = load_vocabulary(path) if path else None
+    return QueryNormalizer(SpellIndex(counts) if counts else None, cache_size)
+
+
+def _corrections(normalizer: QueryNormalizer, query: str) -> List[Tuple[str, str]]:
+    """(word, correction) pairs of a query, for display."""
+    if normalizer.spell_index is None:
+        return []
+    protected = protected_words(query)
+    words = [word for word in WORD_PATTERN.findall(clean_text(query)) if word not in protected]
+    return [(word, normalizer.spell_index.correct(word)) for word in words
+            if normalizer.spell_index.correct(word) != word]
+
+
+def main():
+    from scripts.dataset_io import read_dataset
+
+    parser = argparse.ArgumentParser(
+        description="Build the vocabulary used to spell-correct search queries"
+    )
+    parser.add_argument('--input', default=str(ROOT_DIR / "data/crashcourse_final.csv"),
+                        help='Cleaned dataset, .csv/.parquet/.arrow (default: data/crashcourse_final.csv)')
+    parser.add_argument('--output', default=str(VOCABULARY_PATH),
+                        help=f'Sidecar directory (default: {VOCABULARY_PATH})')
+    parser.add_argument('--min-count', type=int, default=VOCABULARY_MIN_COUNT,
+                        help=f'Drop words seen fewer times (default: {VOCABULARY_MIN_COUNT})')
+    parser.add_argument('--max-words', type=int, default=VOCABULARY_MAX_WORDS,
+                        help=f'Most frequent words kept (default: {VOCABULARY_MAX_WORDS})')
+    parser.add_argument('--check', metavar='QUERY', nargs='+',
+                        help='Show how queries are normalised with the existing vocabulary')
+    args = parser.parse_args()
+
+    if args.check:
+        normalizer = load_normalizer(args.output, cache_size=0)
+        if normalizer.spell_index is None:
+            print(f"⚠️  No vocabulary at {args.output}; queries are only cleaned")
+        for query in args.check:
+            fixes = ", ".join(f"{word} → {fix}" for word, fix in _corrections(normalizer, query))
+            print(f"🔤 {query!r} → {normalizer.normalise(query)!r}" + (f"  ({fixes})" if fixes else ""))
+        return
+
+    print("=" * 70)
+    print("QUERY VOCABULARY BUILD")
+    print("=" * 70)
+
+    df = read_dataset(args.input, columns=['title', 'transcript'])
+    print(f"\n📂 Loaded {len(df):,} videos from {Path(args.input).name}")
+
+    print("\n🔤 Counting words of titles and transcripts...")
+    texts = [text for column in ('title', 'transcript') for text in df[column].tolist()]
+    summary = build_vocabulary(texts, args.output, args.min_count, args.max_words)
+
+    print(f"   • {summary['tokens']:,} words, {summary['distinct']:,} distinct")
+    print(f"\n✅ Kept {summary['words']:,} words (seen {args.min_count}+ times) → {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,296 @@
+"""
+Pipelined Query Executor for YouTube Semantic Search
+
+VideoSemanticSearch.search runs encoding, the index query and result
+formatting one after the other, so under sustained traffic the model is
+idle while the index searches and the other way round. QueryPipeline
+splits a search into two stages, each with its own pool of threads:
+- encode    takes up to PIPELINE_ENCODE_BATCH waiting queries and embeds
+            them with one model call (VideoSemanticSearch.encode_queries)
+- search    index query, formatting and passages for one embedded query
+            (VideoSemanticSearch.search_embedded)
+
+The stages are joined by bounded queues. When they are full, submit()
+blocks, which keeps memory flat under overload. Both stages run at the
+same time, so throughput approaches that of the slower stage instead of
+the sum of both (the model and the index release the GIL while they
+compute).
+
+    with QueryPipeline(engine) as pipeline:
+        results = pipeline.search("photosynthesis", top_k=5)
+        future = pipeline.submit("cell division")       # concurrent.futures.Future
+        results = await pipeline.asearch("black holes")  # from asyncio code
+
+Usage:
+    python scripts/query_pipeline.py --queries-file queries.txt --search-workers 4
+"""
+
+# Suppress warnings before imports
+import os
+import warnings
+os.environ['TF_CPP_MIN_LOG_LEVEL'] = '3'
+os.environ['TF_ENABLE_ONEDNN_OPTS'] = '0'
+warnings.filterwarnings('ignore')
+
+import argparse
+import asyncio
+from concurrent.futures import Future
+from pathlib import Path
+import queue
+import sys
+import threading
+import time
+from typing import Dict, List
+
+# Add project root to path
+ROOT_DIR = Path(__file__).resolve().parents[1]
+sys.path.append(str(ROOT_DIR))
+
+from config import (PIPELINE_ENCODE_WORKERS, PIPELINE_SEARCH_WORKERS, PIPELINE_ENCODE_BATCH,
+                    PIPELINE_QUEUE_SIZE, COLLECTION_NAME)
+from scripts.metrics import metrics, set_quiet
+
+# Queue item that stops one worker
+_STOP = object()
+
+
+class _Job:
+    """One submitted query on its way through the pipeline."""
+
+    __slots__ = ("query", "options", "future", "submitted")
+
+    def __init__(self, query: str, options: Dict):
+        self.query = query
+        self.options = options
+        self.future = Future()
+        self.submitted = time.perf_counter()
+
+
+class QueryPipeline:
+    """
+    Runs searches of one engine through separate encode and search stages.
+
+    Args:
+        engine: VideoSemanticSearch (anything with encode_queries() and
+                search_embedded())
+        encode_workers: Threads of the encode stage
+        search_workers: Threads of the search stage
+        encode_batch: Most queries embedded in one model call
+        queue_size: Capacity of each stage queue
+    """
+
+    def __init__(self, engine, encode_workers: int = PIPELINE_ENCODE_WORKERS,
+                 search_workers: int = PIPELINE_SEARCH_WORKERS,
+                 encode_batch: int = PIPELINE_ENCODE_BATCH, queue_size: int = PIPELINE_QUEUE_SIZE):
+        if encode_workers < 1 or search_workers < 1 or encode_batch < 1 or queue_size < 1:
+            raise ValueError("Worker counts, encode batch and queue size must be at least 1")
+        self.engine = engine
+        self.encode_batch = encode_batch
+        self._encode_queue = queue.Queue(maxsize=queue_size)
+        self._search_queue = queue.Queue(maxsize=queue_size)
+        self._closed = False
+        self._close_lock = threading.Lock()
+        # close() waits for submissions that passed the _closed check, so
+        # none is queued behind the stop sentinels (its future would never resolve)
+        self._submitting = 0
+        self._submits_done = threading.Condition(self._close_lock)
+        self._encoders = [threading.Thread(target=self._encode_loop, name=f"ytss-encode-{i}", daemon=True)
+                          for i in range(encode_workers)]
+        self._searchers = [threading.Thread(target=self._search_loop, name=f"ytss-search-{i}", daemon=True)
+                           for i in range(search_workers)]
+        for worker in self._encoders + self._searchers:
+            worker.start()
+
+    def __enter__(self) -> "QueryPipeline":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+    # ----------------------------------------------------------------
+    # Submitting queries
+    # ----------------------------------------------------------------
+    def _submit(self, query: str, options: Dict, block: bool = True) -> Future:
+        with self._close_lock:
+            if self._closed:
+                raise RuntimeError("QueryPipeline is closed")
+            self._submitting += 1
+        try:
+            job = _Job(query, options)
+            self._encode_queue.put(job, block=block)
+            return job.future
+        finally:
+            with self._close_lock:
+                self._submitting -= 1
+                if self._submitting == 0:
+                    self._submits_done.notify_all()
+
+    def submit(self, query: str, **options) -> Future:
+        """
+        Queue a search; blocks while the encode queue is full.
+
+        Args:
+            query: Natural language search query
+            **options: Keyword arguments of VideoSemanticSearch.search
+                       (top_k, metadata_filter, diverse, ...)
+
+        Returns:
+            Future resolving to the result list (or the search's exception)
+        """
+        return self._submit(query, options)
+
+    def search(self, query: str, **options) -> List[Dict]:
+        """Search through the pipeline and wait for the results."""
+        return self.submit(query, **options).result()
+
+    def map(self, queries: List[str], **options) -> List[List[Dict]]:
+        """Search every query (same options) and return the result lists in order."""
+        futures = [self.submit(query, **options) for query in queries]
+        return [future.result() for future in futures]
+
+    async def asearch(self, query: str, **options) -> List[Dict]:
+        """
+        Coroutine version of search() for asyncio servers.
+
+        The event loop is never blocked: if the encode queue is full the
+        submission waits on a worker thread instead.
+        """
+        try:
+            future = self._submit(query, options, block=False)
+        except queue.Full:
+            loop = asyncio.get_running_loop()
+            future = await loop.run_in_executor(None, self._submit, query, options)
+        return await asyncio.wrap_future(future)
+
+    # ----------------------------------------------------------------
+    # Stages
+    # ----------------------------------------------------------------
+    def _next_batch(self):
+        """Block for one job, then take whatever else is waiting (up to encode_batch)."""
+        first = self._encode_queue.get()
+        if first is _STOP:
+            return [], True
+        batch, stop = [first], False
+        while len(batch) < self.encode_batch:
+            try:
+                job = self._encode_queue.get_nowait()
+            except queue.Empty:
+                break
+            if job is _STOP:
+                stop = True
+                break
+            batch.append(job)
+        return batch, stop
+
+    def _encode_loop(self) -> None:
+        while True:
+            batch, stop = self._next_batch()
+            batch = [job for job in batch if job.future.set_running_or_notify_cancel()]
+            if batch:
+                metrics.histogram("ytss_pipeline_encode_batch", "Queries per pipeline encode call",
+                                  buckets=(1, 2, 4, 8, 16, 32, 64)).observe(len(batch))
+                try:
+                    embeddings = list(self.engine.encode_queries([job.query for job in batch]))
+                    if len(embeddings) != len(batch):
+                        raise ValueError(f"encode_queries returned {len(embeddings)} embeddings "
+                                         f"for {len(batch)} queries")
+                except Exception as e:
+                    # A worker that dies would leave every later future pending forever
+                    metrics.counter("ytss_errors_total", "Errors raised in instrumented blocks",
+                                    stage="pipeline_encode").inc(len(batch))
+                    for job in batch:
+                        job.future.set_exception(e)
+                else:
+                    for job, embedding in zip(batch, embeddings):
+                        self._search_queue.put((job, embedding))
+            if stop:
+                return
+
+    def _search_loop(self) -> None:
+        while True:
+            item = self._search_queue.get()
+            if item is _STOP:
+                return
+            job, embedding = item
+            try:
+                results = self.engine.search_embedded(embedding, **job.options)
+            except Exception as e:
+                metrics.counter("ytss_errors_total", "Errors raised in instrumented blocks",
+                                stage="pipeline_search").inc()
+                job.future.set_exception(e)
+            else:
+                job.future.set_result(results)
+            metrics.histogram("ytss_pipeline_seconds",
+                              "Pipelined search latency, submit to result").observe(
+                time.perf_counter() - job.submitted)
+
+    def close(self) -> None:
+        """Finish the queued searches and stop the workers (idempotent)."""
+        with self._close_lock:
+            if self._closed:
+                return
+            self._closed = True
+            # The workers keep draining the queue, so blocked submissions finish
+            while self._submitting:
+                self._submits_done.wait()
+        for _ in self._encoders:
+            self._encode_queue.put(_STOP)
+        for worker in self._encoders:
+            worker.join()
+        for _ in self._searchers:
+            self._search_queue.put(_STOP)
+        for worker in self._searchers:
+            worker.join()
+
+
+def main():
+    from scripts.db_handler import ModelMismatchError
+    from scripts.semantic_search import VideoSemanticSearch
+
+    parser = argparse.ArgumentParser(
+        description="Run a file of queries through the pipelined (encode || search) executor"
+    )
+    parser.add_argument('--queries-file', required=True, help='Text file with one query per line')
+    parser.add_argument('--top-k', '-k', type=int, default=5, help='Results per query (default: 5)')
+    parser.add_argument('--encode-workers', type=int, default=PIPELINE_ENCODE_WORKERS,
+                        help=f'Encode stage threads (default: {PIPELINE_ENCODE_WORKERS})')
+    parser.add_argument('--search-workers', type=int, default=PIPELINE_SEARCH_WORKERS,
+                        help=f'Search stage threads (default: {PIPELINE_SEARCH_WORKERS})')
+    parser.add_argument('--encode-batch', type=int, default=PIPELINE_ENCODE_BATCH,
+                        help=f'Most queries per model call (default: {PIPELINE_ENCODE_BATCH})')
+    parser.add_argument('--model', type=str, default=None,
+                        help='Sentence-transformer model (default: the model the collection was embedded with)')
+    parser.add_argument('--collection', type=str, default=COLLECTION_NAME,
+                        help=f'ChromaDB collection or alias to search (default: {COLLECTION_NAME})')
+    parser.add_argument('--snapshot', type=str, default=None,
+                        help='Search a read-only snapshot directory instead of ChromaDB')
+    args = parser.parse_args()
+
+    with open(args.queries_file, "r", encoding="utf-8") as f:
+        queries = [line.strip() for line in f if line.strip()]
+
+    try:
+        engine = VideoSemanticSearch(model_name=args.model, snapshot_path=args.snapshot,
+                                     collection_name=args.collection)
+    except ModelMismatchError as e:
+        print(f"❌ {e}")
+        return
+
+    set_quiet(True)
+    start = time.perf_counter()
+    with QueryPipeline(engine, args.encode_workers, args.search_workers, args.encode_batch) as pipeline:
+        futures = [pipeline.submit(query, top_k=args.top_k) for query in queries]
+        for query, future in zip(queries, futures):
+            try:
+                results = future.result()
+            except Exception as e:
+                print(f"❌ {query}: {e}")
+                continue
+            titles = " | ".join(result['title'] for result in results[:3])
+            print(f"🔍 {query}\n   → {titles or '(no results)'}")
+    elapsed = time.perf_counter() - start
+    print(f"\n✅ {len(queries):,} queries in {elapsed:.2f}s ({len(queries) / max(elapsed, 1e-9):.1f} QPS)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,260 @@
+"""
+Reduced-dimension Search for YouTube Semantic Search
+
+Every distance computation uses all 384 dimensions. Most of the ranking
+signal sits in far fewer directions, so this module keeps a reduced copy
+of the vectors:
+- pca       a PCA projection fitted on the collection; components are
+            ordered by variance, so any prefix of them (64, 96, 128...) is
+            itself the best projection of that size
+- prefix    the first dimensions of each vector, for Matryoshka-trained
+            models whose leading dimensions are meant to be used alone
+
+A search scores every video on the first `dims` reduced dimensions (one
+small matrix-vector product), keeps a shortlist of `rescore_depth`, and
+re-scores the shortlist with the full vectors. Both sets of vectors live
+in a memory-mapped sidecar (data/reduced/):
+- components    float32 (max_dims, dim) projection (identity rows for prefix)
+- reduced       float32 (n_videos, max_dims) projected vectors
+- vectors       float32 (n_videos, dim) unit-normalised full vectors
+- ids           video IDs (blob)
+
+VideoVectorDB.search_videos(..., dims=64, rescore_depth=200) uses it;
+benchmark_index.py measures recall against latency for each setting.
+The manifest records the collection's vector write count; after any add,
+upsert, embedding update or delete, reduced searches use the full index
+until the sidecar is rebuilt.
+
+Usage:
+    python scripts/reduced_index.py
+    python scripts/reduced_index.py --max-dims 128 --method prefix
+"""
+
+import argparse
+from pathlib import Path
+import sys
+import time
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+# Add project root to path
+ROOT_DIR = Path(__file__).resolve().parents[1]
+sys.path.append(str(ROOT_DIR))
+
+from config import (REDUCED_PATH, REDUCED_MAX_DIMS, REDUCED_DIMS, REDUCED_RESCORE_DEPTH,
+                    REDUCED_TRAIN_SAMPLE, VECTOR_DB_PATH, COLLECTION_NAME)
+from scripts.array_store import write_store, read_store, store_exists
+from scripts.embedding_utils import normalise_rows
+
+METHODS = ("pca", "prefix")
+
+
+def fit_pca(vectors: np.ndarray, n_components: int, train_sample: int = REDUCED_TRAIN_SAMPLE,
+            seed: int = 0) -> np.ndarray:
+    """
+    Principal axes of a sample of vectors, largest variance first.
+
+    Returns:
+        float32 (n_components, dim) orthonormal rows
+    """
+    rng = np.random.default_rng(seed)
+    n = len(vectors)
+    sample = vectors[np.sort(rng.choice(n, size=min(train_sample, n), replace=False))].astype(np.float64)
+    sample -= sample.mean(axis=0)
+    # Eigenvectors of the (dim x dim) covariance: cheaper than an SVD of the sample
+    eigenvalues, eigenvectors = np.linalg.eigh(sample.T @ sample)
+    order = np.argsort(eigenvalues)[::-1][:n_components]
+    return eigenvectors[:, order].T.astype(np.float32)
+
+
+class ReducedIndex:
+    """
+    Reduced and full vectors of a collection, searched coarse-to-fine.
+
+    Args:
+        ids: Video IDs, one per row
+        components: (max_dims, dim) projection rows
+        reduced: (n, max_dims) projected vectors
+        vectors: (n, dim) unit-normalised full vectors
+        method: "pca" or "prefix"
+        manifest: Extra manifest fields
+    """
+
+    def __init__(self, ids: List[str], components: np.ndarray, reduced: np.ndarray,
+                 vectors: np.ndarray, method: str = "pca", manifest: Optional[Dict] = None):
+        self.ids = list(ids)
+        self.components = components
+        self.reduced = reduced
+        self.vectors = vectors
+        self.method = method
+        self.manifest = dict(manifest or {})
+        self._index = {video_id: i for i, video_id in enumerate(self.ids)}
+        self._prefixes: Dict[int, np.ndarray] = {}
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    def __contains__(self, video_id: str) -> bool:
+        return video_id in self._index
+
+    @property
+    def max_dims(self) -> int:
+        return int(self.components.shape[0])
+
+    @property
+    def dimension(self) -> int:
+        return int(self.vectors.shape[1])
+
+    @classmethod
+    def build(cls, ids: List[str], embeddings: np.ndarray, max_dims: int = REDUCED_MAX_DIMS,
+              method: str = "pca", seed: int = 0) -> "ReducedIndex":
+        """Fit the projection and project every vector."""
+        if method not in METHODS:
+            raise ValueError(f"Unknown method {method!r} (expected one of: {', '.join(METHODS)})")
+        if len(ids) == 0:
+            raise ValueError("Cannot build a reduced index from an empty collection")
+        vectors = normalise_rows(embeddings)
+        max_dims = min(max_dims, vectors.shape[1])
+        if method == "pca":
+            components = fit_pca(vectors, min(max_dims, len(vectors)), seed=seed)
+        else:
+            components = np.eye(max_dims, vectors.shape[1], dtype=np.float32)
+        reduced = vectors @ components.T
+        return cls(ids, components, reduced, vectors, method)
+
+    @classmethod
+    def load(cls, path=REDUCED_PATH) -> "ReducedIndex":
+        """Open a saved index (arrays are memory-mapped)."""
+        arrays, blobs, manifest = read_store(path)
+        ids = blobs["ids"]
+        video_ids = [ids[i].decode("utf-8") for i in range(len(ids))]
+        ids.close()
+        return cls(video_ids, np.asarray(arrays["components"]), arrays["reduced"], arrays["vectors"],
+                   manifest["method"], manifest)
+
+    def save(self, path=REDUCED_PATH, collection_name: str = "", embedding_model: Optional[str] = None,
+             vector_writes: Optional[int] = None) -> Path:
+        """
+        Write the index (atomically replacing any previous one).
+
+        vector_writes is the collection's vector write count when the
+        vectors were read (see db_handler.py); searches treat the index as
+        stale once the count moves on.
+        """
+        return write_store(
+            path,
+            arrays={"components": self.components, "reduced": np.asarray(self.reduced, dtype=np.float32),
+                    "vectors": np.asarray(self.vectors, dtype=np.float32)},
+            blobs={"ids": [video_id.encode("utf-8") for video_id in self.ids]},
+            manifest={"videos": len(self), "method": self.method, "max_dims": self.max_dims,
+                      "dimension": self.dimension, "collection_name": collection_name,
+                      "embedding_model": embedding_model, "vector_writes": vector_writes,
+                      "created_at": time.strftime("%Y-%m-%dT%H:%M:%S")},
+        )
+
+    def _prefix(self, dims: int) -> np.ndarray:
+        """Contiguous first `dims` reduced columns (renormalised for prefix truncation), cached."""
+        block = self._prefixes.get(dims)
+        if block is None:
+            block = np.ascontiguousarray(self.reduced[:, :dims], dtype=np.float32)
+            if self.method == "prefix":
+                block = normalise_rows(block)
+            self._prefixes[dims] = block
+        return block
+
+    def search(self, query_embedding: np.ndarray, top_k: int, dims: int = REDUCED_DIMS,
+               rescore_depth: int = REDUCED_RESCORE_DEPTH) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Reduced first pass, then exact re-scoring of the shortlist.
+
+        Args:
+            query_embedding: Query embedding (same model as the index)
+            top_k: Results to return
+            dims: Reduced dimensions used by the first pass (<= max_dims)
+            rescore_depth: Shortlist re-scored with the full vectors (>= top_k)
+
+        Returns:
+            Tuple of (row indices, cosine similarities), best first
+        """
+        dims = max(1, min(int(dims), self.max_dims))
+        query = normalise_rows(np.asarray(query_embedding).reshape(-1))
+        projected = self.components[:dims] @ query
+        if self.method == "prefix":
+            projected = normalise_rows(projected)
+
+        scores = self._prefix(dims) @ projected
+        depth = min(max(rescore_depth, top_k), len(scores))
+        # Sorted rows keep the reads of the memory-mapped full vectors sequential
+        shortlist = np.sort(np.argpartition(-scores, depth - 1)[:depth])
+
+        exact = self.vectors[shortlist] @ query
+        k = min(top_k, len(exact))
+        top = np.argpartition(-exact, k - 1)[:k]
+        top = top[np.argsort(-exact[top])]
+        return shortlist[top], exact[top]
+
+    def search_ids(self, query_embedding: np.ndarray, top_k: int, dims: int = REDUCED_DIMS,
+                   rescore_depth: int = REDUCED_RESCORE_DEPTH) -> Tuple[List[str], List[float]]:
+        """Like search(), returning (video IDs, cosine distances)."""
+        rows, similarities = self.search(query_embedding, top_k, dims, rescore_depth)
+        return [self.ids[i] for i in rows], [float(1 - s) for s in similarities]
+
+
+def load_reduced(path=REDUCED_PATH) -> Optional[ReducedIndex]:
+    """Open the reduced index if it exists."""
+    if not store_exists(path):
+        return None
+    return ReducedIndex.load(path)
+
+
+def build_from_db(db, max_dims: int = REDUCED_MAX_DIMS, method: str = "pca",
+                  page_size: int = 5000) -> ReducedIndex:
+    """Build the index from every embedding in the database."""
+    ids, blocks = [], []
+    for page_ids, columns in db.iter_pages(('embedding',), page_size):
+        ids.extend(page_ids)
+        blocks.append(columns['embedding'])
+    if not ids:
+        raise ValueError("The collection is empty")
+    return ReducedIndex.build(ids, np.vstack(blocks), max_dims, method)
+
+
+def main():
+    from scripts.db_handler import VideoVectorDB
+
+    parser = argparse.ArgumentParser(
+        description="Build the reduced-dimension sidecar used by fast coarse-to-fine searches"
+    )
+    parser.add_argument('--max-dims', type=int, default=REDUCED_MAX_DIMS,
+                        help=f'Reduced dimensions stored; searches use any prefix (default: {REDUCED_MAX_DIMS})')
+    parser.add_argument('--method', choices=METHODS, default="pca",
+                        help='pca = fitted projection, prefix = leading dims of a Matryoshka model (default: pca)')
+    parser.add_argument('--path', default=REDUCED_PATH, help=f'Sidecar directory (default: {REDUCED_PATH})')
+    parser.add_argument('--db-path', default=VECTOR_DB_PATH, help=f'ChromaDB directory (default: {VECTOR_DB_PATH})')
+    parser.add_argument('--collection', default=COLLECTION_NAME,
+                        help=f'Collection name (default: {COLLECTION_NAME})')
+    args = parser.parse_args()
+
+    print("=" * 70)
+    print("REDUCED-DIMENSION INDEX BUILD")
+    print("=" * 70)
+
+    db = VideoVectorDB(args.db_path, args.collection)
+    start = time.perf_counter()
+    # Read before the vectors, so a write made during the build marks the index stale
+    writes = db.vector_write_count()
+    index = build_from_db(db, args.max_dims, args.method)
+    index.save(args.path, db.collection_name, db.model_info()['model'], writes)
+
+    if index.method == "pca":
+        variance = np.var(index.reduced, axis=0).cumsum() / np.var(index.vectors, axis=0).sum()
+        for dims in (32, 64, 96, 128):
+            if dims <= index.max_dims:
+                print(f"   • {dims:>3} dims keep {variance[dims - 1]:.1%} of the variance")
+    print(f"\n✅ {len(index):,} videos, {index.max_dims}/{index.dimension} dims ({index.method}) "
+          f"in {time.perf_counter() - start:.1f}s → {args.path}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,333 @@
+"""
+Zero-downtime Re-embedding for YouTube Semantic Search
+
+Switching embedding models used to mean clear_collection followed by a full
+re-migration, with search unavailable in between. Collections are now
+tagged with their model and opened through an alias (see db_handler.py),
+so a new model is rolled out blue/green:
+1. a new versioned collection is created for the model
+   (youtube_videos__<model>__<dim>__v<N>)
+2. every video of the live collection is copied into it, re-embedding
+   "title | transcript" with the new model in batches, while the live
+   collection keeps serving searches (and taking writes)
+3. a catch-up pass applies what changed during the copy: new videos and
+   videos whose title or transcript changed (compared by content hash) are
+   embedded, deleted ones removed and metadata re-synced
+4. writes are paused (the exclusive alias lock, see db_handler.py), a
+   final catch-up applies the last changes and the alias is switched to
+   the new collection with one atomic rename
+
+Writers that opened the alias earlier (stream_pipeline.py, dedup.py,
+refresh_stats.py) re-resolve it before every write: after the switch they
+write to the new collection, or stop with a model mismatch if they embed
+with the old model. On Windows the lock is not available, so stop writers
+before switching.
+
+An interrupted run resumes where it stopped: videos already in the new
+collection are skipped. Search processes open the new collection, with
+its model, when they next start. The old version stays until it is
+dropped, so --switch can roll back.
+
+Sidecars built from the old embeddings (passages, field embeddings,
+neighbours, clusters, snapshots) must be rebuilt with the new model. The
+search engine ignores passage and field sidecars built with another model.
+
+Usage:
+    python scripts/reembed.py --model all-mpnet-base-v2
+    python scripts/reembed.py --model all-mpnet-base-v2 --no-switch
+    python scripts/reembed.py --list
+    python scripts/reembed.py --switch youtube_videos__all-MiniLM-L6-v2__384__v1
+    python scripts/reembed.py --drop youtube_videos__all-MiniLM-L6-v2__384__v1
+"""
+
+# Suppress warnings before imports
+import os
+import warnings
+os.environ['TF_CPP_MIN_LOG_LEVEL'] = '3'
+os.environ['TF_ENABLE_ONEDNN_OPTS'] = '0'
+warnings.filterwarnings('ignore')
+
+import argparse
+import hashlib
+from pathlib import Path
+import re
+import sys
+import time
+from typing import Dict, List, Optional
+
+import numpy as np
+import pandas as pd
+
+# Add project root to path
+ROOT_DIR = Path(__file__).resolve().parents[1]
+sys.path.append(str(ROOT_DIR))
+
+from config import VECTOR_DB_PATH, COLLECTION_NAME
+from scripts.db_handler import (VideoVectorDB, resolve_collection, set_alias, alias_lock, versioned_name,
+                                MODEL_KEY, DIMENSION_KEY, VERSION_SEPARATOR)
+from scripts.generate_embeddings import combine_text_columns
+from scripts.embedding_utils import load_model
+
+
+def _client(persist_directory: str):
+    import chromadb
+    from chromadb.config import Settings
+
+    return chromadb.PersistentClient(path=persist_directory, settings=Settings(anonymized_telemetry=False))
+
+
+def list_versions(persist_directory: str = VECTOR_DB_PATH, alias: str = COLLECTION_NAME) -> List[Dict]:
+    """
+    Collections that are versions of an alias (including an unversioned
+    collection named like the alias), oldest first.
+
+    Returns:
+        List of dicts with name, version, model, dimension, videos and active
+    """
+    client = _client(persist_directory)
+    active = resolve_collection(persist_directory, alias)
+    pattern = re.compile(re.escape(alias + VERSION_SEPARATOR) + r".+" + re.escape(VERSION_SEPARATOR) + r"v(\d+)$")
+
+    versions = []
+    for collection in client.list_collections():
+        match = pattern.match(collection.name)
+        if collection.name != alias and not match:
+            continue
+        tags = collection.metadata or {}
+        versions.append({
+            "name": collection.name,
+            "version": int(match.group(1)) if match else 0,
+            "model": tags.get(MODEL_KEY),
+            "dimension": tags.get(DIMENSION_KEY),
+            "videos": collection.count(),
+            "active": collection.name == active,
+        })
+    return sorted(versions, key=lambda version: version["version"])
+
+
+def target_collection(versions: List[Dict], alias: str, model_name: str, dimension: int) -> str:
+    """An unfinished inactive version for this model (to resume), or the next version name."""
+    for version in reversed(versions):
+        if version["model"] == model_name and version["dimension"] == dimension and not version["active"]:
+            return version["name"]
+    return versioned_name(alias, model_name, dimension, max([v["version"] for v in versions], default=0) + 1)
+
+
+def _embed(model, metadatas: List[Dict], transcripts: List[str], batch_size: int) -> np.ndarray:
+    """Embed "title | transcript" exactly as generate_embeddings.py does."""
+    titles = pd.Series([(metadata or {}).get('title') for metadata in metadatas], dtype=object)
+    texts = combine_text_columns(titles, pd.Series(transcripts, dtype=object))
+    return np.asarray(model.encode(texts, batch_size=batch_size, show_progress_bar=False,
+                                   convert_to_numpy=True), dtype=np.float32).reshape(len(texts), -1)
+
+
+def copy_collection(source: VideoVectorDB, target: VideoVectorDB, model, batch_size: int = 64,
+                    page_size: int = 1000) -> Dict[str, int]:
+    """
+    Copy every video of source into target with embeddings from model.
+
+    Videos already in target are skipped, so an interrupted copy resumes.
+
+    Returns:
+        Counts of copied and skipped videos
+    """
+    total = source.collection.count()
+    copied = skipped = 0
+    start = time.perf_counter()
+    for video_ids, columns in source.iter_pages(('metadata', 'transcript'), page_size):
+        present = [record is not None for record in target.get_videos(video_ids, fields=())]
+        todo = [i for i, done in enumerate(present) if not done]
+        skipped += len(video_ids) - len(todo)
+        if todo:
+            ids = [video_ids[i] for i in todo]
+            metadatas = [columns['metadata'][i] for i in todo]
+            transcripts = [columns['transcript'][i] or "" for i in todo]
+            target.upsert_videos(ids, transcripts, _embed(model, metadatas, transcripts, batch_size), metadatas)
+            copied += len(todo)
+        elapsed = time.perf_counter() - start
+        print(f"   • {copied + skipped:,}/{total:,} videos ({copied / max(elapsed, 1e-9):.1f} embedded/s)")
+    return {"copied": copied, "skipped": skipped}
+
+
+def _content_hash(metadata: Optional[Dict], transcript: Optional[str]) -> str:
+    """Hash of the text a video is embedded from (title and transcript)."""
+    title = (metadata or {}).get('title') or ""
+    return hashlib.sha1(f"{title}\0{transcript or ''}".encode("utf-8")).hexdigest()
+
+
+def _snapshot(db: VideoVectorDB, page_size: int) -> Dict[str, tuple]:
+    """video ID -> (metadata, content hash) of every stored video."""
+    return {video_id: (metadata, _content_hash(metadata, transcript))
+            for ids, columns in db.iter_pages(('metadata', 'transcript'), page_size)
+            for video_id, metadata, transcript in zip(ids, columns['metadata'], columns['transcript'])}
+
+
+def catch_up(source: VideoVectorDB, target: VideoVectorDB, model, batch_size: int = 64,
+             page_size: int = 5000) -> Dict[str, int]:
+    """
+    Apply the changes made to source while it was being copied.
+
+    Videos that are new or whose title or transcript changed are
+    re-embedded; metadata-only changes are copied without re-embedding.
+
+    Returns:
+        Counts of added, re-embedded, deleted and metadata-updated videos
+    """
+    source_state = _snapshot(source, page_size)
+    target_state = _snapshot(target, page_size)
+
+    missing = [video_id for video_id in source_state if video_id not in target_state]
+    extra = [video_id for video_id in target_state if video_id not in source_state]
+    stale, changed = [], {}
+    for video_id, (metadata, digest) in source_state.items():
+        if video_id not in target_state:
+            continue
+        target_metadata, target_digest = target_state[video_id]
+        if target_digest != digest:
+            stale.append(video_id)
+        elif target_metadata != metadata:
+            changed[video_id] = metadata
+
+    to_embed = missing + stale
+    for start in range(0, len(to_embed), page_size):
+        records = [r for r in source.get_videos(to_embed[start:start + page_size], ('metadata', 'transcript')) if r]
+        if records:
+            metadatas = [record['metadata'] for record in records]
+            transcripts = [record['transcript'] or "" for record in records]
+            target.upsert_videos([record['id'] for record in records], transcripts,
+                                 _embed(model, metadatas, transcripts, batch_size), metadatas)
+    if extra:
+        target.delete_many(extra)
+    if changed:
+        target.update_metadata_many(changed)
+    return {"added": len(missing), "reembedded": len(stale), "deleted": len(extra), "updated": len(changed)}
+
+
+def _print_changes(changes: Dict[str, int]) -> None:
+    print(f"   ✓ {changes['added']:,} added, {changes['reembedded']:,} re-embedded, "
+          f"{changes['deleted']:,} deleted, {changes['updated']:,} metadata updates")
+
+
+def _same_size(source: VideoVectorDB, target: VideoVectorDB) -> bool:
+    expected, actual = source.collection.count(), target.collection.count()
+    if expected != actual:
+        print(f"❌ {target.collection_name} has {actual:,} videos, {source.collection_name} has {expected:,}. "
+              f"Not switching; run again to resume.")
+    return expected == actual
+
+
+def reembed(model_name: str, persist_directory: str = VECTOR_DB_PATH, alias: str = COLLECTION_NAME,
+            switch: bool = True, batch_size: int = 64, page_size: int = 1000) -> Optional[str]:
+    """
+    Build a new version of an alias with another model and (optionally) switch to it.
+
+    Returns:
+        Name of the new collection, or None if the live one already uses the model
+    """
+    source = VideoVectorDB(persist_directory, alias)
+    print(f"\n🤖 Loading model: {model_name}")
+    model = load_model(model_name)
+    dimension = model.get_sentence_embedding_dimension()
+
+    if source.embedding_model == model_name and source.embedding_dimension == dimension:
+        print(f"✓ {source.collection_name} is already embedded with {model_name}; nothing to do")
+        return None
+
+    name = target_collection(list_versions(persist_directory, alias), alias, model_name, dimension)
+    print(f"\n📦 {alias}: {source.collection_name} ({source.embedding_model or 'untagged'}) "
+          f"-> {name} ({model_name}, {dimension} dims)")
+    target = VideoVectorDB(persist_directory, name, embedding_model=model_name, embedding_dimension=dimension)
+
+    print("\n🔁 Copying and re-embedding (the live collection keeps serving)...")
+    start = time.perf_counter()
+    counts = copy_collection(source, target, model, batch_size, page_size)
+    print(f"   ✓ {counts['copied']:,} embedded, {counts['skipped']:,} already done "
+          f"in {time.perf_counter() - start:.1f}s")
+
+    print("\n🔄 Catching up with changes made during the copy...")
+    _print_changes(catch_up(source, target, model, batch_size))
+
+    if not switch:
+        if _same_size(source, target):
+            print(f"\n✅ {name} is ready. Switch with: python scripts/reembed.py --switch {name}")
+        return name
+
+    # Writes through the alias wait while the last changes are applied and
+    # the alias is switched, so none lands in the old collection afterwards
+    print("\n⏸️  Pausing writes for the final catch-up and the switch...")
+    with alias_lock(persist_directory, exclusive=True):
+        _print_changes(catch_up(source, target, model, batch_size))
+        if not _same_size(source, target):
+            return name
+        previous = set_alias(persist_directory, alias, name)
+
+    print(f"\n✅ {alias} now points to {name} (was {previous}).")
+    print(f"   Roll back with: python scripts/reembed.py --switch {previous}")
+    return name
+
+
+def print_versions(versions: List[Dict], alias: str) -> None:
+    print(f"\n🗂️  Versions of {alias}:")
+    if not versions:
+        print("   (none)")
+    for version in versions:
+        marker = "→" if version["active"] else " "
+        print(f"   {marker} {version['name']:<60} {version['videos']:>8,} videos | "
+              f"{version['model'] or 'untagged'} ({version['dimension'] or '?'} dims)")
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Re-embed the collection with another model into a new version and switch the alias to it"
+    )
+    action = parser.add_mutually_exclusive_group(required=True)
+    action.add_argument('--model', help='Build a new version embedded with this model ("stub" for the test encoder)')
+    action.add_argument('--list', action='store_true', help='List the versions of the collection')
+    action.add_argument('--switch', metavar='NAME', help='Point the alias at this version (e.g. to roll back)')
+    action.add_argument('--drop', metavar='NAME', help='Delete an inactive version')
+    parser.add_argument('--no-switch', action='store_true',
+                        help='Build the new version without switching the alias to it')
+    parser.add_argument('--batch-size', type=int, default=64, help='Encoder batch size (default: 64)')
+    parser.add_argument('--page-size', type=int, default=1000,
+                        help='Videos read and written per round trip (default: 1000)')
+    parser.add_argument('--db-path', default=VECTOR_DB_PATH, help=f'ChromaDB directory (default: {VECTOR_DB_PATH})')
+    parser.add_argument('--collection', default=COLLECTION_NAME,
+                        help=f'Alias to re-embed (default: {COLLECTION_NAME})')
+    args = parser.parse_args()
+
+    versions = list_versions(args.db_path, args.collection)
+    names = {version["name"] for version in versions}
+
+    if args.list:
+        print_versions(versions, args.collection)
+        return
+
+    if args.switch:
+        if args.switch not in names:
+            print(f"❌ {args.switch} is not a version of {args.collection}")
+            return
+        with alias_lock(args.db_path, exclusive=True):
+            previous = set_alias(args.db_path, args.collection, args.switch)
+        print(f"✅ {args.collection} now points to {args.switch} (was {previous})")
+        return
+
+    if args.drop:
+        if args.drop not in names:
+            print(f"❌ {args.drop} is not a version of {args.collection}")
+            return
+        if args.drop == resolve_collection(args.db_path, args.collection):
+            print(f"❌ {args.drop} is the active version; switch to another one first")
+            return
+        _client(args.db_path).delete_collection(name=args.drop)
+        print(f"✅ Dropped {args.drop}")
+        return
+
+    print("=" * 70)
+    print("RE-EMBEDDING")
+    print("=" * 70)
+    reembed(args.model, args.db_path, args.collection, switch=not args.no_switch,
+            batch_size=args.batch_size, page_size=args.page_size)
+
+
+if __name__ == "__main__":
+    main()
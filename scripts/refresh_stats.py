@@ -0,0 +1,184 @@
+"""
+Metadata-only Stats Refresh for YouTube Semantic Search
+
+View, like and comment counts change daily, but refreshing them should not
+mean re-running harvest -> clean -> embed -> migrate. This script:
+1. Pages through the video IDs and metadata already in the collection
+   (no documents or embeddings are read)
+2. Fetches part=statistics for them, 50 IDs per videos.list call (1 quota
+   unit each), with the calls of a page running concurrently
+3. Diffs the counts against the stored metadata
+4. Writes only the changed videos back with a metadata-only batch update
+
+Videos the API no longer returns (deleted or made private) are reported,
+and removed with --delete-missing.
+
+Usage:
+    python scripts/refresh_stats.py
+    python scripts/refresh_stats.py --dry-run
+"""
+
+import argparse
+import asyncio
+from pathlib import Path
+import sys
+import time
+from typing import Dict, List
+
+# Add project root to path
+ROOT_DIR = Path(__file__).resolve().parents[1]
+sys.path.append(str(ROOT_DIR))
+
+from config import (VECTOR_DB_PATH, COLLECTION_NAME, YOUTUBE_API_BASE_URL, YOUTUBE_QUOTA_UNITS,
+                    YOUTUBE_MAX_CONCURRENCY, YOUTUBE_REQUESTS_PER_SECOND, NEIGHBOURS_PATH)
+from scripts.db_handler import VideoVectorDB, STATUS_OK
+from scripts.youtube_async import AsyncYouTubeClient, QuotaLimiter, QuotaExceededError
+
+# Stored metadata key -> videos.list statistics field
+STATS_FIELDS = {
+    'view_count': 'viewCount',
+    'like_count': 'likeCount',
+    'comment_count': 'commentCount',
+}
+
+
+def diff_stats(video_ids: List[str], stored: List[Dict], fresh: Dict[str, Dict]) -> Dict[str, Dict]:
+    """
+    Compare stored counts with freshly fetched ones.
+
+    Args:
+        video_ids: Stored video IDs
+        stored: Stored metadata, aligned with video_ids
+        fresh: videos.list statistics keyed by video ID
+
+    Returns:
+        Dict of video ID -> metadata fields that changed (videos missing
+        from fresh are skipped)
+    """
+    changes = {}
+    for video_id, metadata in zip(video_ids, stored):
+        stats = fresh.get(video_id)
+        if stats is None:
+            continue
+        changed = {
+            key: stats[field]
+            for key, field in STATS_FIELDS.items()
+            if int((metadata or {}).get(key) or 0) != stats[field]
+        }
+        if changed:
+            changes[video_id] = changed
+    return changes
+
+
+async def refresh_stats(db: VideoVectorDB, client: AsyncYouTubeClient, page_size: int = 1000,
+                        dry_run: bool = False, delete_missing: bool = False) -> Dict:
+    """
+    Refresh the count fields of every stored video.
+
+    Args:
+        db: Vector database
+        client: Open AsyncYouTubeClient
+        page_size: Stored videos handled per round (page_size / 50 API calls)
+        dry_run: Diff only, write nothing
+        delete_missing: Delete videos the API no longer returns
+
+    Returns:
+        Summary dict
+    """
+    summary = {'checked': 0, 'changed': 0, 'updated': 0, 'missing': [], 'deleted': 0,
+               'quota_exhausted': False}
+
+    for video_ids, metadatas in db.iter_metadata(page_size):
+        try:
+            fresh = await client.get_video_statistics(video_ids)
+        except QuotaExceededError as e:
+            print(f"\n⚠️  {e}; stopping after {summary['checked']:,} videos")
+            summary['quota_exhausted'] = True
+            break
+
+        changes = diff_stats(video_ids, metadatas, fresh)
+        summary['checked'] += len(video_ids)
+        summary['changed'] += len(changes)
+        summary['missing'].extend(video_id for video_id in video_ids if video_id not in fresh)
+
+        if changes and not dry_run:
+            statuses = db.update_metadata_many(changes)
+            summary['updated'] += sum(1 for value in statuses.values() if value == STATUS_OK)
+
+        print(f"   • {summary['checked']:,} checked, {summary['changed']:,} changed")
+
+    # Deleting while paging would shift the offsets, so missing videos go last
+    if delete_missing and summary['missing'] and not dry_run:
+        statuses = db.delete_many(summary['missing'])
+        summary['deleted'] = sum(1 for value in statuses.values() if value == STATUS_OK)
+
+    return summary
+
+
+async def run(args) -> Dict:
+    limiter = QuotaLimiter(
+        max_concurrent=args.concurrency,
+        requests_per_second=args.requests_per_second,
+        quota_units=args.quota,
+    )
+    db = VideoVectorDB(args.db_path, args.collection, neighbours_path=args.neighbours_path or None)
+    async with AsyncYouTubeClient(base_url=args.base_url, limiter=limiter,
+                                  max_connections=args.concurrency) as client:
+        summary = await refresh_stats(db, client, args.page_size, args.dry_run, args.delete_missing)
+    db.flush_neighbours()
+    summary['quota_units_used'] = limiter.units_used
+    return summary
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Refresh view/like/comment counts in the vector database without re-embedding"
+    )
+    parser.add_argument('--dry-run', action='store_true',
+                        help='Report what would change without writing')
+    parser.add_argument('--delete-missing', action='store_true',
+                        help='Delete videos the API no longer returns (deleted or private)')
+    parser.add_argument('--page-size', type=int, default=1000,
+                        help='Stored videos handled per round (default: 1000)')
+    parser.add_argument('--db-path', default=VECTOR_DB_PATH,
+                        help=f'ChromaDB directory (default: {VECTOR_DB_PATH})')
+    parser.add_argument('--collection', default=COLLECTION_NAME,
+                        help=f'Collection name (default: {COLLECTION_NAME})')
+    parser.add_argument('--neighbours-path', default=NEIGHBOURS_PATH,
+                        help='Related-video table kept in step with the writes, "" to skip (default: %(default)s)')
+    parser.add_argument('--concurrency', type=int, default=YOUTUBE_MAX_CONCURRENCY,
+                        help=f'Concurrent Data API requests (default: {YOUTUBE_MAX_CONCURRENCY})')
+    parser.add_argument('--requests-per-second', type=float, default=YOUTUBE_REQUESTS_PER_SECOND,
+                        help=f'Sustained Data API request rate, 0 for unlimited '
+                             f'(default: {YOUTUBE_REQUESTS_PER_SECOND})')
+    parser.add_argument('--quota', type=int, default=YOUTUBE_QUOTA_UNITS,
+                        help=f'Quota units this run may spend (default: {YOUTUBE_QUOTA_UNITS})')
+    parser.add_argument('--base-url', default=YOUTUBE_API_BASE_URL,
+                        help='Data API root URL, e.g. a local stub server (default: %(default)s)')
+    args = parser.parse_args()
+
+    print("=" * 70)
+    print("STATS REFRESH" + (" (DRY RUN)" if args.dry_run else ""))
+    print("=" * 70 + "\n")
+
+    start = time.perf_counter()
+    summary = asyncio.run(run(args))
+    elapsed = time.perf_counter() - start
+
+    print("\n📊 Summary:")
+    print(f"   • Videos checked: {summary['checked']:,}")
+    print(f"   • Changed counts: {summary['changed']:,}"
+          + ("" if args.dry_run else f" ({summary['updated']:,} updated)"))
+    print(f"   • No longer available: {len(summary['missing']):,}"
+          + (f" ({summary['deleted']:,} deleted)" if args.delete_missing else ""))
+    print(f"   • Quota units used: {summary['quota_units_used']:,}")
+    print(f"   • Time: {elapsed:.1f}s")
+
+    if summary['missing'] and not args.delete_missing:
+        print(f"\n💡 Re-run with --delete-missing to remove the {len(summary['missing']):,} unavailable videos")
+    print("\n✅ Stats refresh complete!" if not summary['quota_exhausted']
+          else "\n⚠️  Stats refresh stopped early (quota exhausted)")
+
+
+if __name__ == "__main__":
+    main()
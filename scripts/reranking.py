@@ -0,0 +1,74 @@
+"""
+Result Reranking for YouTube Semantic Search
+
+Nearest-neighbour search ranks every candidate on its own, so a query like
+"world war" can return five consecutive episodes of one series with almost
+identical scores. Maximal marginal relevance (MMR) picks results one at a
+time, trading relevance to the query against similarity to the results
+already picked:
+
+    score(c) = λ · sim(query, c) − (1 − λ) · max_{s ∈ selected} sim(c, s)
+
+The candidate-candidate similarity matrix is computed once (one matrix
+product) and the greedy loop keeps a running max, so each pick is a single
+vectorised pass over the pool: picking 10 of 300 candidates takes about
+a millisecond.
+
+Usage:
+    from scripts.reranking import mmr_select
+
+    order = mmr_select(query_embedding, candidate_embeddings, top_k=5, lambda_=0.7)
+"""
+
+from pathlib import Path
+import sys
+
+import numpy as np
+
+# Add project root to path
+ROOT_DIR = Path(__file__).resolve().parents[1]
+sys.path.append(str(ROOT_DIR))
+
+from config import MMR_LAMBDA
+from scripts.embedding_utils import normalise_rows
+
+
+def mmr_select(query_embedding: np.ndarray, candidate_embeddings: np.ndarray, top_k: int,
+               lambda_: float = MMR_LAMBDA) -> np.ndarray:
+    """
+    Pick a relevant but diverse subset of candidates.
+
+    Args:
+        query_embedding: Query embedding (1D)
+        candidate_embeddings: (n_candidates, dim) embeddings
+        top_k: Number of candidates to pick
+        lambda_: 1.0 ranks by relevance only, 0.0 by diversity only
+
+    Returns:
+        Indices into candidate_embeddings, in pick order
+    """
+    n = len(candidate_embeddings)
+    k = min(top_k, n)
+    if k == 0:
+        return np.zeros(0, dtype=np.int64)
+
+    candidates = normalise_rows(np.asarray(candidate_embeddings, dtype=np.float32))
+    query = normalise_rows(np.asarray(query_embedding, dtype=np.float32).reshape(-1))
+    relevance = candidates @ query
+    similarity = candidates @ candidates.T
+
+    selected = np.empty(k, dtype=np.int64)
+    available = np.ones(n, dtype=bool)
+    max_similarity = np.full(n, -np.inf, dtype=np.float32)
+
+    # The first pick has no redundancy penalty: it is simply the most relevant
+    scores = relevance.copy()
+    for step in range(k):
+        scores[~available] = -np.inf
+        best = int(np.argmax(scores))
+        selected[step] = best
+        available[best] = False
+        np.maximum(max_similarity, similarity[best], out=max_similarity)
+        scores = lambda_ * relevance - (1 - lambda_) * max_similarity
+
+    return selected
@@ -13,8 +13,9 @@ os.environ['TF_ENABLE_ONEDNN_OPTS'] = '0'
 warnings.filterwarnings('ignore')
 
 import argparse
+from collections import OrderedDict
+import threading
 import numpy as np
-from sentence_transformers import SentenceTransformer
 from pathlib import Path
 import sys
 
@@ -22,8 +23,103 @@ import sys
 ROOT_DIR = Path(__file__).resolve().parents[1]
 sys.path.append(str(ROOT_DIR))
 
-from scripts.db_handler import initialize_collection
-from config import EMBEDDING_MODEL
+from scripts.db_handler import initialize_collection, ModelMismatchError
+from scripts.snapshot import load_snapshot
+from scripts.ivf_index import load_ivf_index
+from scripts.passages import load_passages, timestamp_url
+from scripts.dedup import collapse_filter
+from scripts.reranking import mmr_select
+from scripts.neighbours import load_neighbours
+from scripts.cluster_topics import load_topics, print_series, normalise_series, SERIES_KEY
+from scripts.field_embeddings import load_field_index, parse_weights
+from scripts.query_normalizer import load_normalizer
+from scripts.metrics import metrics, status, set_quiet, serve_metrics
+from scripts.profiling import add_profile_arguments, profile_session
+from config import (EMBEDDING_MODEL, QUERY_CACHE_SIZE, PASSAGES_PATH, SNIPPET_CHARS, MMR_LAMBDA,
+                    MMR_CANDIDATES, NEIGHBOURS_PATH, CLUSTERS_PATH, CLUSTER_PROBES, IVF_NPROBE,
+                    FIELDS_PATH, FIELD_WEIGHTS, FIELD_CANDIDATES, COLLECTION_NAME,
+                    REDUCED_RESCORE_DEPTH, VOCABULARY_PATH)
+
+
+def _and_filters(*filters):
+    """Combine metadata filters with $and, skipping empty ones."""
+    filters = [f for f in filters if f]
+    if not filters:
+        return None
+    return filters[0] if len(filters) == 1 else {"$and": filters}
+
+
+def make_snippet(transcript, passage=None, max_chars: int = SNIPPET_CHARS):
+    """
+    Cut a short preview out of a transcript.
+    
+    Args:
+        transcript: Full transcript (None gives None)
+        passage: Optional best passage of the result; the snippet starts there
+        max_chars: Maximum snippet length (cut back to a word boundary)
+    
+    Returns:
+        Snippet string or None
+    """
+    if not transcript:
+        return None
+    start = passage['char_start'] if passage else 0
+    snippet = transcript[start:start + max_chars]
+    if start + max_chars < len(transcript) and ' ' in snippet:
+        snippet = snippet[:snippet.rindex(' ')] + '…'
+    return ('…' if start > 0 else '') + snippet
+
+
+class _TranscriptLoader:
+    """Loads the transcripts of one result list with a single lookup, on first access."""
+    
+    def __init__(self, db, video_ids):
+        self._db = db
+        self._video_ids = list(video_ids)
+        self._transcripts = None
+        self._lock = threading.Lock()
+    
+    def get(self, video_id: str):
+        with self._lock:
+            if self._transcripts is None:
+                with metrics.timer("ytss_search_stage_seconds", stage="hydrate"):
+                    records = self._db.get_videos(self._video_ids, fields=('transcript',))
+                self._transcripts = {record['id']: record['transcript'] for record in records if record}
+        return self._transcripts.get(video_id)
+
+
+class SearchResult(dict):
+    """
+    One search hit.
+    
+    A plain result dict (rank, video_id, title, youtube_url, ...) whose
+    'transcript' and 'snippet' keys are loaded lazily: the search itself
+    only reads metadata, and the first access to either key fetches the
+    transcripts of the whole result list at once. Also available as the
+    .transcript and .snippet attributes.
+    """
+    
+    def __init__(self, fields: dict, loader: _TranscriptLoader = None):
+        super().__init__(fields)
+        self._loader = loader
+    
+    def __missing__(self, key):
+        if key == 'transcript':
+            value = self._loader.get(self['video_id']) if self._loader else None
+        elif key == 'snippet':
+            value = make_snippet(self['transcript'], self.get('passage'))
+        else:
+            raise KeyError(key)
+        self[key] = value
+        return value
+    
+    @property
+    def transcript(self):
+        return self['transcript']
+    
+    @property
+    def snippet(self):
+        return self['snippet']
 
 
 class VideoSemanticSearch:
@@ -31,23 +127,218 @@ class VideoSemanticSearch:
     Semantic search engine for YouTube videos.
     """
     
-    def __init__(self, model_name: str = EMBEDDING_MODEL):
+    def __init__(self, model_name: str = None, snapshot_path: str = None,
+                 model=None, db=None, query_cache_size: int = QUERY_CACHE_SIZE,
+                 passages_path: str = PASSAGES_PATH, neighbours_path: str = NEIGHBOURS_PATH,
+                 clusters_path: str = CLUSTERS_PATH, ivf_path: str = None,
+                 nprobe: int = IVF_NPROBE, fields_path: str = FIELDS_PATH,
+                 field_weights: dict = FIELD_WEIGHTS, collection_name: str = COLLECTION_NAME,
+                 dims: int = None, rescore_depth: int = REDUCED_RESCORE_DEPTH,
+                 vocabulary_path: str = VOCABULARY_PATH, normalise_queries: bool = True):
         """
         Initialize search engine.
         
         Args:
-            model_name: Name of sentence-transformer model
+            model_name: Name of sentence-transformer model (default: the model
+                        the collection was embedded with, else EMBEDDING_MODEL)
+            snapshot_path: Optional read-only snapshot directory to search
+                           instead of the live ChromaDB collection
+            model: Optional preloaded encoder (anything with an encode() method)
+            db: Optional preloaded database backend (VideoVectorDB or VideoSnapshot)
+            query_cache_size: Number of query embeddings to keep in the LRU cache
+            passages_path: Passage sidecar (see scripts/passages.py) used to link
+                           results to the best-matching moment; ignored if missing
+            neighbours_path: Related-video table (see scripts/neighbours.py);
+                             related() falls back to a vector query without it
+            clusters_path: Topic index (see scripts/cluster_topics.py) used by
+                           routed searches; they search everything without it
+            ivf_path: Optional IVF index directory (see scripts/ivf_index.py)
+                      to search instead of the live ChromaDB collection
+            nprobe: Posting lists scanned per query with ivf_path
+            fields_path: Field sidecar (see scripts/field_embeddings.py) used to
+                         re-score candidates on title, description and
+                         transcript separately; ignored if missing
+            field_weights: Weight per field (and "combined") for that fusion
+            collection_name: ChromaDB collection or alias to search
+            dims: Reduced-dimension mode: rank a first pass on this many PCA /
+                  Matryoshka dimensions (see scripts/reduced_index.py), then
+                  re-score the best rescore_depth with full vectors
+            rescore_depth: Shortlist re-scored with full vectors in that mode
+            vocabulary_path: Vocabulary (see scripts/query_normalizer.py) used
+                             to spell-correct queries; ignored if missing
+            normalise_queries: Clean queries like the stored text (and
+                               spell-correct them) before encoding
+        
+        Raises:
+            ModelMismatchError: If the collection was embedded with a different
+                                model (name or dimension) than the query model
         """
-        print(f"🤖 Loading embedding model: {model_name}...")
-        self.model = SentenceTransformer(model_name)
+        if db is not None:
+            self.db = db
+        elif snapshot_path:
+            status(f"🗄️  Opening search snapshot: {snapshot_path}...")
+            self.db = load_snapshot(snapshot_path)
+        elif ivf_path:
+            status(f"🗄️  Opening IVF index: {ivf_path} (nprobe={nprobe})...")
+            self.db = load_ivf_index(ivf_path, nprobe)
+        else:
+            status("🗄️  Connecting to vector database...")
+            self.db = initialize_collection(collection_name=collection_name)
+        
+        # Query with the model the collection was embedded with, and refuse any other
+        tagged_model = self.db.model_info()['model']
+        if model is not None:
+            self.model = model
+            self.model_name = model_name
+        else:
+            from sentence_transformers import SentenceTransformer
+            self.model_name = model_name or tagged_model or EMBEDDING_MODEL
+            status(f"🤖 Loading embedding model: {self.model_name}...")
+            self.model = SentenceTransformer(self.model_name)
+        self.db.check_model(self.model_name, self.model.get_sentence_embedding_dimension())
+        
+        self.dims = dims
+        self.rescore_depth = rescore_depth
+        if dims:
+            reduced = self.db.reduced_index() if hasattr(self.db, 'reduced_index') else None
+            if reduced is None:
+                status("⚠️  No reduced-dimension index for this backend; searching full vectors")
+                self.dims = None
+            else:
+                status(f"📉 Reduced-dimension search: {min(dims, reduced.max_dims)} of "
+                       f"{reduced.dimension} dims, rescoring {rescore_depth}")
+        
+        self.normalizer = load_normalizer(vocabulary_path) if normalise_queries else None
+        if self.normalizer is not None and self.normalizer.spell_index is not None:
+            status(f"🔤 Query vocabulary loaded: {len(self.normalizer.spell_index):,} words")
+        
+        self.query_cache_size = query_cache_size
+        self._query_cache = OrderedDict()
+        self._cache_lock = threading.Lock()
+        
+        self.passages = self._same_model(load_passages(passages_path) if passages_path else None,
+                                         "Passage index")
+        if self.passages is not None:
+            status(f"⏱️  Passage index loaded: {self.passages.manifest['passages']:,} passages")
         
-        print("🗄️  Connecting to vector database...")
-        self.db = initialize_collection()
+        self.neighbours = self._same_model(
+            load_neighbours(neighbours_path, collection_name=getattr(self.db, 'collection_name', None))
+            if neighbours_path else None,
+            "Related-video table")
+        if self.neighbours is not None:
+            status(f"🔗 Related-video table loaded: {len(self.neighbours):,} videos")
+        
+        self.topics = self._same_model(
+            load_topics(clusters_path, collection_name=getattr(self.db, 'collection_name', None))
+            if clusters_path else None,
+            "Topic index")
+        if self.topics is not None:
+            status(f"📚 Topic index loaded: {len(self.topics)} clusters, "
+                   f"{len(self.topics.series_counts)} series")
+        
+        self.field_weights = dict(field_weights)
+        self.fields = self._same_model(load_field_index(fields_path) if fields_path else None,
+                                       "Field embeddings")
+        if self.fields is not None:
+            status(f"🧩 Field embeddings loaded: {len(self.fields):,} videos "
+                   f"({', '.join(self.fields.fields)})")
         
         stats = self.db.get_collection_stats()
-        print(f"   ✓ Database loaded: {stats['total_videos']} videos available\n")
+        status(f"   ✓ Database loaded: {stats['total_videos']} videos available\n")
+    
+    def _same_model(self, sidecar, label: str):
+        """Drop a sidecar built with a different model than the query model."""
+        if sidecar is None or self.model_name is None:
+            return sidecar
+        sidecar_model = sidecar.manifest.get('model')
+        if sidecar_model is not None and sidecar_model != self.model_name:
+            status(f"⚠️  {label} was built with {sidecar_model}, not {self.model_name}; ignoring it")
+            return None
+        return sidecar
     
-    def search(self, query: str, top_k: int = 5, metadata_filter=None):
+    def normalise_query(self, query: str) -> str:
+        """Query as it is encoded: cleaned and spell-corrected (memoised), unless disabled."""
+        return self.normalizer.normalise(query) if self.normalizer is not None else query
+    
+    def encode_query(self, query: str) -> np.ndarray:
+        """
+        Embed a query, reusing cached embeddings for repeated queries.
+        
+        The query is normalised first, so spellings that normalise to the
+        same text share one cache entry.
+        
+        Args:
+            query: Natural language search query
+        
+        Returns:
+            Query embedding (1D numpy array)
+        """
+        return self._encode_normalised(self.normalise_query(query))
+    
+    def _encode_normalised(self, query: str) -> np.ndarray:
+        if self.query_cache_size > 0:
+            with self._cache_lock:
+                cached = self._query_cache.get(query)
+                if cached is not None:
+                    self._query_cache.move_to_end(query)
+            if cached is not None:
+                metrics.counter("ytss_query_cache_hits_total", "Query embedding cache hits").inc()
+                return cached
+            metrics.counter("ytss_query_cache_misses_total", "Query embedding cache misses").inc()
+        
+        with metrics.timer("ytss_search_stage_seconds", stage="encode"):
+            embedding = self.model.encode(query, convert_to_numpy=True)
+        
+        if self.query_cache_size > 0:
+            with self._cache_lock:
+                self._query_cache[query] = embedding
+                if len(self._query_cache) > self.query_cache_size:
+                    self._query_cache.popitem(last=False)
+        return embedding
+    
+    def encode_queries(self, queries: list) -> list:
+        """
+        Embed several queries with one model call, reusing cached embeddings.
+        
+        Args:
+            queries: Natural language search queries
+        
+        Returns:
+            Query embedding per query (1D numpy arrays)
+        """
+        queries = [self.normalise_query(query) for query in queries]
+        embeddings = {}
+        if self.query_cache_size > 0:
+            with self._cache_lock:
+                for query in queries:
+                    cached = self._query_cache.get(query)
+                    if cached is not None:
+                        self._query_cache.move_to_end(query)
+                        embeddings[query] = cached
+            hits = sum(query in embeddings for query in queries)
+            if hits:
+                metrics.counter("ytss_query_cache_hits_total", "Query embedding cache hits").inc(hits)
+            if hits < len(queries):
+                metrics.counter("ytss_query_cache_misses_total", "Query embedding cache misses").inc(
+                    len(queries) - hits)
+        
+        misses = list(dict.fromkeys(query for query in queries if query not in embeddings))
+        if misses:
+            with metrics.timer("ytss_search_stage_seconds", stage="encode"):
+                encoded = np.asarray(self.model.encode(misses, convert_to_numpy=True)).reshape(len(misses), -1)
+            embeddings.update(zip(misses, encoded))
+            if self.query_cache_size > 0:
+                with self._cache_lock:
+                    for query in misses:
+                        self._query_cache[query] = embeddings[query]
+                    while len(self._query_cache) > self.query_cache_size:
+                        self._query_cache.popitem(last=False)
+        return [embeddings[query] for query in queries]
+    
+    def search(self, query: str, top_k: int = 5, metadata_filter=None,
+               collapse_duplicates: bool = False, diverse: bool = False,
+               mmr_lambda: float = MMR_LAMBDA, series: str = None,
+               routed: bool = False, n_probe: int = CLUSTER_PROBES, fuse_fields: bool = True):
         """
         Search for videos matching the query.
         
@@ -55,28 +346,216 @@ class VideoSemanticSearch:
             query: Natural language search query
             top_k: Number of results to return
             metadata_filter: Optional metadata filter dict
+            collapse_duplicates: Return only the canonical video of each
+                                 near-duplicate group (see scripts/dedup.py)
+            diverse: Rerank MMR_CANDIDATES candidates with maximal marginal
+                     relevance so top_k is not filled by near-identical videos
+            mmr_lambda: Relevance/diversity trade-off for diverse mode
+            series: Only return videos of this series (see scripts/cluster_topics.py)
+            routed: Coarse-to-fine search: rank only the videos of the n_probe
+                    topic clusters nearest to the query (falls back to a full
+                    search if they hold fewer than top_k matches)
+            n_probe: Clusters searched in routed mode
+            fuse_fields: Re-score FIELD_CANDIDATES candidates on the title,
+                         description and transcript embeddings with the
+                         engine's field_weights (needs the field sidecar;
+                         not applied in diverse mode, or when a candidate
+                         is missing from the sidecar). similarity_score is
+                         then the fused score, not the cosine similarity
         
         Returns:
             List of result dictionaries
         """
-        # Generate query embedding
-        print(f"🔍 Searching for: \"{query}\"")
-        query_embedding = self.model.encode(query, convert_to_numpy=True)
+        with metrics.timer("ytss_search_seconds"):
+            # Generate query embedding
+            status(f"🔍 Searching for: \"{query}\"")
+            text = self.normalise_query(query)
+            if text != query:
+                status(f"   ✏️  Normalised to: \"{text}\"")
+            query_embedding = self._encode_normalised(text)
+            return self.search_embedded(query_embedding, top_k, metadata_filter, collapse_duplicates,
+                                        diverse, mmr_lambda, series, routed, n_probe, fuse_fields)
+    
+    def search_embedded(self, query_embedding: np.ndarray, top_k: int = 5, metadata_filter=None,
+                        collapse_duplicates: bool = False, diverse: bool = False,
+                        mmr_lambda: float = MMR_LAMBDA, series: str = None,
+                        routed: bool = False, n_probe: int = CLUSTER_PROBES, fuse_fields: bool = True):
+        """
+        Everything search() does after encoding the query.
         
-        # Search database
-        video_ids, distances, metadatas = self.db.search_videos(
+        Takes the same options as search(); lets callers such as
+        scripts/query_pipeline.py encode and search on different threads.
+        
+        Returns:
+            List of result dictionaries
+        """
+        if collapse_duplicates:
+            metadata_filter = collapse_filter(metadata_filter)
+        if series:
+            metadata_filter = _and_filters(metadata_filter, {SERIES_KEY: normalise_series(series)})
+        
+        video_ids = None
+        if routed and self.topics is not None and self.topics.dimension == len(query_embedding):
+            with metrics.timer("ytss_search_stage_seconds", stage="route"):
+                route_filter = self.topics.route_filter(query_embedding, n_probe)
+            video_ids, distances, metadatas = self._search_embedding(
+                query_embedding, top_k, _and_filters(metadata_filter, route_filter),
+                diverse, mmr_lambda, fuse_fields
+            )
+            if len(video_ids) < top_k:
+                video_ids = None
+        
+        if video_ids is None:
+            video_ids, distances, metadatas = self._search_embedding(
+                query_embedding, top_k, metadata_filter, diverse, mmr_lambda, fuse_fields
+            )
+        
+        with metrics.timer("ytss_search_stage_seconds", stage="format"):
+            results = self.format_results(video_ids, distances, metadatas)
+        
+        with metrics.timer("ytss_search_stage_seconds", stage="passages"):
+            self.add_passages(results, query_embedding)
+        return results
+    
+    def related(self, video_id: str, top_k: int = 5):
+        """
+        Find videos related to a video ("more like this").
+        
+        Reads the precomputed neighbour table when the video is in it;
+        otherwise queries the database with the video's own embedding.
+        
+        Args:
+            video_id: YouTube video ID
+            top_k: Number of related videos
+        
+        Returns:
+            List of SearchResult dictionaries (empty if the video is unknown)
+        """
+        with metrics.timer("ytss_search_seconds"):
+            neighbours = self.neighbours.related(video_id, top_k) if self.neighbours is not None else None
+            if neighbours is not None:
+                video_ids = [neighbour_id for neighbour_id, _ in neighbours]
+                distances = [1 - similarity for _, similarity in neighbours]
+                records = self.db.get_videos(video_ids, fields=('metadata',))
+                # Videos deleted since the table was built are skipped
+                kept = [i for i, record in enumerate(records) if record is not None]
+                video_ids = [video_ids[i] for i in kept]
+                distances = [distances[i] for i in kept]
+                metadatas = [records[i]['metadata'] for i in kept]
+            else:
+                record = self.db.get_video_by_id(video_id, fields=('embedding',))
+                if record is None:
+                    return []
+                video_ids, distances, metadatas = self.db.search_videos(
+                    query_embedding=record['embedding'], top_k=top_k + 1
+                )
+                hits = [i for i, hit_id in enumerate(video_ids) if hit_id != video_id][:top_k]
+                video_ids = [video_ids[i] for i in hits]
+                distances = [distances[i] for i in hits]
+                metadatas = [metadatas[i] for i in hits]
+            
+            with metrics.timer("ytss_search_stage_seconds", stage="format"):
+                return self.format_results(video_ids, distances, metadatas)
+    
+    def _search_embedding(self, query_embedding, top_k, metadata_filter, diverse, mmr_lambda,
+                          fuse_fields=False):
+        """Run the database search for an embedded query."""
+        if diverse:
+            return self._search_diverse(query_embedding, top_k, metadata_filter, mmr_lambda)
+        if fuse_fields and self.fields is not None and self.fields.dimension == len(query_embedding):
+            return self._search_fused(query_embedding, top_k, metadata_filter)
+        return self._db_search(query_embedding, top_k, metadata_filter)
+    
+    def _db_search(self, query_embedding, top_k, metadata_filter):
+        """Nearest-neighbour query, in reduced-dimension mode if the engine has dims set."""
+        if self.dims:
+            return self.db.search_videos(
+                query_embedding=query_embedding,
+                top_k=top_k,
+                metadata_filter=metadata_filter,
+                dims=self.dims,
+                rescore_depth=self.rescore_depth
+            )
+        return self.db.search_videos(
             query_embedding=query_embedding,
             top_k=top_k,
             metadata_filter=metadata_filter
         )
+    
+    def _search_diverse(self, query_embedding, top_k, metadata_filter, mmr_lambda):
+        """Over-fetch candidates with their embeddings and keep an MMR-selected top_k."""
+        video_ids, distances, metadatas, embeddings = self.db.search_candidates(
+            query_embedding=query_embedding,
+            top_k=max(MMR_CANDIDATES, top_k),
+            metadata_filter=metadata_filter
+        )
+        with metrics.timer("ytss_search_stage_seconds", stage="rerank"):
+            order = mmr_select(query_embedding, embeddings, top_k, mmr_lambda)
+        return ([video_ids[i] for i in order], [distances[i] for i in order],
+                [metadatas[i] for i in order])
+    
+    def _search_fused(self, query_embedding, top_k, metadata_filter):
+        """
+        Over-fetch candidates and re-rank them by weighted field similarity.
+
+        Videos added since the field sidecar was built only have a combined
+        similarity, which is not on the fused scale, so a query with such a
+        candidate keeps the plain ranking instead of mixing the two.
+        """
+        video_ids, distances, metadatas = self._db_search(
+            query_embedding, max(FIELD_CANDIDATES, top_k), metadata_filter
+        )
+        if any(video_id not in self.fields for video_id in video_ids):
+            metrics.counter("ytss_field_fusion_skipped_total",
+                            "Queries not fused because a candidate is missing from the field sidecar").inc()
+            return video_ids[:top_k], distances[:top_k], metadatas[:top_k]
+        with metrics.timer("ytss_search_stage_seconds", stage="fuse"):
+            fused = self.fields.fuse(video_ids, query_embedding, 1 - np.asarray(distances, dtype=np.float32),
+                                     self.field_weights)
+            order = np.argsort(-fused, kind="stable")[:top_k]
+        return ([video_ids[i] for i in order], [1 - float(fused[i]) for i in order],
+                [metadatas[i] for i in order])
+    
+    def add_passages(self, results, query_embedding):
+        """
+        Point each result at its best-matching passage.
+        
+        Adds 'passage' (start_seconds, char_start, char_end, score) and
+        'timestamp_url' (a ?t= deep link) to results whose video is in the
+        passage index. Does nothing without an index, or if it was built
+        with a model of a different dimension.
         
-        # Format results
+        Args:
+            results: Result dictionaries from format_results()
+            query_embedding: Embedding of the query
+        """
+        if self.passages is None or self.passages.manifest.get('dimension') != len(query_embedding):
+            return
+        for result in results:
+            passage = self.passages.best_passage(result['video_id'], query_embedding)
+            if passage is not None:
+                result['passage'] = passage
+                result['timestamp_url'] = timestamp_url(result['video_id'], passage['start_seconds'])
+    
+    def format_results(self, video_ids, distances, metadatas):
+        """
+        Turn raw database hits into SearchResult dictionaries.
+        
+        Args:
+            video_ids: Matched video IDs
+            distances: Distances returned by the database
+            metadatas: Metadata dicts returned by the database
+        
+        Returns:
+            List of SearchResult dictionaries (transcripts load on access)
+        """
+        loader = _TranscriptLoader(self.db, video_ids)
         results = []
         for i, (video_id, distance, metadata) in enumerate(zip(video_ids, distances, metadatas)):
             # Convert distance to similarity score (cosine distance → similarity)
             similarity = 1 - distance
             
-            result = {
+            result = SearchResult({
                 'rank': i + 1,
                 'video_id': video_id,
                 'title': metadata.get('title', 'N/A'),
@@ -85,17 +564,19 @@ class VideoSemanticSearch:
                 'duration': metadata.get('duration_seconds', 0),
                 'similarity_score': round(similarity, 4),
                 'youtube_url': f"https://youtu.be/{video_id}"
-            }
+            }, loader)
             results.append(result)
         
         return results
     
-    def display_results(self, results):
+    def display_results(self, results, show_snippets: bool = False):
         """
         Display search results in a formatted way.
         
         Args:
             results: List of result dictionaries
+            show_snippets: Also print a transcript snippet per result
+                           (loads the transcripts)
         """
         print(f"\n{'='*80}")
         print(f"TOP {len(results)} RESULTS")
@@ -105,7 +586,12 @@ class VideoSemanticSearch:
             print(f"[{result['rank']}] 🎯 Score: {result['similarity_score']:.3f}")
             print(f"    📺 {result['title']}")
             print(f"    🔗 {result['youtube_url']}")
+            if 'timestamp_url' in result:
+                start = result['passage']['start_seconds']
+                print(f"    ⏱️  Best match at {start//60}:{start%60:02d} → {result['timestamp_url']}")
             print(f"    👁️  {result['views']:,} views | ⏱️ {result['duration']//60}m {result['duration']%60}s")
+            if show_snippets and result['snippet']:
+                print(f"    💬 {result['snippet']}")
             print()
         
         print(f"{'='*80}\n")
@@ -123,12 +609,22 @@ def main():
     parser = argparse.ArgumentParser(
         description="Search YouTube videos using semantic search"
     )
-    parser.add_argument(
+    target = parser.add_mutually_exclusive_group(required=True)
+    target.add_argument(
         '--query', '-q',
         type=str,
-        required=True,
         help='Search query (natural language)'
     )
+    target.add_argument(
+        '--related',
+        metavar='VIDEO_ID',
+        help='Show videos related to this video instead of searching'
+    )
+    target.add_argument(
+        '--list-series',
+        action='store_true',
+        help='List the series labels that --series accepts'
+    )
     parser.add_argument(
         '--top-k', '-k',
         type=int,
@@ -141,26 +637,185 @@ def main():
         default=None,
         help='Filter by minimum view count'
     )
+    parser.add_argument(
+        '--quiet',
+        action='store_true',
+        help='Suppress status output (results are still printed)'
+    )
+    parser.add_argument(
+        '--metrics-out',
+        type=str,
+        default=None,
+        help='Write metrics after the search (.json for JSON, otherwise Prometheus text)'
+    )
+    parser.add_argument(
+        '--metrics-port',
+        type=int,
+        default=None,
+        help='Serve /metrics and /metrics.json on this port while running'
+    )
+    parser.add_argument(
+        '--model',
+        type=str,
+        default=None,
+        help='Query model (default: the model the collection was embedded with)'
+    )
+    parser.add_argument(
+        '--collection',
+        type=str,
+        default=COLLECTION_NAME,
+        help=f'Collection or alias to search (default: {COLLECTION_NAME})'
+    )
+    parser.add_argument(
+        '--snapshot',
+        type=str,
+        default=None,
+        help='Search a read-only snapshot directory (see scripts/snapshot.py)'
+    )
+    parser.add_argument(
+        '--ivf',
+        type=str,
+        default=None,
+        help='Search an IVF index directory (see scripts/ivf_index.py)'
+    )
+    parser.add_argument(
+        '--nprobe',
+        type=int,
+        default=IVF_NPROBE,
+        help=f'Posting lists scanned per query with --ivf (default: {IVF_NPROBE})'
+    )
+    parser.add_argument(
+        '--dims',
+        type=int,
+        default=None,
+        help='Reduced-dimension first pass on this many dims, e.g. 64 (run scripts/reduced_index.py first)'
+    )
+    parser.add_argument(
+        '--rescore-depth',
+        type=int,
+        default=REDUCED_RESCORE_DEPTH,
+        help=f'Shortlist re-scored with full vectors with --dims (default: {REDUCED_RESCORE_DEPTH})'
+    )
+    parser.add_argument(
+        '--collapse-duplicates',
+        action='store_true',
+        help='Show one video per near-duplicate group (run scripts/dedup.py first)'
+    )
+    parser.add_argument(
+        '--diverse',
+        action='store_true',
+        help='Rerank for diversity (maximal marginal relevance) instead of pure similarity'
+    )
+    parser.add_argument(
+        '--mmr-lambda',
+        type=float,
+        default=MMR_LAMBDA,
+        help=f'Relevance vs diversity for --diverse, 1.0 = relevance only (default: {MMR_LAMBDA})'
+    )
+    parser.add_argument(
+        '--series',
+        type=str,
+        default=None,
+        help='Only show videos of this series (see --list-series)'
+    )
+    parser.add_argument(
+        '--routed',
+        action='store_true',
+        help='Search only the topic clusters nearest to the query (faster on large collections)'
+    )
+    parser.add_argument(
+        '--probes',
+        type=int,
+        default=CLUSTER_PROBES,
+        help=f'Clusters searched with --routed (default: {CLUSTER_PROBES})'
+    )
+    parser.add_argument(
+        '--field-weights',
+        nargs='+',
+        metavar='FIELD=WEIGHT',
+        default=None,
+        help='Weights for multi-field fusion, e.g. title=0.5 transcript=0.5 '
+             f'(fields: title, description, transcript, combined; default: {FIELD_WEIGHTS})'
+    )
+    parser.add_argument(
+        '--no-fusion',
+        action='store_true',
+        help='Rank by the combined embedding only, ignoring the field embeddings'
+    )
+    parser.add_argument(
+        '--no-normalise',
+        action='store_true',
+        help='Encode the query as typed (no cleaning or spelling correction)'
+    )
+    parser.add_argument(
+        '--snippets',
+        action='store_true',
+        help='Show a transcript snippet for each result'
+    )
+    
+    add_profile_arguments(parser)
     
     args = parser.parse_args()
     
+    with profile_session(args, "semantic_search"):
+        run_search(args)
+
+
+def run_search(args):
+    """Run one search from parsed CLI arguments and display the results."""
+    if args.quiet:
+        set_quiet(True)
+    if args.metrics_port is not None:
+        serve_metrics(args.metrics_port)
+    
     # Initialize search engine
-    search_engine = VideoSemanticSearch()
+    field_weights = parse_weights(args.field_weights) if args.field_weights else FIELD_WEIGHTS
+    try:
+        search_engine = VideoSemanticSearch(model_name=args.model, snapshot_path=args.snapshot,
+                                            ivf_path=args.ivf, nprobe=args.nprobe,
+                                            field_weights=field_weights, collection_name=args.collection,
+                                            dims=args.dims, rescore_depth=args.rescore_depth,
+                                            normalise_queries=not args.no_normalise)
+    except ModelMismatchError as e:
+        print(f"❌ {e}")
+        return
     
     # Build metadata filter if specified
     metadata_filter = None
     if args.min_views is not None:
         metadata_filter = {"view_count": {"$gte": args.min_views}}
     
+    if args.list_series:
+        if search_engine.topics is None:
+            print("❌ No topic index found. Build it with: python scripts/cluster_topics.py")
+        else:
+            print_series(search_engine.topics)
+        return
+    
     # Perform search
-    results = search_engine.search(
-        query=args.query,
-        top_k=args.top_k,
-        metadata_filter=metadata_filter
-    )
+    if args.related:
+        status(f"🔗 Videos related to: {args.related}")
+        results = search_engine.related(args.related, top_k=args.top_k)
+    else:
+        results = search_engine.search(
+            query=args.query,
+            top_k=args.top_k,
+            metadata_filter=metadata_filter,
+            collapse_duplicates=args.collapse_duplicates,
+            diverse=args.diverse,
+            mmr_lambda=args.mmr_lambda,
+            series=args.series,
+            routed=args.routed,
+            n_probe=args.probes,
+            fuse_fields=not args.no_fusion
+        )
     
     # Display results
-    search_engine.display_results(results)
+    search_engine.display_results(results, show_snippets=args.snippets)
+    
+    if args.metrics_out:
+        path = metrics.write(args.metrics_out)
+        status(f"📈 Metrics written to: {path}")
     
     # Optional: Save results to file
     # TODO: Add option to export results to JSON/CSV
@@ -0,0 +1,602 @@
+"""
+Read-Only Search Snapshots for YouTube Semantic Search
+
+Exports the ChromaDB collection to a read-only snapshot that search
+processes can memory-map instead of each building their own in-memory
+HNSW copy. All workers on a host then share the same page-cache pages
+and start up almost instantly.
+
+A snapshot directory contains:
+- vectors.npy          float32 vector matrix (normalised for cosine)
+- graph.npy            prebuilt k-NN graph (int32, one row per video)
+- entry_points.npy     graph entry points
+- meta__<key>.npy      numeric and low-cardinality string metadata columns
+                       (for vectorised filters, e.g. view_count or series)
+- ids / metadata / transcripts blobs (offset-indexed, mmap'd)
+
+Usage:
+    python scripts/snapshot.py --output data/snapshot
+    python scripts/semantic_search.py -q "photosynthesis" --snapshot data/snapshot
+"""
+
+import argparse
+import heapq
+import json
+import time
+from pathlib import Path
+import sys
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+# Add project root to path
+ROOT_DIR = Path(__file__).resolve().parents[1]
+sys.path.append(str(ROOT_DIR))
+
+from scripts.array_store import write_store, read_store, store_path
+from scripts.embedding_utils import normalise_rows
+from scripts.metrics import metrics
+from config import (SNAPSHOT_PATH, SNAPSHOT_GRAPH_DEGREE, SNAPSHOT_EXACT_SEARCH_MAX,
+                    SNAPSHOT_SEARCH_EF, DISTANCE_METRIC)
+
+SNAPSHOT_FORMAT_VERSION = 1
+
+# String metadata with at most this many distinct values is stored as a column too
+CATEGORY_MAX_VALUES = 1024
+
+# Same field names as VideoVectorDB.get_videos (not imported: that would pull in chromadb)
+VIDEO_FIELDS = ('metadata', 'transcript', 'embedding')
+
+
+# --------------------------------------------------------------------
+# Metadata filters (subset of ChromaDB's `where` syntax)
+# --------------------------------------------------------------------
+_COMPARATORS = {
+    "$eq": lambda a, b: a == b,
+    "$ne": lambda a, b: a != b,
+    "$gt": lambda a, b: a > b,
+    "$gte": lambda a, b: a >= b,
+    "$lt": lambda a, b: a < b,
+    "$lte": lambda a, b: a <= b,
+}
+
+
+def matches_filter(metadata: Dict, where: Optional[Dict]) -> bool:
+    """
+    Check a metadata dict against a ChromaDB-style `where` filter.
+
+    Supports $and, $or, $eq, $ne, $gt, $gte, $lt, $lte, $in and $nin.
+
+    Args:
+        metadata: Video metadata dict
+        where: Filter dict (e.g., {"view_count": {"$gte": 10000}})
+
+    Returns:
+        True if the metadata matches
+    """
+    if not where:
+        return True
+
+    for key, condition in where.items():
+        if key == "$and":
+            if not all(matches_filter(metadata, sub) for sub in condition):
+                return False
+            continue
+        if key == "$or":
+            if not any(matches_filter(metadata, sub) for sub in condition):
+                return False
+            continue
+
+        if not isinstance(condition, dict):
+            condition = {"$eq": condition}
+
+        value = metadata.get(key)
+        for op, operand in condition.items():
+            if op == "$in":
+                ok = value in operand
+            elif op == "$nin":
+                ok = value not in operand
+            elif value is None:
+                ok = op == "$ne"
+            else:
+                try:
+                    ok = _COMPARATORS[op](value, operand)
+                except TypeError:
+                    ok = False
+            if not ok:
+                return False
+    return True
+
+
+def _filter_keys(where: Dict) -> set:
+    """Collect the metadata keys referenced by a filter."""
+    keys = set()
+    for key, condition in where.items():
+        if key in ("$and", "$or"):
+            for sub in condition:
+                keys |= _filter_keys(sub)
+        else:
+            keys.add(key)
+    return keys
+
+
+def _column_mask(columns: Dict[str, np.ndarray], where: Dict) -> np.ndarray:
+    """Evaluate a filter over numeric metadata columns in one vectorised pass."""
+    mask = None
+    for key, condition in where.items():
+        if key == "$and":
+            sub_mask = np.logical_and.reduce([_column_mask(columns, sub) for sub in condition])
+        elif key == "$or":
+            sub_mask = np.logical_or.reduce([_column_mask(columns, sub) for sub in condition])
+        else:
+            column = columns[key]
+            if not isinstance(condition, dict):
+                condition = {"$eq": condition}
+            sub_mask = np.ones(len(column), dtype=bool)
+            for op, operand in condition.items():
+                if op == "$in":
+                    sub_mask &= np.isin(column, operand)
+                elif op == "$nin":
+                    sub_mask &= ~np.isin(column, operand)
+                else:
+                    sub_mask &= _COMPARATORS[op](column, operand)
+        mask = sub_mask if mask is None else mask & sub_mask
+    return mask
+
+
+# --------------------------------------------------------------------
+# k-NN graph construction
+# --------------------------------------------------------------------
+def build_knn_graph(vectors: np.ndarray, degree: int = SNAPSHOT_GRAPH_DEGREE,
+                    block_size: int = 1024) -> np.ndarray:
+    """
+    Build an exact k-NN graph over normalised vectors with blocked matrix products.
+
+    Args:
+        vectors: Normalised vectors (n, dim)
+        degree: Neighbours per node
+        block_size: Rows per matrix block
+
+    Returns:
+        np.ndarray of neighbour indices (n, degree), int32
+    """
+    n = len(vectors)
+    degree = max(0, min(degree, n - 1))
+    graph = np.zeros((n, degree), dtype=np.int32)
+    if degree == 0:
+        return graph
+
+    for start in range(0, n, block_size):
+        block = vectors[start:start + block_size]
+        sims = block @ vectors.T
+        # Exclude self-matches
+        sims[np.arange(len(block)), np.arange(start, start + len(block))] = -np.inf
+        top = np.argpartition(-sims, degree - 1, axis=1)[:, :degree]
+        order = np.argsort(-np.take_along_axis(sims, top, axis=1), axis=1)
+        graph[start:start + len(block)] = np.take_along_axis(top, order, axis=1)
+
+    return graph
+
+
+# --------------------------------------------------------------------
+# Export
+# --------------------------------------------------------------------
+def fetch_collection(db, batch_size: int = 1000) -> Tuple[List[str], List[str], List[Dict], np.ndarray]:
+    """
+    Read a whole VideoVectorDB collection.
+
+    Vectors are unit-normalised when the collection uses cosine distance.
+
+    Returns:
+        Tuple of (ids, documents, metadatas, float32 vector matrix)
+    """
+    total = db.collection.count()
+    ids, documents, metadatas, vectors = [], [], [], []
+    for offset in range(0, total, batch_size):
+        page = db.collection.get(
+            limit=batch_size,
+            offset=offset,
+            include=["embeddings", "metadatas", "documents"]
+        )
+        ids.extend(page["ids"])
+        documents.extend(page["documents"])
+        metadatas.extend(page["metadatas"])
+        vectors.append(np.asarray(page["embeddings"], dtype=np.float32))
+
+    dim = vectors[0].shape[1] if vectors else 0
+    matrix = np.vstack(vectors) if vectors else np.zeros((0, dim), dtype=np.float32)
+    if DISTANCE_METRIC == "cosine":
+        matrix = normalise_rows(matrix)
+    return ids, documents, metadatas, matrix
+
+
+def metadata_columns(metadatas: List[Dict]) -> Tuple[Dict[str, np.ndarray], List[str], List[str]]:
+    """
+    Metadata columns that allow vectorised filtering without decoding JSON.
+
+    Returns:
+        Tuple of (arrays named meta__<key>, numeric keys, category keys)
+    """
+    arrays, numeric_keys, category_keys = {}, [], []
+    if metadatas:
+        for key in sorted(set().union(*(m.keys() for m in metadatas))):
+            values = [m.get(key) for m in metadatas]
+            if all(isinstance(v, (int, float)) and not isinstance(v, bool) for v in values):
+                arrays[f"meta__{key}"] = np.asarray(values, dtype=np.float64)
+                numeric_keys.append(key)
+            elif all(isinstance(v, str) for v in values) and len(set(values)) <= CATEGORY_MAX_VALUES:
+                arrays[f"meta__{key}"] = np.asarray(values, dtype=str)
+                category_keys.append(key)
+    return arrays, numeric_keys, category_keys
+
+
+def record_blobs(ids: List[str], documents: List[str], metadatas: List[Dict]) -> Dict[str, List[bytes]]:
+    """The ids / metadata / transcripts blobs of a store, in row order."""
+    return {
+        "ids": [vid.encode("utf-8") for vid in ids],
+        "metadata": [json.dumps(m, ensure_ascii=False).encode("utf-8") for m in metadatas],
+        "transcripts": [(doc or "").encode("utf-8") for doc in documents],
+    }
+
+
+def export_snapshot(db, output_dir: str = SNAPSHOT_PATH,
+                    graph_degree: int = SNAPSHOT_GRAPH_DEGREE,
+                    batch_size: int = 1000) -> Path:
+    """
+    Export a VideoVectorDB collection to a read-only snapshot.
+
+    Args:
+        db: VideoVectorDB instance
+        output_dir: Snapshot directory
+        graph_degree: Neighbours per node in the prebuilt graph
+        batch_size: Rows fetched from ChromaDB per round trip
+
+    Returns:
+        Path to the snapshot
+    """
+    print(f"\n📤 Exporting {db.collection.count()} videos from {db.collection_name}...")
+    ids, documents, metadatas, matrix = fetch_collection(db, batch_size)
+    dim = matrix.shape[1]
+    print(f"   ✓ Fetched {len(ids)} vectors ({dim} dims)")
+
+    print(f"   • Building k-NN graph (degree={graph_degree})...")
+    start = time.perf_counter()
+    graph = build_knn_graph(matrix, degree=graph_degree)
+    print(f"   ✓ Graph built in {time.perf_counter() - start:.1f}s")
+
+    rng = np.random.default_rng(0)
+    n_entry = min(len(ids), 64)
+    entry_points = np.sort(rng.choice(len(ids), size=n_entry, replace=False)).astype(np.int32)
+
+    arrays = {
+        "vectors": matrix.astype(np.float32),
+        "graph": graph,
+        "entry_points": entry_points,
+        "sq_norms": np.einsum("ij,ij->i", matrix, matrix).astype(np.float32),
+    }
+    columns, numeric_keys, category_keys = metadata_columns(metadatas)
+    arrays.update(columns)
+
+    manifest = {
+        "format_version": SNAPSHOT_FORMAT_VERSION,
+        "collection_name": db.collection_name,
+        "distance_metric": DISTANCE_METRIC,
+        "count": len(ids),
+        "dimension": dim,
+        "embedding_model": db.model_info()['model'],
+        "graph_degree": int(graph.shape[1]),
+        "numeric_metadata": numeric_keys,
+        "category_metadata": category_keys,
+        "created_at": time.strftime("%Y-%m-%dT%H:%M:%S"),
+    }
+
+    path = write_store(output_dir, arrays, record_blobs(ids, documents, metadatas), manifest)
+    size_mb = sum(f.stat().st_size for f in store_path(path).iterdir()) / (1024 * 1024)
+    print(f"   ✓ Snapshot written to: {path} ({size_mb:.2f} MB)")
+    return path
+
+
+# --------------------------------------------------------------------
+# Loader
+# --------------------------------------------------------------------
+class VideoSnapshot:
+    """
+    Read-only, memory-mapped view of an exported collection.
+
+    Exposes the read side of VideoVectorDB (search_videos, get_video_by_id,
+    get_videos, get_collection_stats) so it can be used as a drop-in backend for
+    VideoSemanticSearch.
+    """
+
+    def __init__(self, snapshot_path: str = SNAPSHOT_PATH):
+        """
+        Open a snapshot.
+
+        Args:
+            snapshot_path: Directory written by export_snapshot()
+        """
+        self.snapshot_path = str(snapshot_path)
+        arrays, blobs, self.manifest = read_store(snapshot_path)
+
+        self.vectors = arrays["vectors"]
+        self.graph = arrays["graph"]
+        self.entry_points = arrays["entry_points"]
+        self.sq_norms = arrays["sq_norms"]
+        self.columns = {
+            key: arrays[f"meta__{key}"]
+            for key in self.manifest.get("numeric_metadata", []) + self.manifest.get("category_metadata", [])
+        }
+
+        self._ids = blobs["ids"]
+        self._metadata = blobs["metadata"]
+        self._transcripts = blobs["transcripts"]
+
+        self.collection_name = self.manifest["collection_name"]
+        self.distance_metric = self.manifest["distance_metric"]
+        self._id_index = None
+
+    def count(self) -> int:
+        return int(self.manifest["count"])
+
+    def _video_id(self, index: int) -> str:
+        return self._ids[index].decode("utf-8")
+
+    def _video_metadata(self, index: int) -> Dict:
+        return json.loads(self._metadata[index])
+
+    def _index_of(self, video_id: str) -> Optional[int]:
+        # Built on first use only: most search workers never need it
+        if self._id_index is None:
+            self._id_index = {self._video_id(i): i for i in range(self.count())}
+        return self._id_index.get(video_id)
+
+    def _distances(self, query: np.ndarray, rows) -> np.ndarray:
+        """Distances from the query to the given rows, matching ChromaDB's metrics."""
+        vectors = self.vectors if rows is None else self.vectors[rows]
+        dots = vectors @ query
+        if self.distance_metric == "l2":
+            sq_norms = self.sq_norms if rows is None else self.sq_norms[rows]
+            return sq_norms + float(query @ query) - 2 * dots
+        return 1.0 - dots
+
+    def _filter_rows(self, metadata_filter: Dict) -> np.ndarray:
+        """Indices of rows matching a metadata filter."""
+        if _filter_keys(metadata_filter) <= set(self.columns):
+            return np.flatnonzero(_column_mask(self.columns, metadata_filter))
+        return np.array([
+            i for i in range(self.count())
+            if matches_filter(self._video_metadata(i), metadata_filter)
+        ], dtype=np.int64)
+
+    def _exact_search(self, query: np.ndarray, top_k: int, rows=None) -> Tuple[np.ndarray, np.ndarray]:
+        distances = self._distances(query, rows)
+        k = min(top_k, len(distances))
+        if k == 0:
+            return np.array([], dtype=np.int64), np.array([], dtype=np.float32)
+        top = np.argpartition(distances, k - 1)[:k]
+        top = top[np.argsort(distances[top])]
+        indices = top if rows is None else np.asarray(rows)[top]
+        return indices, distances[top]
+
+    def _graph_search(self, query: np.ndarray, top_k: int, ef: int) -> Tuple[np.ndarray, np.ndarray]:
+        """Best-first beam search over the prebuilt k-NN graph."""
+        ef = max(ef, top_k)
+        entry = self.entry_points
+        entry_dist = self._distances(query, entry)
+
+        visited = set(int(i) for i in entry)
+        candidates = [(float(d), int(i)) for d, i in zip(entry_dist, entry)]
+        heapq.heapify(candidates)
+        results = [(-d, i) for d, i in candidates]
+        heapq.heapify(results)
+        while len(results) > ef:
+            heapq.heappop(results)
+
+        while candidates:
+            dist, node = heapq.heappop(candidates)
+            if len(results) >= ef and dist > -results[0][0]:
+                break
+
+            neighbours = [int(n) for n in self.graph[node] if int(n) not in visited]
+            if not neighbours:
+                continue
+            visited.update(neighbours)
+
+            for d, n in zip(self._distances(query, neighbours), neighbours):
+                d = float(d)
+                if len(results) < ef or d < -results[0][0]:
+                    heapq.heappush(candidates, (d, n))
+                    heapq.heappush(results, (-d, n))
+                    if len(results) > ef:
+                        heapq.heappop(results)
+
+        best = sorted((-d, i) for d, i in results)[:top_k]
+        return (np.array([i for _, i in best], dtype=np.int64),
+                np.array([d for d, _ in best], dtype=np.float32))
+
+    def _search_indices(self, query_embedding: np.ndarray, top_k: int,
+                        metadata_filter: Optional[Dict], ef: int) -> Tuple[np.ndarray, np.ndarray]:
+        """Row indices and distances of the nearest videos."""
+        query = np.asarray(query_embedding, dtype=np.float32).reshape(-1)
+        if self.distance_metric == "cosine":
+            query = query / max(float(np.linalg.norm(query)), 1e-12)
+
+        with metrics.timer("ytss_db_seconds", operation="query"):
+            if metadata_filter:
+                return self._exact_search(query, top_k, self._filter_rows(metadata_filter))
+            if self.count() <= SNAPSHOT_EXACT_SEARCH_MAX or self.graph.shape[1] == 0:
+                return self._exact_search(query, top_k)
+            return self._graph_search(query, top_k, ef)
+
+    def search_videos(self,
+                      query_embedding: np.ndarray,
+                      top_k: int = 5,
+                      metadata_filter: Optional[Dict] = None,
+                      ef: int = SNAPSHOT_SEARCH_EF) -> Tuple[List[str], List[float], List[Dict]]:
+        """
+        Search for similar videos using query embedding.
+
+        Small snapshots and filtered queries are answered with an exact scan
+        over the memory-mapped matrix; large snapshots use the k-NN graph.
+
+        Args:
+            query_embedding: Query embedding vector (1D numpy array)
+            top_k: Number of results to return
+            metadata_filter: Optional filter dict (e.g., {"view_count": {"$gte": 10000}})
+            ef: Beam width for graph search
+
+        Returns:
+            Tuple of (video_ids, distances, metadata)
+        """
+        indices, distances = self._search_indices(query_embedding, top_k, metadata_filter, ef)
+
+        with metrics.timer("ytss_db_seconds", operation="get"):
+            video_ids = [self._video_id(i) for i in indices]
+            metadatas = [self._video_metadata(i) for i in indices]
+        return video_ids, [float(d) for d in distances], metadatas
+
+    def search_candidates(self,
+                          query_embedding: np.ndarray,
+                          top_k: int = 100,
+                          metadata_filter: Optional[Dict] = None,
+                          ef: int = SNAPSHOT_SEARCH_EF) -> Tuple[List[str], List[float], List[Dict], np.ndarray]:
+        """
+        Like search_videos, but also returns the candidates' embeddings
+        (for reranking).
+
+        Returns:
+            Tuple of (video_ids, distances, metadata, embeddings matrix)
+        """
+        indices, distances = self._search_indices(query_embedding, top_k, metadata_filter, max(ef, top_k))
+
+        with metrics.timer("ytss_db_seconds", operation="get"):
+            video_ids = [self._video_id(i) for i in indices]
+            metadatas = [self._video_metadata(i) for i in indices]
+            embeddings = np.asarray(self.vectors[indices], dtype=np.float32)
+        return video_ids, [float(d) for d in distances], metadatas, embeddings
+
+    def get_video_by_id(self, video_id: str,
+                        fields: Sequence[str] = VIDEO_FIELDS) -> Optional[Dict]:
+        """
+        Retrieve a specific video by ID.
+
+        Args:
+            video_id: YouTube video ID
+            fields: Fields to load ('metadata', 'transcript', 'embedding')
+
+        Returns:
+            Dictionary with 'id' and the requested fields, or None if not found
+        """
+        return self.get_videos([video_id], fields)[0]
+
+    def get_videos(self, video_ids: List[str],
+                   fields: Sequence[str] = ('metadata',)) -> List[Optional[Dict]]:
+        """
+        Retrieve several videos; only the requested blobs are touched.
+
+        Args:
+            video_ids: YouTube video IDs
+            fields: Fields to load ('metadata', 'transcript', 'embedding')
+
+        Returns:
+            List aligned with video_ids (None for IDs not in the snapshot)
+
+        Raises:
+            ValueError: For unknown field names
+        """
+        unknown = set(fields) - set(VIDEO_FIELDS)
+        if unknown:
+            raise ValueError(f"Unknown video field(s): {', '.join(sorted(unknown))} "
+                             f"(expected any of: {', '.join(VIDEO_FIELDS)})")
+
+        records = []
+        with metrics.timer("ytss_db_seconds", operation="get"):
+            for video_id in video_ids:
+                index = self._index_of(video_id)
+                if index is None:
+                    records.append(None)
+                    continue
+                record = {'id': video_id}
+                if 'transcript' in fields:
+                    record['transcript'] = self._transcripts[index].decode("utf-8")
+                if 'embedding' in fields:
+                    record['embedding'] = np.array(self.vectors[index])
+                if 'metadata' in fields:
+                    record['metadata'] = self._video_metadata(index)
+                records.append(record)
+        return records
+
+    def get_collection_stats(self) -> Dict:
+        """
+        Get statistics about the snapshot.
+
+        Returns:
+            Dictionary with collection stats
+        """
+        return {
+            'total_videos': self.count(),
+            'collection_name': self.collection_name,
+            'persist_directory': self.snapshot_path,
+            'distance_metric': self.distance_metric,
+            'embedding_model': self.manifest.get("embedding_model"),
+            'embedding_dimension': self.manifest.get("dimension")
+        }
+
+    def model_info(self) -> Dict:
+        """Embedding model and dimension of the exported collection (model None if untagged)."""
+        return {'model': self.manifest.get("embedding_model"), 'dimension': self.manifest.get("dimension")}
+
+    def check_model(self, model_name: Optional[str] = None, dimension: Optional[int] = None) -> None:
+        """Raise ModelMismatchError if the snapshot was embedded with another model."""
+        from scripts.db_handler import check_model
+        check_model(self.model_info(), model_name, dimension, f"Index {self.snapshot_path}")
+
+
+def load_snapshot(snapshot_path: str = SNAPSHOT_PATH) -> VideoSnapshot:
+    """
+    Convenience function to open a read-only snapshot.
+
+    Args:
+        snapshot_path: Snapshot directory
+
+    Returns:
+        VideoSnapshot instance
+    """
+    return VideoSnapshot(snapshot_path)
+
+
+def main():
+    """Export the vector database to a read-only snapshot."""
+    parser = argparse.ArgumentParser(
+        description="Export the ChromaDB collection to a memory-mapped search snapshot"
+    )
+    parser.add_argument(
+        '--output', '-o',
+        default=SNAPSHOT_PATH,
+        help=f'Snapshot directory (default: {SNAPSHOT_PATH})'
+    )
+    parser.add_argument(
+        '--graph-degree',
+        type=int,
+        default=SNAPSHOT_GRAPH_DEGREE,
+        help=f'Neighbours per node in the k-NN graph (default: {SNAPSHOT_GRAPH_DEGREE})'
+    )
+    args = parser.parse_args()
+
+    from scripts.db_handler import initialize_collection
+
+    print("=" * 70)
+    print("SEARCH SNAPSHOT EXPORT")
+    print("=" * 70)
+
+    db = initialize_collection()
+    export_snapshot(db, args.output, graph_degree=args.graph_degree)
+
+    print("\n" + "=" * 70)
+    print("✅ SNAPSHOT EXPORT COMPLETE!")
+    print("=" * 70)
+    print(f"\n💡 Search it with: python scripts/semantic_search.py -q 'your query' --snapshot {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,505 @@
+"""
+Streaming Ingestion Pipeline for YouTube Semantic Search
+
+Runs fetch -> clean -> embed -> upsert as one streaming job instead of
+four batch scripts that each write and re-read a full CSV. The stages
+run in their own threads and are connected by bounded queues:
+
+    fetch --videos--> clean --frames--> embed --batches--> upsert
+
+- clean collects videos into micro-batches (up to --batch-size videos or
+  --max-batch-wait seconds, whichever comes first), so a video becomes
+  searchable seconds after its transcript is fetched
+- a full queue blocks the stage feeding it (backpressure), so a slow
+  encoder throttles fetching instead of buffering the whole channel
+- per-stage stats (throughput, busy/idle/blocked time) and the
+  fetch-to-searchable latency are reported at the end
+- upserted videos are added to the related-video table (--neighbours-path)
+  if one exists
+
+Sources:
+    youtube    harvest the channel (like extract_transcript.py)
+    file       replay a raw crashcourse_videos dataset (CSV, Parquet or Arrow)
+    synthetic  generated videos, for offline runs and benchmarks
+
+Usage:
+    python scripts/stream_pipeline.py --source youtube --target-transcripts 200
+    python scripts/stream_pipeline.py --source file --input data/crashcourse_videos.csv
+    python scripts/stream_pipeline.py --source synthetic --videos 2000 --model stub
+"""
+
+# Suppress warnings before imports
+import os
+import warnings
+os.environ['TRANSFORMERS_VERBOSITY'] = 'error'
+warnings.filterwarnings('ignore')
+
+import argparse
+import json
+import queue
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+import sys
+from typing import Callable, Dict, Iterable, Iterator, List, Optional
+
+import numpy as np
+import pandas as pd
+
+# Add project root to path
+ROOT_DIR = Path(__file__).resolve().parents[1]
+sys.path.append(str(ROOT_DIR))
+
+from config import (VECTOR_DB_PATH, COLLECTION_NAME, EMBEDDING_MODEL,
+                    CHANNEL_ID, TRANSCRIPT_CONCURRENCY, CLUSTERS_PATH, NEIGHBOURS_PATH)
+from scripts.clean_and_merge_dataset import clean_video_frame
+from scripts.cluster_topics import load_topics
+from scripts.dataset_io import dataset_format, read_dataset
+from scripts.embedding_utils import load_model
+from scripts.generate_embeddings import combine_text_columns
+from scripts.migrate_to_vectordb import prepare_records
+from scripts.profiling import add_profile_arguments, profile_session
+from scripts.transcript_cache import add_cache_arguments, cache_from_args
+
+
+# End-of-stream marker passed down the queues
+_DONE = object()
+
+
+# --------------------------------------------------------------------
+# Sources
+# --------------------------------------------------------------------
+def youtube_source(channel_id: str, target_count: int,
+                   transcript_concurrency: int = TRANSCRIPT_CONCURRENCY,
+                   cache=None, max_age: Optional[float] = None) -> Iterator[Dict]:
+    """
+    Yield raw video rows (with transcript) from a channel's uploads playlist.
+
+    Transcripts for a page are downloaded concurrently and each video is
+    yielded as soon as its transcript (and those before it) are ready.
+    Pass a TranscriptCache to serve repeat harvests from disk.
+    """
+    from scripts.extract_transcript import (get_youtube, get_uploads_playlist_id,
+                                            get_video_metadata, fetch_timed_transcript)
+    from scripts.passages import CUES_COLUMN
+
+    youtube = get_youtube()
+    uploads_playlist_id = get_uploads_playlist_id(youtube, channel_id)
+    produced = 0
+    next_page_token = None
+
+    with ThreadPoolExecutor(max_workers=transcript_concurrency) as pool:
+        while produced < target_count:
+            res = youtube.playlistItems().list(
+                part="contentDetails",
+                playlistId=uploads_playlist_id,
+                maxResults=50,
+                pageToken=next_page_token,
+            ).execute()
+
+            batch_ids = [item["contentDetails"]["videoId"] for item in res.get("items", [])]
+            if not batch_ids:
+                break
+
+            videos = get_video_metadata(youtube, batch_ids)
+            transcripts = pool.map(
+                lambda video_id: fetch_timed_transcript(video_id, cache=cache, max_age=max_age),
+                [video["id"] for video in videos],
+            )
+            for video, (transcript, cues) in zip(videos, transcripts):
+                if not transcript:
+                    continue
+                video["transcript"] = transcript
+                video[CUES_COLUMN] = cues
+                yield video
+                produced += 1
+                if produced >= target_count:
+                    break
+
+            next_page_token = res.get("nextPageToken")
+            if not next_page_token:
+                break
+
+
+def file_source(path, chunksize: int = 1000) -> Iterator[Dict]:
+    """Yield raw video rows from a crashcourse_videos-shaped dataset (CSV, Parquet or Arrow)."""
+    if dataset_format(path) == "csv":
+        for chunk in pd.read_csv(path, chunksize=chunksize):
+            yield from chunk.to_dict('records')
+    else:
+        yield from read_dataset(path).to_dict('records')
+
+
+def synthetic_source(n_videos: int, transcript_chars: int = 30000, seed: int = 0) -> Iterator[Dict]:
+    """Yield generated raw video rows."""
+    from scripts.synthetic_data import make_videos_frame
+
+    yield from make_videos_frame(n_videos, seed=seed,
+                                 median_transcript_chars=transcript_chars).to_dict('records')
+
+
+# --------------------------------------------------------------------
+# Stage bookkeeping
+# --------------------------------------------------------------------
+class StageStats:
+    """
+    Counters for one pipeline stage.
+
+    busy:    seconds spent doing the stage's own work
+    idle:    seconds waiting for input (upstream is the bottleneck)
+    blocked: seconds waiting for room downstream (backpressure)
+    """
+
+    def __init__(self, name: str):
+        self.name = name
+        self.items = 0
+        self.batches = 0
+        self.busy = 0.0
+        self.idle = 0.0
+        self.blocked = 0.0
+        self.started = None
+        self.finished = None
+
+    def to_dict(self) -> Dict:
+        wall = (self.finished or time.perf_counter()) - (self.started or time.perf_counter())
+        return {
+            "items": self.items,
+            "batches": self.batches,
+            "wall_seconds": round(wall, 3),
+            "busy_seconds": round(self.busy, 3),
+            "idle_seconds": round(self.idle, 3),
+            "blocked_seconds": round(self.blocked, 3),
+            "items_per_sec": round(self.items / wall, 2) if wall > 0 else None,
+            "items_per_busy_sec": round(self.items / self.busy, 2) if self.busy > 0 else None,
+        }
+
+
+class PipelineAborted(Exception):
+    """Raised inside stages when another stage has failed."""
+
+
+class StreamingPipeline:
+    """
+    Threaded fetch -> clean -> embed -> upsert pipeline with bounded queues.
+
+    Args:
+        source: Iterable of raw video rows (dicts with the crashcourse_videos.csv columns)
+        db: VideoVectorDB (or anything with upsert_videos)
+        model: Encoder with encode()
+        batch_size: Maximum videos per micro-batch
+        max_batch_wait: Seconds to wait for a micro-batch to fill before flushing it
+        queue_size: Capacity of each inter-stage queue, in micro-batches
+        on_batch: Optional callback(video_ids) after each upsert
+        topics: Optional TopicIndex; new videos get the cluster_id / series of
+                their nearest centroid (see scripts/cluster_topics.py)
+    """
+
+    def __init__(self, source: Iterable[Dict], db, model, batch_size: int = 32,
+                 max_batch_wait: float = 1.0, queue_size: int = 4,
+                 on_batch: Optional[Callable[[List[str]], None]] = None,
+                 topics=None):
+        self.source = source
+        self.db = db
+        self.model = model
+        self.topics = topics
+        self.batch_size = batch_size
+        self.max_batch_wait = max_batch_wait
+        self.on_batch = on_batch
+
+        self.videos = queue.Queue(maxsize=queue_size * batch_size)
+        self.frames = queue.Queue(maxsize=queue_size)
+        self.batches = queue.Queue(maxsize=queue_size)
+
+        self.stats = {name: StageStats(name) for name in ("fetch", "clean", "embed", "upsert")}
+        self.latencies: List[float] = []
+        self._stop = threading.Event()
+        self._errors: List[BaseException] = []
+
+    # ---- queue helpers (wake up periodically so a failed stage stops everyone)
+    def _put(self, q: queue.Queue, item, stats: StageStats) -> None:
+        start = time.perf_counter()
+        while True:
+            if self._stop.is_set():
+                raise PipelineAborted()
+            try:
+                q.put(item, timeout=0.1)
+                break
+            except queue.Full:
+                continue
+        stats.blocked += time.perf_counter() - start
+
+    def _get(self, q: queue.Queue, stats: StageStats, timeout: Optional[float] = None):
+        start = time.perf_counter()
+        deadline = None if timeout is None else start + timeout
+        try:
+            while True:
+                if self._stop.is_set():
+                    raise PipelineAborted()
+                wait = 0.1 if deadline is None else min(0.1, deadline - time.perf_counter())
+                if wait <= 0:
+                    raise queue.Empty
+                try:
+                    return q.get(timeout=wait)
+                except queue.Empty:
+                    continue
+        finally:
+            stats.idle += time.perf_counter() - start
+
+    # ---- stages
+    def _fetch(self) -> None:
+        stats = self.stats["fetch"]
+        iterator = iter(self.source)
+        while True:
+            start = time.perf_counter()
+            video = next(iterator, _DONE)
+            stats.busy += time.perf_counter() - start
+            if video is _DONE:
+                break
+            stats.items += 1
+            self._put(self.videos, (video, time.perf_counter()), stats)
+        self._put(self.videos, _DONE, stats)
+
+    def _clean(self) -> None:
+        stats = self.stats["clean"]
+        done = False
+        while not done:
+            # Block for the first video, then fill the micro-batch until it is
+            # full or max_batch_wait has passed
+            batch = []
+            item = self._get(self.videos, stats)
+            if item is _DONE:
+                break
+            batch.append(item)
+            deadline = time.perf_counter() + self.max_batch_wait
+            while len(batch) < self.batch_size:
+                try:
+                    item = self._get(self.videos, stats, timeout=deadline - time.perf_counter())
+                except queue.Empty:
+                    break
+                if item is _DONE:
+                    done = True
+                    break
+                batch.append(item)
+
+            start = time.perf_counter()
+            frame = clean_video_frame(pd.DataFrame([video for video, _ in batch]))
+            fetched_at = [t for _, t in batch]
+            stats.busy += time.perf_counter() - start
+            stats.items += len(batch)
+            stats.batches += 1
+            self._put(self.frames, (frame, fetched_at), stats)
+        self._put(self.frames, _DONE, stats)
+
+    def _embed(self) -> None:
+        stats = self.stats["embed"]
+        while True:
+            item = self._get(self.frames, stats)
+            if item is _DONE:
+                break
+            frame, fetched_at = item
+
+            start = time.perf_counter()
+            texts = combine_text_columns(frame['title'], frame['transcript'])
+            embeddings = np.asarray(
+                self.model.encode(texts, batch_size=len(texts), show_progress_bar=False,
+                                  convert_to_numpy=True),
+                dtype=np.float32,
+            )
+            stats.busy += time.perf_counter() - start
+            stats.items += len(frame)
+            stats.batches += 1
+            self._put(self.batches, (frame, embeddings, fetched_at), stats)
+        self._put(self.batches, _DONE, stats)
+
+    def _upsert(self) -> None:
+        stats = self.stats["upsert"]
+        while True:
+            item = self._get(self.batches, stats)
+            if item is _DONE:
+                break
+            frame, embeddings, fetched_at = item
+
+            start = time.perf_counter()
+            video_ids, transcripts, metadata_list = prepare_records(frame)
+            if self.topics is not None:
+                self.topics.label(metadata_list, embeddings)
+            self.db.upsert_videos(video_ids, transcripts, embeddings, metadata_list)
+            now = time.perf_counter()
+            stats.busy += now - start
+            stats.items += len(video_ids)
+            stats.batches += 1
+            self.latencies.extend(now - t for t in fetched_at)
+            if self.on_batch:
+                self.on_batch(video_ids)
+
+    def _run_stage(self, name: str, target: Callable[[], None]) -> None:
+        stats = self.stats[name]
+        stats.started = time.perf_counter()
+        try:
+            target()
+        except PipelineAborted:
+            pass
+        except BaseException as e:
+            self._errors.append(e)
+            self._stop.set()
+        finally:
+            stats.finished = time.perf_counter()
+
+    def run(self) -> Dict:
+        """Run the pipeline to completion and return its stats."""
+        start = time.perf_counter()
+        stages = [("fetch", self._fetch), ("clean", self._clean),
+                  ("embed", self._embed), ("upsert", self._upsert)]
+        threads = [
+            threading.Thread(target=self._run_stage, args=stage, name=f"pipeline-{stage[0]}", daemon=True)
+            for stage in stages
+        ]
+        for thread in threads:
+            thread.start()
+        try:
+            for thread in threads:
+                thread.join()
+        except KeyboardInterrupt:
+            self._stop.set()
+            for thread in threads:
+                thread.join()
+            raise
+
+        if self._errors:
+            raise self._errors[0]
+        return self.report(time.perf_counter() - start)
+
+    def report(self, wall_seconds: float) -> Dict:
+        latencies = np.array(self.latencies) if self.latencies else np.zeros(1)
+        return {
+            "videos": self.stats["upsert"].items,
+            "wall_seconds": round(wall_seconds, 3),
+            "videos_per_sec": round(self.stats["upsert"].items / wall_seconds, 2) if wall_seconds else None,
+            "fetch_to_searchable_seconds": {
+                "p50": round(float(np.percentile(latencies, 50)), 3),
+                "p95": round(float(np.percentile(latencies, 95)), 3),
+                "max": round(float(latencies.max()), 3),
+            },
+            "stages": {name: stats.to_dict() for name, stats in self.stats.items()},
+        }
+
+
+def print_report(report: Dict) -> None:
+    """Print the pipeline stats as a table."""
+    print("\n" + "=" * 70)
+    print("STREAMING PIPELINE REPORT")
+    print("=" * 70)
+    print(f"\n📊 {report['videos']} videos in {report['wall_seconds']:.2f}s "
+          f"({report['videos_per_sec']} videos/s)")
+    latency = report["fetch_to_searchable_seconds"]
+    print(f"   • Fetch -> searchable: p50 {latency['p50']:.2f}s | p95 {latency['p95']:.2f}s "
+          f"| max {latency['max']:.2f}s")
+
+    print(f"\n⏱️  Stages (busy = working, idle = waiting for input, blocked = backpressure):")
+    for name, stage in report["stages"].items():
+        print(f"   • {name:<7} {stage['items']:>7} items | {stage['batches']:>5} batches | "
+              f"busy {stage['busy_seconds']:>7.2f}s | idle {stage['idle_seconds']:>7.2f}s | "
+              f"blocked {stage['blocked_seconds']:>7.2f}s | "
+              f"{stage['items_per_busy_sec'] or 0:>9.1f} items/busy-s")
+    print("=" * 70)
+
+
+def run_pipeline(args) -> Optional[Dict]:
+    from scripts.db_handler import VideoVectorDB, ModelMismatchError
+
+    if args.source == "youtube":
+        source = youtube_source(args.channel_id, args.target_transcripts, args.transcript_concurrency,
+                                cache_from_args(args), args.refresh_older_than)
+    elif args.source == "file":
+        source = file_source(args.input)
+    else:
+        source = synthetic_source(args.videos, args.transcript_chars, args.seed)
+
+    print(f"\n🤖 Loading model: {args.model}")
+    model = load_model(args.model, args.seed)
+    dimension = model.get_sentence_embedding_dimension()
+    db = VideoVectorDB(persist_directory=args.db_path, collection_name=args.collection,
+                       embedding_model=args.model, embedding_dimension=dimension,
+                       neighbours_path=args.neighbours_path or None)
+    try:
+        db.check_model(args.model, dimension)
+    except ModelMismatchError as e:
+        print(f"❌ {e}")
+        return None
+    topics = load_topics(args.clusters_path, db.model_info()['model'], db.collection_name) \
+        if args.clusters_path else None
+    if topics is not None and topics.dimension != dimension:
+        print(f"   ⚠️  Topic index at {args.clusters_path} has {topics.dimension} dims; "
+              f"new videos will not be labelled")
+        topics = None
+
+    print(f"\n🚰 Streaming {args.source} -> {args.collection} "
+          f"(batch {args.batch_size}, max wait {args.max_batch_wait}s, queue {args.queue_size})")
+    pipeline = StreamingPipeline(
+        source, db, model,
+        batch_size=args.batch_size,
+        max_batch_wait=args.max_batch_wait,
+        queue_size=args.queue_size,
+        topics=topics,
+    )
+    report = pipeline.run()
+    db.flush_neighbours()
+    print_report(report)
+
+    if args.stats_out:
+        stats_path = Path(args.stats_out)
+        stats_path.parent.mkdir(parents=True, exist_ok=True)
+        stats_path.write_text(json.dumps(report, indent=2), encoding="utf-8")
+        print(f"\n💾 Stats written to: {stats_path}")
+    return report
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Stream videos from harvest to the vector database in micro-batches"
+    )
+    parser.add_argument('--source', choices=['youtube', 'file', 'synthetic'], default='youtube',
+                        help='Where videos come from (default: youtube)')
+    parser.add_argument('--channel-id', default=CHANNEL_ID,
+                        help='YouTube channel ID (youtube source)')
+    parser.add_argument('--target-transcripts', type=int, default=50,
+                        help='Videos with transcripts to harvest (youtube source, default: 50)')
+    parser.add_argument('--transcript-concurrency', type=int, default=TRANSCRIPT_CONCURRENCY,
+                        help=f'Concurrent transcript downloads (default: {TRANSCRIPT_CONCURRENCY})')
+    parser.add_argument('--input', default=str(ROOT_DIR / "data/crashcourse_videos.csv"),
+                        help='Raw videos dataset, .csv/.parquet/.arrow (file source)')
+    parser.add_argument('--videos', type=int, default=1000,
+                        help='Number of generated videos (synthetic source, default: 1000)')
+    parser.add_argument('--transcript-chars', type=int, default=30000,
+                        help='Median generated transcript length (synthetic source, default: 30000)')
+    parser.add_argument('--model', default=EMBEDDING_MODEL,
+                        help=f'Encoder: a sentence-transformer model or "stub" (default: {EMBEDDING_MODEL})')
+    parser.add_argument('--db-path', default=VECTOR_DB_PATH,
+                        help='ChromaDB directory (default: %(default)s)')
+    parser.add_argument('--collection', default=COLLECTION_NAME,
+                        help='Collection name (default: %(default)s)')
+    parser.add_argument('--batch-size', type=int, default=32,
+                        help='Maximum videos per micro-batch (default: 32)')
+    parser.add_argument('--max-batch-wait', type=float, default=1.0,
+                        help='Seconds to wait for a micro-batch to fill (default: 1.0)')
+    parser.add_argument('--queue-size', type=int, default=4,
+                        help='Micro-batches buffered between stages (default: 4)')
+    parser.add_argument('--clusters-path', default=CLUSTERS_PATH,
+                        help='Topic index used to label new videos, "" to skip (default: %(default)s)')
+    parser.add_argument('--neighbours-path', default=NEIGHBOURS_PATH,
+                        help='Related-video table kept in step with the writes, "" to skip (default: %(default)s)')
+    parser.add_argument('--seed', type=int, default=0,
+                        help='Random seed for synthetic data and the stub encoder (default: 0)')
+    parser.add_argument('--stats-out', default=None,
+                        help='Write the pipeline stats as JSON to this path')
+    add_cache_arguments(parser)
+    add_profile_arguments(parser)
+    args = parser.parse_args()
+
+    with profile_session(args, "stream_pipeline"):
+        run_pipeline(args)
+
+
+if __name__ == "__main__":
+    main()
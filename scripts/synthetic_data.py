@@ -0,0 +1,227 @@
+"""
+Synthetic Data for Offline Benchmarks
+
+Generates CrashCourse-shaped video datasets and query sets without touching
+the YouTube API, plus a deterministic stub encoder that stands in for the
+sentence-transformer model. Used by the benchmark scripts so they can run
+offline and reproducibly.
+
+The corpus is organised into series (topics) with their own vocabulary, so
+queries drawn from a topic have meaningful nearest neighbours.
+"""
+
+import zlib
+from typing import List, Optional
+
+import numpy as np
+import pandas as pd
+
+SERIES_NAMES = [
+    "Biology", "World History", "Chemistry", "Physics", "Psychology",
+    "Economics", "Astronomy", "Philosophy", "Literature", "Computer Science",
+    "Anatomy & Physiology", "US History", "Sociology", "Statistics",
+    "Futures of AI", "Native American History", "Film History", "Geography",
+]
+
+_SYLLABLES = [
+    "ba", "ce", "di", "fo", "gu", "ha", "je", "ki", "lo", "mu", "na", "pe",
+    "qui", "ra", "se", "ti", "vo", "wu", "xa", "ye", "zo", "tra", "ple", "gri",
+    "sto", "blu", "cra", "dre", "fla", "pro", "sen", "tor", "lis", "mon",
+]
+
+_COMMON_WORDS = (
+    "the of and to a in is that it for on with as was this are be by you at "
+    "from have or an but not what all were we when your can there use which "
+    "so about how then them these some would like into time has look two more "
+    "see way could people than first been who now find down day did get come"
+).split()
+
+
+def _pseudo_words(rng: np.random.Generator, count: int) -> List[str]:
+    """Generate pronounceable pseudo-words."""
+    words = set()
+    while len(words) < count:
+        n_syllables = rng.integers(2, 5)
+        words.add("".join(rng.choice(_SYLLABLES, size=n_syllables)))
+    return sorted(words)
+
+
+class SyntheticCorpus:
+    """
+    Topic-structured vocabulary used to generate videos and queries.
+
+    Args:
+        n_topics: Number of series/topics
+        words_per_topic: Vocabulary size of each topic
+        seed: Random seed
+    """
+
+    def __init__(self, n_topics: int = 12, words_per_topic: int = 150, seed: int = 0):
+        self.rng = np.random.default_rng(seed)
+        self.n_topics = n_topics
+        vocab = _pseudo_words(self.rng, n_topics * words_per_topic)
+        self.rng.shuffle(vocab)
+        self.topic_words = [
+            vocab[i * words_per_topic:(i + 1) * words_per_topic] for i in range(n_topics)
+        ]
+        self.series = [SERIES_NAMES[i % len(SERIES_NAMES)] for i in range(n_topics)]
+        self._paragraphs = None
+
+    def _sentence(self, topic: int, n_words: int) -> str:
+        topic_share = self.rng.random(n_words) < 0.4
+        words = np.where(
+            topic_share,
+            self.rng.choice(self.topic_words[topic], size=n_words),
+            self.rng.choice(_COMMON_WORDS, size=n_words),
+        )
+        return " ".join(words)
+
+    def paragraphs(self, per_topic: int = 40) -> List[List[str]]:
+        """Pool of ~1 KB paragraphs per topic, reused to build long transcripts cheaply."""
+        if self._paragraphs is None:
+            self._paragraphs = [
+                [self._sentence(t, 180) + "." for _ in range(per_topic)]
+                for t in range(self.n_topics)
+            ]
+        return self._paragraphs
+
+    def transcript(self, topic: int, target_chars: int) -> str:
+        pool = self.paragraphs()[topic]
+        n_paragraphs = max(1, target_chars // (len(pool[0]) + 1))
+        picks = self.rng.integers(0, len(pool), size=n_paragraphs)
+        return " ".join(pool[i] for i in picks)
+
+    def query(self, topic: Optional[int] = None) -> str:
+        """A short natural-language-ish query about one topic."""
+        if topic is None:
+            topic = int(self.rng.integers(0, self.n_topics))
+        n_words = int(self.rng.integers(2, 6))
+        return " ".join(self.rng.choice(self.topic_words[topic], size=n_words))
+
+
+def make_videos_frame(n_videos: int, seed: int = 0, median_transcript_chars: int = 30000,
+                      corpus: Optional[SyntheticCorpus] = None) -> pd.DataFrame:
+    """
+    Build a raw video dataset shaped like data/crashcourse_videos.csv.
+
+    Transcript lengths follow a log-normal distribution around the median
+    seen in the real CrashCourse harvest (~30k characters).
+
+    Args:
+        n_videos: Number of videos
+        seed: Random seed
+        median_transcript_chars: Median transcript length in characters
+        corpus: Optional SyntheticCorpus to draw text from
+
+    Returns:
+        pandas DataFrame with the extraction columns
+    """
+    corpus = corpus or SyntheticCorpus(seed=seed)
+    rng = np.random.default_rng(seed + 1)
+
+    topics = rng.integers(0, corpus.n_topics, size=n_videos)
+    lengths = np.clip(
+        rng.lognormal(np.log(median_transcript_chars), 0.6, size=n_videos),
+        1000, median_transcript_chars * 6
+    ).astype(int)
+    durations = rng.integers(120, 3600, size=n_videos)
+    published = pd.Timestamp("2012-01-01") + pd.to_timedelta(
+        rng.integers(0, 14 * 365 * 24 * 3600, size=n_videos), unit="s"
+    )
+    episode = np.zeros(corpus.n_topics, dtype=int)
+
+    rows = []
+    for i in range(n_videos):
+        topic = int(topics[i])
+        episode[topic] += 1
+        video_id = f"syn{i:08d}"
+        subject = " ".join(rng.choice(corpus.topic_words[topic], size=3)).title()
+        seconds = int(durations[i])
+        rows.append({
+            "id": video_id,
+            "title": f"{subject}: Crash Course {corpus.series[topic]} #{episode[topic]}",
+            "description": corpus.transcript(topic, 2500)[:2500],
+            "publishedAt": published[i].strftime("%Y-%m-%dT%H:%M:%SZ"),
+            "tags": ", ".join(["Crash Course", "education", corpus.series[topic]]
+                              + list(rng.choice(corpus.topic_words[topic], size=8))),
+            "categoryId": 27,
+            "defaultLanguage": "en",
+            "defaultAudioLanguage": "en",
+            "thumbnail_default": f"https://i.ytimg.com/vi/{video_id}/default.jpg",
+            "thumbnail_high": f"https://i.ytimg.com/vi/{video_id}/hqdefault.jpg",
+            "duration": f"PT{seconds // 3600}H{(seconds % 3600) // 60}M{seconds % 60}S",
+            "viewCount": int(rng.integers(1000, 5_000_000)),
+            "likeCount": int(rng.integers(10, 100_000)),
+            "commentCount": int(rng.integers(0, 10_000)),
+            "privacyStatus": "public",
+            "channel_id": "UCX6b17PVsYBQ0ip5gyeme-Q",
+            "channel_title": "CrashCourse",
+            "channel_description": "Tons of awesome courses in one awesome channel!",
+            "channel_country": "US",
+            "channel_thumbnail": "https://yt3.ggpht.com/crashcourse.jpg",
+            "channel_subscriberCount": 16800000,
+            "channel_videoCount": n_videos,
+            "transcript": corpus.transcript(topic, int(lengths[i])),
+        })
+
+    return pd.DataFrame(rows)
+
+
+def make_queries(n_queries: int, seed: int = 0, corpus: Optional[SyntheticCorpus] = None) -> List[str]:
+    """
+    Generate a query set spread across the corpus topics.
+
+    Args:
+        n_queries: Number of queries
+        seed: Random seed (must match the corpus seed for related queries)
+        corpus: Optional SyntheticCorpus to draw words from
+
+    Returns:
+        List of query strings
+    """
+    corpus = corpus or SyntheticCorpus(seed=seed)
+    return [corpus.query(i % corpus.n_topics) for i in range(n_queries)]
+
+
+class StubEncoder:
+    """
+    Deterministic stand-in for SentenceTransformer.
+
+    Hashes tokens into a fixed random projection (the hashing trick), so texts
+    sharing words get similar vectors. Needs no model download and is fast
+    enough to embed large synthetic corpora.
+
+    Args:
+        dimension: Embedding dimension
+        max_seq_length: Tokens used per text (mirrors the model's truncation)
+        n_buckets: Hash buckets in the projection table
+        seed: Random seed for the projection table
+    """
+
+    def __init__(self, dimension: int = 384, max_seq_length: int = 256,
+                 n_buckets: int = 1 << 14, seed: int = 0):
+        self.dimension = dimension
+        self.max_seq_length = max_seq_length
+        self._mask = n_buckets - 1
+        rng = np.random.default_rng(seed)
+        self._table = rng.standard_normal((n_buckets, dimension)).astype(np.float32)
+
+    def get_sentence_embedding_dimension(self) -> int:
+        return self.dimension
+
+    def _encode_one(self, text: str) -> np.ndarray:
+        tokens = str(text).split(None, self.max_seq_length)[:self.max_seq_length]
+        if not tokens:
+            return np.zeros(self.dimension, dtype=np.float32)
+        buckets = [zlib.crc32(tok.encode("utf-8")) & self._mask for tok in tokens]
+        vec = self._table[buckets].sum(axis=0)
+        return vec / max(float(np.linalg.norm(vec)), 1e-12)
+
+    def encode(self, sentences, batch_size: int = 32, show_progress_bar: bool = False,
+               convert_to_numpy: bool = True, normalize_embeddings: bool = False, **kwargs):
+        """Mirror of SentenceTransformer.encode for str or list inputs."""
+        if isinstance(sentences, str):
+            return self._encode_one(sentences)
+        if len(sentences) == 0:
+            return np.zeros((0, self.dimension), dtype=np.float32)
+        return np.vstack([self._encode_one(s) for s in sentences])
@@ -0,0 +1,66 @@
+"""
+Offline tests for query normalisation and spelling correction
+
+Uses a small handmade vocabulary with counts shaped like the real one
+(a few very common words, many rare ones). Valid words missing from the
+vocabulary must be kept; only clear typos are corrected.
+
+Usage:
+    python -m pytest scripts/test_query_normalizer.py
+    python scripts/test_query_normalizer.py
+"""
+
+from pathlib import Path
+import sys
+
+# Add project root to path
+ROOT_DIR = Path(__file__).resolve().parents[1]
+sys.path.append(str(ROOT_DIR))
+
+from scripts.query_normalizer import QueryNormalizer, SpellIndex
+
+VOCABULARY = {
+    "cast": 15, "while": 244, "could": 402, "beyond": 30, "music": 499,
+    "vaccine": 40, "plants": 39, "revolution": 120, "history": 300,
+    "photosynthesis": 60, "of": 5000, "the": 9000, "rare": 3, "evolution": 3,
+}
+
+
+def _normalise(query: str, vocabulary: dict = VOCABULARY) -> str:
+    return QueryNormalizer(SpellIndex(vocabulary), cache_size=0).normalise(query)
+
+
+def test_valid_words_are_kept():
+    # "cats" is one edit from "cast" and "whales" one from "while", but neither is a typo
+    assert _normalise("cats") == "cats"
+    assert _normalise("evolution of whales") == "evolution of whales"
+
+
+def test_ambiguous_typo_is_kept():
+    # "evolutin" is as close to a rare "evolution" as to a common "revolution"
+    assert _normalise("evolutin of whales") == "evolutin of whales"
+
+
+def test_clear_typo_is_corrected():
+    assert _normalise("evolutin of whales", dict(VOCABULARY, evolution=80)) == "evolution of whales"
+    assert _normalise("Photosynthsis in plnts?") == "photosynthesis in plants"
+    assert _normalise("histroy of the revolutoin") == "history of the revolution"
+
+
+def test_rare_candidate_is_not_used():
+    # Too rare to be told apart from an unknown word
+    assert _normalise("rares") == "rares"
+
+
+def test_tokens_with_digits_hyphens_or_accents_are_kept():
+    assert _normalise("COVID-19 vaccine") == "covid-19 vaccine"
+    assert _normalise("Beyoncé music") != "beyond music"
+    assert _normalise("cold-war histroy") == "cold-war history"
+
+
+if __name__ == "__main__":
+    tests = [(name, test) for name, test in sorted(globals().items()) if name.startswith("test_")]
+    for name, test in tests:
+        test()
+        print(f"✓ {name}")
+    print(f"\n✅ {len(tests)} tests passed")
@@ -0,0 +1,170 @@
+"""
+Offline tests for the transcript cache
+
+Uses the VTT fixtures in tests/fixtures/ (<video_id>.<lang>.vtt): parsing,
+import, least-recently-used eviction under the size limit and
+--refresh-older-than re-downloads. yt-dlp is never called.
+
+Usage:
+    python -m pytest scripts/test_transcript_cache.py
+    python scripts/test_transcript_cache.py
+"""
+
+from pathlib import Path
+import sys
+import tempfile
+import time
+
+# Add project root to path
+ROOT_DIR = Path(__file__).resolve().parents[1]
+sys.path.append(str(ROOT_DIR))
+
+import scripts.extract_transcript as extract_transcript
+from scripts.extract_transcript import parse_vtt, parse_vtt_cues, fetch_timed_transcript
+from scripts.passages import decode_cues
+from scripts.transcript_cache import TranscriptCache, parse_age
+
+FIXTURES = ROOT_DIR / "tests" / "fixtures"
+
+
+def _fixture(name: str) -> str:
+    return (FIXTURES / name).read_text(encoding="utf-8")
+
+
+def _backdate(cache: TranscriptCache, video_id: str, seconds: float) -> None:
+    """Pretend an entry was fetched (and last used) `seconds` ago."""
+    past = time.time() - seconds
+    cache._conn.execute("UPDATE entries SET fetched_at = ?, last_access = ? WHERE video_id = ?",
+                        (past, past, video_id))
+    cache._conn.commit()
+
+
+def test_parse_fixture():
+    vtt = _fixture("fixtureVid01.en.vtt")
+    cues = parse_vtt_cues(vtt)
+    # The repeated rolling-caption line is kept once; multi-line cues are joined
+    assert [line for _, line in cues] == [
+        "Hi, I'm John Green and this is Crash Course.",
+        "Today we're talking about the French Revolution.",
+        "It began in 1789 with the storming of the Bastille.",
+    ]
+    assert [round(start, 2) for start, _ in cues] == [0.0, 3.5, 7.26]
+    assert parse_vtt(vtt) == " ".join(line for _, line in cues)
+
+
+def test_parse_age():
+    assert parse_age("90") == 90
+    assert parse_age("45m") == 2700
+    assert parse_age("12h") == 43200
+    assert parse_age("2w") == 14 * 86400
+    try:
+        parse_age("soon")
+    except ValueError:
+        pass
+    else:
+        raise AssertionError("parse_age accepted an invalid age")
+
+
+def test_import_and_get():
+    with tempfile.TemporaryDirectory() as directory:
+        cache = TranscriptCache(directory)
+        text = cache.import_vtt("fixtureVid02", ["en"], FIXTURES / "fixtureVid02.en.vtt")
+        entry = cache.get("fixtureVid02", ["en"])
+        assert entry.vtt == _fixture("fixtureVid02.en.vtt")
+        assert entry.text == text == "Photosynthesis turns light into chemical energy. " \
+                                     "Plants store that energy as glucose."
+        assert cache.get("fixtureVid02", ["de"]) is None  # keyed by languages too
+
+        # Identical content is stored once
+        cache.import_vtt("fixtureVid02copy", ["en"], FIXTURES / "fixtureVid02.en.vtt")
+        assert cache.stats()["blobs"] == 2
+        cache.close()
+
+
+def test_no_subtitles_entry():
+    with tempfile.TemporaryDirectory() as directory:
+        cache = TranscriptCache(directory)
+        cache.put("silent", ["en"], None, None)
+        assert cache.contains("silent", ["en"])
+        assert cache.get("silent", ["en"]).vtt is None
+        assert cache.stats()["without_subtitles"] == 1
+        cache.close()
+
+
+def test_lru_eviction():
+    with tempfile.TemporaryDirectory() as directory:
+        cache = TranscriptCache(directory, max_bytes=None)
+        fixtures = sorted(FIXTURES.glob("*.vtt"))
+        for i, path in enumerate(fixtures):
+            cache.import_vtt(path.name.split(".")[0], ["en"], path)
+            _backdate(cache, path.name.split(".")[0], 100 - i)  # oldest first
+        ids = [path.name.split(".")[0] for path in fixtures]
+        full_size = cache._total_bytes()
+
+        # Touch the oldest entry so the second one becomes least recently used
+        assert cache.get(ids[0], ["en"]) is not None
+
+        # Room for all but about one entry: only the LRU entry goes
+        cache.max_bytes = full_size - 1
+        cache.put("newcomer", ["en"], None, None)
+        assert not cache.contains(ids[1], ["en"])
+        assert cache.contains(ids[0], ["en"]) and cache.contains(ids[2], ["en"])
+        assert cache.contains("newcomer", ["en"])
+        assert cache._total_bytes() <= cache.max_bytes
+        # Blob files of the evicted entry are gone too
+        assert len(list(cache.blob_dir.rglob("*.gz"))) == cache.stats()["blobs"]
+        cache.close()
+
+
+def test_evict_older_than():
+    with tempfile.TemporaryDirectory() as directory:
+        cache = TranscriptCache(directory)
+        cache.import_vtt("old", ["en"], FIXTURES / "fixtureVid01.en.vtt")
+        cache.import_vtt("new", ["en"], FIXTURES / "fixtureVid02.en.vtt")
+        _backdate(cache, "old", 40 * 86400)
+        assert cache.evict_older_than(parse_age("30d")) == 1
+        assert not cache.contains("old", ["en"]) and cache.contains("new", ["en"])
+        assert cache.stats()["blobs"] == 2
+        cache.close()
+
+
+def test_refresh_older_than():
+    """Fresh entries are served from the cache; older ones are downloaded again."""
+    downloads = []
+
+    def fake_download(video_id, languages):
+        downloads.append(video_id)
+        return _fixture("fixtureVid01.en.vtt")
+
+    original = extract_transcript.download_vtt
+    extract_transcript.download_vtt = fake_download
+    try:
+        with tempfile.TemporaryDirectory() as directory:
+            cache = TranscriptCache(directory)
+            cache.put("fixtureVid01", ["en"], _fixture("fixtureVid02.en.vtt"), "stale text")
+            _backdate(cache, "fixtureVid01", 2 * 86400)
+
+            # No max_age: any cached entry is used, with cue timings from the cached VTT
+            text, cues = fetch_timed_transcript("fixtureVid01", cache=cache)
+            assert downloads == [] and text.startswith("Photosynthesis")
+            assert decode_cues(cues)[1].tolist() == [1200, 4000]
+
+            # --refresh-older-than 1d: the 2-day-old entry is downloaded again and replaced
+            text, _ = fetch_timed_transcript("fixtureVid01", cache=cache, max_age=parse_age("1d"))
+            assert downloads == ["fixtureVid01"] and text.startswith("Hi, I'm John Green")
+            assert cache.get("fixtureVid01", ["en"]).text == text
+
+            # ... and is now fresh
+            fetch_timed_transcript("fixtureVid01", cache=cache, max_age=parse_age("1d"))
+            assert downloads == ["fixtureVid01"]
+            cache.close()
+    finally:
+        extract_transcript.download_vtt = original
+
+
+if __name__ == "__main__":
+    tests = [(name, test) for name, test in sorted(globals().items()) if name.startswith("test_")]
+    for name, test in tests:
+        test()
+        print(f"✓ {name}")
+    print(f"\n✅ {len(tests)} tests passed")
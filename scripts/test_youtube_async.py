@@ -0,0 +1,173 @@
+"""
+Offline tests for the async YouTube fetcher
+
+Runs AsyncYouTubeClient against the local stub server
+(scripts/youtube_stub_server.py): playlist prefetching, 50-ID videos.list
+batching, the QuotaLimiter (quota budget, concurrency cap, quotaExceeded)
+and the retry path. No network access or API key needed.
+
+Usage:
+    python -m pytest scripts/test_youtube_async.py
+    python scripts/test_youtube_async.py
+"""
+
+import asyncio
+from pathlib import Path
+import sys
+
+# Add project root to path
+ROOT_DIR = Path(__file__).resolve().parents[1]
+sys.path.append(str(ROOT_DIR))
+
+from scripts.youtube_async import (AsyncYouTubeClient, QuotaLimiter, QuotaExceededError,
+                                   fetch_videos_with_transcripts_async)
+from scripts.youtube_stub_server import StubYouTubeServer, STUB_CHANNEL_ID, STUB_PLAYLIST_ID
+
+
+def _client(server, **limiter_args) -> AsyncYouTubeClient:
+    limiter = QuotaLimiter(**{"requests_per_second": 0, "quota_units": None, **limiter_args})
+    return AsyncYouTubeClient(api_key="test-key", base_url=server.url, limiter=limiter)
+
+
+def _run(coroutine):
+    return asyncio.run(coroutine)
+
+
+def test_playlist_pages_are_prefetched():
+    """The next playlistItems page is requested before the caller finishes the current one."""
+    async def scenario():
+        async with StubYouTubeServer(n_videos=120, delay=0.05) as server:
+            async with _client(server) as client:
+                pages, processed = [], []
+                async for batch in client.iter_playlist_video_ids(STUB_PLAYLIST_ID):
+                    pages.append(batch)
+                    await asyncio.sleep(0.1)  # the caller works on the page
+                    processed.append(asyncio.get_running_loop().time())
+            return server, pages
+
+    server, pages = _run(scenario())
+    assert [len(page) for page in pages] == [50, 50, 20]
+    assert [video_id for page in pages for video_id in page] == server.video_ids
+
+    calls = server.calls("playlistItems")
+    assert [call["params"].get("pageToken") for call in calls] == [None, "50", "100"]
+    # Page 2 was requested while page 1 was still being processed (it arrived 0.05s in)
+    assert calls[1]["start"] - calls[0]["end"] < 0.05
+
+
+def test_video_metadata_is_batched_by_50():
+    async def scenario():
+        async with StubYouTubeServer(n_videos=120) as server:
+            async with _client(server) as client:
+                rows = await client.get_video_metadata(server.video_ids)
+            return server, rows
+
+    server, rows = _run(scenario())
+    batches = [call["params"]["id"].split(",") for call in server.calls("videos")]
+    assert sorted(len(batch) for batch in batches) == [20, 50, 50]
+    assert [row["id"] for row in rows] == server.video_ids
+    assert rows[7]["title"] == "Stub video 7" and rows[7]["viewCount"] == 1007
+
+
+def test_limiter_caps_concurrency():
+    async def scenario():
+        async with StubYouTubeServer(n_videos=300, delay=0.05) as server:
+            async with _client(server, max_concurrent=2) as client:
+                await client.get_video_metadata(server.video_ids)  # 6 batches
+            return server
+
+    server = _run(scenario())
+    assert len(server.calls("videos")) == 6
+    assert server.max_in_flight == 2
+
+
+def test_limiter_stops_at_quota_budget():
+    async def scenario():
+        async with StubYouTubeServer(n_videos=10) as server:
+            async with _client(server, quota_units=2) as client:
+                await client.get_uploads_playlist_id(STUB_CHANNEL_ID)
+                await client.get_video_metadata(server.video_ids)
+                try:
+                    await client.get_video_metadata(server.video_ids)
+                except QuotaExceededError:
+                    return server, client.limiter.units_used, True
+            return server, client.limiter.units_used, False
+
+    server, units_used, raised = _run(scenario())
+    assert raised
+    assert units_used == 2
+    assert len(server.requests) == 2  # the third call never reached the server
+
+
+def test_quota_exceeded_response_is_not_retried():
+    async def scenario():
+        async with StubYouTubeServer(n_videos=10) as server:
+            server.quota_exceeded = True
+            async with _client(server) as client:
+                try:
+                    await client.get_uploads_playlist_id(STUB_CHANNEL_ID)
+                except QuotaExceededError:
+                    return server, True
+            return server, False
+
+    server, raised = _run(scenario())
+    assert raised
+    assert len(server.requests) == 1
+
+
+def test_transient_errors_are_retried():
+    async def scenario():
+        async with StubYouTubeServer(n_videos=10) as server:
+            server.fail_next["videos"] = [503, 429]
+            async with _client(server) as client:
+                rows = await client.get_video_metadata(server.video_ids)
+            return server, rows
+
+    server, rows = _run(scenario())
+    assert len(rows) == 10
+    assert len(server.calls("videos")) == 3
+
+
+def test_retries_give_up_after_max_retries():
+    async def scenario():
+        async with StubYouTubeServer(n_videos=10) as server:
+            server.fail_next["videos"] = [500, 500, 500]
+            async with _client(server) as client:
+                client.max_retries = 1
+                try:
+                    await client.get_video_metadata(server.video_ids)
+                except RuntimeError as e:
+                    return server, str(e)
+            return server, None
+
+    server, error = _run(scenario())
+    assert error is not None and "HTTP 500" in error
+    assert len(server.calls("videos")) == 2
+
+
+def test_fetch_with_transcripts_end_to_end():
+    """Collects the target in playlist order, skipping videos without transcripts."""
+    def fetch_transcript(video_id):
+        index = int(video_id[3:])
+        return (None, None) if index % 3 == 0 else (f"transcript of {video_id}", "[]")
+
+    async def scenario():
+        async with StubYouTubeServer(n_videos=120) as server:
+            async with _client(server) as client:
+                df, failed = await fetch_videos_with_transcripts_async(
+                    client, STUB_CHANNEL_ID, target_count=40, transcript_fetcher=fetch_transcript)
+            return server, df, failed
+
+    server, df, failed = _run(scenario())
+    expected = [video_id for video_id in server.video_ids if int(video_id[3:]) % 3][:40]
+    assert df["id"].tolist() == expected
+    assert all(int(entry["video_id"][3:]) % 3 == 0 for entry in failed)
+    assert df["transcript"].iloc[0] == f"transcript of {expected[0]}"
+
+
+if __name__ == "__main__":
+    tests = [(name, test) for name, test in sorted(globals().items()) if name.startswith("test_")]
+    for name, test in tests:
+        test()
+        print(f"✓ {name}")
+    print(f"\n✅ {len(tests)} tests passed")
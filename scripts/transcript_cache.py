@@ -0,0 +1,342 @@
+"""
+Content-addressed Transcript Cache
+
+Local on-disk cache for yt-dlp subtitle downloads, so harvest re-runs and
+re-cleaning experiments don't download the same VTT files again.
+
+Layout (data/cache/transcripts/ by default):
+- index.sqlite          (video_id, languages) -> blob hashes, fetch/access times
+- blobs/ab/<sha256>.gz  gzip-compressed blobs addressed by the SHA-256 of
+                        their content (raw VTT and parsed text are stored
+                        separately, identical content is stored once)
+
+Videos that have no subtitles are cached too (as entries without blobs),
+so they are not retried on every run. Entries can be refreshed by age
+(--refresh-older-than) and the cache is kept under a size limit by
+evicting the least recently used entries.
+
+Usage:
+    python scripts/transcript_cache.py --stats
+    python scripts/transcript_cache.py --import-vtt tests/fixtures/   # <video_id>.<lang>.vtt files
+    python scripts/transcript_cache.py --evict-older-than 90d
+"""
+
+import argparse
+import gzip
+import hashlib
+import os
+import re
+import sqlite3
+import sys
+import threading
+import time
+from pathlib import Path
+from typing import List, NamedTuple, Optional
+
+# Add project root to path
+ROOT_DIR = Path(__file__).resolve().parents[1]
+sys.path.append(str(ROOT_DIR))
+
+from config import TRANSCRIPT_CACHE_DIR, TRANSCRIPT_CACHE_MAX_MB
+
+_AGE_UNITS = {"s": 1, "m": 60, "h": 3600, "d": 86400, "w": 604800}
+
+
+def parse_age(value: str) -> float:
+    """
+    Parse an age such as "90", "45m", "12h", "30d" or "2w" into seconds.
+
+    Raises:
+        ValueError: If the value is not a number with an optional s/m/h/d/w suffix
+    """
+    match = re.fullmatch(r"\s*(\d+(?:\.\d+)?)\s*([smhdw]?)\s*", str(value).lower())
+    if not match:
+        raise ValueError(f"Invalid age: {value!r} (expected e.g. 3600, 45m, 12h, 30d, 2w)")
+    return float(match.group(1)) * _AGE_UNITS[match.group(2) or "s"]
+
+
+class CachedTranscript(NamedTuple):
+    vtt: Optional[str]   # Raw subtitle file (None if the video has no subtitles)
+    text: Optional[str]  # Parsed transcript text (None if unavailable)
+    fetched_at: float
+
+
+class TranscriptCache:
+    """
+    Transcript cache keyed by video ID and requested languages.
+
+    Safe to share between threads.
+
+    Args:
+        directory: Cache directory
+        max_bytes: Size limit for the compressed blobs (None for no limit)
+    """
+
+    def __init__(self, directory=TRANSCRIPT_CACHE_DIR,
+                 max_bytes: Optional[int] = TRANSCRIPT_CACHE_MAX_MB * 1024 * 1024):
+        self.directory = Path(directory)
+        self.blob_dir = self.directory / "blobs"
+        self.blob_dir.mkdir(parents=True, exist_ok=True)
+        self.max_bytes = max_bytes
+
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(self.directory / "index.sqlite", check_same_thread=False)
+        self._conn.executescript("""
+            PRAGMA journal_mode=WAL;
+            CREATE TABLE IF NOT EXISTS entries (
+                video_id    TEXT NOT NULL,
+                languages   TEXT NOT NULL,
+                vtt_hash    TEXT,
+                text_hash   TEXT,
+                fetched_at  REAL NOT NULL,
+                last_access REAL NOT NULL,
+                PRIMARY KEY (video_id, languages)
+            );
+            CREATE TABLE IF NOT EXISTS blobs (
+                hash TEXT PRIMARY KEY,
+                size INTEGER NOT NULL
+            );
+            CREATE INDEX IF NOT EXISTS entries_last_access ON entries (last_access);
+        """)
+
+    @staticmethod
+    def _languages_key(languages) -> str:
+        return ",".join(languages) if not isinstance(languages, str) else languages
+
+    def _blob_path(self, digest: str) -> Path:
+        return self.blob_dir / digest[:2] / f"{digest}.gz"
+
+    def _write_blob(self, content: Optional[str]) -> Optional[str]:
+        if content is None:
+            return None
+        data = content.encode("utf-8")
+        digest = hashlib.sha256(data).hexdigest()
+        path = self._blob_path(digest)
+        if not path.exists():
+            path.parent.mkdir(parents=True, exist_ok=True)
+            tmp_path = path.with_suffix(f".{threading.get_ident()}.tmp")
+            tmp_path.write_bytes(gzip.compress(data))
+            os.replace(tmp_path, path)
+        self._conn.execute("INSERT OR REPLACE INTO blobs (hash, size) VALUES (?, ?)",
+                           (digest, path.stat().st_size))
+        return digest
+
+    def _read_blob(self, digest: Optional[str]) -> Optional[str]:
+        if digest is None:
+            return None
+        return gzip.decompress(self._blob_path(digest).read_bytes()).decode("utf-8")
+
+    def contains(self, video_id: str, languages, max_age: Optional[float] = None) -> bool:
+        """True if a fresh entry (including a 'no subtitles' entry) exists."""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT fetched_at FROM entries WHERE video_id = ? AND languages = ?",
+                (video_id, self._languages_key(languages)),
+            ).fetchone()
+        return row is not None and (max_age is None or time.time() - row[0] <= max_age)
+
+    def get(self, video_id: str, languages, max_age: Optional[float] = None) -> Optional[CachedTranscript]:
+        """
+        Look up a transcript.
+
+        Args:
+            video_id: YouTube video ID
+            languages: Requested subtitle languages (list or comma-separated string)
+            max_age: Treat entries fetched longer ago than this (seconds) as misses
+
+        Returns:
+            CachedTranscript, or None on a miss
+        """
+        key = self._languages_key(languages)
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT vtt_hash, text_hash, fetched_at FROM entries WHERE video_id = ? AND languages = ?",
+                (video_id, key),
+            ).fetchone()
+            if row is None or (max_age is not None and time.time() - row[2] > max_age):
+                return None
+            try:
+                entry = CachedTranscript(self._read_blob(row[0]), self._read_blob(row[1]), row[2])
+            except OSError:
+                # Blob removed behind our back: drop the entry and report a miss
+                self._conn.execute("DELETE FROM entries WHERE video_id = ? AND languages = ?",
+                                   (video_id, key))
+                self._conn.commit()
+                return None
+            self._conn.execute(
+                "UPDATE entries SET last_access = ? WHERE video_id = ? AND languages = ?",
+                (time.time(), video_id, key),
+            )
+            self._conn.commit()
+        return entry
+
+    def put(self, video_id: str, languages, vtt: Optional[str], text: Optional[str]) -> None:
+        """Store a download (vtt=None records that the video has no subtitles)."""
+        now = time.time()
+        key = self._languages_key(languages)
+        with self._lock:
+            previous = self._conn.execute(
+                "SELECT vtt_hash, text_hash FROM entries WHERE video_id = ? AND languages = ?",
+                (video_id, key),
+            ).fetchone()
+            vtt_hash = self._write_blob(vtt)
+            text_hash = self._write_blob(text)
+            self._conn.execute(
+                "INSERT OR REPLACE INTO entries VALUES (?, ?, ?, ?, ?, ?)",
+                (video_id, key, vtt_hash, text_hash, now, now),
+            )
+            # A refreshed entry may leave its old blobs unreferenced
+            for digest in set(previous or ()) - {None, vtt_hash, text_hash}:
+                self._delete_blob_if_unreferenced(digest)
+            self._conn.commit()
+            self._evict_to_limit()
+
+    def _total_bytes(self) -> int:
+        return self._conn.execute("SELECT COALESCE(SUM(size), 0) FROM blobs").fetchone()[0]
+
+    def _delete_blob_if_unreferenced(self, digest: str) -> None:
+        referenced = self._conn.execute(
+            "SELECT 1 FROM entries WHERE vtt_hash = ? OR text_hash = ? LIMIT 1", (digest, digest)
+        ).fetchone()
+        if not referenced:
+            self._blob_path(digest).unlink(missing_ok=True)
+            self._conn.execute("DELETE FROM blobs WHERE hash = ?", (digest,))
+
+    def _delete_unreferenced_blobs(self) -> None:
+        orphans = self._conn.execute("""
+            SELECT hash FROM blobs WHERE hash NOT IN (
+                SELECT vtt_hash FROM entries WHERE vtt_hash IS NOT NULL
+                UNION SELECT text_hash FROM entries WHERE text_hash IS NOT NULL)
+        """).fetchall()
+        for (digest,) in orphans:
+            self._blob_path(digest).unlink(missing_ok=True)
+        self._conn.executemany("DELETE FROM blobs WHERE hash = ?", orphans)
+
+    def _evict_to_limit(self) -> int:
+        """Drop least recently used entries until the blobs fit in max_bytes."""
+        if self.max_bytes is None or self._total_bytes() <= self.max_bytes:
+            return 0
+        evicted = 0
+        total = self._total_bytes()
+        # Oldest first, one entry at a time, so no more is dropped than needed
+        victims = self._conn.execute(
+            "SELECT video_id, languages, vtt_hash, text_hash FROM entries ORDER BY last_access"
+        ).fetchall()
+        for video_id, languages, *digests in victims:
+            if total <= self.max_bytes:
+                break
+            self._conn.execute("DELETE FROM entries WHERE video_id = ? AND languages = ?",
+                               (video_id, languages))
+            for digest in set(digests) - {None}:
+                self._delete_blob_if_unreferenced(digest)
+            total = self._total_bytes()
+            evicted += 1
+        self._conn.commit()
+        return evicted
+
+    def evict_older_than(self, max_age: float) -> int:
+        """Remove entries fetched more than max_age seconds ago; returns the number removed."""
+        with self._lock:
+            cursor = self._conn.execute("DELETE FROM entries WHERE fetched_at < ?",
+                                        (time.time() - max_age,))
+            self._delete_unreferenced_blobs()
+            self._conn.commit()
+            return cursor.rowcount
+
+    def import_vtt(self, video_id: str, languages, vtt_path) -> Optional[str]:
+        """Load a local VTT file into the cache (e.g. test fixtures); returns the parsed text."""
+        from scripts.extract_transcript import parse_vtt
+
+        vtt = Path(vtt_path).read_text(encoding="utf-8")
+        text = parse_vtt(vtt)
+        self.put(video_id, languages, vtt, text)
+        return text
+
+    def stats(self) -> dict:
+        with self._lock:
+            entries, missing = self._conn.execute(
+                "SELECT COUNT(*), COALESCE(SUM(vtt_hash IS NULL), 0) FROM entries"
+            ).fetchone()
+            blobs = self._conn.execute("SELECT COUNT(*) FROM blobs").fetchone()[0]
+            total = self._total_bytes()
+        return {
+            "entries": entries,
+            "without_subtitles": missing,
+            "blobs": blobs,
+            "size_mb": round(total / (1024 * 1024), 2),
+            "max_mb": round(self.max_bytes / (1024 * 1024), 2) if self.max_bytes else None,
+        }
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+
+def add_cache_arguments(parser) -> None:
+    """Register the transcript cache options shared by the harvest scripts."""
+    group = parser.add_argument_group("transcript cache")
+    group.add_argument(
+        '--transcript-cache-dir',
+        default=str(TRANSCRIPT_CACHE_DIR),
+        help=f'Transcript cache directory (default: {TRANSCRIPT_CACHE_DIR})'
+    )
+    group.add_argument(
+        '--no-transcript-cache',
+        action='store_true',
+        help='Always download transcripts and do not cache them'
+    )
+    group.add_argument(
+        '--refresh-older-than',
+        type=parse_age,
+        default=None,
+        metavar='AGE',
+        help='Re-download cached transcripts older than AGE (e.g. 12h, 30d)'
+    )
+
+
+def cache_from_args(args) -> Optional[TranscriptCache]:
+    """Open the cache selected by add_cache_arguments() options (None if disabled)."""
+    if args.no_transcript_cache:
+        return None
+    return TranscriptCache(args.transcript_cache_dir)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Inspect and maintain the transcript cache")
+    parser.add_argument('--cache-dir', default=str(TRANSCRIPT_CACHE_DIR),
+                        help=f'Cache directory (default: {TRANSCRIPT_CACHE_DIR})')
+    parser.add_argument('--max-mb', type=float, default=TRANSCRIPT_CACHE_MAX_MB,
+                        help=f'Size limit in MB (default: {TRANSCRIPT_CACHE_MAX_MB})')
+    parser.add_argument('--stats', action='store_true', help='Show cache statistics')
+    parser.add_argument('--import-vtt', metavar='DIR',
+                        help='Import <video_id>.<lang>.vtt files from DIR')
+    parser.add_argument('--evict-older-than', type=parse_age, metavar='AGE',
+                        help='Remove entries fetched more than AGE ago (e.g. 90d)')
+    args = parser.parse_args()
+
+    cache = TranscriptCache(args.cache_dir, int(args.max_mb * 1024 * 1024))
+
+    if args.import_vtt:
+        files: List[Path] = sorted(Path(args.import_vtt).glob("*.vtt"))
+        for path in files:
+            video_id, _, language = path.stem.rpartition(".")
+            if not video_id:
+                video_id, language = language, "en"
+            cache.import_vtt(video_id, [language], path)
+        print(f"✓ Imported {len(files)} VTT files from {args.import_vtt}")
+
+    if args.evict_older_than is not None:
+        removed = cache.evict_older_than(args.evict_older_than)
+        print(f"✓ Removed {removed} entries")
+
+    if args.stats or not (args.import_vtt or args.evict_older_than is not None):
+        stats = cache.stats()
+        print(f"\n📦 Transcript cache: {args.cache_dir}")
+        print(f"   • Entries: {stats['entries']} ({stats['without_subtitles']} without subtitles)")
+        print(f"   • Blobs: {stats['blobs']} ({stats['size_mb']} MB of {stats['max_mb']} MB)")
+
+    cache.close()
+
+
+if __name__ == "__main__":
+    main()
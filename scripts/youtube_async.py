@@ -0,0 +1,499 @@
+# scripts/youtube_async.py
+"""
+Async YouTube Video + Transcript Extraction
+
+asyncio version of extract_transcript.py. All Data API calls go through a
+pooled aiohttp session, so playlist paging, metadata fetches and
+transcript downloads overlap instead of running one after another:
+- the next playlistItems page is prefetched while the current one is processed
+- videos.list / channels.list batches (50 IDs each) run concurrently
+- transcripts are downloaded in worker threads (yt-dlp is blocking)
+
+Every request passes through a QuotaLimiter that caps concurrency, the
+sustained request rate and the total quota units spent.
+
+Pass --base-url (or set YOUTUBE_API_BASE_URL) to point the client at a
+local stub server instead of googleapis.com.
+
+Usage:
+    python scripts/youtube_async.py --target-transcripts 200 --concurrency 8
+
+Output:
+    data/crashcourse_videos.csv    (videos with transcripts)
+    data/failed_transcripts.txt    (log of failures)
+"""
+
+import argparse
+import asyncio
+import functools
+import sys
+from contextlib import aclosing, asynccontextmanager
+from pathlib import Path
+from typing import AsyncIterator, Callable, Dict, List, Optional, Tuple
+
+import aiohttp
+import pandas as pd
+
+# Allow import of config from project root
+ROOT_DIR = Path(__file__).resolve().parents[1]
+sys.path.append(str(ROOT_DIR))
+
+from scripts.extract_transcript import (_channel_item_to_info, _count, _video_item_to_row,
+                                        apply_channel_info, display_summary, fetch_timed_transcript,
+                                        log_failures)
+from scripts.channel_cache import ChannelCache
+from scripts.dataset_io import write_dataset
+from scripts.passages import CUES_COLUMN
+from scripts.transcript_cache import add_cache_arguments, cache_from_args
+from scripts.profiling import add_profile_arguments, profile_session
+from config import (YOUTUBE_API_KEY, YOUTUBE_API_BASE_URL, CHANNEL_ID, YOUTUBE_QUOTA_UNITS,
+                    YOUTUBE_MAX_CONCURRENCY, YOUTUBE_REQUESTS_PER_SECOND, TRANSCRIPT_CONCURRENCY,
+                    CHANNEL_CACHE_TTL)
+
+# IDs per videos.list / channels.list call and items per playlistItems page (API maximum)
+API_BATCH_SIZE = 50
+
+# HTTP statuses worth retrying (rate limiting and transient server errors)
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+
+
+class QuotaExceededError(RuntimeError):
+    """Raised when the quota budget is spent or the API reports quotaExceeded."""
+
+
+# --------------------------------------------------------------------
+# Quota-aware limiter
+# --------------------------------------------------------------------
+class QuotaLimiter:
+    """
+    Limits Data API traffic on three axes.
+
+    Args:
+        max_concurrent: Requests in flight at once
+        requests_per_second: Sustained request rate (0 disables pacing)
+        quota_units: Total quota units this run may spend (None for no limit)
+    """
+
+    def __init__(self, max_concurrent: int = YOUTUBE_MAX_CONCURRENCY,
+                 requests_per_second: float = YOUTUBE_REQUESTS_PER_SECOND,
+                 quota_units: Optional[int] = YOUTUBE_QUOTA_UNITS):
+        self.interval = 1.0 / requests_per_second if requests_per_second else 0.0
+        self.quota_units = quota_units
+        self.units_used = 0
+        self._semaphore = asyncio.Semaphore(max_concurrent)
+        self._next_slot = 0.0
+        self._lock = asyncio.Lock()
+
+    @asynccontextmanager
+    async def acquire(self, cost: int = 1):
+        """Reserve `cost` quota units and a request slot for the enclosed call."""
+        if self.quota_units is not None and self.units_used + cost > self.quota_units:
+            raise QuotaExceededError(
+                f"Quota budget exhausted ({self.units_used}/{self.quota_units} units used)"
+            )
+        self.units_used += cost
+
+        async with self._semaphore:
+            if self.interval:
+                async with self._lock:
+                    now = asyncio.get_running_loop().time()
+                    wait = self._next_slot - now
+                    self._next_slot = max(now, self._next_slot) + self.interval
+                if wait > 0:
+                    await asyncio.sleep(wait)
+            yield
+
+
+# --------------------------------------------------------------------
+# Async YouTube client
+# --------------------------------------------------------------------
+class AsyncYouTubeClient:
+    """
+    Minimal async client for the YouTube Data API v3 list endpoints.
+
+    Use as an async context manager so the pooled session is closed:
+
+        async with AsyncYouTubeClient() as client:
+            playlist_id = await client.get_uploads_playlist_id(channel_id)
+
+    Args:
+        api_key: Data API key
+        base_url: API root (point at a stub server for testing)
+        limiter: Shared QuotaLimiter (a default one is created if omitted)
+        max_connections: Size of the HTTP connection pool
+        max_retries: Retries for 429/5xx responses and connection errors
+        timeout: Per-request timeout in seconds
+    """
+
+    def __init__(self, api_key: str = YOUTUBE_API_KEY, base_url: str = YOUTUBE_API_BASE_URL,
+                 limiter: Optional[QuotaLimiter] = None,
+                 max_connections: int = YOUTUBE_MAX_CONCURRENCY,
+                 max_retries: int = 3, timeout: float = 30.0):
+        if not api_key:
+            raise RuntimeError("YOUTUBE_API_KEY is not set.")
+        self.api_key = api_key
+        self.base_url = base_url.rstrip("/")
+        self.limiter = limiter or QuotaLimiter()
+        self.max_connections = max_connections
+        self.max_retries = max_retries
+        self.timeout = timeout
+        self._session: Optional[aiohttp.ClientSession] = None
+
+    async def __aenter__(self):
+        self._session = aiohttp.ClientSession(
+            connector=aiohttp.TCPConnector(limit=self.max_connections),
+            timeout=aiohttp.ClientTimeout(total=self.timeout),
+        )
+        return self
+
+    async def __aexit__(self, *exc):
+        await self._session.close()
+        self._session = None
+
+    async def _get(self, resource: str, cost: int = 1, **params) -> Dict:
+        """GET {base_url}/{resource} with retries; returns the decoded JSON body."""
+        if self._session is None:
+            raise RuntimeError("AsyncYouTubeClient must be used as an async context manager")
+
+        query = {key: value for key, value in params.items() if value is not None}
+        query["key"] = self.api_key
+        url = f"{self.base_url}/{resource}"
+
+        for attempt in range(self.max_retries + 1):
+            try:
+                async with self.limiter.acquire(cost):
+                    async with self._session.get(url, params=query) as resp:
+                        if resp.status == 200:
+                            return await resp.json(content_type=None)
+                        status, body = resp.status, await resp.text()
+            except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+                if attempt == self.max_retries:
+                    raise RuntimeError(f"YouTube API {resource} request failed: {e}") from e
+                await asyncio.sleep(0.5 * 2 ** attempt)
+                continue
+
+            if status == 403 and "quotaExceeded" in body:
+                raise QuotaExceededError(f"YouTube API quota exceeded ({resource})")
+            if status in RETRY_STATUSES and attempt < self.max_retries:
+                await asyncio.sleep(0.5 * 2 ** attempt)
+                continue
+            raise RuntimeError(f"YouTube API {resource} failed with HTTP {status}: {body[:200]}")
+
+    async def get_uploads_playlist_id(self, channel_id: str) -> str:
+        """Get the uploads playlist ID for a channel."""
+        resp = await self._get("channels", part="contentDetails", id=channel_id)
+
+        items = resp.get("items", [])
+        if not items:
+            raise RuntimeError(f"No channel found for id={channel_id}")
+        return items[0]["contentDetails"]["relatedPlaylists"]["uploads"]
+
+    async def iter_playlist_video_ids(self, playlist_id: str) -> AsyncIterator[List[str]]:
+        """
+        Yield the video IDs of a playlist one page at a time.
+
+        The request for the next page is issued as soon as the current page
+        arrives, so it downloads while the caller processes the current batch.
+        """
+        def request(page_token=None):
+            return asyncio.ensure_future(self._get(
+                "playlistItems",
+                part="contentDetails",
+                playlistId=playlist_id,
+                maxResults=API_BATCH_SIZE,
+                pageToken=page_token,
+            ))
+
+        next_page = request()
+        try:
+            while next_page is not None:
+                res = await next_page
+                token = res.get("nextPageToken")
+                next_page = request(token) if token else None
+
+                batch_ids = [item["contentDetails"]["videoId"] for item in res.get("items", [])]
+                if batch_ids:
+                    yield batch_ids
+        finally:
+            if next_page is not None:
+                next_page.cancel()
+
+    async def get_video_metadata(self, video_ids: List[str]) -> List[Dict]:
+        """Fetch metadata rows for video IDs, running the 50-ID batches concurrently."""
+        batches = [video_ids[i:i + API_BATCH_SIZE] for i in range(0, len(video_ids), API_BATCH_SIZE)]
+        responses = await asyncio.gather(*(
+            self._get("videos", part="snippet,contentDetails,statistics,status", id=",".join(batch))
+            for batch in batches
+        ))
+        return [_video_item_to_row(item) for res in responses for item in res.get("items", [])]
+
+    async def get_video_statistics(self, video_ids: List[str]) -> Dict[str, Dict]:
+        """
+        Fetch only viewCount / likeCount / commentCount, keyed by video ID.
+
+        Videos that are deleted or private are missing from the result.
+        """
+        batches = [video_ids[i:i + API_BATCH_SIZE] for i in range(0, len(video_ids), API_BATCH_SIZE)]
+        responses = await asyncio.gather(*(
+            self._get("videos", part="statistics", id=",".join(batch),
+                      fields="items(id,statistics(viewCount,likeCount,commentCount))")
+            for batch in batches
+        ))
+        return {
+            item["id"]: {key: _count(item.get("statistics", {}), key)
+                         for key in ("viewCount", "likeCount", "commentCount")}
+            for res in responses for item in res.get("items", [])
+        }
+
+    async def get_channel_info(self, channel_ids: List[str]) -> Dict[str, Dict]:
+        """Fetch the channel_* columns for channel IDs, keyed by channel ID."""
+        batches = [channel_ids[i:i + API_BATCH_SIZE] for i in range(0, len(channel_ids), API_BATCH_SIZE)]
+        responses = await asyncio.gather(*(
+            self._get("channels", part="snippet,statistics", id=",".join(batch))
+            for batch in batches
+        ))
+        return {ch["id"]: _channel_item_to_info(ch) for res in responses for ch in res.get("items", [])}
+
+
+# --------------------------------------------------------------------
+# Extraction
+# --------------------------------------------------------------------
+async def fetch_videos_with_transcripts_async(
+    client: AsyncYouTubeClient,
+    channel_id: str,
+    target_count: int,
+    transcript_concurrency: int = TRANSCRIPT_CONCURRENCY,
+    transcript_fetcher: Callable[[str], Tuple[Optional[str], Optional[str]]] = fetch_timed_transcript,
+):
+    """
+    Fetch videos until target_count have transcripts.
+
+    Transcript downloads for one page keep running while the metadata for
+    the next page is fetched. At most a few pages of videos are queued for
+    transcripts at a time, so the playlist is not read far ahead of need.
+
+    Args:
+        client: Open AsyncYouTubeClient
+        channel_id: YouTube channel ID
+        target_count: Number of videos with transcripts to collect
+        transcript_concurrency: Concurrent transcript downloads
+        transcript_fetcher: Blocking function video_id -> (transcript, encoded cues),
+                            (None, None) if unavailable
+
+    Returns:
+        tuple: (DataFrame of successful videos, list of failed videos)
+    """
+    print("=" * 70)
+    print("YOUTUBE VIDEO + TRANSCRIPT EXTRACTION (ASYNC)")
+    print("=" * 70)
+    print(f"\nTarget: {target_count} videos with transcripts\n")
+
+    uploads_playlist_id = await client.get_uploads_playlist_id(channel_id)
+    print(f"Uploads playlist ID: {uploads_playlist_id}")
+
+    transcript_slots = asyncio.Semaphore(transcript_concurrency)
+    max_pending = max(2 * API_BATCH_SIZE, transcript_concurrency)
+
+    async def with_transcript(position: int, video: Dict):
+        async with transcript_slots:
+            transcript, cues = await asyncio.to_thread(transcript_fetcher, video["id"])
+        return position, video, transcript, cues
+
+    successful = []  # (playlist position, video)
+    failed_videos = []
+    pending = set()
+    total_queued = 0
+
+    def collect(done):
+        for task in done:
+            position, video, transcript, cues = task.result()
+            title = (video.get("title") or "")[:50]
+            if transcript:
+                video["transcript"] = transcript
+                video[CUES_COLUMN] = cues
+                successful.append((position, video))
+                print(f"[{len(successful)}/{target_count}] {video['id']} - {title}... ✓ OK")
+            else:
+                failed_videos.append({"video_id": video["id"], "title": video.get("title", "")})
+                print(f"[{len(successful)}/{target_count}] {video['id']} - {title}... ✗ FAILED")
+
+    try:
+        async with aclosing(client.iter_playlist_video_ids(uploads_playlist_id)) as pages:
+            async for batch_ids in pages:
+                print(f"\nFetching metadata for {len(batch_ids)} videos...")
+                for video in await client.get_video_metadata(batch_ids):
+                    pending.add(asyncio.create_task(with_transcript(total_queued, video)))
+                    total_queued += 1
+
+                # Backpressure: only read further ahead once the queue drains
+                while pending and (len(pending) >= max_pending
+                                   or len(successful) + len(pending) >= target_count):
+                    done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                    collect(done)
+                    if len(successful) >= target_count:
+                        break
+                if len(successful) >= target_count:
+                    print(f"\n✓ Reached target of {target_count} videos with transcripts!")
+                    break
+            else:
+                print("\nNo more videos available in channel")
+
+        while pending and len(successful) < target_count:
+            done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+            collect(done)
+    finally:
+        for task in pending:
+            task.cancel()
+
+    # Keep the playlist order and drop any extra transcripts that finished late
+    successful.sort(key=lambda item: item[0])
+    successful_videos = [video for _, video in successful[:target_count]]
+
+    print(f"\n" + "=" * 70)
+    print(f"EXTRACTION COMPLETE")
+    print(f"=" * 70)
+    print(f"Total videos processed: {len(successful) + len(failed_videos)}")
+    print(f"Successful (with transcript): {len(successful_videos)}")
+    print(f"Failed (no transcript): {len(failed_videos)}")
+    print(f"Quota units used: {client.limiter.units_used}")
+
+    return pd.DataFrame(successful_videos), failed_videos
+
+
+async def enrich_channel_details_async(client: AsyncYouTubeClient, df: pd.DataFrame,
+                                      cache: Optional[ChannelCache] = None) -> pd.DataFrame:
+    """Add channel metadata to the dataframe (see extract_transcript.enrich_channel_details)."""
+    print("\nEnriching channel metadata...")
+
+    unique_channels = df["channel_id"].dropna().unique().tolist()
+    if len(unique_channels) == 0:
+        return df
+
+    channel_info, missing = cache.get_many(unique_channels) if cache else ({}, unique_channels)
+    if missing:
+        fetched = await client.get_channel_info(missing)
+        channel_info.update(fetched)
+        if cache:
+            cache.put_many(fetched)
+            cache.save()
+
+    df = apply_channel_info(df, channel_info)
+
+    print(f"Channel metadata enriched ({len(unique_channels) - len(missing)} cached, {len(missing)} fetched)")
+    return df
+
+
+async def extract(args) -> None:
+    limiter = QuotaLimiter(
+        max_concurrent=args.concurrency,
+        requests_per_second=args.requests_per_second,
+        quota_units=args.quota,
+    )
+    async with AsyncYouTubeClient(base_url=args.base_url, limiter=limiter,
+                                  max_connections=args.concurrency) as client:
+        df, failed = await fetch_videos_with_transcripts_async(
+            client,
+            args.channel_id,
+            args.target_transcripts,
+            args.transcript_concurrency,
+            functools.partial(fetch_timed_transcript, cache=cache_from_args(args),
+                              max_age=args.refresh_older_than),
+        )
+
+        if df.empty:
+            print("\nNo videos with transcripts extracted.")
+            return
+
+        cache = ChannelCache(ttl=args.channel_cache_ttl) if args.channel_cache_ttl > 0 else None
+        df = await enrich_channel_details_async(client, df, cache)
+
+    # Save dataset
+    output_path = write_dataset(df, args.output)
+    print(f"\n✓ Dataset saved to: {output_path}")
+
+    # Log failures
+    if failed:
+        log_failures(failed, Path(args.failed_log))
+
+    # Display summary
+    display_summary(df)
+
+    print("\n" + "=" * 70)
+    print("✅ EXTRACTION COMPLETE!")
+    print(f"   {len(df)} videos with transcripts saved to {args.output}")
+    print("=" * 70 + "\n")
+
+
+# --------------------------------------------------------------------
+# MAIN
+# --------------------------------------------------------------------
+def main():
+    parser = argparse.ArgumentParser(
+        description="Extract YouTube videos with transcripts using concurrent async requests"
+    )
+    parser.add_argument(
+        "--target-transcripts",
+        type=int,
+        default=50,
+        help="Number of videos with transcripts to collect (default: 50)"
+    )
+    parser.add_argument(
+        "--channel-id",
+        default=CHANNEL_ID,
+        help="YouTube channel ID"
+    )
+    parser.add_argument(
+        "--output",
+        default=str(ROOT_DIR / "data/crashcourse_videos.csv"),
+        help="Output path (.csv, .parquet or .arrow)"
+    )
+    parser.add_argument(
+        "--failed-log",
+        default=str(ROOT_DIR / "data/failed_transcripts.txt"),
+        help="Failed transcripts log path"
+    )
+    parser.add_argument(
+        "--concurrency",
+        type=int,
+        default=YOUTUBE_MAX_CONCURRENCY,
+        help=f"Concurrent Data API requests (default: {YOUTUBE_MAX_CONCURRENCY})"
+    )
+    parser.add_argument(
+        "--transcript-concurrency",
+        type=int,
+        default=TRANSCRIPT_CONCURRENCY,
+        help=f"Concurrent transcript downloads (default: {TRANSCRIPT_CONCURRENCY})"
+    )
+    parser.add_argument(
+        "--requests-per-second",
+        type=float,
+        default=YOUTUBE_REQUESTS_PER_SECOND,
+        help=f"Sustained Data API request rate, 0 for unlimited (default: {YOUTUBE_REQUESTS_PER_SECOND})"
+    )
+    parser.add_argument(
+        "--quota",
+        type=int,
+        default=YOUTUBE_QUOTA_UNITS,
+        help=f"Quota units this run may spend (default: {YOUTUBE_QUOTA_UNITS})"
+    )
+    parser.add_argument(
+        "--base-url",
+        default=YOUTUBE_API_BASE_URL,
+        help="Data API root URL, e.g. a local stub server (default: %(default)s)"
+    )
+    parser.add_argument(
+        "--channel-cache-ttl",
+        type=float,
+        default=CHANNEL_CACHE_TTL,
+        help=f"Seconds cached channel metadata stays fresh, 0 disables the cache (default: {CHANNEL_CACHE_TTL})"
+    )
+    add_cache_arguments(parser)
+    add_profile_arguments(parser)
+    args = parser.parse_args()
+
+    with profile_session(args, "youtube_async"):
+        asyncio.run(extract(args))
+
+
+if __name__ == "__main__":
+    main()
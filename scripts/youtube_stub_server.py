@@ -0,0 +1,198 @@
+"""
+Local Stub of the YouTube Data API for Offline Testing
+
+Serves the three list endpoints the fetchers use (channels, playlistItems,
+videos) from an in-memory channel of synthetic videos, so youtube_async.py
+can be exercised without network access or quota:
+- playlistItems pages of up to 50 items with nextPageToken
+- videos.list / channels.list for up to 50 comma-separated IDs
+- optional per-request delay, scripted error statuses (for retries) and a
+  quotaExceeded mode
+
+Every request is recorded (resource, parameters, start and end time) and
+the highest number of requests in flight is tracked, so tests can check
+batching, prefetching and concurrency limits.
+
+Usage:
+    python scripts/youtube_stub_server.py --videos 500 --port 8765
+    python scripts/youtube_async.py --base-url http://127.0.0.1:8765 \
+        --channel-id UCstubchannel000000000000 --target-transcripts 20
+    python -m pytest scripts/test_youtube_async.py
+"""
+
+import argparse
+import asyncio
+from pathlib import Path
+import sys
+import time
+from typing import Dict, List, Optional
+
+from aiohttp import web
+
+# Add project root to path
+ROOT_DIR = Path(__file__).resolve().parents[1]
+sys.path.append(str(ROOT_DIR))
+
+# Largest page / ID batch the real API accepts
+MAX_RESULTS = 50
+
+STUB_CHANNEL_ID = "UCstubchannel000000000000"
+STUB_PLAYLIST_ID = "UUstubchannel000000000000"
+
+
+def stub_video_item(video_id: str, index: int) -> Dict:
+    """A videos.list item shaped like the real API's."""
+    return {
+        "id": video_id,
+        "snippet": {
+            "title": f"Stub video {index}",
+            "description": f"Description of stub video {index}",
+            "publishedAt": "2024-01-01T00:00:00Z",
+            "tags": ["stub", f"topic{index % 5}"],
+            "categoryId": "27",
+            "channelId": STUB_CHANNEL_ID,
+            "channelTitle": "Stub Channel",
+            "thumbnails": {"default": {"url": f"https://i.ytimg.com/vi/{video_id}/default.jpg"},
+                           "high": {"url": f"https://i.ytimg.com/vi/{video_id}/hqdefault.jpg"}},
+        },
+        "contentDetails": {"duration": f"PT{5 + index % 10}M{index % 60}S"},
+        "statistics": {"viewCount": str(1000 + index), "likeCount": str(index), "commentCount": "3"},
+        "status": {"privacyStatus": "public"},
+    }
+
+
+class StubYouTubeServer:
+    """
+    In-memory Data API stub on 127.0.0.1.
+
+    Use as an async context manager (or call start()/close()):
+
+        async with StubYouTubeServer(n_videos=120) as server:
+            client = AsyncYouTubeClient(api_key="test", base_url=server.url)
+
+    Args:
+        n_videos: Videos in the channel's uploads playlist
+        delay: Seconds each response is delayed
+        port: Port to listen on (0 picks a free one)
+    """
+
+    def __init__(self, n_videos: int = 120, delay: float = 0.0, port: int = 0):
+        self.video_ids = [f"vid{i:08d}" for i in range(n_videos)]
+        self._index = {video_id: i for i, video_id in enumerate(self.video_ids)}
+        self.delay = delay
+        self.port = port
+        self.requests: List[Dict] = []
+        self.fail_next: Dict[str, List[int]] = {}  # resource -> statuses returned before succeeding
+        self.quota_exceeded = False
+        self.in_flight = 0
+        self.max_in_flight = 0
+        self._runner: Optional[web.AppRunner] = None
+
+    @property
+    def url(self) -> str:
+        return f"http://127.0.0.1:{self.port}"
+
+    def calls(self, resource: str) -> List[Dict]:
+        """Recorded requests to one resource, in arrival order."""
+        return [request for request in self.requests if request["resource"] == resource]
+
+    async def start(self) -> "StubYouTubeServer":
+        app = web.Application()
+        app.router.add_get("/{resource}", self._handle)
+        self._runner = web.AppRunner(app)
+        await self._runner.setup()
+        site = web.TCPSite(self._runner, "127.0.0.1", self.port)
+        await site.start()
+        self.port = self._runner.addresses[0][1]
+        return self
+
+    async def close(self) -> None:
+        if self._runner is not None:
+            await self._runner.cleanup()
+            self._runner = None
+
+    async def __aenter__(self) -> "StubYouTubeServer":
+        return await self.start()
+
+    async def __aexit__(self, *exc) -> None:
+        await self.close()
+
+    async def _handle(self, request: web.Request) -> web.Response:
+        resource = request.match_info["resource"]
+        record = {"resource": resource, "params": dict(request.query), "start": time.perf_counter()}
+        self.requests.append(record)
+        self.in_flight += 1
+        self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        try:
+            if self.delay:
+                await asyncio.sleep(self.delay)
+            if self.quota_exceeded:
+                return web.json_response({"error": {"errors": [{"reason": "quotaExceeded"}]}}, status=403)
+            statuses = self.fail_next.get(resource)
+            if statuses:
+                return web.json_response({"error": {"code": statuses[0]}}, status=statuses.pop(0))
+            handler = {"channels": self._channels, "playlistItems": self._playlist_items,
+                       "videos": self._videos}.get(resource)
+            if handler is None:
+                return web.json_response({"error": {"code": 404}}, status=404)
+            return web.json_response(handler(request.query))
+        finally:
+            self.in_flight -= 1
+            record["end"] = time.perf_counter()
+
+    def _ids(self, query) -> List[str]:
+        ids = [video_id for video_id in query.get("id", "").split(",") if video_id]
+        if len(ids) > MAX_RESULTS:
+            raise web.HTTPBadRequest(text=f"At most {MAX_RESULTS} IDs per request")
+        return ids
+
+    def _channels(self, query) -> Dict:
+        if STUB_CHANNEL_ID not in self._ids(query):
+            return {"items": []}
+        return {"items": [{
+            "id": STUB_CHANNEL_ID,
+            "contentDetails": {"relatedPlaylists": {"uploads": STUB_PLAYLIST_ID}},
+            "snippet": {"description": "A stub channel", "country": "US",
+                        "thumbnails": {"high": {"url": "https://yt3.ggpht.com/stub"}}},
+            "statistics": {"subscriberCount": "1000", "videoCount": str(len(self.video_ids))},
+        }]}
+
+    def _playlist_items(self, query) -> Dict:
+        if query.get("playlistId") != STUB_PLAYLIST_ID:
+            return {"items": []}
+        page_size = min(int(query.get("maxResults", 5)), MAX_RESULTS)
+        start = int(query.get("pageToken") or 0)
+        page = self.video_ids[start:start + page_size]
+        body = {"items": [{"contentDetails": {"videoId": video_id}} for video_id in page]}
+        if start + page_size < len(self.video_ids):
+            body["nextPageToken"] = str(start + page_size)
+        return body
+
+    def _videos(self, query) -> Dict:
+        return {"items": [stub_video_item(video_id, self._index[video_id])
+                          for video_id in self._ids(query) if video_id in self._index]}
+
+
+async def _serve(args) -> None:
+    async with StubYouTubeServer(args.videos, args.delay, args.port) as server:
+        print(f"✅ Stub YouTube Data API at {server.url} ({args.videos} videos, "
+              f"channel {STUB_CHANNEL_ID})")
+        print(f"   Try: python scripts/youtube_async.py --base-url {server.url} "
+              f"--channel-id {STUB_CHANNEL_ID} --target-transcripts 10")
+        await asyncio.Event().wait()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Serve a local stub of the YouTube Data API list endpoints")
+    parser.add_argument('--videos', type=int, default=500, help='Videos in the stub channel (default: 500)')
+    parser.add_argument('--delay', type=float, default=0.0, help='Seconds each response is delayed (default: 0)')
+    parser.add_argument('--port', type=int, default=8765, help='Port to listen on (default: 8765)')
+    args = parser.parse_args()
+    try:
+        asyncio.run(_serve(args))
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()